@@ -82,6 +82,9 @@ PERFORMANCE_SETTINGS = {
     "culling_enabled": os.getenv("ANVIL_CULLING", "true").lower() == "true",
     "max_concurrent_simulations": int(os.getenv("ANVIL_MAX_SIMS", "4")),
     "memory_limit_gb": int(os.getenv("ANVIL_MEMORY_LIMIT", "16")),
+    "worker_processes": int(os.getenv("ANVIL_WORKER_PROCESSES", "0")),  # 0 = CPU count
+    "telemetry_history_seconds": float(os.getenv("ANVIL_TELEMETRY_HISTORY_SECONDS", "60")),  # per session
+    "telemetry_recording": os.getenv("ANVIL_TELEMETRY_RECORDING", "true").lower() == "true",
 }
 
 # Validation Settings
@@ -96,13 +99,17 @@ VALIDATION_SETTINGS = {
         "enabled": True,
         "check_self_collision": True,
         "check_environment_collision": True,
-        "tolerance_mm": 1.0
+        "tolerance_mm": 1.0,
+        "recommended_clearance_mm": 10.0,
+        "max_distance_mm": 50.0,  # clearances are resolved up to this distance
+        "sample_count": int(os.getenv("ANVIL_COLLISION_SAMPLES", "10000"))
     },
     "stress_validation": {
         "enabled": True,
         "max_force_threshold": 1000.0,  # N
         "max_torque_threshold": 100.0,  # Nm  
-        "safety_factor": 2.0
+        "safety_factor": 2.0,
+        "sample_count": int(os.getenv("ANVIL_STRESS_SAMPLES", "100000"))
     },
     "performance_validation": {
         "enabled": True,
@@ -117,6 +124,10 @@ ASSET_PATHS = {
     "mesh_cache": os.getenv("ANVIL_MESH_CACHE", "/tmp/anvil/meshes"),
     "scene_cache": os.getenv("ANVIL_SCENE_CACHE", "/tmp/anvil/scenes"),
     "texture_cache": os.getenv("ANVIL_TEXTURE_CACHE", "/tmp/anvil/textures"),
+    "bundle_cache": os.getenv("ANVIL_BUNDLE_CACHE", "/tmp/anvil/bundles"),
+    "blob_store": os.getenv("ANVIL_BLOB_STORE", "/tmp/anvil/blobs"),
+    "reachability_cache": os.getenv("ANVIL_REACHABILITY_CACHE", "/tmp/anvil/reachability"),
+    "telemetry_store": os.getenv("ANVIL_TELEMETRY_STORE", "/tmp/anvil/telemetry"),
     "environments": os.getenv("ANVIL_ENVIRONMENTS", "/assets/environments"),
     "materials": os.getenv("ANVIL_MATERIALS", "/assets/materials")
 }
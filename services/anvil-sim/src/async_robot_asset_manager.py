@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Async Robot Asset Manager for Isaac Sim
+Non-blocking variant of RobotAssetManager for use inside the asyncio service.
+"""
+
+import asyncio
+import functools
+import logging
+import random
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Callable, Sequence
+
+import httpx
+
+from robot_asset_manager import RobotAssetManager
+
+logger = logging.getLogger(__name__)
+
+# POST /load-robot is not idempotent: only retry when the host cannot have
+# acted on the command, i.e. statuses that reject a request unprocessed
+RETRYABLE_STATUS_CODES = {408, 425, 429, 503}
+
+# Failures before the request reached the host; a read timeout or dropped
+# connection after sending may follow a load that did happen
+RETRYABLE_TRANSPORT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class RetryableLoadError(RuntimeError):
+    """Raised for Isaac Sim API responses that may succeed when retried."""
+
+
+class AsyncRobotAssetManager:
+    """
+    Async robot asset manager.
+
+    File operations run on a bounded thread pool so they never block the event
+    loop, and load commands share one pooled keep-alive HTTP client with
+    bounded concurrency and jittered exponential backoff.
+    """
+
+    def __init__(self, aws_public_ip: str, asset_base_path: str = "/assets",
+                 max_concurrency: int = 8, max_connections: int = 32,
+                 max_keepalive_connections: int = 16, request_timeout: float = 30.0,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 file_workers: int = 4):
+        """
+        Initialize the async robot asset manager.
+
+        Args:
+            aws_public_ip: Public IP of the default AWS Isaac Sim instance
+            asset_base_path: Base path for storing assets on AWS
+            max_concurrency: Maximum number of in-flight load commands
+            max_connections: Maximum pooled HTTP connections across all hosts
+            max_keepalive_connections: Maximum idle keep-alive connections
+            request_timeout: Timeout of a single load command in seconds
+            max_retries: Retries of a failed load command
+            backoff_base: Base delay of the exponential backoff in seconds
+            backoff_max: Upper bound of a single backoff delay in seconds
+            file_workers: Threads used for file operations
+        """
+        self.aws_public_ip = aws_public_ip
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=30.0
+        )
+        self._timeout = httpx.Timeout(request_timeout)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=file_workers, thread_name_prefix="robot-assets")
+
+        self._manager = RobotAssetManager(aws_public_ip, asset_base_path)
+
+    async def __aenter__(self) -> "AsyncRobotAssetManager":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared pooled HTTP client, created on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(limits=self._limits, timeout=self._timeout)
+        return self._client
+
+    async def _run_in_executor(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking file operation on the manager's thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def upload_robot_assets(self, robot_config: Dict[str, Any]) -> Dict[str, Any]:
+        """Upload robot assets without blocking the event loop."""
+        return await self._run_in_executor(self._manager.upload_robot_assets, robot_config)
+
+    async def convert_robot_for_isaac_sim(self, robot_config: Dict[str, Any]) -> str:
+        """Convert robot assets to Isaac Sim format without blocking the event loop."""
+        return await self._run_in_executor(self._manager.convert_robot_for_isaac_sim, robot_config)
+
+    async def get_robot_list(self, **filters) -> List[Dict[str, Any]]:
+        """Query the robot catalog without blocking the event loop."""
+        return await self._run_in_executor(self._manager.get_robot_list, **filters)
+
+    async def cleanup_robot_assets(self, robot_name: str) -> bool:
+        """Clean up robot assets without blocking the event loop."""
+        return await self._run_in_executor(self._manager.cleanup_robot_assets, robot_name)
+
+    async def get_asset_info(self, asset_path: str) -> Dict[str, Any]:
+        """Get asset information without blocking the event loop."""
+        return await self._run_in_executor(self._manager.get_asset_info, asset_path)
+
+    async def load_robot_in_isaac_sim(self, robot_config: Dict[str, Any],
+                                      host: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Load robot into an Isaac Sim instance.
+
+        Args:
+            robot_config: Robot configuration
+            host: Isaac Sim host, defaults to the manager's AWS instance
+
+        Returns:
+            Loading result information
+        """
+        results = await self.load_robots([robot_config], hosts=[host or self.aws_public_ip])
+        return results[0]
+
+    async def load_robots(self, robot_configs: Sequence[Dict[str, Any]],
+                          hosts: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Load several robots onto several Isaac Sim hosts concurrently.
+
+        Each robot is converted once; the load commands for every
+        (robot, host) pair are then sent concurrently over the shared pool.
+
+        Args:
+            robot_configs: Robot configurations
+            hosts: Isaac Sim hosts, defaults to the manager's AWS instance
+
+        Returns:
+            One loading result per (robot, host) pair, robot-major
+        """
+        hosts = list(hosts or [self.aws_public_ip])
+
+        conversions = await asyncio.gather(
+            *(self.convert_robot_for_isaac_sim(config) for config in robot_configs),
+            return_exceptions=True
+        )
+
+        tasks = []
+        for robot_config, usd_path in zip(robot_configs, conversions):
+            for host in hosts:
+                tasks.append(self._load_on_host(robot_config, usd_path, host))
+
+        return await asyncio.gather(*tasks)
+
+    async def _load_on_host(self, robot_config: Dict[str, Any], usd_path: Any, host: str) -> Dict[str, Any]:
+        """Send one load command and shape the result like the sync manager."""
+        robot_name = robot_config.get('name', 'robot')
+
+        try:
+            if isinstance(usd_path, BaseException):
+                raise usd_path
+
+            load_result = await self._send_load_command_to_isaac_sim(host, usd_path, robot_config)
+
+            return {
+                "success": True,
+                "host": host,
+                "usd_path": usd_path,
+                "robot_name": robot_name,
+                "load_result": load_result,
+                "timestamp": datetime.utcnow().isoformat()
+            }
+
+        except Exception as e:
+            logger.error(f"Failed to load robot {robot_name} on {host}: {e}")
+            return {
+                "success": False,
+                "host": host,
+                "robot_name": robot_name,
+                "error": str(e),
+                "timestamp": datetime.utcnow().isoformat()
+            }
+
+    async def _send_load_command_to_isaac_sim(self, host: str, usd_path: str,
+                                              robot_config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send robot load command to an Isaac Sim instance with retries.
+
+        Loading is not idempotent, so only failures that guarantee the host
+        did not act on the command are retried. Every attempt carries the
+        same ``Idempotency-Key`` header for hosts able to deduplicate.
+
+        Args:
+            host: Isaac Sim host
+            usd_path: Path to USD file
+            robot_config: Robot configuration
+
+        Returns:
+            Load command result
+        """
+        api_url = f"http://{host}:8000/load-robot"
+        load_command = {
+            "action": "load_robot",
+            "usd_path": usd_path,
+            "robot_config": robot_config,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        headers = {"Idempotency-Key": str(uuid.uuid4())}
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    response = await self.client.post(api_url, json=load_command, headers=headers)
+
+                if response.status_code == 200:
+                    result = response.json()
+                    logger.info(f"Robot load command successful on {host}: {result}")
+                    return result
+
+                message = f"Isaac Sim API error: {response.status_code} - {response.text}"
+                if response.status_code in RETRYABLE_STATUS_CODES:
+                    raise RetryableLoadError(message)
+                raise RuntimeError(message)
+
+            except (*RETRYABLE_TRANSPORT_ERRORS, RetryableLoadError) as e:
+                if attempt >= self.max_retries:
+                    logger.error(f"Failed to send load command to {host} after {attempt + 1} attempts: {e}")
+                    raise
+
+                # Full jitter keeps many retrying clients from stampeding a host
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+                logger.warning(f"Load command to {host} failed ({e}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def close(self):
+        """Close the HTTP connection pool and file workers."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._executor.shutdown(wait=False)
+
+
+def create_async_asset_manager(aws_public_ip: str, **kwargs) -> AsyncRobotAssetManager:
+    """
+    Factory function to create an async robot asset manager.
+
+    Args:
+        aws_public_ip: Public IP of AWS Isaac Sim instance
+
+    Returns:
+        AsyncRobotAssetManager instance
+    """
+    return AsyncRobotAssetManager(aws_public_ip, **kwargs)
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Batch URDF to USD Conversion
+Converts and validates a directory or manifest of URDFs across a process pool,
+writing a machine-readable report and resuming interrupted runs.
+
+Usage:
+    python batch_convert.py robots/ --output converted/ --workers 8
+    python batch_convert.py manifest.jsonl --output converted/ --report report.json
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Iterable
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_NAME = ".batch_journal.jsonl"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Converter of the current worker process, created once by the pool initializer
+_worker_converter = None
+
+
+@dataclass
+class ConversionJob:
+    """One URDF to convert."""
+    urdf_path: str
+    name: str
+    output_path: str
+    config: Dict[str, Any] = field(default_factory=dict)
+
+
+def load_jobs(source: str, output_dir: str, default_config: Optional[Dict[str, Any]] = None) -> List[ConversionJob]:
+    """
+    Build conversion jobs from a directory or manifest.
+
+    A directory is searched recursively for ``*.urdf`` files. A manifest is
+    either a JSON list, JSON lines, or a plain list of paths; JSON entries may
+    give ``urdf``, ``name``, ``output`` and ``config``. Relative paths in a
+    manifest are resolved against the manifest's directory.
+
+    Args:
+        source: Directory of URDFs or manifest file
+        output_dir: Directory receiving the USD files
+        default_config: Conversion options applied to every job
+
+    Returns:
+        Conversion jobs in a stable order
+    """
+    source_path = Path(source)
+    default_config = default_config or {}
+
+    if source_path.is_dir():
+        entries = [{"urdf": str(p)} for p in sorted(source_path.rglob("*.urdf"))]
+        base_dir = source_path
+    elif source_path.is_file():
+        entries = list(_read_manifest(source_path))
+        base_dir = source_path.parent
+    else:
+        raise FileNotFoundError(f"Batch source not found: {source}")
+
+    jobs = []
+    used_names = set()
+    for entry in entries:
+        urdf_path = Path(entry["urdf"])
+        if not urdf_path.is_absolute():
+            urdf_path = base_dir / urdf_path if not urdf_path.exists() else urdf_path
+
+        name = entry.get("name") or urdf_path.stem
+        unique_name, suffix = name, 1
+        while unique_name in used_names:
+            unique_name, suffix = f"{name}_{suffix}", suffix + 1
+        used_names.add(unique_name)
+
+        output_path = entry.get("output") or os.path.join(output_dir, f"{unique_name}.usd")
+        config = dict(default_config)
+        config.update(entry.get("config") or {})
+
+        jobs.append(ConversionJob(
+            urdf_path=str(urdf_path.resolve()),
+            name=unique_name,
+            output_path=os.path.abspath(output_path),
+            config=config
+        ))
+
+    return jobs
+
+
+def _read_manifest(path: Path) -> Iterable[Dict[str, Any]]:
+    """Yield manifest entries as dicts with at least a ``urdf`` key."""
+    with open(path, "r") as f:
+        text = f.read()
+
+    stripped = text.lstrip()
+    if stripped.startswith("["):
+        for entry in json.loads(text):
+            yield entry if isinstance(entry, dict) else {"urdf": entry}
+        return
+
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            yield json.loads(line)
+        else:
+            yield {"urdf": line}
+
+
+def file_sha256(path: str) -> str:
+    """Content hash of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_journal(journal_path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Read the latest journal record per URDF.
+
+    A torn last line from an interrupted run is ignored.
+    """
+    records: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(journal_path):
+        return records
+
+    with open(journal_path, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            records[record["urdf_path"]] = record
+    return records
+
+
+def _is_up_to_date(job: ConversionJob, record: Optional[Dict[str, Any]], urdf_hash: str) -> bool:
+    """Whether a journal record shows the job already converted from the same URDF."""
+    return (
+        record is not None
+        and record.get("status") == "ok"
+        and record.get("urdf_sha256") == urdf_hash
+        and record.get("output_path") == job.output_path
+        and record.get("config") == job.config
+        and os.path.exists(job.output_path)
+    )
+
+
+def _init_worker(isaac_sim_available: bool, log_level: int):
+    """Create the worker's converter once instead of once per job."""
+    global _worker_converter
+    logging.basicConfig(level=log_level)
+    from urdf_to_usd_converter import create_converter
+    _worker_converter = create_converter(isaac_sim_available=isaac_sim_available)
+
+
+def convert_job(job: ConversionJob, urdf_hash: str) -> Dict[str, Any]:
+    """
+    Convert and validate one URDF in a worker process.
+
+    Returns:
+        Journal record with status, timings and any error
+    """
+    started = time.perf_counter()
+    record = {
+        "urdf_path": job.urdf_path,
+        "name": job.name,
+        "output_path": job.output_path,
+        "config": job.config,
+        "urdf_sha256": urdf_hash,
+        "worker_pid": os.getpid(),
+    }
+
+    try:
+        converter = _worker_converter
+        if converter is None:
+            from urdf_to_usd_converter import create_converter
+            converter = create_converter(isaac_sim_available=False)
+
+        converter.convert(job.urdf_path, job.output_path, job.name, job.config)
+        converted = time.perf_counter()
+
+        if not converter.validate_usd(job.output_path):
+            raise RuntimeError("USD file validation failed")
+        validated = time.perf_counter()
+
+        record.update({
+            "status": "ok",
+            "convert_seconds": round(converted - started, 6),
+            "validate_seconds": round(validated - converted, 6),
+            "usd_bytes": os.path.getsize(job.output_path),
+        })
+
+    except Exception as e:
+        record.update({
+            "status": "failed",
+            "error": f"{type(e).__name__}: {e}",
+        })
+        report = getattr(e, "report", None)
+        if report is not None:
+            # Preflight rejections list every problem, not just the first
+            record["preflight_errors"] = [issue.message for issue in report.errors]
+
+    record["total_seconds"] = round(time.perf_counter() - started, 6)
+    record["finished_at"] = datetime.utcnow().isoformat()
+    return record
+
+
+def run_batch(jobs: List[ConversionJob], journal_path: str, workers: Optional[int] = None,
+              isaac_sim_available: bool = False, resume: bool = True) -> Dict[str, Any]:
+    """
+    Convert jobs across a process pool, journaling each result as it completes.
+
+    Args:
+        jobs: Conversion jobs
+        journal_path: JSON-lines journal used to resume interrupted runs
+        workers: Worker processes, defaults to the CPU count
+        isaac_sim_available: Convert with Isaac Sim instead of the pure-Python writer
+        resume: Skip jobs the journal shows as already converted
+
+    Returns:
+        Batch report
+    """
+    started = time.perf_counter()
+    previous = read_journal(journal_path) if resume else {}
+    if not resume and os.path.exists(journal_path):
+        os.remove(journal_path)
+
+    results: List[Dict[str, Any]] = []
+    pending = []
+    for job in jobs:
+        try:
+            urdf_hash = file_sha256(job.urdf_path)
+        except OSError as e:
+            results.append({
+                "urdf_path": job.urdf_path, "name": job.name, "output_path": job.output_path,
+                "status": "failed", "error": f"{type(e).__name__}: {e}", "total_seconds": 0.0,
+            })
+            continue
+
+        record = previous.get(job.urdf_path)
+        if _is_up_to_date(job, record, urdf_hash):
+            results.append(dict(record, status="skipped"))
+        else:
+            pending.append((job, urdf_hash))
+
+    logger.info(f"Batch conversion: {len(pending)} to convert, "
+                f"{sum(r['status'] == 'skipped' for r in results)} already up to date")
+
+    os.makedirs(os.path.dirname(os.path.abspath(journal_path)), exist_ok=True)
+    interrupted = False
+
+    if pending:
+        workers = workers or os.cpu_count() or 1
+        with open(journal_path, "a") as journal, ProcessPoolExecutor(
+            max_workers=min(workers, len(pending)),
+            initializer=_init_worker,
+            initargs=(isaac_sim_available, logging.getLogger().level or logging.WARNING)
+        ) as pool:
+            futures = {pool.submit(convert_job, job, urdf_hash): job for job, urdf_hash in pending}
+            try:
+                for done, future in enumerate(as_completed(futures), 1):
+                    job = futures[future]
+                    try:
+                        record = future.result()
+                    except Exception as e:
+                        # Worker process died
+                        record = {
+                            "urdf_path": job.urdf_path, "name": job.name, "output_path": job.output_path,
+                            "status": "failed", "error": f"{type(e).__name__}: {e}", "total_seconds": 0.0,
+                        }
+
+                    journal.write(json.dumps(record) + "\n")
+                    journal.flush()
+                    results.append(record)
+
+                    if record["status"] == "ok":
+                        logger.info(f"[{done}/{len(pending)}] {job.name} converted in {record['total_seconds']:.3f}s")
+                    else:
+                        logger.error(f"[{done}/{len(pending)}] {job.name} failed: {record['error']}")
+
+            except KeyboardInterrupt:
+                interrupted = True
+                logger.warning("Batch interrupted; completed conversions are journaled and will be skipped on resume")
+                for future in futures:
+                    future.cancel()
+
+    return build_report(results, time.perf_counter() - started, interrupted, len(jobs))
+
+
+def build_report(results: List[Dict[str, Any]], wall_seconds: float,
+                 interrupted: bool, total_jobs: int) -> Dict[str, Any]:
+    """Summarize batch results."""
+    converted = [r for r in results if r["status"] == "ok"]
+    failed = [r for r in results if r["status"] == "failed"]
+    skipped = [r for r in results if r["status"] == "skipped"]
+    convert_seconds = sum(r.get("total_seconds", 0.0) for r in converted)
+
+    return {
+        "generated_at": datetime.utcnow().isoformat(),
+        "interrupted": interrupted,
+        "summary": {
+            "total": total_jobs,
+            "converted": len(converted),
+            "skipped": len(skipped),
+            "failed": len(failed),
+            "not_run": total_jobs - len(results),
+            "wall_seconds": round(wall_seconds, 3),
+            "conversion_seconds": round(convert_seconds, 3),
+            "robots_per_second": round(len(converted) / wall_seconds, 3) if wall_seconds > 0 else None,
+            "slowest": sorted(
+                ({"name": r["name"], "total_seconds": r["total_seconds"]} for r in converted),
+                key=lambda r: r["total_seconds"], reverse=True
+            )[:10],
+        },
+        "failures": [
+            {"name": r["name"], "urdf_path": r["urdf_path"], "error": r["error"],
+             **({"preflight_errors": r["preflight_errors"]} if "preflight_errors" in r else {})}
+            for r in failed
+        ],
+        "results": sorted(results, key=lambda r: r["name"]),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Convert a directory or manifest of URDFs to USD in parallel")
+    parser.add_argument("source", help="Directory searched for *.urdf files, or a manifest (JSON, JSON lines or paths)")
+    parser.add_argument("-o", "--output", default="converted", help="Directory for USD files (default: converted)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--report", default=None, help="Report path (default: <output>/batch_report.json)")
+    parser.add_argument("--journal", default=None, help=f"Journal path (default: <output>/{JOURNAL_NAME})")
+    parser.add_argument("--config", default=None, help="JSON file of conversion options applied to every robot")
+    parser.add_argument("--no-resume", action="store_true", help="Reconvert everything, ignoring the journal")
+    parser.add_argument("--isaac-sim", action="store_true", help="Convert with Isaac Sim instead of the pure-Python writer")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log every conversion")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s %(levelname)s %(message)s")
+    logger.setLevel(logging.INFO)
+
+    default_config = {}
+    if args.config:
+        with open(args.config, "r") as f:
+            default_config = json.load(f)
+
+    jobs = load_jobs(args.source, args.output, default_config)
+    if not jobs:
+        logger.error(f"No URDF files found in {args.source}")
+        return 2
+
+    journal_path = args.journal or os.path.join(args.output, JOURNAL_NAME)
+    report = run_batch(jobs, journal_path, args.workers, args.isaac_sim, resume=not args.no_resume)
+
+    report_path = args.report or os.path.join(args.output, "batch_report.json")
+    os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    summary = report["summary"]
+    print(f"Converted {summary['converted']}, skipped {summary['skipped']}, failed {summary['failed']} "
+          f"of {summary['total']} in {summary['wall_seconds']}s - report: {report_path}")
+
+    if report["interrupted"]:
+        return 130
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
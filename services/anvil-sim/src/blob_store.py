@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Blob Store - Content-addressed, reference-counted storage for large payloads
+URDF text and other session payloads are stored once per distinct content and
+shared by every session that references them.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class BlobStore:
+    """
+    Stores blobs under ``<root>/<digest[:2]>/<digest>``.
+
+    Every ``put`` or ``acquire`` adds a reference and every ``release`` drops
+    one; a blob is deleted when its last reference is released. Recently read
+    blobs are kept in a small in-memory cache bounded by ``cache_bytes``.
+    """
+
+    def __init__(self, root: str, cache_bytes: int = 64 * 1024 * 1024):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.cache_bytes = cache_bytes
+
+        self._refs: Dict[str, int] = {}
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+
+        # References live in memory, so blobs left by a previous process are orphans
+        removed = self.collect_garbage()
+        if removed:
+            logger.info("Removed unreferenced blobs", count=removed, root=str(self.root))
+
+    def put(self, data: Union[str, bytes]) -> str:
+        """
+        Store a payload and take a reference to it.
+
+        Args:
+            data: Payload; text is stored as UTF-8
+
+        Returns:
+            SHA-256 digest identifying the blob
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+
+        with self._lock:
+            path = self.path(digest)
+            if not path.exists():
+                self._write(path, data)
+            self._refs[digest] = self._refs.get(digest, 0) + 1
+            self._cache_put(digest, data)
+        return digest
+
+    def put_file(self, source_path: str) -> str:
+        """
+        Store a file's content and take a reference to it.
+
+        The file is hashed in chunks and hard-linked into the store when
+        possible, so large files are never read into memory.
+
+        Returns:
+            SHA-256 digest identifying the blob
+        """
+        digest = hashlib.sha256()
+        with open(source_path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        digest = digest.hexdigest()
+
+        with self._lock:
+            path = self.path(digest)
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_name(f".{digest}.{os.getpid()}.{threading.get_ident()}.tmp")
+                try:
+                    os.link(source_path, tmp_path)
+                except OSError:
+                    with open(source_path, "rb") as src, open(tmp_path, "wb") as dst:
+                        for chunk in iter(lambda: src.read(HASH_CHUNK_SIZE), b""):
+                            dst.write(chunk)
+                os.replace(tmp_path, path)
+            self._refs[digest] = self._refs.get(digest, 0) + 1
+        return digest
+
+    def acquire(self, digest: str) -> bool:
+        """
+        Take another reference to an existing blob.
+
+        Returns:
+            False if the blob does not exist
+        """
+        with self._lock:
+            if not self.path(digest).exists():
+                return False
+            self._refs[digest] = self._refs.get(digest, 0) + 1
+            return True
+
+    def release(self, digest: Optional[str]) -> int:
+        """
+        Drop a reference, deleting the blob when none remain.
+
+        Returns:
+            Remaining reference count
+        """
+        if not digest:
+            return 0
+        with self._lock:
+            count = self._refs.get(digest, 0) - 1
+            if count > 0:
+                self._refs[digest] = count
+                return count
+
+            self._refs.pop(digest, None)
+            self._cache_drop(digest)
+            try:
+                self.path(digest).unlink()
+            except FileNotFoundError:
+                pass
+            return 0
+
+    def path(self, digest: str) -> Path:
+        """Path of a blob on disk."""
+        if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+            raise ValueError(f"Invalid blob digest: {digest!r}")
+        return self.root / digest[:2] / digest
+
+    def read_bytes(self, digest: str) -> bytes:
+        """Read a blob, served from memory when recently used."""
+        with self._lock:
+            data = self._cache.get(digest)
+            if data is not None:
+                self._cache.move_to_end(digest)
+                return data
+
+        data = self.path(digest).read_bytes()
+        with self._lock:
+            self._cache_put(digest, data)
+        return data
+
+    def read_text(self, digest: str) -> str:
+        """Read a text blob."""
+        return self.read_bytes(digest).decode("utf-8")
+
+    def refcount(self, digest: str) -> int:
+        with self._lock:
+            return self._refs.get(digest, 0)
+
+    def stats(self) -> Dict[str, int]:
+        """Blob and reference counts for debugging endpoints."""
+        with self._lock:
+            return {
+                "blobs": len(self._refs),
+                "references": sum(self._refs.values()),
+                "cached_bytes": self._cached_bytes,
+            }
+
+    def collect_garbage(self, min_age_seconds: float = 0.0) -> int:
+        """
+        Delete blobs without references.
+
+        Args:
+            min_age_seconds: Keep unreferenced blobs modified more recently than this
+
+        Returns:
+            Number of blobs removed
+        """
+        removed = 0
+        now = time.time()
+        with self._lock:
+            for shard in self.root.iterdir():
+                if not shard.is_dir():
+                    continue
+                for path in shard.iterdir():
+                    if path.name in self._refs:
+                        continue
+                    try:
+                        if now - path.stat().st_mtime >= min_age_seconds:
+                            path.unlink()
+                            removed += 1
+                    except FileNotFoundError:
+                        pass
+        return removed
+
+    def _write(self, path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _cache_put(self, digest: str, data: bytes):
+        if len(data) > self.cache_bytes // 4 or digest in self._cache:
+            return
+        self._cache[digest] = data
+        self._cached_bytes += len(data)
+        while self._cached_bytes > self.cache_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_bytes -= len(evicted)
+
+    def _cache_drop(self, digest: str):
+        data = self._cache.pop(digest, None)
+        if data is not None:
+            self._cached_bytes -= len(data)
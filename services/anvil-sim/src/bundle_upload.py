@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Bundle Upload - Streaming upload of URDF + mesh bundles
+Receives multipart or zip uploads in chunks, hashes them while streaming and
+extracts zip archives in parallel, without holding a bundle in memory.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import stat
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional, Any, Tuple
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+CHUNK_SIZE = 256 * 1024
+
+# Extraction limits guarding against zip bombs
+MAX_EXTRACTED_RATIO = 20       # total extracted bytes per uploaded byte
+MAX_MEMBER_RATIO = 200         # compression ratio of a single member
+MAX_BUNDLE_FILES = 10000
+
+
+class BundleError(ValueError):
+    """Raised for malformed or unsafe bundles."""
+
+
+class BundleTooLarge(BundleError):
+    """Raised when a bundle exceeds the configured size limit."""
+
+
+@dataclass
+class UploadedBundle:
+    """A stored, extracted bundle."""
+    bundle_id: str
+    sha256: str
+    size: int
+    directory: str
+    files: List[str] = field(default_factory=list)
+    urdf_files: List[str] = field(default_factory=list)
+    reused: bool = False
+    receive_seconds: float = 0.0
+    extract_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "bundle_id": self.bundle_id,
+            "sha256": self.sha256,
+            "size": self.size,
+            "file_count": len(self.files),
+            "urdf_files": self.urdf_files,
+            "reused": self.reused,
+            "receive_seconds": round(self.receive_seconds, 4),
+            "extract_seconds": round(self.extract_seconds, 4),
+        }
+
+
+class BundleUploadManager:
+    """
+    Stores uploaded robot bundles under ``<root>/<sha256>/``.
+
+    The id hashes a manifest of the uploaded parts: every file's path, size
+    and content hash, and every archive's size and content hash. Identical
+    bundles are extracted once; later uploads of the same bundle reuse the
+    existing directory.
+    """
+
+    def __init__(self, root: str, max_request_size: int, extract_workers: int = 4,
+                 chunk_size: int = CHUNK_SIZE):
+        self.root = Path(root)
+        self.staging = self.root / ".staging"
+        self.staging.mkdir(parents=True, exist_ok=True)
+        self.max_request_size = max_request_size
+        self.max_extracted_size = max_request_size * MAX_EXTRACTED_RATIO
+        self.extract_workers = max(1, extract_workers)
+        self.chunk_size = chunk_size
+
+    def bundle_path(self, bundle_id: str) -> Optional[Path]:
+        """Directory of a stored bundle, or None if unknown."""
+        if not bundle_id or not all(c in "0123456789abcdef" for c in bundle_id):
+            return None
+        path = self.root / bundle_id
+        return path if path.is_dir() else None
+
+    def resolve_file(self, bundle_id: str, relative_path: str) -> Optional[Path]:
+        """Path of a file inside a stored bundle, refusing paths that escape it."""
+        directory = self.bundle_path(bundle_id)
+        if directory is None:
+            return None
+        try:
+            target = (directory / _safe_relative_path(relative_path)).resolve()
+        except BundleError:
+            return None
+        if directory.resolve() not in target.parents or not target.is_file():
+            return None
+        return target
+
+    async def receive(self, request) -> UploadedBundle:
+        """
+        Receive a bundle from an aiohttp request.
+
+        Accepts ``multipart/form-data`` (any mix of files and zip archives) or
+        a raw zip body. The request body is streamed to disk in chunks.
+
+        Raises:
+            BundleTooLarge: The body exceeds max_request_size
+            BundleError: The bundle is empty, malformed or unsafe
+        """
+        if request.content_length is not None and request.content_length > self.max_request_size:
+            raise BundleTooLarge(f"Bundle exceeds {self.max_request_size} bytes")
+
+        started = time.perf_counter()
+        work_dir = self.staging / uuid.uuid4().hex
+        files_dir = work_dir / "files"
+        files_dir.mkdir(parents=True)
+        received = 0
+        archives: List[Path] = []
+        manifest: List[Tuple[str, str, int, str]] = []
+        paths = set()
+
+        try:
+            if request.content_type == "multipart/form-data":
+                reader = await request.multipart()
+                while True:
+                    part = await reader.next()
+                    if part is None:
+                        break
+                    if not part.filename:
+                        await part.release()
+                        continue
+
+                    relative = _safe_relative_path(part.filename)
+                    if relative.suffix.lower() == ".zip":
+                        kind, name = "zip", ""
+                        target = work_dir / f"archive_{len(archives)}.zip"
+                        archives.append(target)
+                    else:
+                        if relative in paths:
+                            raise BundleError(f"Duplicate file in bundle: {relative}")
+                        paths.add(relative)
+                        kind, name = "file", str(relative)
+                        target = files_dir / relative
+                        target.parent.mkdir(parents=True, exist_ok=True)
+
+                    size, part_sha = await self._stream_to_file(part.read_chunk, target, received)
+                    received += size
+                    manifest.append((kind, name, size, part_sha))
+            else:
+                target = work_dir / "archive_0.zip"
+                archives.append(target)
+                size, part_sha = await self._stream_to_file(request.content.read, target, received)
+                received += size
+                manifest.append(("zip", "", size, part_sha))
+
+            if received == 0:
+                raise BundleError("Empty bundle")
+
+            receive_seconds = time.perf_counter() - started
+            # Part order does not change the extracted tree (overlapping paths are rejected)
+            sha256 = hashlib.sha256(json.dumps(sorted(manifest)).encode("utf-8")).hexdigest()
+            bundle_dir = self.root / sha256
+
+            if bundle_dir.is_dir():
+                # Same bundle uploaded before: keep the existing extraction
+                return self._describe(sha256, bundle_dir, received, True, receive_seconds, 0.0)
+
+            extract_started = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            for archive in archives:
+                await loop.run_in_executor(None, self._extract_archive, archive, files_dir)
+                archive.unlink()
+            extract_seconds = time.perf_counter() - extract_started
+
+            try:
+                os.replace(files_dir, bundle_dir)
+            except OSError:
+                if not bundle_dir.is_dir():
+                    raise
+                # A concurrent upload of the same bundle finished first
+
+            bundle = self._describe(sha256, bundle_dir, received, False, receive_seconds, extract_seconds)
+            logger.info("Bundle stored", bundle_id=sha256, size=received,
+                        files=len(bundle.files), urdf_files=len(bundle.urdf_files),
+                        receive_seconds=round(receive_seconds, 3),
+                        extract_seconds=round(extract_seconds, 3))
+            return bundle
+
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    async def _stream_to_file(self, read_chunk, target: Path, received: int) -> Tuple[int, str]:
+        """
+        Copy a stream to a file chunk by chunk, enforcing the size limit on
+        the ``received`` bytes so far plus this part.
+
+        Returns:
+            (part size, part sha256)
+        """
+        digest = hashlib.sha256()
+        size = 0
+        with open(target, "wb") as f:
+            while True:
+                chunk = await read_chunk(self.chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if received + size > self.max_request_size:
+                    raise BundleTooLarge(f"Bundle exceeds {self.max_request_size} bytes")
+                digest.update(chunk)
+                f.write(chunk)
+        return size, digest.hexdigest()
+
+    def _extract_archive(self, archive: Path, destination: Path):
+        """Validate a zip archive and extract its members on a thread pool."""
+        try:
+            with zipfile.ZipFile(archive) as zf:
+                members = self._checked_members(zf, archive.stat().st_size)
+        except zipfile.BadZipFile as e:
+            raise BundleError(f"Invalid zip archive: {e}")
+
+        if not members:
+            return
+
+        # Balance members across workers by size; each worker opens its own handle
+        workers = min(self.extract_workers, len(members))
+        groups: List[List[Tuple[zipfile.ZipInfo, PurePosixPath]]] = [[] for _ in range(workers)]
+        loads = [0] * workers
+        for member in sorted(members, key=lambda m: m[0].file_size, reverse=True):
+            index = loads.index(min(loads))
+            groups[index].append(member)
+            loads[index] += member[0].file_size
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bundle-extract") as pool:
+            futures = [pool.submit(self._extract_group, archive, group, destination) for group in groups]
+            for future in futures:
+                future.result()
+
+    def _checked_members(self, zf: zipfile.ZipFile,
+                         archive_size: int) -> List[Tuple[zipfile.ZipInfo, PurePosixPath]]:
+        """Reject unsafe archives before anything is written."""
+        members = []
+        paths = set()
+        total = 0
+        infos = zf.infolist()
+        if len(infos) > MAX_BUNDLE_FILES:
+            raise BundleError(f"Bundle contains more than {MAX_BUNDLE_FILES} files")
+
+        for info in infos:
+            if info.is_dir():
+                continue
+            if stat.S_ISLNK(info.external_attr >> 16):
+                raise BundleError(f"Symbolic links are not allowed: {info.filename}")
+            if info.flag_bits & 0x1:
+                raise BundleError(f"Encrypted members are not supported: {info.filename}")
+
+            relative = _safe_relative_path(info.filename)
+            if relative in paths:
+                raise BundleError(f"Duplicate file in bundle: {relative}")
+            paths.add(relative)
+            total += info.file_size
+            if total > self.max_extracted_size:
+                raise BundleTooLarge(f"Bundle expands beyond {self.max_extracted_size} bytes")
+            if info.compress_size and info.file_size / info.compress_size > MAX_MEMBER_RATIO:
+                raise BundleError(f"Suspicious compression ratio for {info.filename}")
+            members.append((info, relative))
+
+        return members
+
+    def _extract_group(self, archive: Path, group: List[Tuple[zipfile.ZipInfo, PurePosixPath]],
+                       destination: Path):
+        with zipfile.ZipFile(archive) as zf:
+            for info, relative in group:
+                target = destination / relative
+                target.parent.mkdir(parents=True, exist_ok=True)
+                written = 0
+                try:
+                    # Exclusive create: another part or archive already wrote this path
+                    output = open(target, "xb")
+                except FileExistsError:
+                    raise BundleError(f"Duplicate file in bundle: {relative}")
+                with zf.open(info) as source, output as f:
+                    while True:
+                        chunk = source.read(self.chunk_size)
+                        if not chunk:
+                            break
+                        written += len(chunk)
+                        # Sizes in the central directory can lie
+                        if written > info.file_size:
+                            raise BundleError(f"Member larger than declared: {info.filename}")
+                        f.write(chunk)
+
+    def _describe(self, sha256: str, bundle_dir: Path, size: int, reused: bool,
+                  receive_seconds: float, extract_seconds: float) -> UploadedBundle:
+        files = sorted(
+            str(path.relative_to(bundle_dir)).replace(os.sep, "/")
+            for path in bundle_dir.rglob("*") if path.is_file()
+        )
+        return UploadedBundle(
+            bundle_id=sha256,
+            sha256=sha256,
+            size=size,
+            directory=str(bundle_dir),
+            files=files,
+            urdf_files=[f for f in files if f.lower().endswith(".urdf")],
+            reused=reused,
+            receive_seconds=receive_seconds,
+            extract_seconds=extract_seconds,
+        )
+
+
+def _safe_relative_path(name: str) -> PurePosixPath:
+    """Normalize an uploaded file name, rejecting absolute and escaping paths."""
+    normalized = name.replace("\\", "/")
+    path = PurePosixPath(normalized)
+    if path.is_absolute() or normalized.startswith("/") or (len(normalized) > 1 and normalized[1] == ":"):
+        raise BundleError(f"Absolute paths are not allowed: {name}")
+    parts = [part for part in path.parts if part not in ("", ".")]
+    if not parts or any(part == ".." for part in parts):
+        raise BundleError(f"Unsafe path in bundle: {name}")
+    return PurePosixPath(*parts)
@@ -0,0 +1,564 @@
+#!/usr/bin/env python3
+"""
+Self-Collision Checking
+Sphere-tree bounding volume hierarchies of robot links, traversed for whole
+batches of joint configurations with vectorized numpy operations.
+"""
+
+import hashlib
+import logging
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Any, Tuple, Iterable, Union
+
+import numpy as np
+
+from kinematics import KinematicChain
+from mesh_stats import read_mesh_points
+from urdf_model import UrdfModel, UrdfShape, parse_urdf, resolve_mesh_path, rpy_to_quat, quat_to_matrix
+
+logger = logging.getLogger(__name__)
+
+LEAF_POINTS = 16              # points bounded by each leaf sphere
+MAX_LINK_POINTS = 4096        # link point clouds are thinned to about this many points
+PRIMITIVE_SPACING = 0.02      # m between points sampled on primitive surfaces
+DEFAULT_MAX_DISTANCE = 0.05   # m; larger clearances are reported as this value
+DEFAULT_CHUNK_SIZE = 1024     # configurations per traversal
+CONFIGS_PER_TASK = 2048       # configurations per process pool task
+
+# Allowed-collision matrix sampling
+ACM_SAMPLES = 1000
+ALWAYS_COLLIDING_FRACTION = 0.95
+
+MODEL_CACHE_SIZE = 16
+
+_model_cache: "OrderedDict[Tuple, CollisionModel]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+@dataclass
+class SphereTree:
+    """
+    Binary sphere tree over a link's surface points, in the link frame.
+
+    Node 0 is the root. Every node's sphere encloses the spheres of its
+    children; ``representative`` is a leaf below each node, used to bound
+    the distance between two subtrees from above.
+    """
+    centers: np.ndarray          # (M, 3)
+    radii: np.ndarray            # (M,)
+    children: np.ndarray         # (M, 2), -1 for leaves
+    representative: np.ndarray   # (M,)
+
+    @property
+    def node_count(self) -> int:
+        return len(self.radii)
+
+
+def build_sphere_tree(points: np.ndarray, leaf_points: int = LEAF_POINTS) -> SphereTree:
+    """
+    Build a sphere tree by recursive median splits along the longest axis.
+
+    Args:
+        points: (N, 3) surface points
+        leaf_points: Maximum points per leaf
+
+    Returns:
+        Sphere tree
+    """
+    centers: List[np.ndarray] = []
+    radii: List[float] = []
+    children: List[Tuple[int, int]] = []
+    representative: List[int] = []
+
+    def build(indices: np.ndarray) -> int:
+        node = len(centers)
+        centers.append(None)
+        radii.append(0.0)
+        children.append((-1, -1))
+        representative.append(node)
+
+        subset = points[indices]
+        lower, upper = subset.min(axis=0), subset.max(axis=0)
+        center = (lower + upper) / 2
+        if len(indices) <= leaf_points:
+            radius = float(np.max(np.linalg.norm(subset - center, axis=1)))
+        else:
+            axis = int(np.argmax(upper - lower))
+            order = np.argsort(subset[:, axis], kind="stable")
+            half = len(order) // 2
+            left, right = build(indices[order[:half]]), build(indices[order[half:]])
+            children[node] = (left, right)
+            radius = max(float(np.linalg.norm(centers[child] - center)) + radii[child] for child in (left, right))
+            representative[node] = min(
+                (representative[left], representative[right]),
+                key=lambda leaf: float(np.linalg.norm(centers[leaf] - center))
+            )
+        centers[node] = center
+        radii[node] = radius
+        return node
+
+    build(np.arange(len(points)))
+    return SphereTree(
+        centers=np.array(centers),
+        radii=np.array(radii),
+        children=np.array(children, dtype=np.int64),
+        representative=np.array(representative, dtype=np.int64),
+    )
+
+
+@dataclass
+class CollisionReport:
+    """Self-collision results for a batch of configurations."""
+    clearance: np.ndarray        # (N,) m, negative when spheres overlap
+    closest_pair: np.ndarray     # (N,) index into CollisionModel.pairs, -1 if all beyond max_distance
+    in_collision: np.ndarray     # (N,) bool
+    max_distance: float = DEFAULT_MAX_DISTANCE
+
+    def to_dict(self, model: "CollisionModel", max_examples: int = 20) -> Dict[str, Any]:
+        colliding = np.flatnonzero(self.in_collision)
+        worst = int(np.argmin(self.clearance)) if len(self.clearance) else -1
+        pair_counts: Dict[str, int] = {}
+        for pair in self.closest_pair[colliding]:
+            name = "/".join(model.pair_names(pair))
+            pair_counts[name] = pair_counts.get(name, 0) + 1
+
+        return {
+            "configurations": int(len(self.clearance)),
+            "colliding_configurations": int(len(colliding)),
+            "min_clearance_m": float(self.clearance[worst]) if worst >= 0 else None,
+            "min_clearance_configuration": worst if worst >= 0 else None,
+            "min_clearance_pair": (list(model.pair_names(self.closest_pair[worst]))
+                                   if worst >= 0 and self.closest_pair[worst] >= 0 else None),
+            "colliding_pairs": pair_counts,
+            "collisions": [
+                {
+                    "configuration": int(index),
+                    "links": list(model.pair_names(self.closest_pair[index])),
+                    "penetration_m": float(-self.clearance[index]),
+                }
+                for index in colliding[:max_examples]
+            ],
+            "checked_pairs": len(model.pairs),
+            "max_distance_m": self.max_distance,
+        }
+
+
+class CollisionModel:
+    """
+    Self-collision model of a robot.
+
+    Links are represented by sphere trees built from their collision
+    geometry (visual geometry when a link has none). Pairs in the
+    allowed-collision matrix (adjacent links, links touching in the default
+    pose, links touching in almost every sampled pose) are never checked.
+    """
+
+    def __init__(self, model: UrdfModel, package_dirs: Iterable[str] = (),
+                 chain: Optional[KinematicChain] = None, acm_samples: int = ACM_SAMPLES,
+                 seed: int = 0, root: Optional[str] = None):
+        """
+        Build a collision model.
+
+        Args:
+            model: Parsed URDF model
+            package_dirs: Directories used to resolve package:// mesh references
+            chain: Compiled kinematic chain of the model, compiled if None
+            acm_samples: Random configurations used to find always-colliding pairs
+            seed: Sampling seed, fixed so every worker builds the same matrix
+            root: Directory tree meshes may resolve into; defaults to the
+                URDF directory
+        """
+        self.chain = chain or KinematicChain(model)
+        package_dirs = list(package_dirs)
+        self.missing_meshes: List[str] = []
+
+        trees: List[SphereTree] = []
+        self.link_names: List[str] = []
+        for name in self.chain.link_names:
+            link = model.links.get(name)
+            if link is None:
+                continue
+            points = self._link_points(link.collisions or link.visuals, model.base_dir, package_dirs, root)
+            if points is None:
+                continue
+            self.link_names.append(name)
+            trees.append(build_sphere_tree(points))
+
+        # All trees in one node array; node_link maps nodes to link slots
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+        self.roots = offsets[:-1].astype(np.int64)
+        if trees:
+            self.centers = np.concatenate([tree.centers for tree in trees])
+            self.radii = np.concatenate([tree.radii for tree in trees])
+            self.children = np.concatenate([
+                np.where(tree.children >= 0, tree.children + offset, -1)
+                for tree, offset in zip(trees, self.roots)
+            ])
+            self.representative = np.concatenate([tree.representative + offset
+                                                  for tree, offset in zip(trees, self.roots)])
+            self.node_link = np.concatenate([np.full(tree.node_count, i) for i, tree in enumerate(trees)])
+        else:
+            self.centers = np.zeros((0, 3))
+            self.radii = np.zeros(0)
+            self.children = np.zeros((0, 2), dtype=np.int64)
+            self.representative = np.zeros(0, dtype=np.int64)
+            self.node_link = np.zeros(0, dtype=np.int64)
+        self.is_leaf = self.children[:, 0] < 0 if len(self.children) else np.zeros(0, dtype=bool)
+        self.chain_links = self.chain.link_indices(self.link_names)
+
+        self.allowed: Dict[Tuple[str, str], str] = {}
+        self.pairs = self._candidate_pairs(model)
+        if len(self.pairs) and self.chain.dof:
+            self._disable_default_and_always(acm_samples, seed)
+
+    def pair_names(self, pair: int) -> Tuple[str, str]:
+        if pair < 0:
+            return ()
+        a, b = self.pairs[pair]
+        return self.link_names[a], self.link_names[b]
+
+    def check(self, q, padding: float = 0.0, max_distance: float = DEFAULT_MAX_DISTANCE,
+              chunk_size: int = DEFAULT_CHUNK_SIZE) -> CollisionReport:
+        """
+        Check a batch of configurations for self-collision.
+
+        Args:
+            q: (N, dof) joint configurations
+            padding: Clearance below which links count as colliding, in m
+            max_distance: Clearances are only resolved up to this distance
+            chunk_size: Configurations traversed together
+
+        Returns:
+            Collision report
+        """
+        q = np.atleast_2d(np.asarray(q, dtype=float))
+        distances = self.pair_distances(q, max(max_distance, padding), chunk_size)
+        if distances.shape[1] == 0:
+            clearance = np.full(len(q), max_distance)
+            closest = np.full(len(q), -1, dtype=np.int64)
+        else:
+            closest = np.argmin(distances, axis=1)
+            clearance = distances[np.arange(len(q)), closest]
+            closest = np.where(clearance < max_distance, closest, -1)
+        return CollisionReport(clearance, closest, clearance < padding, max_distance)
+
+    def pair_distances(self, q: np.ndarray, max_distance: float,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+        """
+        Distance between the sphere trees of every checked pair.
+
+        Returns:
+            (N, P) distances, capped at max_distance, negative for overlaps
+        """
+        result = np.full((len(q), len(self.pairs)), max_distance)
+        if not len(self.pairs):
+            return result
+        for start in range(0, len(q), chunk_size):
+            end = min(start + chunk_size, len(q))
+            positions, rotations = self.chain.forward(q[start:end], self.chain_links)
+            result[start:end] = self._traverse(positions, rotations, self.pairs, max_distance)
+        return result
+
+    def _traverse(self, positions: np.ndarray, rotations: np.ndarray, pairs: np.ndarray,
+                  max_distance: float) -> np.ndarray:
+        """
+        Breadth-first traversal of all (configuration, pair) sphere trees at once.
+
+        Node pairs whose spheres are farther apart than the best leaf distance
+        found so far are pruned; the larger sphere of a surviving pair is
+        split into its children.
+        """
+        count = len(positions)
+        # World centers of every node for every configuration: (C, nodes, 3)
+        world = np.empty((count, len(self.radii), 3))
+        for slot, (start, stop) in enumerate(zip(self.roots, np.append(self.roots[1:], len(self.radii)))):
+            world[:, start:stop] = (np.einsum("cij,mj->cmi", rotations[:, slot], self.centers[start:stop])
+                                    + positions[:, slot, None])
+
+        best = np.full((count, len(pairs)), max_distance)
+        config = np.repeat(np.arange(count), len(pairs))
+        pair = np.tile(np.arange(len(pairs)), count)
+        node_a = self.roots[pairs[pair, 0]]
+        node_b = self.roots[pairs[pair, 1]]
+
+        while len(config):
+            # Upper bound: distance between one leaf below each node
+            leaf_a, leaf_b = self.representative[node_a], self.representative[node_b]
+            upper = self._sphere_distance(world, config, leaf_a, leaf_b)
+            np.minimum.at(best, (config, pair), upper)
+
+            lower = self._sphere_distance(world, config, node_a, node_b)
+            keep = lower < best[config, pair]
+            config, pair, node_a, node_b = config[keep], pair[keep], node_a[keep], node_b[keep]
+
+            a_leaf, b_leaf = self.is_leaf[node_a], self.is_leaf[node_b]
+            open_pairs = ~(a_leaf & b_leaf)
+            config, pair, node_a, node_b = (config[open_pairs], pair[open_pairs],
+                                            node_a[open_pairs], node_b[open_pairs])
+            a_leaf, b_leaf = a_leaf[open_pairs], b_leaf[open_pairs]
+
+            split_a = ~a_leaf & (b_leaf | (self.radii[node_a] >= self.radii[node_b]))
+            split_b = ~split_a
+            config = np.concatenate([config[split_a], config[split_a], config[split_b], config[split_b]])
+            pair = np.concatenate([pair[split_a], pair[split_a], pair[split_b], pair[split_b]])
+            node_a, node_b = (
+                np.concatenate([self.children[node_a[split_a], 0], self.children[node_a[split_a], 1],
+                                node_a[split_b], node_a[split_b]]),
+                np.concatenate([node_b[split_a], node_b[split_a],
+                                self.children[node_b[split_b], 0], self.children[node_b[split_b], 1]]),
+            )
+
+        return best
+
+    def _sphere_distance(self, world: np.ndarray, config: np.ndarray,
+                         node_a: np.ndarray, node_b: np.ndarray) -> np.ndarray:
+        delta = world[config, node_a] - world[config, node_b]
+        return np.sqrt(np.einsum("fi,fi->f", delta, delta)) - self.radii[node_a] - self.radii[node_b]
+
+    def _candidate_pairs(self, model: UrdfModel) -> np.ndarray:
+        """All link pairs except adjacent ones."""
+        slots = {name: i for i, name in enumerate(self.link_names)}
+        neighbours: Dict[str, set] = {}
+        for joint in model.joints.values():
+            neighbours.setdefault(joint.parent, set()).add(joint.child)
+            neighbours.setdefault(joint.child, set()).add(joint.parent)
+
+        # Links without geometry are transparent: their neighbours are adjacent
+        adjacent = set()
+        for name in self.link_names:
+            seen, stack = {name}, list(neighbours.get(name, ()))
+            while stack:
+                other = stack.pop()
+                if other in seen:
+                    continue
+                seen.add(other)
+                if other in slots:
+                    adjacent.add(tuple(sorted((slots[name], slots[other]))))
+                else:
+                    stack.extend(neighbours.get(other, ()))
+
+        pairs = []
+        for i in range(len(self.link_names)):
+            for j in range(i + 1, len(self.link_names)):
+                if (i, j) in adjacent:
+                    self.allowed[(self.link_names[i], self.link_names[j])] = "adjacent"
+                else:
+                    pairs.append((i, j))
+        return np.array(pairs, dtype=np.int64).reshape(-1, 2)
+
+    def _disable_default_and_always(self, samples: int, seed: int):
+        """Drop pairs colliding in the default pose or in almost every sampled pose."""
+        chain = self.chain
+        rng = np.random.default_rng(seed)
+        default = np.clip(np.zeros(chain.dof), chain.lower, chain.upper)
+        q = np.vstack([default, rng.uniform(chain.lower, chain.upper, size=(samples, chain.dof))])
+        colliding = self.pair_distances(q, 1e-9) < 0
+
+        keep = []
+        for index, (a, b) in enumerate(self.pairs):
+            names = (self.link_names[a], self.link_names[b])
+            if colliding[0, index]:
+                self.allowed[names] = "default"
+            elif samples and colliding[1:, index].mean() >= ALWAYS_COLLIDING_FRACTION:
+                self.allowed[names] = "always"
+            else:
+                keep.append(index)
+        self.pairs = self.pairs[keep]
+
+    def _link_points(self, shapes: List[UrdfShape], base_dir: Optional[str],
+                     package_dirs: List[str], root: Optional[str] = None) -> Optional[np.ndarray]:
+        clouds = []
+        for shape in shapes:
+            local = _shape_points(shape, base_dir, package_dirs, root)
+            if local is None:
+                if shape.geometry.type == "mesh":
+                    self.missing_meshes.append(shape.geometry.filename)
+                continue
+            rotation = np.array(quat_to_matrix(rpy_to_quat(shape.origin.rpy)))
+            clouds.append(local @ rotation.T + np.array(shape.origin.xyz))
+        if not clouds:
+            return None
+        return _thin(np.concatenate(clouds), MAX_LINK_POINTS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        reasons: Dict[str, int] = {}
+        for reason in self.allowed.values():
+            reasons[reason] = reasons.get(reason, 0) + 1
+        return {
+            "links": self.link_names,
+            "sphere_nodes": int(len(self.radii)),
+            "checked_pairs": int(len(self.pairs)),
+            "allowed_pairs": reasons,
+            "missing_meshes": sorted(set(self.missing_meshes)),
+        }
+
+
+def _shape_points(shape: UrdfShape, base_dir: Optional[str], package_dirs: List[str],
+                  root: Optional[str] = None) -> Optional[np.ndarray]:
+    """Surface points of a shape in its own frame."""
+    geometry = shape.geometry
+    spacing = PRIMITIVE_SPACING
+
+    if geometry.type == "box":
+        half = np.array(geometry.size) / 2
+        faces = []
+        for axis in range(3):
+            u, v = [a for a in range(3) if a != axis]
+            grid_u = np.linspace(-half[u], half[u], max(2, math.ceil(2 * half[u] / spacing) + 1))
+            grid_v = np.linspace(-half[v], half[v], max(2, math.ceil(2 * half[v] / spacing) + 1))
+            gu, gv = np.meshgrid(grid_u, grid_v, indexing="ij")
+            for sign in (-1.0, 1.0):
+                face = np.zeros((gu.size, 3))
+                face[:, axis] = sign * half[axis]
+                face[:, u] = gu.ravel()
+                face[:, v] = gv.ravel()
+                faces.append(face)
+        return np.concatenate(faces)
+
+    if geometry.type == "cylinder":
+        radius, length = geometry.radius, geometry.length
+        around = max(8, math.ceil(2 * math.pi * radius / spacing))
+        angles = np.linspace(0, 2 * math.pi, around, endpoint=False)
+        heights = np.linspace(-length / 2, length / 2, max(2, math.ceil(length / spacing) + 1))
+        rings = np.linspace(0, radius, max(2, math.ceil(radius / spacing) + 1))
+        side = np.stack(np.meshgrid(angles, heights, indexing="ij"), axis=-1).reshape(-1, 2)
+        caps = np.stack(np.meshgrid(angles, rings, [-length / 2, length / 2], indexing="ij"), axis=-1).reshape(-1, 3)
+        return np.concatenate([
+            np.column_stack([radius * np.cos(side[:, 0]), radius * np.sin(side[:, 0]), side[:, 1]]),
+            np.column_stack([caps[:, 1] * np.cos(caps[:, 0]), caps[:, 1] * np.sin(caps[:, 0]), caps[:, 2]]),
+        ])
+
+    if geometry.type == "sphere":
+        radius = geometry.radius
+        count = max(12, math.ceil(4 * math.pi * radius * radius / (spacing * spacing)))
+        index = np.arange(count) + 0.5
+        polar = np.arccos(1 - 2 * index / count)
+        azimuth = math.pi * (1 + 5 ** 0.5) * index
+        return radius * np.column_stack([np.cos(azimuth) * np.sin(polar),
+                                         np.sin(azimuth) * np.sin(polar), np.cos(polar)])
+
+    if geometry.type == "mesh" and geometry.filename:
+        path = resolve_mesh_path(geometry.filename, base_dir, package_dirs, root)
+        points = read_mesh_points(path) if path else None
+        if points is None or len(points) == 0:
+            return None
+        return points * np.array(geometry.scale)
+
+    return None
+
+
+def _thin(points: np.ndarray, max_points: int) -> np.ndarray:
+    """Keep one point per grid cell, coarsening the grid until few enough remain."""
+    if len(points) <= max_points:
+        return points
+    extent = float(np.max(points.max(axis=0) - points.min(axis=0))) or 1.0
+    cell = extent / 64
+    while True:
+        _, first = np.unique(np.floor(points / cell).astype(np.int64), axis=0, return_index=True)
+        if len(first) <= max_points:
+            return points[np.sort(first)]
+        cell *= 1.5
+
+
+def collision_model_for(urdf_content: Union[str, bytes], base_dir: Optional[str] = None,
+                        package_dirs: Iterable[str] = (), digest: Optional[str] = None,
+                        root: Optional[str] = None) -> CollisionModel:
+    """
+    Collision model of a URDF document, cached by content hash.
+
+    Args:
+        urdf_content: URDF document
+        base_dir: Directory relative mesh references are resolved against
+        package_dirs: Directories used to resolve package:// references
+        digest: SHA-256 of the content, if already known
+        root: Directory tree meshes may resolve into; defaults to base_dir
+
+    Returns:
+        Collision model (shared; do not modify)
+    """
+    if isinstance(urdf_content, str):
+        urdf_content = urdf_content.encode("utf-8")
+    digest = digest or hashlib.sha256(urdf_content).hexdigest()
+    package_dirs = tuple(package_dirs)
+    key = (digest, base_dir, package_dirs, root)
+
+    with _cache_lock:
+        collision_model = _model_cache.get(key)
+        if collision_model is not None:
+            _model_cache.move_to_end(key)
+            return collision_model
+
+    source_path = f"{base_dir}/robot.urdf" if base_dir else None
+    collision_model = CollisionModel(parse_urdf(urdf_content, source_path), package_dirs, root=root)
+    if collision_model.missing_meshes:
+        logger.warning(f"Collision model of {digest[:12]} built without "
+                       f"{len(set(collision_model.missing_meshes))} unresolved meshes")
+
+    with _cache_lock:
+        _model_cache[key] = collision_model
+        while len(_model_cache) > MODEL_CACHE_SIZE:
+            _model_cache.popitem(last=False)
+    return collision_model
+
+
+def check_configurations(urdf_content: Union[str, bytes], q, padding: float = 0.0,
+                         max_distance: float = DEFAULT_MAX_DISTANCE, base_dir: Optional[str] = None,
+                         package_dirs: Iterable[str] = (), executor=None,
+                         progress: Optional[Callable[[float], None]] = None,
+                         root: Optional[str] = None) -> Tuple[CollisionModel, CollisionReport]:
+    """
+    Check many configurations, split into tasks across an executor.
+
+    Args:
+        urdf_content: URDF document
+        q: (N, dof) joint configurations
+        padding: Clearance below which links count as colliding, in m
+        max_distance: Clearances are only resolved up to this distance
+        base_dir: Directory relative mesh references are resolved against
+        package_dirs: Directories used to resolve package:// references
+        executor: Executor running the tasks, inline if None
+        progress: Called with the completed fraction after each task
+        root: Directory tree meshes may resolve into; defaults to base_dir
+
+    Returns:
+        (collision model, collision report)
+    """
+    if isinstance(urdf_content, str):
+        urdf_content = urdf_content.encode("utf-8")
+    digest = hashlib.sha256(urdf_content).hexdigest()
+    package_dirs = tuple(package_dirs)
+    collision_model = collision_model_for(urdf_content, base_dir, package_dirs, digest, root)
+
+    q = np.atleast_2d(np.asarray(q, dtype=float))
+    if q.shape[1] != collision_model.chain.dof:
+        raise ValueError(f"Expected {collision_model.chain.dof} joint values, got {q.shape[1]}")
+
+    tasks = [
+        (urdf_content, digest, base_dir, package_dirs, root, q[start:start + CONFIGS_PER_TASK], padding, max_distance)
+        for start in range(0, len(q), CONFIGS_PER_TASK)
+    ]
+    results = executor.map(_check_task, tasks) if executor is not None and len(tasks) > 1 else map(_check_task, tasks)
+    parts = []
+    for part in results:
+        parts.append(part)
+        if progress is not None:
+            progress(len(parts) / len(tasks))
+
+    if not parts:
+        empty = np.zeros(0)
+        return collision_model, CollisionReport(empty, empty.astype(np.int64), empty.astype(bool), max_distance)
+    return collision_model, CollisionReport(
+        clearance=np.concatenate([part.clearance for part in parts]),
+        closest_pair=np.concatenate([part.closest_pair for part in parts]),
+        in_collision=np.concatenate([part.in_collision for part in parts]),
+        max_distance=max_distance,
+    )
+
+
+def _check_task(args) -> CollisionReport:
+    urdf_content, digest, base_dir, package_dirs, root, q, padding, max_distance = args
+    collision_model = collision_model_for(urdf_content, base_dir, package_dirs, digest, root)
+    return collision_model.check(q, padding, max_distance)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Command Coalescer - One joint and camera update per tick per session
+Interactive clients send camera and joint commands far faster than frames
+are rendered, e.g. one per mouse event while dragging. Commands are folded
+into the latest camera and the merged joint targets of their session and
+applied once per tick, and every client gets one acknowledgement per
+command type per tick for the newest command it sent.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional, Any, Tuple
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+JOINT = "joint"
+CAMERA = "camera"
+
+
+@dataclass
+class CommandBatch:
+    """Commands received since the previous apply, folded together."""
+    joint_states: Dict[str, float] = field(default_factory=dict)
+    camera: Optional[Dict[str, Any]] = None
+    # (client id, command) -> [newest seq or None, commands folded]
+    acks: Dict[Tuple[str, str], list] = field(default_factory=dict)
+    received: int = 0
+
+
+class CommandCoalescer:
+    """
+    Pending commands of one session, applied at most once per ``tick``.
+
+    A command arriving after an idle tick is applied right away; commands
+    arriving faster are folded into the next apply: the newest camera wins
+    and joint targets are merged, newest value per joint.
+    """
+
+    def __init__(self, apply: Callable[[CommandBatch], Awaitable[Any]],
+                 acknowledge: Callable[[CommandBatch], Awaitable[Any]], tick: float):
+        self._apply = apply
+        self._acknowledge = acknowledge
+        self.tick = float(tick)
+        self.received = 0
+        self.applied = 0
+        self._batch = CommandBatch()
+        self._pending = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def joint(self, client_id: str, joint_states: Dict[str, float], seq: Any = None):
+        self._batch.joint_states.update(joint_states)
+        self._submitted(client_id, JOINT, seq)
+
+    def camera(self, client_id: str, camera: Dict[str, Any], seq: Any = None):
+        self._batch.camera = camera
+        self._submitted(client_id, CAMERA, seq)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "received": self.received,
+            "applied": self.applied,
+            "coalescing_ratio": round(self.received / self.applied, 2) if self.applied else 0.0,
+        }
+
+    async def close(self):
+        """Stop applying; commands still pending are dropped."""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        if task is not asyncio.current_task():
+            # Not closed by a disconnect noticed while acknowledging
+            await asyncio.gather(task, return_exceptions=True)
+
+    def _submitted(self, client_id: str, command: str, seq: Any):
+        ack = self._batch.acks.setdefault((client_id, command), [None, 0])
+        if seq is not None:
+            ack[0] = seq
+        ack[1] += 1
+        self._batch.received += 1
+        self.received += 1
+        self._pending.set()
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        next_apply = 0.0
+        while True:
+            await self._pending.wait()
+            delay = next_apply - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            next_apply = time.monotonic() + self.tick
+
+            batch, self._batch = self._batch, CommandBatch()
+            self._pending.clear()
+            self.applied += 1
+            try:
+                await self._apply(batch)
+            except Exception as e:
+                logger.error("Failed to apply coalesced commands", error=str(e))
+            try:
+                await self._acknowledge(batch)
+            except Exception as e:
+                logger.error("Failed to acknowledge coalesced commands", error=str(e))
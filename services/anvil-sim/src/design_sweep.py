@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Design Sweeps - Parameter grids over URDF design variants
+A sweep expands a parameter grid into URDF variants, evaluates each distinct
+variant once on the shared process pool and streams results back as they
+finish. Variants are deduplicated by content hash.
+"""
+
+import asyncio
+import copy
+import hashlib
+import itertools
+import json
+import time
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Any, Sequence, Tuple, Union
+
+import numpy as np
+import structlog
+
+from collision import check_configurations
+from kinematics import chain_for_urdf
+from stress_analysis import stress_sweep
+from urdf_model import parse_urdf
+
+logger = structlog.get_logger(__name__)
+
+MAX_VARIANTS = 1000
+PAYLOAD_LINK = "sweep_payload"
+PAYLOAD_RADIUS = 0.05                  # m, inertia of the payload as a solid sphere
+
+VALIDATIONS = ("reach", "stress", "collision")
+DEFAULT_VALIDATIONS = ("reach", "stress")
+DEFAULT_OPTIONS = {
+    "stress_samples": 20_000,
+    "collision_samples": 2_000,
+    "safety_factor": 2.0,
+    "max_torque_threshold": 100.0,
+    "max_force_threshold": 1000.0,
+    "padding_mm": 1.0,
+    "max_distance_mm": 50.0,
+}
+
+# Results of evaluated variants, keyed by (variant digest, evaluation key)
+RESULT_CACHE_SIZE = 1024
+_result_cache: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+
+# Parameter type -> element the parameter targets
+PARAMETER_TYPES = {
+    "link_length": "joint",        # scales the joint origin offset from its parent link
+    "link_mass": "link",           # scales mass and inertia of a link
+    "joint_effort": "joint",       # sets the effort limit
+    "joint_velocity": "joint",     # sets the velocity limit
+    "joint_damping": "joint",      # sets <dynamics damping>, the drive damping in USD
+    "joint_friction": "joint",     # sets <dynamics friction>
+    "payload": "link",             # payload mass in kg fixed to a link
+}
+
+
+@dataclass(frozen=True)
+class SweepParameter:
+    """One axis of a sweep grid."""
+    name: str
+    type: str
+    target: Optional[str]
+    values: Tuple[float, ...]
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SweepParameter":
+        kind = data.get("type")
+        if kind not in PARAMETER_TYPES:
+            raise ValueError(f"Unknown sweep parameter type: {kind!r}")
+        values = tuple(float(v) for v in data.get("values") or ())
+        if not values:
+            raise ValueError(f"Sweep parameter {data.get('name') or kind} has no values")
+        if not all(np.isfinite(values)):
+            raise ValueError(f"Sweep parameter {data.get('name') or kind} has non-finite values")
+        target = data.get(PARAMETER_TYPES[kind])
+        if target is None and kind != "payload":
+            raise ValueError(f"Sweep parameter {kind} requires '{PARAMETER_TYPES[kind]}'")
+        if kind in ("link_length", "link_mass", "payload") and min(values) < 0:
+            raise ValueError(f"Sweep parameter {kind} values must not be negative")
+        return cls(name=data.get("name") or f"{kind}:{target or 'tip'}", type=kind, target=target, values=values)
+
+
+@dataclass
+class DesignVariant:
+    """One point of the grid and the URDF it produces."""
+    index: int
+    assignment: Dict[str, float]
+    content: bytes
+    digest: str
+
+
+def expand_grid(parameters: Sequence[SweepParameter]) -> List[Dict[str, float]]:
+    """Every combination of parameter values, in row-major order."""
+    names = [parameter.name for parameter in parameters]
+    if len(set(names)) != len(names):
+        raise ValueError("Sweep parameter names must be unique")
+    count = int(np.prod([len(parameter.values) for parameter in parameters])) if parameters else 0
+    if count > MAX_VARIANTS:
+        raise ValueError(f"Sweep grid has {count} variants; at most {MAX_VARIANTS} are allowed")
+    return [dict(zip(names, values)) for values in itertools.product(*(p.values for p in parameters))]
+
+
+def build_variants(urdf_content: Union[str, bytes],
+                   parameters: Sequence[SweepParameter]) -> List[DesignVariant]:
+    """
+    Generate the URDF of every grid point.
+
+    Values that leave an element unchanged (a scale of 1, a zero payload)
+    do not rewrite it, so equivalent variants serialize identically.
+    """
+    if isinstance(urdf_content, str):
+        urdf_content = urdf_content.encode("utf-8")
+    base = ET.fromstring(urdf_content)
+    tip = chain_for_urdf(urdf_content).tip_links[0]
+
+    if sum(parameter.type == "payload" for parameter in parameters) > 1:
+        raise ValueError("A sweep can vary at most one payload")
+    joints = {element.get("name"): element for element in base.findall("joint")}
+    links = {element.get("name"): element for element in base.findall("link")}
+    for parameter in parameters:
+        elements = joints if PARAMETER_TYPES[parameter.type] == "joint" else links
+        if parameter.target is not None and parameter.target not in elements:
+            raise ValueError(f"Unknown {PARAMETER_TYPES[parameter.type]} for {parameter.name}: {parameter.target}")
+
+    variants = []
+    for index, assignment in enumerate(expand_grid(parameters)):
+        root = copy.deepcopy(base)
+        for parameter in parameters:
+            _apply(root, parameter, assignment[parameter.name], tip)
+        content = ET.tostring(root, encoding="utf-8")
+        variants.append(DesignVariant(index, assignment, content, hashlib.sha256(content).hexdigest()))
+    return variants
+
+
+def _apply(root: ET.Element, parameter: SweepParameter, value: float, tip: str):
+    """Apply one parameter value to a variant tree in place."""
+    kind = parameter.type
+    if kind == "payload":
+        if value > 0:
+            _add_payload(root, parameter.target or tip, value)
+        return
+
+    if kind == "link_mass":
+        if value == 1.0:
+            return
+        inertial = root.find(f"link[@name='{parameter.target}']/inertial")
+        if inertial is None:
+            raise ValueError(f"Link {parameter.target} has no inertial to scale")
+        for element in inertial.iter():
+            for attribute in ("value", "ixx", "ixy", "ixz", "iyy", "iyz", "izz"):
+                if element.tag in ("mass", "inertia") and element.get(attribute) is not None:
+                    element.set(attribute, _num(float(element.get(attribute)) * value))
+        return
+
+    joint = root.find(f"joint[@name='{parameter.target}']")
+    if kind == "link_length":
+        if value == 1.0:
+            return
+        origin = joint.find("origin")
+        if origin is None or origin.get("xyz") is None:
+            raise ValueError(f"Joint {parameter.target} has no origin offset to scale")
+        xyz = [float(v) * value for v in origin.get("xyz").split()]
+        origin.set("xyz", " ".join(_num(v) for v in xyz))
+    elif kind in ("joint_effort", "joint_velocity"):
+        limit = joint.find("limit")
+        if limit is None:
+            limit = ET.SubElement(joint, "limit")
+        limit.set(kind[len("joint_"):], _num(value))
+    else:
+        dynamics = joint.find("dynamics")
+        if dynamics is None:
+            dynamics = ET.SubElement(joint, "dynamics")
+        dynamics.set(kind[len("joint_"):], _num(value))
+
+
+def _add_payload(root: ET.Element, link: str, mass: float):
+    """Fix a payload of the given mass to a link as a solid sphere."""
+    inertia = _num(0.4 * mass * PAYLOAD_RADIUS ** 2)
+    payload = ET.SubElement(root, "link", name=PAYLOAD_LINK)
+    inertial = ET.SubElement(payload, "inertial")
+    ET.SubElement(inertial, "mass", value=_num(mass))
+    ET.SubElement(inertial, "inertia", ixx=inertia, ixy="0", ixz="0", iyy=inertia, iyz="0", izz=inertia)
+    joint = ET.SubElement(root, "joint", name=f"{PAYLOAD_LINK}_joint", type="fixed")
+    ET.SubElement(joint, "parent", link=link)
+    ET.SubElement(joint, "child", link=PAYLOAD_LINK)
+
+
+def _num(value: float) -> str:
+    return f"{value:.9g}"
+
+
+def evaluate_variant(args) -> Dict[str, Any]:
+    """
+    Evaluate one variant (process pool task).
+
+    Runs inline in the worker: the sweep parallelizes across variants.
+    """
+    content, digest, validations, options, tip, base_dir, root = args
+    started = time.perf_counter()
+    model = parse_urdf(content)
+    chain = chain_for_urdf(content, digest)
+    result: Dict[str, Any] = {
+        "mass_kg": round(sum(link.inertial.mass for link in model.links.values()
+                             if link.inertial is not None and link.inertial.mass > 0), 4),
+        "dof": chain.dof,
+    }
+
+    if "reach" in validations:
+        result["reach_m"] = round(chain.reach_bound(tip), 4)
+
+    if "stress" in validations:
+        sweep = stress_sweep(
+            content, samples=options["stress_samples"], safety_factor=options["safety_factor"],
+            max_torque_threshold=options["max_torque_threshold"],
+            max_force_threshold=options["max_force_threshold"],
+        )
+        result["stress"] = {
+            "passed": sweep["passed"],
+            "min_safety_factor": sweep["min_safety_factor"],
+            "critical_joint": sweep["critical_joint"],
+            "peak_loads": {joint["name"]: joint["peak_load"] for joint in sweep["joints"]},
+        }
+
+    if "collision" in validations:
+        q = chain.sample(options["collision_samples"], seed=0)
+        collision_model, report = check_configurations(
+            content, q, options["padding_mm"] / 1000.0, options["max_distance_mm"] / 1000.0,
+            base_dir=base_dir, root=root
+        )
+        summary = report.to_dict(collision_model)
+        result["collision"] = {
+            "colliding_fraction": round(summary["colliding_configurations"] / max(summary["configurations"], 1), 5),
+            "min_clearance_mm": round(summary["min_clearance_m"] * 1000.0, 3)
+                                if summary["min_clearance_m"] is not None else None,
+            "colliding_pairs": summary["colliding_pairs"],
+        }
+
+    checks = []
+    if "stress" in result:
+        checks.append(result["stress"]["passed"])
+    if "collision" in result:
+        checks.append(result["collision"]["colliding_fraction"] == 0)
+    result["passed"] = all(checks)
+    result["evaluate_seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+async def run_sweep(urdf_content: Union[str, bytes], parameters: Sequence[Dict[str, Any]],
+                    validations: Sequence[str] = DEFAULT_VALIDATIONS,
+                    options: Optional[Dict[str, Any]] = None,
+                    executor=None, base_dir: Optional[str] = None,
+                    root: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Evaluate a parameter grid, yielding results as variants finish.
+
+    Yields one ``{"type": "variant", ...}`` record per grid point (variants
+    sharing a content hash are reported together) and a final
+    ``{"type": "summary", ...}`` record.
+
+    Args:
+        urdf_content: Base URDF document
+        parameters: Sweep parameter dicts (see SweepParameter.from_dict)
+        validations: Subset of VALIDATIONS to run per variant
+        options: Overrides of DEFAULT_OPTIONS
+        executor: Executor running the evaluations (the shared process pool)
+        base_dir: Directory of the base URDF, which variants resolve their
+            mesh references against
+        root: Directory tree meshes may resolve into, e.g. the bundle the
+            URDF came from; defaults to base_dir
+    """
+    started = time.perf_counter()
+    unknown = set(validations) - set(VALIDATIONS)
+    if unknown:
+        raise ValueError(f"Unknown validations: {sorted(unknown)}")
+    settings = dict(DEFAULT_OPTIONS, **{k: v for k, v in (options or {}).items() if k in DEFAULT_OPTIONS})
+    for name in ("stress_samples", "collision_samples"):
+        settings[name] = int(settings[name])
+        if not 100 <= settings[name] <= 1_000_000:
+            raise ValueError(f"{name} must be between 100 and 1000000")
+
+    if isinstance(urdf_content, str):
+        urdf_content = urdf_content.encode("utf-8")
+    sweep_parameters = [SweepParameter.from_dict(p) for p in parameters]
+    variants = build_variants(urdf_content, sweep_parameters)
+    link = chain_for_urdf(urdf_content).tip_links[0]
+    evaluation_key = hashlib.sha256(
+        json.dumps([sorted(validations), settings, link, base_dir, root], sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+    groups: "OrderedDict[str, List[DesignVariant]]" = OrderedDict()
+    for variant in variants:
+        groups.setdefault(variant.digest, []).append(variant)
+    logger.info("Design sweep started", variants=len(variants), unique=len(groups), validations=list(validations))
+
+    loop = asyncio.get_running_loop()
+    pending: Dict[asyncio.Future, str] = {}
+    finished = cached = failed = passed = 0
+    ready: List[Tuple[str, Dict[str, Any], bool]] = []
+    for digest, members in groups.items():
+        result = _result_cache.get((digest, evaluation_key))
+        if result is not None:
+            _result_cache.move_to_end((digest, evaluation_key))
+            ready.append((digest, result, True))
+            continue
+        task = (members[0].content, digest, tuple(validations), settings, link, base_dir, root)
+        pending[loop.run_in_executor(executor, evaluate_variant, task)] = digest
+
+    try:
+        while ready or pending:
+            if not ready:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    digest = pending.pop(future)
+                    try:
+                        result = future.result()
+                        _store_result((digest, evaluation_key), result)
+                    except Exception as e:
+                        logger.warning("Design variant failed", digest=digest, error=str(e))
+                        result = {"error": str(e), "passed": False}
+                    ready.append((digest, result, False))
+
+            digest, result, from_cache = ready.pop(0)
+            for variant in groups[digest]:
+                finished += 1
+                cached += from_cache
+                failed += "error" in result
+                passed += bool(result.get("passed"))
+                yield {
+                    "type": "variant",
+                    "index": variant.index,
+                    "assignment": variant.assignment,
+                    "digest": digest,
+                    "duplicates": len(groups[digest]) - 1,
+                    "cached": from_cache,
+                    "completed": finished,
+                    "total": len(variants),
+                    "result": result,
+                }
+    finally:
+        for future in pending:
+            future.cancel()
+
+    yield {
+        "type": "summary",
+        "variants": len(variants),
+        "unique_variants": len(groups),
+        "cached": cached,
+        "failed": failed,
+        "passed": passed,
+        "validations": list(validations),
+        "sweep_seconds": round(time.perf_counter() - started, 3),
+    }
+    logger.info("Design sweep finished", variants=len(variants), unique=len(groups),
+                seconds=round(time.perf_counter() - started, 3))
+
+
+def _store_result(key: Tuple[str, str], result: Dict[str, Any]):
+    _result_cache[key] = result
+    _result_cache.move_to_end(key)
+    while len(_result_cache) > RESULT_CACHE_SIZE:
+        _result_cache.popitem(last=False)
@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Inverse Kinematics
+Batched damped-least-squares IK on top of the compiled kinematic chain. All
+targets of a request are iterated together in vectorized numpy; solutions
+are cached per robot and quantized target and reused as warm starts.
+"""
+
+import argparse
+import hashlib
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Sequence, Tuple, Union
+
+import numpy as np
+
+from kinematics import KinematicChain, chain_for_urdf, compile_chain, _benchmark_urdf
+from urdf_model import parse_urdf, matrix_to_quat
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POSITION_TOLERANCE = 1e-4      # m
+DEFAULT_ORIENTATION_TOLERANCE = 1e-3   # rad
+DEFAULT_MAX_ITERATIONS = 100
+DEFAULT_RESTARTS = 3
+ORIENTED_RESTART_FACTOR = 8            # oriented targets get this many times the restarts
+DEFAULT_DAMPING = 3e-3                 # damping floor near the solution
+DAMPING_GAIN = 0.1                     # lambda^2 grows by this times the squared error
+MAX_STEP = 0.25                        # rad (m for prismatic joints) per joint and iteration
+MAX_TARGETS = 10_000
+
+# Cache keys round targets to these steps; hits are re-checked against the exact target
+POSITION_QUANTUM = 1e-4                # m
+ORIENTATION_QUANTUM = 1e-4             # quaternion component
+SOLUTION_CACHE_SIZE = 100_000
+
+# Solvers (and their solution caches) per (URDF digest, link)
+SOLVER_CACHE_SIZE = 64
+
+_solver_cache: "OrderedDict[Tuple[str, str], InverseKinematicsSolver]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+@dataclass
+class IKResult:
+    """Per-target results of one batch solve."""
+    joint_names: List[str]
+    link: str
+    q: np.ndarray                    # (N, dof)
+    converged: np.ndarray            # (N,) bool
+    position_error: np.ndarray       # (N,) m
+    orientation_error: np.ndarray    # (N,) rad, NaN for position-only targets
+    iterations: np.ndarray           # (N,)
+    cached: np.ndarray               # (N,) bool
+    elapsed_ms: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        solutions = []
+        for i in range(len(self.q)):
+            orientation_error = self.orientation_error[i]
+            solutions.append({
+                "converged": bool(self.converged[i]),
+                "joint_positions": [round(float(v), 6) for v in self.q[i]],
+                "position_error": float(self.position_error[i]),
+                "orientation_error": None if np.isnan(orientation_error) else float(orientation_error),
+                "iterations": int(self.iterations[i]),
+                "cached": bool(self.cached[i]),
+            })
+        return {
+            "link": self.link,
+            "joint_names": self.joint_names,
+            "count": len(solutions),
+            "converged": int(np.count_nonzero(self.converged)),
+            "cached": int(np.count_nonzero(self.cached)),
+            "solutions": solutions,
+            "solve_ms": round(self.elapsed_ms, 3),
+        }
+
+
+def quat_matrices(quats: np.ndarray) -> np.ndarray:
+    """(N, 3, 3) rotation matrices of (N, 4) (w, x, y, z) quaternions."""
+    quats = quats / np.linalg.norm(quats, axis=1, keepdims=True)
+    w, x, y, z = quats.T
+    return np.stack([
+        np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)], axis=-1),
+        np.stack([2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)], axis=-1),
+        np.stack([2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)], axis=-1),
+    ], axis=1)
+
+
+def rotation_error(current: np.ndarray, target: np.ndarray) -> np.ndarray:
+    """
+    Rotation vectors taking (N, 3, 3) current orientations to target ones,
+    in the root frame, so they pair with the angular Jacobian rows.
+    """
+    delta = target @ current.swapaxes(1, 2)
+    skew = 0.5 * np.stack([delta[:, 2, 1] - delta[:, 1, 2],
+                           delta[:, 0, 2] - delta[:, 2, 0],
+                           delta[:, 1, 0] - delta[:, 0, 1]], axis=1)
+    cos = np.clip((np.trace(delta, axis1=1, axis2=2) - 1.0) / 2.0, -1.0, 1.0)
+    angle = np.arccos(cos)
+    sin = np.linalg.norm(skew, axis=1)
+
+    scale = np.ones_like(angle)
+    regular = sin > 1e-9
+    scale[regular] = angle[regular] / sin[regular]
+    error = skew * scale[:, None]
+
+    # Near a half turn the skew part vanishes; the axis is the dominant column of R + I
+    flipped = (cos < -0.999) & (angle > np.pi / 2)
+    if np.any(flipped):
+        sym = delta[flipped] + np.eye(3)
+        columns = np.linalg.norm(sym, axis=1)
+        axis = sym[np.arange(len(sym)), :, np.argmax(columns, axis=1)]
+        axis /= np.linalg.norm(axis, axis=1, keepdims=True)
+        error[flipped] = axis * angle[flipped, None]
+    return error
+
+
+def parse_targets(targets: Sequence[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Validate request targets.
+
+    Each target is ``{"position": [x, y, z], "orientation": [w, x, y, z]}``
+    in the robot root link frame; the orientation is optional.
+
+    Returns:
+        (positions (N, 3), quaternions (N, 4), oriented (N,) mask)
+    """
+    if not targets:
+        raise ValueError("No targets given")
+    if len(targets) > MAX_TARGETS:
+        raise ValueError(f"At most {MAX_TARGETS} targets per request")
+
+    positions = np.zeros((len(targets), 3))
+    quats = np.tile([1.0, 0.0, 0.0, 0.0], (len(targets), 1))
+    oriented = np.zeros(len(targets), dtype=bool)
+    for i, target in enumerate(targets):
+        positions[i] = np.asarray(target["position"], dtype=float).reshape(3)
+        if target.get("orientation") is not None:
+            quat = np.asarray(target["orientation"], dtype=float).reshape(4)
+            norm = np.linalg.norm(quat)
+            if not norm > 1e-9:
+                raise ValueError(f"Target {i} has a zero orientation quaternion")
+            quats[i] = quat / norm
+            oriented[i] = True
+    if not np.all(np.isfinite(positions)) or not np.all(np.isfinite(quats)):
+        raise ValueError("Targets must be finite")
+    return positions, quats, oriented
+
+
+def solve_dls(chain: KinematicChain, link: Union[str, int], positions: np.ndarray,
+              rotations: np.ndarray, oriented: np.ndarray, seeds: np.ndarray,
+              position_tolerance: float = DEFAULT_POSITION_TOLERANCE,
+              orientation_tolerance: float = DEFAULT_ORIENTATION_TOLERANCE,
+              max_iterations: int = DEFAULT_MAX_ITERATIONS,
+              damping: float = DEFAULT_DAMPING) -> Tuple[np.ndarray, ...]:
+    """
+    Damped least squares, dq = J^T (J J^T + lambda^2 I)^-1 e, for a batch of
+    targets at once. Converged targets drop out of the working set, so late
+    iterations only pay for the stragglers.
+
+    The damping follows the error, lambda^2 = gain |e|^2 + damping^2: heavy
+    while far from the target, light near it so the last millimetres do not
+    crawl. Joints resting on a limit that the step would push further are
+    taken out of the Jacobian, so the remaining joints make up for them
+    instead of the step being clipped away.
+
+    Args:
+        chain: Kinematic chain
+        link: Link whose origin is placed on the targets
+        positions: (N, 3) target positions
+        rotations: (N, 3, 3) target orientations
+        oriented: (N,) mask of targets with an orientation constraint
+        seeds: (N, dof) initial configurations
+
+    Returns:
+        (q, converged, position_error, orientation_error, iterations)
+    """
+    count = len(positions)
+    q = np.clip(np.array(seeds, dtype=float), chain.lower, chain.upper)
+    converged = np.zeros(count, dtype=bool)
+    position_error = np.full(count, np.inf)
+    orientation_error = np.zeros(count)
+    iterations = np.zeros(count, dtype=np.int64)
+    identity = np.eye(6)
+    wrap = chain.continuous
+
+    active = np.arange(count)
+    for iteration in range(max_iterations + 1):
+        current_pos, current_rot, jacobians = chain.pose_jacobian(q[active], link)
+        error = np.empty((len(active), 6))
+        error[:, :3] = positions[active] - current_pos
+        error[:, 3:] = rotation_error(current_rot, rotations[active])
+        error[~oriented[active], 3:] = 0.0
+
+        pos_norm = np.linalg.norm(error[:, :3], axis=1)
+        rot_norm = np.linalg.norm(error[:, 3:], axis=1)
+        position_error[active] = pos_norm
+        orientation_error[active] = rot_norm
+        iterations[active] = iteration
+
+        done = (pos_norm <= position_tolerance) & (rot_norm <= orientation_tolerance)
+        converged[active[done]] = True
+        if iteration == max_iterations or done.all():
+            break
+
+        keep = ~done
+        active, error, jacobians = active[keep], error[keep], jacobians[keep]
+        jacobians[~oriented[active], 3:] = 0.0
+
+        regularizer = (DAMPING_GAIN * np.einsum("ij,ij->i", error, error) + damping ** 2)[:, None, None] * identity
+        jt = jacobians.swapaxes(1, 2)
+        step = (jt @ np.linalg.solve(jacobians @ jt + regularizer, error[:, :, None]))[:, :, 0]
+
+        current = q[active]
+        blocked = ((current <= chain.lower) & (step < 0)) | ((current >= chain.upper) & (step > 0))
+        if blocked.any():
+            jacobians = np.where(blocked[:, None, :], 0.0, jacobians)
+            jt = jacobians.swapaxes(1, 2)
+            step = (jt @ np.linalg.solve(jacobians @ jt + regularizer, error[:, :, None]))[:, :, 0]
+
+        largest = np.abs(step).max(axis=1, initial=0.0)
+        step *= (MAX_STEP / np.maximum(largest, MAX_STEP))[:, None]
+
+        updated = current + step
+        if wrap.any():
+            updated[:, wrap] = (updated[:, wrap] + np.pi) % (2 * np.pi) - np.pi
+        q[active] = np.clip(updated, chain.lower, chain.upper)
+
+    return q, converged, position_error, orientation_error, iterations
+
+
+class InverseKinematicsSolver:
+    """
+    Batch IK for one link of one robot.
+
+    Seeds come, in order of preference, from an explicit seed, the cached
+    solution of the quantized target, and the last solution this solver
+    returned. Targets that fail to converge are restarted from the solution
+    of the nearest converged target in the batch, then from random samples,
+    unless they lie beyond the link's reach bound. Oriented targets get
+    ``ORIENTED_RESTART_FACTOR`` times the restarts: a joint-limited arm has
+    few configurations reaching a full pose, and many seeds end in a local
+    minimum.
+    """
+
+    def __init__(self, chain: KinematicChain, link: Optional[str] = None,
+                 cache_size: int = SOLUTION_CACHE_SIZE):
+        self.chain = chain
+        self.link = link or chain.tip_links[0]
+        if self.link not in chain.link_index:
+            raise ValueError(f"Unknown link: {self.link}")
+        self.cache_size = cache_size
+        self.reach = chain.reach_bound(self.link)
+        self._solutions: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._last: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def solve(self, positions: np.ndarray, quats: Optional[np.ndarray] = None,
+              oriented: Optional[np.ndarray] = None, seed: Optional[Sequence[float]] = None,
+              position_tolerance: float = DEFAULT_POSITION_TOLERANCE,
+              orientation_tolerance: float = DEFAULT_ORIENTATION_TOLERANCE,
+              max_iterations: int = DEFAULT_MAX_ITERATIONS,
+              restarts: int = DEFAULT_RESTARTS, random_seed: int = 0) -> IKResult:
+        """
+        Solve a batch of targets.
+
+        Args:
+            positions: (N, 3) target positions in the root link frame
+            quats: (N, 4) target orientations as (w, x, y, z), if any
+            oriented: (N,) mask of targets whose orientation is constrained
+            seed: Configuration to start every uncached target from
+            restarts: Extra attempts for position-only targets that did not
+                converge; oriented targets get ``ORIENTED_RESTART_FACTOR`` times
+                as many
+            random_seed: Seed of the restart samples
+        """
+        started = time.perf_counter()
+        chain = self.chain
+        positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        count = len(positions)
+        if quats is None:
+            quats = np.tile([1.0, 0.0, 0.0, 0.0], (count, 1))
+            oriented = np.zeros(count, dtype=bool)
+        elif oriented is None:
+            oriented = np.ones(count, dtype=bool)
+        quats = np.asarray(quats, dtype=float).reshape(-1, 4)
+        oriented = np.asarray(oriented, dtype=bool)
+        rotations = quat_matrices(quats)
+        keys = self._keys(positions, quats, oriented)
+
+        # Seeds: explicit, then cached, then the last solution, then mid-range
+        cached = np.zeros(count, dtype=bool)
+        with self._lock:
+            default = self._last
+            seeds = np.empty((count, chain.dof))
+            for i, key in enumerate(keys):
+                hit = self._solutions.get(key)
+                if hit is not None:
+                    self._solutions.move_to_end(key)
+                    seeds[i] = hit
+                    cached[i] = True
+        if seed is not None:
+            default = np.asarray(seed, dtype=float).reshape(chain.dof)
+        elif default is None:
+            default = np.clip(np.zeros(chain.dof), chain.lower, chain.upper)
+        seeds[~cached] = default
+
+        q, converged, pos_err, rot_err, iterations = solve_dls(
+            chain, self.link, positions, rotations, oriented, seeds,
+            position_tolerance, orientation_tolerance, max_iterations
+        )
+        # A cache hit counts only if the cached solution already met the tolerances
+        cached &= converged & (iterations == 0)
+
+        # Targets beyond the reach bound cannot converge; do not restart them
+        within = np.linalg.norm(positions, axis=1) <= self.reach + position_tolerance
+        rng = np.random.default_rng(random_seed)
+        oriented_restarts = restarts * ORIENTED_RESTART_FACTOR if oriented.any() else restarts
+        for attempt in range(oriented_restarts):
+            retrying = within if attempt < restarts else within & oriented
+            failed = np.flatnonzero(~converged & retrying)
+            if len(failed) == 0:
+                break
+            solved = np.flatnonzero(converged)
+            if attempt == 0 and len(solved):
+                distances = np.linalg.norm(positions[failed, None] - positions[None, solved], axis=2)
+                retry_seeds = q[solved[np.argmin(distances, axis=1)]]
+            else:
+                retry_seeds = chain.sample(len(failed), rng.integers(1 << 31))
+
+            retry = solve_dls(chain, self.link, positions[failed], rotations[failed], oriented[failed],
+                              retry_seeds, position_tolerance, orientation_tolerance, max_iterations)
+            better = retry[1] | (retry[2] + retry[3] < pos_err[failed] + rot_err[failed])
+            better &= ~converged[failed]
+            index = failed[better]
+            q[index], converged[index] = retry[0][better], retry[1][better]
+            pos_err[index], rot_err[index] = retry[2][better], retry[3][better]
+            iterations[index] += retry[4][better]
+
+        with self._lock:
+            for i in np.flatnonzero(converged & ~cached):
+                self._solutions[keys[i]] = q[i].copy()
+                self._solutions.move_to_end(keys[i])
+            while len(self._solutions) > self.cache_size:
+                self._solutions.popitem(last=False)
+            if converged.any():
+                self._last = q[np.flatnonzero(converged)[-1]].copy()
+
+        rot_err[~oriented] = np.nan
+        result = IKResult(
+            joint_names=list(chain.joint_names), link=self.link, q=q, converged=converged,
+            position_error=pos_err, orientation_error=rot_err, iterations=iterations,
+            cached=cached, elapsed_ms=(time.perf_counter() - started) * 1000,
+        )
+        logger.debug(f"IK batch of {count} targets for {chain.name}/{self.link}: "
+                     f"{int(converged.sum())} converged, {int(cached.sum())} cached, "
+                     f"{result.elapsed_ms:.1f} ms")
+        return result
+
+    def clear(self):
+        """Drop cached solutions and the warm start."""
+        with self._lock:
+            self._solutions.clear()
+            self._last = None
+
+    @staticmethod
+    def _keys(positions: np.ndarray, quats: np.ndarray, oriented: np.ndarray) -> List[bytes]:
+        """Cache keys of quantized targets; q and -q are the same orientation."""
+        quats = np.where(quats[:, :1] < 0, -quats, quats)
+        quantized = np.empty((len(positions), 7), dtype=np.int64)
+        quantized[:, :3] = np.round(positions / POSITION_QUANTUM)
+        quantized[:, 3:] = np.round(quats / ORIENTATION_QUANTUM)
+        quantized[~oriented, 3:] = np.iinfo(np.int64).min
+        return [row.tobytes() for row in quantized]
+
+
+def solver_for(urdf_content: Union[str, bytes], digest: Optional[str] = None,
+               link: Optional[str] = None) -> InverseKinematicsSolver:
+    """
+    IK solver of a URDF document and link, cached by content hash so warm
+    starts and solutions carry over between requests.
+    """
+    if isinstance(urdf_content, str):
+        urdf_content = urdf_content.encode("utf-8")
+    digest = digest or hashlib.sha256(urdf_content).hexdigest()
+    chain = chain_for_urdf(urdf_content, digest)
+    key = (digest, link or chain.tip_links[0])
+
+    with _cache_lock:
+        solver = _solver_cache.get(key)
+        if solver is not None:
+            _solver_cache.move_to_end(key)
+            return solver
+
+    solver = InverseKinematicsSolver(chain, key[1])
+    with _cache_lock:
+        solver = _solver_cache.setdefault(key, solver)
+        while len(_solver_cache) > SOLVER_CACHE_SIZE:
+            _solver_cache.popitem(last=False)
+    return solver
+
+
+def solve_request(urdf_content: Union[str, bytes], digest: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Solve an /ik/solve request body; raises ValueError on invalid input."""
+    positions, quats, oriented = parse_targets(data.get("targets") or [])
+    solver = solver_for(urdf_content, digest, data.get("link"))
+
+    max_iterations = int(data.get("max_iterations", DEFAULT_MAX_ITERATIONS))
+    restarts = int(data.get("restarts", DEFAULT_RESTARTS))
+    if not 1 <= max_iterations <= 1000:
+        raise ValueError("max_iterations must be between 1 and 1000")
+    if not 0 <= restarts <= 20:
+        raise ValueError("restarts must be between 0 and 20")
+
+    seed = data.get("seed")
+    if seed is not None and len(seed) != solver.chain.dof:
+        raise ValueError(f"seed must have {solver.chain.dof} joint values")
+
+    result = solver.solve(
+        positions, quats, oriented, seed=seed,
+        position_tolerance=float(data.get("position_tolerance", DEFAULT_POSITION_TOLERANCE)),
+        orientation_tolerance=float(data.get("orientation_tolerance", DEFAULT_ORIENTATION_TOLERANCE)),
+        max_iterations=max_iterations, restarts=restarts, random_seed=int(data.get("random_seed", 0)),
+    )
+    return result.to_dict()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched inverse kinematics")
+    parser.add_argument("-n", "--targets", type=int, default=500, help="Targets per batch")
+    parser.add_argument("--position-only", action="store_true", help="Ignore target orientations")
+    args = parser.parse_args()
+
+    chain = compile_chain(parse_urdf(_benchmark_urdf()))
+    link = chain.tip_links[0]
+    truth = chain.sample(args.targets, seed=1)
+    positions, rotations = chain.forward(truth, [link])
+    quats = np.array([matrix_to_quat(r.tolist()) for r in rotations[:, 0]])
+
+    # Every target is reachable by construction, so all of them must converge
+    solver = InverseKinematicsSolver(chain, link)
+    failed = 0
+    for label in ("cold", "cached"):
+        result = solver.solve(positions[:, 0], None if args.position_only else quats)
+        failed = max(failed, args.targets - int(result.converged.sum()))
+        print(f"{label:6s} {args.targets} targets: {int(result.converged.sum())} converged, "
+              f"{int(result.cached.sum())} cached, {result.elapsed_ms:8.1f} ms, "
+              f"max position error {float(np.max(result.position_error)):.2e} m")
+
+    if failed:
+        print(f"{failed} of {args.targets} reachable targets did not converge")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,14 +7,29 @@ Handles Isaac Sim lifecycle, scene management, and WebRTC streaming.
 import asyncio
 import logging
 import os
+import time
 import uuid
-from typing import Dict, Optional, Any, List
+from typing import AsyncIterator, Dict, Optional, Any, List, Sequence, Union
 import json
 from dataclasses import dataclass
 from datetime import datetime
 
+import numpy as np
 import structlog
 
+from blob_store import BlobStore
+from robot_summary import summarize_urdf_content
+from urdf_preflight import preflight_urdf
+from kinematics import chain_for_urdf
+from physics_backend import (
+    PhysicsBackend, IsaacPhysicsBackend, TelemetryBatch, create_numpy_backend,
+    MAX_STEPS_PER_BATCH
+)
+from telemetry_buffer import TelemetryRingBuffer, TelemetrySampler
+from telemetry_codec import TelemetrySchema
+from telemetry_store import TelemetryStore, TelemetryRecorder
+from joint_trajectory import JointTrajectory, TrajectoryExecution, CUBIC, DEFAULT_ACCEL_FRACTION
+
 # Isaac Sim imports (graceful degradation if not available)
 try:
     import omni
@@ -55,13 +70,36 @@ class SimulationSession:
     quality_profile: str
     created_at: datetime
     robot: Optional[Any] = None
+    articulation: Optional[Any] = None  # Isaac Sim Articulation of the loaded robot
     world: Optional[World] = None
     status: str = "initializing"
     participants: List[str] = None
+    robot_summary: Optional[Dict[str, Any]] = None
+    urdf_digest: Optional[str] = None
+    physics: Optional[PhysicsBackend] = None
+    physics_lock: Optional[asyncio.Lock] = None
+    telemetry: Optional[TelemetryRingBuffer] = None
+    sampler: Optional[TelemetrySampler] = None
+    recorder: Optional[TelemetryRecorder] = None
+    trajectory: Optional[TrajectoryExecution] = None
+    clock: float = 0.0  # simulation time advanced while no robot is loaded
+    robot_changed: Optional[asyncio.Event] = None
     
     def __post_init__(self):
         if self.participants is None:
             self.participants = []
+        if self.physics_lock is None:
+            self.physics_lock = asyncio.Lock()
+        if self.robot_changed is None:
+            self.robot_changed = asyncio.Event()
+    
+    @property
+    def has_robot(self) -> bool:
+        return self.urdf_digest is not None or self.articulation is not None
+    
+    def notify_robot_changed(self):
+        changed, self.robot_changed = self.robot_changed, asyncio.Event()
+        changed.set()
 
 class IsaacSimManager:
     """
@@ -75,6 +113,10 @@ class IsaacSimManager:
         self.active_sessions: Dict[str, SimulationSession] = {}
         self.isaac_sim_available = ISAAC_SIM_AVAILABLE
         self.initialized = False
+        # URDF text is stored once per distinct content and shared by sessions
+        self.blob_store = BlobStore(ASSET_PATHS['blob_store'])
+        # Telemetry of every session is kept on disk after the session ends
+        self.telemetry_store = TelemetryStore(ASSET_PATHS['telemetry_store'])
         
     async def initialize(self) -> bool:
         """
@@ -201,13 +243,13 @@ class IsaacSimManager:
                 
                 # Load environment
                 await self._load_environment(session, environment)
+                session.world = self.world
                 
                 # Load robot if URDF provided
                 if urdf_content:
                     robot = await self._load_robot_from_urdf(session, urdf_content)
                     session.robot = robot
                 
-                session.world = self.world
                 session.status = "ready"
                 
                 logger.info("Isaac Sim session created", session_id=session_id,
@@ -251,46 +293,123 @@ class IsaacSimManager:
     async def _load_robot_from_urdf(self, session: SimulationSession, urdf_content: str):
         """Load robot from URDF content."""
         try:
+            # Fail fast on broken URDFs before anything is stored or loaded
+            preflight = preflight_urdf(urdf_content, check_meshes=False)
+            if not preflight.ok:
+                logger.warning("URDF rejected by preflight", session_id=session.id,
+                               errors=[issue.message for issue in preflight.errors])
+            preflight.raise_for_errors()
+
+            # Sessions share one stored copy per distinct URDF
+            urdf_digest = self.blob_store.put(urdf_content)
+            try:
+                # Structure facts are extracted once per distinct URDF
+                robot_summary = summarize_urdf_content(urdf_content, urdf_digest)
+            except Exception:
+                self.blob_store.release(urdf_digest)
+                raise
+            
+            async with session.physics_lock:
+                self.blob_store.release(session.urdf_digest)
+                session.urdf_digest = urdf_digest
+                session.robot_summary = robot_summary
+                # Physics and telemetry are rebuilt for the new robot on the next step
+                self._cancel_trajectory(session, "Robot changed")
+                session.physics = None
+                self._close_telemetry(session)
+                self._remove_articulation(session)
+            
             if not self.isaac_sim_available:
                 # Simulation mode
-                return {"type": "simulated_robot", "urdf": urdf_content[:100] + "..."}
-            
-            # Save URDF to temporary file
-            urdf_path = f"{ASSET_PATHS['urdf_cache']}/{session.id}.urdf"
-            os.makedirs(os.path.dirname(urdf_path), exist_ok=True)
+                session.notify_robot_changed()
+                return {"type": "simulated_robot", "urdf_digest": urdf_digest}
             
-            with open(urdf_path, 'w') as f:
-                f.write(urdf_content)
+            urdf_path = str(self.blob_store.path(urdf_digest))
             
-            # In real Isaac Sim, this would use the URDF loader
-            # For now, we simulate robot loading
             logger.info("Loading robot from URDF", 
                        session_id=session.id,
-                       urdf_length=len(urdf_content))
+                       urdf_length=len(urdf_content),
+                       urdf_digest=urdf_digest)
             
-            # Simulate loading time
-            await asyncio.sleep(1.0)
+            async with session.physics_lock:
+                session.articulation = self._import_articulation(session, urdf_path)
+                # Drop a stand-in backend built while the import was pending
+                session.physics = None
+                self._close_telemetry(session)
+            session.notify_robot_changed()
             
-            return {"type": "isaac_sim_robot", "urdf_path": urdf_path}
+            return {"type": "isaac_sim_robot", "urdf_path": urdf_path, "urdf_digest": urdf_digest,
+                    "prim_path": session.articulation.prim_path if session.articulation is not None else None}
             
         except Exception as e:
             logger.error("Failed to load robot from URDF", 
                         session_id=session.id, error=str(e))
             raise
     
-    async def update_joint_states(self, session_id: str, joint_states: Dict[str, float]):
-        """Update robot joint states in simulation."""
+    def _import_articulation(self, session: SimulationSession, urdf_path: str) -> Optional[Any]:
+        """
+        Import a URDF into the session's world and return its Articulation,
+        initialized by a world reset. Returns None if the import fails, in
+        which case the numpy backend stands in for the session's physics.
+        """
+        if session.world is None:
+            return None
+        try:
+            import omni.kit.commands
+            from omni.isaac.core.articulations import Articulation
+            from omni.isaac.urdf import _urdf
+            
+            import_config = _urdf.ImportConfig()
+            import_config.merge_fixed_joints = False
+            import_config.fix_base = True
+            status, prim_path = omni.kit.commands.execute(
+                "URDFParseAndImportFile", urdf_path=urdf_path, import_config=import_config
+            )
+            if not status or not prim_path:
+                raise RuntimeError(f"URDF import failed for {urdf_path}")
+            
+            articulation = session.world.scene.add(Articulation(prim_path=prim_path, name=f"robot_{session.id}"))
+            # Articulations only know their DOFs once the world has been reset
+            session.world.reset()
+            logger.info("Robot articulation created", session_id=session.id,
+                       prim_path=prim_path, dof=articulation.num_dof)
+            return articulation
+            
+        except Exception as e:
+            logger.warning("Failed to create robot articulation, using numpy physics",
+                          session_id=session.id, error=str(e))
+            return None
+    
+    def _remove_articulation(self, session: SimulationSession):
+        if session.articulation is None:
+            return
+        try:
+            session.world.scene.remove_object(session.articulation.name)
+        except Exception as e:
+            logger.warning("Failed to remove robot articulation", session_id=session.id, error=str(e))
+        session.articulation = None
+    
+    async def update_joint_states(self, session_id: str, joint_states: Union[Dict[str, float], Sequence[float]]):
+        """
+        Set a session's joint drive targets, by joint name or as a full
+        vector in the physics backend's joint order.
+        """
         session = self.active_sessions.get(session_id)
         if not session:
             raise ValueError(f"Session {session_id} not found")
         
         try:
-            if self.isaac_sim_available and session.robot:
-                # Update actual robot joints
-                for joint_name, value in joint_states.items():
-                    # In real Isaac Sim, this would set joint positions
-                    pass
-                    
+            # The backend may be stepping on an executor thread
+            async with session.physics_lock:
+                self._cancel_trajectory(session, "Overridden by joint command")
+                if not session.has_robot:
+                    logger.debug("No robot loaded, joint states ignored", session_id=session_id)
+                    return
+                # Drive targets for batched physics stepping, applied in one
+                # articulation action when the backend is Isaac Sim; the
+                # backend is built now so targets sent before the first step hold
+                self.physics_backend(session).set_targets(joint_states)
+            
             # Log for demo/simulation mode
             logger.debug("Updated joint states", 
                         session_id=session_id,
@@ -302,54 +421,270 @@ class IsaacSimManager:
             raise
     
     async def step_simulation(self, session_id: str) -> Dict[str, Any]:
-        """Step the simulation and return telemetry data."""
-        session = self.active_sessions.get(session_id)
-        if not session:
-            raise ValueError(f"Session {session_id} not found")
-        
+        """Step the simulation once and return telemetry data."""
         try:
-            if self.isaac_sim_available and session.world:
-                # Step Isaac Sim physics
-                await session.world.step_async()
-                
-                # Collect telemetry
-                telemetry = {
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "session_id": session_id,
-                    "physics_fps": 60.0,  # Would get from Isaac Sim
-                    "rendering_fps": 60.0,
-                    "robot_pose": {"position": [0, 0, 0], "orientation": [0, 0, 0, 1]},
-                    "joint_states": {},  # Would get from robot
-                    "physics_metrics": {
-                        "total_energy": 145.2,
-                        "collision_count": 0,
-                        "stability_score": 0.98
-                    }
-                }
-            else:
-                # Simulation mode telemetry
-                telemetry = {
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "session_id": session_id,
-                    "mode": "simulation",
-                    "physics_fps": 60.0,
-                    "rendering_fps": 60.0,
-                    "robot_pose": {"position": [0, 0, 0], "orientation": [0, 0, 0, 1]},
-                    "joint_states": {},
-                    "physics_metrics": {
-                        "total_energy": 145.2,
-                        "collision_count": 0, 
-                        "stability_score": 0.98
-                    }
-                }
-            
-            return telemetry
+            await self.step_simulation_batch(session_id, 1)
+            return self.telemetry_snapshot(self.active_sessions[session_id])
             
         except Exception as e:
             logger.error("Failed to step simulation", 
                         session_id=session_id, error=str(e))
             raise
     
+    def telemetry_snapshot(self, session: SimulationSession) -> Dict[str, Any]:
+        """Newest recorded telemetry of a session, without stepping it."""
+        telemetry = {
+            "timestamp": datetime.utcnow().isoformat(),
+            "session_id": session.id,
+            "mode": "isaac_sim" if self.isaac_sim_available else "simulation",
+            "realtime": session.sampler is not None and session.sampler.running,
+            "physics_fps": 0.0,
+            "joint_states": {},
+        }
+        if session.telemetry is not None:
+            telemetry["physics_fps"] = round(session.telemetry.physics_fps, 1)
+            telemetry.update(session.telemetry.latest() or {})
+        elif not session.has_robot:
+            telemetry["simulation_time"] = round(session.clock, 6)
+        return telemetry
+    
+    def telemetry_buffer(self, session: SimulationSession) -> TelemetryRingBuffer:
+        """
+        Ring buffer recording every physics step of a session, created with
+        the session's physics backend and replaced when the robot changes.
+        """
+        if session.telemetry is None:
+            backend = self.physics_backend(session)
+            chain = None
+            if session.urdf_digest:
+                chain = chain_for_urdf(self.blob_store.read_bytes(session.urdf_digest), session.urdf_digest)
+            capacity = max(2, int(PERFORMANCE_SETTINGS["telemetry_history_seconds"] / backend.dt))
+            session.telemetry = TelemetryRingBuffer(backend.joint_names, backend.dt, capacity, chain)
+            
+            if PERFORMANCE_SETTINGS["telemetry_recording"]:
+                schema = TelemetrySchema(backend.joint_names, session.telemetry.pose_link)
+                writer = self.telemetry_store.create(
+                    session.id, schema.channels, backend.dt, joint_names=backend.joint_names,
+                    pose_link=schema.pose_link, urdf_digest=session.urdf_digest, backend=backend.name,
+                    robot=session.robot_summary["name"] if session.robot_summary else None,
+                )
+                session.recorder = TelemetryRecorder(writer, session.telemetry)
+        return session.telemetry
+    
+    async def subscribe_telemetry(self, session_id: str, rate_hz: float,
+                                  rows: bool = False) -> AsyncIterator[Any]:
+        """
+        Yield a session's telemetry samples at ``rate_hz`` of simulation time
+        as they are recorded, following robot changes, until the session ends.
+        Subscribing never steps the simulation.
+        
+        With ``rows``, yields (buffer, steps, times, values) chunks instead of
+        sample dicts; a new buffer means the robot, and so the layout, changed.
+        """
+        while True:
+            session = self.active_sessions.get(session_id)
+            if session is None:
+                return
+            if not session.has_robot:
+                # Nothing to report until a robot is loaded or the session ends
+                await session.robot_changed.wait()
+                continue
+            buffer = self.telemetry_buffer(session)
+            async for item in buffer.subscribe(rate_hz, rows):
+                yield (buffer, *item) if rows else item
+    
+    async def start_realtime(self, session_id: str):
+        """Advance a session's physics in real time until stopped."""
+        session = self.active_sessions.get(session_id)
+        if not session:
+            raise ValueError(f"Session {session_id} not found")
+        
+        if not session.has_robot:
+            # Without a robot there is no physics state worth advancing in real time
+            logger.info("No robot loaded, real-time physics not started", session_id=session_id)
+            return
+        
+        # Fail now rather than in the background if the robot cannot be simulated
+        self.telemetry_buffer(session)
+        if session.sampler is None:
+            session.sampler = TelemetrySampler(
+                lambda num_steps: self.step_simulation_batch(session_id, num_steps),
+                ISAAC_SIM_CONFIG["physics_dt"], ISAAC_SIM_CONFIG["rendering_dt"]
+            )
+        session.sampler.start()
+        logger.info("Real-time physics started", session_id=session_id)
+    
+    async def stop_realtime(self, session_id: str):
+        """Stop real-time stepping of a session; its telemetry stays readable."""
+        session = self.active_sessions.get(session_id)
+        if session and session.sampler is not None:
+            await session.sampler.stop()
+            logger.info("Real-time physics stopped", session_id=session_id,
+                        dropped_steps=session.sampler.dropped_steps)
+    
+    async def execute_trajectory(self, session_id: str, waypoints: List[Dict[str, Any]],
+                                 method: str = CUBIC,
+                                 accel_fraction: float = DEFAULT_ACCEL_FRACTION) -> TrajectoryExecution:
+        """
+        Follow timed joint waypoints from the current joint positions. The
+        trajectory is sampled at the physics rate by whatever advances the
+        session (real-time stepping or batches) and replaces any trajectory
+        still running; a joint command or a robot change cancels it.
+        """
+        session = self.active_sessions.get(session_id)
+        if not session:
+            raise ValueError(f"Session {session_id} not found")
+        
+        async with session.physics_lock:
+            backend = self.physics_backend(session)
+            trajectory = JointTrajectory.from_waypoints(
+                waypoints, backend.joint_names, backend.joint_positions(), method, accel_fraction
+            )
+            execution = TrajectoryExecution(trajectory, backend.time)
+            self._cancel_trajectory(session, f"Replaced by trajectory {execution.trajectory_id}")
+            session.trajectory = execution
+        
+        logger.info("Trajectory started", session_id=session_id, trajectory_id=execution.trajectory_id,
+                    method=method, waypoints=len(waypoints), duration=trajectory.duration)
+        return execution
+    
+    def cancel_trajectory(self, session_id: str) -> Optional[TrajectoryExecution]:
+        """Stop a session's running trajectory, if any; the drives hold their targets."""
+        session = self.active_sessions.get(session_id)
+        if not session:
+            raise ValueError(f"Session {session_id} not found")
+        execution = session.trajectory
+        self._cancel_trajectory(session)
+        return execution
+    
+    def _cancel_trajectory(self, session: SimulationSession, message: str = "Cancelled"):
+        if session.trajectory is not None:
+            session.trajectory.cancel(message)
+            session.trajectory = None
+    
+    def _record(self, session: SimulationSession, telemetry: TelemetryRingBuffer, batch: TelemetryBatch):
+        """Write a batch into the ring buffer, draining it to disk often enough to lose nothing."""
+        recorder = session.recorder
+        if recorder is None:
+            telemetry.write(batch)
+            return
+        for start in range(0, batch.steps, recorder.max_write):
+            telemetry.write(batch.slice(start, start + recorder.max_write))
+            recorder.drain()
+    
+    def _close_telemetry(self, session: SimulationSession):
+        if session.recorder is not None:
+            try:
+                session.recorder.close()
+            except Exception as e:
+                logger.error("Failed to close telemetry run", session_id=session.id, error=str(e))
+            session.recorder = None
+        if session.telemetry is not None:
+            session.telemetry.close()
+            session.telemetry = None
+    
+    def physics_backend(self, session: SimulationSession, fresh: bool = False) -> PhysicsBackend:
+        """
+        Render-free physics backend of a session: the session's Isaac Sim
+        world when the robot was imported as an articulation, otherwise the
+        numpy stand-in built from the session URDF.
+        
+        Args:
+            session: Session with a loaded robot
+            fresh: Return a new numpy stand-in instead of the session's own
+                backend; it never touches the session's (shared) Isaac world
+        """
+        if session.physics is not None and not fresh:
+            return session.physics
+        
+        if (not fresh and self.isaac_sim_available and session.world is not None
+                and session.articulation is not None):
+            backend = IsaacPhysicsBackend(session.world, session.articulation, ISAAC_SIM_CONFIG["physics_dt"])
+        else:
+            if not session.urdf_digest:
+                raise ValueError(f"Session {session.id} has no robot loaded")
+            thresholds = VALIDATION_SETTINGS["stress_validation"]
+            backend = create_numpy_backend(
+                self.blob_store.read_bytes(session.urdf_digest), ISAAC_SIM_CONFIG["physics_dt"],
+                session.urdf_digest, thresholds["max_torque_threshold"], thresholds["max_force_threshold"]
+            )
+        
+        if not fresh:
+            session.physics = backend
+        return backend
+    
+    async def step_simulation_batch(self, session_id: str, num_steps: int,
+                                    joint_targets: Optional[Dict[str, float]] = None,
+                                    with_poses: bool = False, pose_link: Optional[str] = None) -> TelemetryBatch:
+        """
+        Advance a session by ``num_steps`` physics steps without rendering or
+        pacing, returning per-step joint telemetry arrays.
+        
+        Args:
+            session_id: Session to step
+            num_steps: Physics steps to take
+            joint_targets: Drive targets to set before stepping, cancelling a running trajectory
+            with_poses: Also compute the per-step pose of ``pose_link``
+            pose_link: Link whose pose is tracked, defaults to the first tip link
+        """
+        session = self.active_sessions.get(session_id)
+        if not session:
+            raise ValueError(f"Session {session_id} not found")
+        
+        if not session.has_robot:
+            async with session.physics_lock:
+                return self._step_without_robot(session, num_steps)
+        
+        chain = None
+        if with_poses and session.urdf_digest is not None:
+            chain = chain_for_urdf(self.blob_store.read_bytes(session.urdf_digest), session.urdf_digest)
+            if pose_link is not None and pose_link not in chain.link_index:
+                raise ValueError(f"Unknown link: {pose_link}")
+        
+        loop = asyncio.get_running_loop()
+        async with session.physics_lock:
+            backend = self.physics_backend(session)
+            telemetry = self.telemetry_buffer(session)
+            if joint_targets:
+                self._cancel_trajectory(session, "Overridden by joint targets")
+                backend.set_targets(joint_targets)
+            
+            # A running trajectory gives every step its own drive target
+            targets = None
+            execution = session.trajectory
+            if execution is not None and execution.running:
+                targets = execution.targets(backend.time + backend.dt * np.arange(1, num_steps + 1))
+                if not execution.running:
+                    session.trajectory = None
+            
+            if backend.thread_safe:
+                batch = await loop.run_in_executor(None, backend.step, num_steps, targets)
+            else:
+                # Isaac Sim must be stepped from the thread that owns it
+                batch = backend.step(num_steps, targets)
+            
+            if chain is not None:
+                await loop.run_in_executor(None, batch.with_poses, chain, pose_link)
+            await loop.run_in_executor(None, self._record, session, telemetry, batch)
+        
+        logger.debug("Stepped physics batch", session_id=session_id, backend=backend.name,
+                     steps=num_steps, realtime_factor=round(batch.realtime_factor, 1))
+        return batch
+    
+    def _step_without_robot(self, session: SimulationSession, num_steps: int) -> TelemetryBatch:
+        """Advance simulation time only; there are no joints to report."""
+        if not 1 <= num_steps <= MAX_STEPS_PER_BATCH:
+            raise ValueError(f"num_steps must be between 1 and {MAX_STEPS_PER_BATCH}")
+        started = time.perf_counter()
+        dt = ISAAC_SIM_CONFIG["physics_dt"]
+        if self.isaac_sim_available and session.world is not None:
+            for _ in range(num_steps):
+                session.world.step(render=False)
+        
+        times = session.clock + dt * np.arange(1, num_steps + 1)
+        session.clock = float(times[-1])
+        return TelemetryBatch.without_joints(times, dt, time.perf_counter() - started)
+    
     async def destroy_session(self, session_id: str):
         """Clean up and destroy simulation session."""
         session = self.active_sessions.get(session_id)
@@ -357,13 +692,21 @@ class IsaacSimManager:
             return
         
         try:
-            # Cleanup session resources
-            if self.isaac_sim_available and session.robot:
+            if session.sampler is not None:
+                await session.sampler.stop()
+            async with session.physics_lock:
+                self._cancel_trajectory(session, "Session ended")
+                self._close_telemetry(session)
                 # Remove robot from scene
-                pass
+                self._remove_articulation(session)
+            
+            # Drop the session's reference to its URDF
+            self.blob_store.release(session.urdf_digest)
+            session.urdf_digest = None
             
-            # Remove from active sessions
+            # Remove from active sessions, ending telemetry streams waiting for a robot
             del self.active_sessions[session_id]
+            session.notify_robot_changed()
             
             logger.info("Session destroyed", session_id=session_id)
             
@@ -386,7 +729,13 @@ class IsaacSimManager:
             "status": session.status,
             "created_at": session.created_at.isoformat(),
             "participants": session.participants,
-            "isaac_sim_available": self.isaac_sim_available
+            "isaac_sim_available": self.isaac_sim_available,
+            "robot": {
+                "name": session.robot_summary["name"],
+                "dof": session.robot_summary["dof"],
+                "link_count": session.robot_summary["link_count"],
+                "joint_count": session.robot_summary["joint_count"]
+            } if session.robot_summary else None
         }
     
     async def list_sessions(self) -> List[Dict[str, Any]]:
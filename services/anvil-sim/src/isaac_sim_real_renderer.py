@@ -7,7 +7,7 @@ Provides photorealistic 3D robot simulation with advanced lighting and materials
 import asyncio
 import logging
 import time
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
 import numpy as np
 import sys
 import os
@@ -54,6 +54,8 @@ except ImportError as e:
 
 import structlog
 
+from joint_trajectory import JointTrajectory, TrajectoryExecution, CUBIC, DEFAULT_ACCEL_FRACTION
+
 logger = structlog.get_logger(__name__)
 
 class IsaacSimRealRenderer:
@@ -96,6 +98,10 @@ class IsaacSimRealRenderer:
         }
         
         self.robot_loaded = False
+        # DOF order of the loaded robot, cached once per robot
+        self.joint_names: List[str] = []
+        self.joint_index: Dict[str, int] = {}
+        self.trajectory: Optional[TrajectoryExecution] = None
         
         # Try to initialize Isaac Sim
         try:
@@ -380,8 +386,11 @@ class IsaacSimRealRenderer:
                 return False
             
             # Remove existing robot if any
+            self.cancel_trajectory("Robot changed")
             if self.robot:
                 self.world.scene.remove_object(self.robot)
+            self.joint_names = []
+            self.joint_index = {}
             
             # Load robot from Isaac Sim assets
             self.robot = self.world.scene.add(
@@ -391,6 +400,7 @@ class IsaacSimRealRenderer:
                     usd_path=robot_path
                 )
             )
+            self._index_joints()
             
             self.robot_config.update(robot_config)
             logger.info("🤖 Real robot loaded successfully", 
@@ -446,29 +456,106 @@ class IsaacSimRealRenderer:
             logger.error("❌ Failed to setup real camera", error=str(e))
             return False
     
-    async def update_joints(self, joint_states: Dict[str, float]):
-        """Update robot joint states."""
+    def _index_joints(self) -> bool:
+        """
+        Cache the loaded robot's joint name -> DOF index map. The articulation
+        only knows its DOFs once initialized, so until then this returns False
+        and is retried on the next joint update.
+        """
+        try:
+            names = self.robot.dof_names if self.robot else None
+        except Exception:
+            names = None
+        if not names:
+            return False
+        self.joint_names = list(names)
+        self.joint_index = {name: i for i, name in enumerate(self.joint_names)}
+        logger.debug("🔧 Joint index cached", robot_name=self.robot_config.get('name'), dof=len(self.joint_names))
+        return True
+    
+    async def update_joints(self, joint_states: Union[Dict[str, float], Sequence[float], np.ndarray]):
+        """
+        Set robot joint positions in a single articulation write.
+        
+        Args:
+            joint_states: Positions by joint name (unknown names ignored), or
+                a full position vector in ``joint_names`` order
+        """
         if not self.robot:
             logger.warning("No robot loaded - cannot update joints")
             return
         
         try:
-            # Update joint states
-            self.joint_states.update(joint_states)
-            
-            # Apply to robot articulation
-            articulation = self.robot.get_articulation()
-            joint_names = articulation.get_joint_names()
+            if not self.joint_index and not self._index_joints():
+                logger.warning("Robot articulation not initialized - cannot update joints")
+                return
             
-            for joint_name, angle in joint_states.items():
-                if joint_name in joint_names:
-                    articulation.set_joint_positions({joint_name: angle})
+            # Direct joint commands take over from a running trajectory
+            self.cancel_trajectory("Overridden by joint command")
+            
+            if isinstance(joint_states, dict):
+                index = self.joint_index
+                known = [(index[name], angle) for name, angle in joint_states.items() if name in index]
+                if not known:
+                    return
+                indices = np.fromiter((i for i, _ in known), dtype=np.int32, count=len(known))
+                positions = np.fromiter((angle for _, angle in known), dtype=np.float32, count=len(known))
+                self.robot.set_joint_positions(positions, joint_indices=indices)
+                self.joint_states.update(joint_states)
+            else:
+                positions = np.asarray(joint_states, dtype=np.float32).reshape(-1)
+                if len(positions) != len(self.joint_names):
+                    raise ValueError(f"Expected {len(self.joint_names)} joint positions, got {len(positions)}")
+                self.robot.set_joint_positions(positions)
+                self.joint_states = dict(zip(self.joint_names, positions.tolist()))
             
-            logger.debug("🔧 Real joint states updated", joint_states=joint_states)
+            logger.debug("🔧 Real joint states updated", joint_count=len(positions))
             
         except Exception as e:
             logger.error("❌ Failed to update real joints", error=str(e))
     
+    async def start_trajectory(self, waypoints: list, method: str = CUBIC,
+                               accel_fraction: float = DEFAULT_ACCEL_FRACTION) -> Optional[TrajectoryExecution]:
+        """
+        Follow timed joint waypoints from the current joint positions. Drive
+        targets are sampled every physics step by a physics callback, so the
+        motion is as smooth as the physics rate whatever the frame rate.
+        """
+        if not self.robot or not self.world:
+            logger.warning("No robot loaded - cannot follow trajectory")
+            return None
+        if not self.joint_index and not self._index_joints():
+            raise ValueError("Robot articulation not initialized")
+        
+        trajectory = JointTrajectory.from_waypoints(
+            waypoints, self.joint_names, self.robot.get_joint_positions(), method, accel_fraction
+        )
+        self.cancel_trajectory("Replaced by a new trajectory")
+        self.trajectory = TrajectoryExecution(trajectory, self.world.current_time)
+        if not self.world.physics_callback_exists("joint_trajectory"):
+            self.world.add_physics_callback("joint_trajectory", self._follow_trajectory)
+        
+        logger.info("🦾 Real trajectory started", trajectory_id=self.trajectory.trajectory_id,
+                   method=method, duration=trajectory.duration)
+        return self.trajectory
+    
+    def cancel_trajectory(self, message: str = "Cancelled"):
+        """Stop following the current trajectory; the drives hold their targets."""
+        if self.trajectory is not None:
+            self.trajectory.cancel(message)
+            self.trajectory = None
+    
+    def _follow_trajectory(self, step_size: float):
+        """Physics callback: set the drive targets of the step about to be taken."""
+        execution = self.trajectory
+        if execution is None or not execution.running or not self.robot:
+            return
+        from omni.isaac.core.utils.types import ArticulationAction
+        target = execution.targets([self.world.current_time + step_size])[0]
+        self.robot.apply_action(ArticulationAction(joint_positions=target))
+        if not execution.running:
+            self.trajectory = None
+    
     async def render_frame(self) -> np.ndarray:
         """Render a photorealistic frame from Isaac Sim."""
         if not self.scene_initialized or not self.camera:
@@ -538,19 +625,22 @@ class IsaacSimRealRenderer:
         
         try:
             # Update camera state
+            previous = dict(self.camera_state)
             self.camera_state.update({
                 'position': position,
                 'target': target,
                 'fov': fov
             })
             
-            # Update camera if it exists
+            # Update camera if it exists, touching only what changed
             if self.camera:
                 try:
-                    self.camera.set_position(position)
-                    self.camera.set_look_at(target)
-                    self.camera.set_fov(fov)
-                    logger.info("📹 Real camera updated", position=position, target=target, fov=fov)
+                    if position != previous['position'] or target != previous['target']:
+                        self.camera.set_position(position)
+                        self.camera.set_look_at(target)
+                    if fov != previous['fov']:
+                        self.camera.set_fov(fov)
+                    logger.debug("📹 Real camera updated", position=position, target=target, fov=fov)
                     return True
                 except Exception as e:
                     logger.error("Failed to update camera parameters", error=str(e))
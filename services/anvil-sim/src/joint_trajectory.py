@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Joint Trajectory - Server-side interpolation of timed joint waypoints
+A client sends a motion once as waypoints with times; the server samples it
+at the physics rate and feeds the samples to the position drives step by
+step, reporting progress as the motion runs instead of receiving a joint
+command per frame.
+"""
+
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Any, Sequence, Union
+
+import numpy as np
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+LINEAR = "linear"
+CUBIC = "cubic"
+TRAPEZOIDAL = "trapezoidal"
+INTERPOLATION_METHODS = (LINEAR, CUBIC, TRAPEZOIDAL)
+
+RUNNING = "running"
+COMPLETED = "completed"
+CANCELLED = "cancelled"
+
+MAX_WAYPOINTS = 10_000
+# Share of each trapezoidal segment spent accelerating, and again decelerating
+DEFAULT_ACCEL_FRACTION = 0.25
+# Progress events per wall-clock second sent while a trajectory runs
+DEFAULT_PROGRESS_HZ = 10.0
+
+
+@dataclass
+class JointTrajectory:
+    """
+    Joint positions at increasing times, interpolated between waypoints.
+
+    ``linear`` holds a constant velocity per segment. ``cubic`` is a C1
+    Hermite spline through the waypoints with zero velocity at the ends and
+    at waypoints where a joint turns around, so it never overshoots them.
+    ``trapezoidal`` moves all joints of a segment together on a trapezoidal
+    velocity profile, stopping at every waypoint.
+    """
+    joint_names: List[str]
+    times: np.ndarray              # (k,) seconds from the start, times[0] == 0
+    positions: np.ndarray          # (k, dof) waypoint positions
+    method: str = CUBIC
+    accel_fraction: float = DEFAULT_ACCEL_FRACTION
+
+    def __post_init__(self):
+        if self.method not in INTERPOLATION_METHODS:
+            raise ValueError(f"Unknown interpolation method {self.method!r}, expected one of {INTERPOLATION_METHODS}")
+        if not 0.0 < self.accel_fraction <= 0.5:
+            raise ValueError("accel_fraction must be in (0, 0.5]")
+        self.joint_names = list(self.joint_names)
+        self.times = np.asarray(self.times, dtype=float)
+        self.positions = np.asarray(self.positions, dtype=float).reshape(len(self.times), len(self.joint_names))
+        if not (np.all(np.isfinite(self.times)) and np.all(np.isfinite(self.positions))):
+            raise ValueError("Waypoint times and positions must be finite")
+        if len(self.times) < 2 or self.times[0] != 0.0 or np.any(np.diff(self.times) <= 0):
+            raise ValueError("A trajectory needs at least two waypoints at increasing times from 0")
+        self._velocities = self._waypoint_velocities() if self.method == CUBIC else None
+
+    @classmethod
+    def from_waypoints(cls, waypoints: Sequence[Dict[str, Any]], joint_names: Sequence[str],
+                       start: Sequence[float], method: str = CUBIC,
+                       accel_fraction: float = DEFAULT_ACCEL_FRACTION) -> "JointTrajectory":
+        """
+        Trajectory from the current joint positions through client waypoints.
+
+        Args:
+            waypoints: ``{"time": seconds from now, "positions": {joint: value}}``
+                dicts, or positions as a full vector in ``joint_names`` order.
+                Joints a waypoint leaves out hold their previous value.
+            joint_names: Joints of the robot, in drive order
+            start: Current joint positions, the implicit waypoint at time 0
+            method: One of ``INTERPOLATION_METHODS``
+            accel_fraction: Trapezoidal ramp share of each segment
+        """
+        if not waypoints:
+            raise ValueError("A trajectory needs at least one waypoint")
+        if len(waypoints) > MAX_WAYPOINTS:
+            raise ValueError(f"At most {MAX_WAYPOINTS} waypoints are supported")
+
+        joint_index = {name: i for i, name in enumerate(joint_names)}
+        times = [0.0]
+        rows = [np.asarray(start, dtype=float).reshape(len(joint_index))]
+        for waypoint in waypoints:
+            positions = waypoint.get("positions")
+            if positions is None or "time" not in waypoint:
+                raise ValueError("Every waypoint needs a time and positions")
+            if isinstance(positions, dict):
+                unknown = sorted(set(positions) - set(joint_index))
+                if unknown:
+                    raise ValueError(f"Unknown joints: {', '.join(unknown)}")
+                row = rows[-1].copy()
+                for name, value in positions.items():
+                    row[joint_index[name]] = float(value)
+            else:
+                row = np.asarray(positions, dtype=float).reshape(-1)
+                if len(row) != len(joint_index):
+                    raise ValueError(f"Expected {len(joint_index)} joint positions, got {len(row)}")
+            times.append(float(waypoint["time"]))
+            rows.append(row)
+
+        # NaN compares false, so finiteness is checked before the ordering
+        if not (np.all(np.isfinite(times)) and all(np.all(np.isfinite(row)) for row in rows)):
+            raise ValueError("Waypoint times and positions must be finite")
+        if np.any(np.diff(times) <= 0):
+            raise ValueError("Waypoint times must be positive and increasing")
+        return cls(list(joint_names), np.array(times), np.array(rows), method, accel_fraction)
+
+    @property
+    def duration(self) -> float:
+        return float(self.times[-1])
+
+    @property
+    def dof(self) -> int:
+        return len(self.joint_names)
+
+    def sample(self, t: Union[float, Sequence[float], np.ndarray]) -> np.ndarray:
+        """
+        Positions at times ``t`` from the start, (m, dof) for m times; times
+        past the end hold the last waypoint.
+        """
+        t = np.clip(np.atleast_1d(np.asarray(t, dtype=float)), 0.0, self.duration)
+        index = np.clip(np.searchsorted(self.times, t, side="right") - 1, 0, len(self.times) - 2)
+        t0 = self.times[index]
+        h = self.times[index + 1] - t0
+        u = ((t - t0) / h)[:, None]
+        p0 = self.positions[index]
+        p1 = self.positions[index + 1]
+
+        if self.method == LINEAR:
+            return p0 + u * (p1 - p0)
+        if self.method == TRAPEZOIDAL:
+            return p0 + self._trapezoid(u) * (p1 - p0)
+
+        # Cubic Hermite basis
+        u2, u3 = u * u, u * u * u
+        h = h[:, None]
+        return ((2 * u3 - 3 * u2 + 1) * p0 + (u3 - 2 * u2 + u) * h * self._velocities[index]
+                + (3 * u2 - 2 * u3) * p1 + (u3 - u2) * h * self._velocities[index + 1])
+
+    def waypoint_index(self, t: float) -> int:
+        """Number of waypoints after the start that have been reached by time ``t``."""
+        return int(np.searchsorted(self.times, t, side="right")) - 1
+
+    def _trapezoid(self, u: np.ndarray) -> np.ndarray:
+        """Normalized distance along a segment with a trapezoidal velocity profile."""
+        a = self.accel_fraction
+        peak = 1.0 / (1.0 - a)
+        return np.where(u < a, 0.5 * peak * u * u / a,
+                        np.where(u > 1.0 - a, 1.0 - 0.5 * peak * (1.0 - u) ** 2 / a, peak * (u - 0.5 * a)))
+
+    def _waypoint_velocities(self) -> np.ndarray:
+        """Spline velocities: duration-weighted mean of the neighbouring slopes."""
+        h = np.diff(self.times)[:, None]
+        slopes = np.diff(self.positions, axis=0) / h
+        velocities = np.zeros_like(self.positions)
+        if len(slopes) > 1:
+            mean = (h[1:] * slopes[:-1] + h[:-1] * slopes[1:]) / (h[:-1] + h[1:])
+            velocities[1:-1] = np.where(slopes[:-1] * slopes[1:] > 0, mean, 0.0)
+        return velocities
+
+
+class TrajectoryExecution:
+    """
+    One trajectory being followed from simulation time ``start_time``.
+
+    The stepping code asks ``targets`` for the drive targets of the steps it
+    is about to take, which also advances progress; that may happen on an
+    executor or physics thread. Progress readers run on the event loop the
+    execution was created on.
+    """
+
+    def __init__(self, trajectory: JointTrajectory, start_time: float):
+        self.trajectory_id = str(uuid.uuid4())
+        self.trajectory = trajectory
+        self.start_time = float(start_time)
+        self.elapsed = 0.0
+        self.status = RUNNING
+        self.message = ""
+        self.created_at = time.time()
+        self._loop = asyncio.get_running_loop()
+        self._changed = asyncio.Event()
+        self._done = self._loop.create_future()
+
+    @property
+    def running(self) -> bool:
+        return self.status == RUNNING
+
+    @property
+    def progress(self) -> float:
+        return min(self.elapsed / self.trajectory.duration, 1.0)
+
+    def targets(self, times: Union[Sequence[float], np.ndarray]) -> np.ndarray:
+        """Drive targets, (m, dof), for the steps ending at simulation ``times``."""
+        times = np.atleast_1d(np.asarray(times, dtype=float)) - self.start_time
+        if self.running and len(times):
+            self.elapsed = min(max(self.elapsed, float(times[-1])), self.trajectory.duration)
+            if self.elapsed >= self.trajectory.duration:
+                self.status = COMPLETED
+            self._loop.call_soon_threadsafe(self._notify)
+        return self.trajectory.sample(times)
+
+    def cancel(self, message: str = "Cancelled"):
+        """Stop following the trajectory; the drives hold their last targets."""
+        if self.running:
+            self.status = CANCELLED
+            self.message = message
+            self._loop.call_soon_threadsafe(self._notify)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "trajectory_id": self.trajectory_id,
+            "status": self.status,
+            "method": self.trajectory.method,
+            "elapsed": round(self.elapsed, 6),
+            "duration": self.trajectory.duration,
+            "progress": round(self.progress, 4),
+            "waypoint": self.trajectory.waypoint_index(self.elapsed),
+            "waypoint_count": len(self.trajectory.times) - 1,
+        }
+        if self.message:
+            data["message"] = self.message
+        return data
+
+    async def events(self, rate_hz: float = DEFAULT_PROGRESS_HZ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield progress snapshots at most ``rate_hz`` times per second while
+        the trajectory advances, ending with the finished state right away.
+        """
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be positive")
+        interval = 1.0 / rate_hz
+        while True:
+            changed = self._changed
+            sent = time.monotonic()
+            yield self.to_dict()
+            if not self.running:
+                return
+            await changed.wait()
+            remaining = interval - (time.monotonic() - sent)
+            if remaining > 0 and self.running:
+                await asyncio.wait({self._done}, timeout=remaining)
+
+    def _notify(self):
+        if not self.running and not self._done.done():
+            self._done.set_result(None)
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
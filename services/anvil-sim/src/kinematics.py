@@ -0,0 +1,706 @@
+#!/usr/bin/env python3
+"""
+Kinematics
+Batched forward kinematics compiled from a URDF joint tree. Link poses for
+many joint configurations are evaluated in a few vectorized numpy calls, with
+no Isaac Sim or USD stage involved.
+"""
+
+import argparse
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Sequence, Union
+
+import numpy as np
+
+from urdf_model import (
+    UrdfModel, Vector3, Quaternion,
+    parse_urdf, parse_urdf_file, rpy_to_quat, quat_to_matrix, matrix_to_quat
+)
+
+# Configurations evaluated per vectorized pass; small enough to stay in cache
+DEFAULT_CHUNK_SIZE = 4096
+
+REVOLUTE = 0
+PRISMATIC = 1
+
+# Compiled chains of URDF documents received over the API, keyed by content hash
+CHAIN_CACHE_SIZE = 64
+
+_chain_cache: "OrderedDict[str, KinematicChain]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class KinematicChain:
+    """
+    A URDF joint tree compiled into arrays for batched forward kinematics.
+
+    Every movable joint becomes a *frame*; fixed joints are folded into
+    constant offsets, so evaluation cost depends only on the number of
+    movable joints. Joint configurations are ordered like ``joint_names``:
+    the movable, non-mimic joints in tree order. Mimic joints follow their
+    source joint.
+    """
+
+    def __init__(self, model: UrdfModel, dtype=np.float64):
+        """
+        Compile a kinematic chain.
+
+        Args:
+            model: Parsed URDF model
+            dtype: Floating point type used for evaluation
+        """
+        self.name = model.name
+        self.dtype = np.dtype(dtype)
+        self.root_link = model.root_link()
+        if self.root_link is None:
+            raise ValueError("URDF has no root link")
+
+        joints = model.ordered_joints()
+        movable = [joint for joint in joints if joint.movable]
+        actuated = [joint for joint in movable
+                    if joint.mimic is None or not _mimic_resolvable(joint, model)]
+        self.joint_names: List[str] = [joint.name for joint in actuated]
+        self.dof = len(self.joint_names)
+        actuated_index = {name: i for i, name in enumerate(self.joint_names)}
+
+        self.lower = np.zeros(self.dof)
+        self.upper = np.zeros(self.dof)
+        for i, joint in enumerate(actuated):
+            self.lower[i], self.upper[i] = _joint_range(joint)
+        self.continuous = np.array([joint.type == "continuous" for joint in actuated], dtype=bool)
+
+        # Frame 0 is the root link; frame k > 0 is the child side of a movable joint
+        frame_parent = [-1]
+        frame_type = [REVOLUTE]
+        frame_source = [0]
+        frame_scale = [0.0]
+        frame_offset = [0.0]
+        frame_m0 = [np.eye(3)]
+        frame_m1 = [np.zeros((3, 3))]
+        frame_m2 = [np.zeros((3, 3))]
+        frame_t = [np.zeros(3)]
+        frame_axis = [np.zeros(3)]
+        frame_joint_axis = [np.zeros(3)]
+
+        # Link -> (frame, constant rotation, constant translation within the frame)
+        link_frames: Dict[str, Tuple[int, np.ndarray, np.ndarray]] = {
+            self.root_link: (0, np.eye(3), np.zeros(3))
+        }
+
+        for joint in joints:
+            parent = link_frames.get(joint.parent)
+            if parent is None:
+                continue
+            frame, parent_rot, parent_pos = parent
+            origin_rot = np.array(quat_to_matrix(rpy_to_quat(joint.origin.rpy)))
+            rot = parent_rot @ origin_rot
+            pos = parent_rot @ np.array(joint.origin.xyz) + parent_pos
+
+            if not joint.movable:
+                link_frames[joint.child] = (frame, rot, pos)
+                continue
+
+            axis = np.array(joint.axis, dtype=float)
+            norm = np.linalg.norm(axis)
+            axis = axis / norm if norm > 0 else np.array([1.0, 0.0, 0.0])
+
+            source, scale, offset = _joint_source(joint, model, actuated_index)
+            frame_parent.append(frame)
+            frame_source.append(source)
+            frame_scale.append(scale)
+            frame_offset.append(offset)
+            frame_t.append(pos)
+            frame_m0.append(rot)
+            frame_joint_axis.append(axis)
+            if joint.type == "prismatic":
+                frame_type.append(PRISMATIC)
+                frame_m1.append(np.zeros((3, 3)))
+                frame_m2.append(np.zeros((3, 3)))
+                frame_axis.append(rot @ axis)
+            else:
+                # Rodrigues: R(q) = I + sin(q) K + (1 - cos(q)) K^2
+                skew = _skew(axis)
+                frame_type.append(REVOLUTE)
+                frame_m1.append(rot @ skew)
+                frame_m2.append(rot @ skew @ skew)
+                frame_axis.append(np.zeros(3))
+
+            link_frames[joint.child] = (len(frame_parent) - 1, np.eye(3), np.zeros(3))
+
+        self.frame_count = len(frame_parent)
+        self.frame_parent = np.array(frame_parent, dtype=np.int64)
+        self.frame_type = np.array(frame_type, dtype=np.int8)
+        self.frame_source = np.array(frame_source, dtype=np.int64)
+        self.frame_scale = np.array(frame_scale)
+        self.frame_offset = np.array(frame_offset)
+        self._m0 = np.array(frame_m0, dtype=self.dtype)
+        self._m1 = np.array(frame_m1, dtype=self.dtype)
+        self._m2 = np.array(frame_m2, dtype=self.dtype)
+        self._t = np.array(frame_t, dtype=self.dtype)
+        self._axis = np.array(frame_axis, dtype=self.dtype)
+        # Joint axis in the frame itself; the same in the frame before motion
+        self._joint_axis = np.array(frame_joint_axis, dtype=self.dtype)
+        self._prismatic_extent = np.zeros(self.frame_count)
+        for frame in range(1, self.frame_count):
+            if self.frame_type[frame] == PRISMATIC:
+                source = self.frame_source[frame]
+                values = self.frame_scale[frame] * np.array([self.lower[source], self.upper[source]])
+                self._prismatic_extent[frame] = np.max(np.abs(values + self.frame_offset[frame]))
+
+        self.link_names: List[str] = list(link_frames)
+        self.link_index = {name: i for i, name in enumerate(self.link_names)}
+        self.link_frame = np.array([link_frames[name][0] for name in self.link_names], dtype=np.int64)
+        self._link_rot = np.array([link_frames[name][1] for name in self.link_names], dtype=self.dtype)
+        self._link_pos = np.array([link_frames[name][2] for name in self.link_names], dtype=self.dtype)
+        self._link_identity = np.array([
+            np.allclose(link_frames[name][1], np.eye(3)) and not np.any(link_frames[name][2])
+            for name in self.link_names
+        ])
+
+        # Links no other link hangs off: the usual end-effector candidates
+        parents = {joint.parent for joint in joints}
+        self.tip_links: List[str] = [name for name in self.link_names if name not in parents]
+
+    def link_indices(self, links: Optional[Sequence[Union[str, int]]] = None) -> np.ndarray:
+        """Indices of the given link names (all links if None)."""
+        if links is None:
+            return np.arange(len(self.link_names))
+        return np.array([link if isinstance(link, (int, np.integer)) else self.link_index[link]
+                         for link in links], dtype=np.int64)
+
+    def joint_values(self, q: np.ndarray) -> np.ndarray:
+        """
+        Expand actuated joint values to per-frame values (mimic joints included).
+
+        Args:
+            q: (N, dof) joint configurations
+
+        Returns:
+            (frame_count, N) joint value of every frame
+        """
+        values = q.T[self.frame_source] * self.frame_scale[:, None] + self.frame_offset[:, None]
+        return values.astype(self.dtype, copy=False)
+
+    def forward(self, q, links: Optional[Sequence[Union[str, int]]] = None,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        World poses of links for a batch of joint configurations.
+
+        Args:
+            q: (N, dof) or (dof,) joint configurations
+            links: Link names or indices to return, defaults to every link
+            chunk_size: Configurations evaluated per vectorized pass
+
+        Returns:
+            (positions (N, K, 3), rotation matrices (N, K, 3, 3)) in the root
+            link frame; the batch axis is dropped for a single configuration
+        """
+        q = np.asarray(q, dtype=float)
+        single = q.ndim == 1
+        q = np.atleast_2d(q)
+        if q.shape[1] != self.dof:
+            raise ValueError(f"Expected {self.dof} joint values, got {q.shape[1]}")
+
+        indices = self.link_indices(links)
+        count = len(q)
+        positions = np.empty((count, len(indices), 3), dtype=self.dtype)
+        rotations = np.empty((count, len(indices), 3, 3), dtype=self.dtype)
+
+        for start in range(0, count, chunk_size):
+            end = min(start + chunk_size, count)
+            frame_rot, frame_pos = self._frames(q[start:end], self._needed_frames(indices))
+            for k, link in enumerate(indices):
+                rot, pos = self._link_pose(link, frame_rot, frame_pos)
+                positions[start:end, k] = pos.T
+                rotations[start:end, k] = rot.transpose(2, 0, 1)
+
+        if single:
+            return positions[0], rotations[0]
+        return positions, rotations
+
+    def link_positions(self, q, links: Optional[Sequence[Union[str, int]]] = None,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+        """
+        World positions of links for a batch of joint configurations.
+
+        Returns:
+            (N, K, 3) positions, or (K, 3) for a single configuration
+        """
+        q = np.asarray(q, dtype=float)
+        single = q.ndim == 1
+        q = np.atleast_2d(q)
+        if q.shape[1] != self.dof:
+            raise ValueError(f"Expected {self.dof} joint values, got {q.shape[1]}")
+
+        indices = self.link_indices(links)
+        positions = np.empty((len(q), len(indices), 3), dtype=self.dtype)
+        for start in range(0, len(q), chunk_size):
+            end = min(start + chunk_size, len(q))
+            frame_rot, frame_pos = self._frames(q[start:end], self._needed_frames(indices))
+            for k, link in enumerate(indices):
+                frame = self.link_frame[link]
+                pos = frame_pos[frame]
+                if not self._link_identity[link]:
+                    pos = pos + _matvec(frame_rot[frame], self._link_pos[link])
+                positions[start:end, k] = pos.T
+
+        return positions[0] if single else positions
+
+    def sample(self, count: int, seed: Optional[int] = None) -> np.ndarray:
+        """(count, dof) configurations drawn uniformly within the joint limits."""
+        rng = np.random.default_rng(seed)
+        return rng.uniform(self.lower, self.upper, size=(count, self.dof))
+
+    def jacobian(self, q, link: Union[str, int],
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+        """
+        Geometric Jacobians of a link origin for a batch of configurations.
+
+        Returns:
+            (N, 6, dof) Jacobians, linear rows first, in the root link frame;
+            (6, dof) for a single configuration
+        """
+        q = np.asarray(q, dtype=float)
+        single = q.ndim == 1
+        jacobians, _, _ = self._jacobian(np.atleast_2d(q), link, chunk_size, angular=True)
+        return jacobians[0] if single else jacobians
+
+    def position_jacobian(self, q, link: Union[str, int],
+                          chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Positions and linear Jacobians of a link origin.
+
+        Returns:
+            (positions (N, 3), Jacobians (N, 3, dof))
+        """
+        jacobians, positions, _ = self._jacobian(np.atleast_2d(np.asarray(q, dtype=float)), link,
+                                                 chunk_size, angular=False)
+        return positions, jacobians
+
+    def pose_jacobian(self, q, link: Union[str, int],
+                      chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Poses and geometric Jacobians of a link origin from one pass over the
+        frames, as needed by iterative solvers.
+
+        Returns:
+            (positions (N, 3), rotations (N, 3, 3), Jacobians (N, 6, dof))
+        """
+        jacobians, positions, rotations = self._jacobian(np.atleast_2d(np.asarray(q, dtype=float)), link,
+                                                         chunk_size, angular=True)
+        return positions, rotations, jacobians
+
+    def point_jacobians(self, q, links: Sequence[Union[str, int]], points,
+                        chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Positions and linear Jacobians of points fixed in links, e.g. link
+        centers of mass, from one pass over the frames.
+
+        Args:
+            q: (N, dof) joint configurations
+            links: Link carrying each point
+            points: (K, 3) points in their link frames
+
+        Returns:
+            (positions (N, K, 3), Jacobians (N, K, 3, dof))
+        """
+        q = np.atleast_2d(np.asarray(q, dtype=float))
+        if q.shape[1] != self.dof:
+            raise ValueError(f"Expected {self.dof} joint values, got {q.shape[1]}")
+        indices = self.link_indices(links)
+        points = np.asarray(points, dtype=self.dtype).reshape(-1, 3)
+        above = np.array([self._needed_frames(np.array([link])) for link in indices]).reshape(len(indices), -1)
+        needed = above.any(axis=0) if len(indices) else np.zeros(self.frame_count, dtype=bool)
+        frames = np.flatnonzero(needed[1:]) + 1
+
+        positions = np.empty((len(q), len(indices), 3), dtype=self.dtype)
+        jacobians = np.zeros((len(q), len(indices), 3, self.dof), dtype=self.dtype)
+        for start in range(0, len(q), chunk_size):
+            end = min(start + chunk_size, len(q))
+            frame_rot, frame_pos = self._frames(q[start:end], needed)
+            x = np.empty((3, len(indices), end - start), dtype=self.dtype)
+            for k, (link, point) in enumerate(zip(indices, points)):
+                rot, pos = self._link_pose(link, frame_rot, frame_pos)
+                x[:, k] = pos + _matvec(rot, point)
+            positions[start:end] = x.transpose(2, 1, 0)
+
+            for frame in frames:
+                rows = above[:, frame]
+                axis = _matvec(frame_rot[frame], self._joint_axis[frame])
+                if self.frame_type[frame] == REVOLUTE:
+                    column = _cross(axis[:, None], x[:, rows] - frame_pos[frame][:, None])
+                else:
+                    column = np.broadcast_to(axis[:, None], (3, int(rows.sum()), end - start))
+                block = jacobians[start:end, :, :, self.frame_source[frame]]
+                block[:, rows] += self.frame_scale[frame] * column.transpose(2, 1, 0)
+
+        return positions, jacobians
+
+    def static_torques(self, q, load_links: Sequence[Union[str, int]], load_points, load_forces,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+        """
+        Joint torques (forces for prismatic joints) produced by constant
+        point loads, e.g. link weights and a payload.
+
+        Uses tau_j = w_j . sum_k (x_k - p_j) x F_k over the loads below joint
+        j, so every load is transformed once per configuration. Holding the
+        pose requires the opposite torque.
+
+        Args:
+            q: (N, dof) joint configurations
+            load_links: Link carrying each load
+            load_points: (K, 3) load application points in their link frames
+            load_forces: (K, 3) forces in the root link frame, in N
+
+        Returns:
+            (N, dof) torques in Nm (N for prismatic joints)
+        """
+        q = np.atleast_2d(np.asarray(q, dtype=float))
+        if q.shape[1] != self.dof:
+            raise ValueError(f"Expected {self.dof} joint values, got {q.shape[1]}")
+        links = self.link_indices(load_links)
+        points = np.asarray(load_points, dtype=self.dtype).reshape(-1, 3)
+        forces = np.asarray(load_forces, dtype=self.dtype).reshape(-1, 3)
+
+        # Frames above each load
+        above = np.array([self._needed_frames(np.array([link])) for link in links]).reshape(len(links), -1)
+        needed = above.any(axis=0) if len(links) else np.zeros(self.frame_count, dtype=bool)
+        frames = np.flatnonzero(needed[1:]) + 1
+        force_sums = {frame: forces[above[:, frame]].sum(axis=0) for frame in frames}
+
+        torques = np.zeros((len(q), self.dof), dtype=self.dtype)
+        for start in range(0, len(q), chunk_size):
+            end = min(start + chunk_size, len(q))
+            frame_rot, frame_pos = self._frames(q[start:end], needed)
+
+            # Moment of every load about the root origin
+            moments = []
+            for link, point, force in zip(links, points, forces):
+                rot, pos = self._link_pose(link, frame_rot, frame_pos)
+                moments.append(np.cross(pos + _matvec(rot, point), force[:, None], axis=0))
+            moments = np.array(moments)
+
+            for frame in frames:
+                axis = _matvec(frame_rot[frame], self._joint_axis[frame])
+                force = force_sums[frame]
+                if self.frame_type[frame] == REVOLUTE:
+                    moment = moments[above[:, frame]].sum(axis=0) - np.cross(frame_pos[frame], force[:, None], axis=0)
+                    torque = np.einsum("ic,ic->c", axis, moment)
+                else:
+                    torque = force @ axis
+                torques[start:end, self.frame_source[frame]] += self.frame_scale[frame] * torque
+
+        return torques
+
+    def reach_bound(self, link: Union[str, int]) -> float:
+        """Upper bound on the distance of a link origin from the root link."""
+        index = self.link_indices([link])[0]
+        needed = self._needed_frames(np.array([index]))
+        frames = np.flatnonzero(needed)
+        return float(np.sum(np.linalg.norm(self._t[frames], axis=1))
+                     + np.sum(self._prismatic_extent[frames])
+                     + np.linalg.norm(self._link_pos[index]))
+
+    def link_poses(self, q) -> Dict[str, Tuple[Vector3, Quaternion]]:
+        """
+        Pose of every link for one configuration, in the format of
+        UrdfModel.link_world_poses.
+        """
+        positions, rotations = self.forward(np.asarray(q, dtype=float).reshape(self.dof))
+        return {
+            name: (tuple(float(v) for v in positions[i]), matrix_to_quat(rotations[i].tolist()))
+            for i, name in enumerate(self.link_names)
+        }
+
+    def _jacobian(self, q: np.ndarray, link: Union[str, int], chunk_size: int,
+                  angular: bool) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if q.shape[1] != self.dof:
+            raise ValueError(f"Expected {self.dof} joint values, got {q.shape[1]}")
+        index = self.link_indices([link])[0]
+        needed = self._needed_frames(np.array([index]))
+        ancestors = np.flatnonzero(needed[1:]) + 1
+
+        rows = 6 if angular else 3
+        jacobians = np.zeros((len(q), rows, self.dof), dtype=self.dtype)
+        positions = np.empty((len(q), 3), dtype=self.dtype)
+        rotations = np.empty((len(q), 3, 3), dtype=self.dtype)
+        for start in range(0, len(q), chunk_size):
+            end = min(start + chunk_size, len(q))
+            frame_rot, frame_pos = self._frames(q[start:end], needed)
+            tip_rot, tip = self._link_pose(index, frame_rot, frame_pos)
+            positions[start:end] = tip.T
+            rotations[start:end] = np.moveaxis(tip_rot, -1, 0)
+            for frame in ancestors:
+                axis = _matvec(frame_rot[frame], self._joint_axis[frame])
+                column = self.frame_source[frame]
+                scale = self.frame_scale[frame]
+                if self.frame_type[frame] == REVOLUTE:
+                    jacobians[start:end, :3, column] += scale * np.cross(axis, tip - frame_pos[frame], axis=0).T
+                    if angular:
+                        jacobians[start:end, 3:, column] += scale * axis.T
+                else:
+                    jacobians[start:end, :3, column] += scale * axis.T
+
+        return jacobians, positions, rotations
+
+    def _needed_frames(self, links: np.ndarray) -> np.ndarray:
+        """Mask of frames on the path from the root to the given links."""
+        needed = np.zeros(self.frame_count, dtype=bool)
+        for frame in self.link_frame[links]:
+            while frame >= 0 and not needed[frame]:
+                needed[frame] = True
+                frame = self.frame_parent[frame]
+        return needed
+
+    def _frames(self, q: np.ndarray, needed: np.ndarray) -> Tuple[List, List]:
+        """
+        Evaluate frame poses for one chunk.
+
+        Rotations are (3, 3, C) and positions (3, C): the batch is the
+        innermost axis, so every step is a handful of contiguous array ops.
+        """
+        count = len(q)
+        values = self.joint_values(q)
+        rotations: List[Optional[np.ndarray]] = [None] * self.frame_count
+        positions: List[Optional[np.ndarray]] = [None] * self.frame_count
+        rotations[0] = np.broadcast_to(np.eye(3, dtype=self.dtype)[:, :, None], (3, 3, count))
+        positions[0] = np.zeros((3, count), dtype=self.dtype)
+
+        for frame in range(1, self.frame_count):
+            if not needed[frame]:
+                continue
+            value = values[frame]
+            if self.frame_type[frame] == REVOLUTE:
+                local_rot = (self._m0[frame][:, :, None]
+                             + self._m1[frame][:, :, None] * np.sin(value)
+                             + self._m2[frame][:, :, None] * (1.0 - np.cos(value)))
+                local_pos = np.broadcast_to(self._t[frame][:, None], (3, count))
+            else:
+                local_rot = np.broadcast_to(self._m0[frame][:, :, None], (3, 3, count))
+                local_pos = self._t[frame][:, None] + self._axis[frame][:, None] * value
+
+            parent = self.frame_parent[frame]
+            if parent == 0:
+                rotations[frame] = local_rot
+                positions[frame] = local_pos
+            else:
+                parent_rot = rotations[parent]
+                rotations[frame] = _matmul(parent_rot, local_rot)
+                positions[frame] = positions[parent] + _matvec(parent_rot, local_pos)
+
+        return rotations, positions
+
+    def _link_pose(self, link: int, frame_rot: List, frame_pos: List) -> Tuple[np.ndarray, np.ndarray]:
+        frame = self.link_frame[link]
+        rot, pos = frame_rot[frame], frame_pos[frame]
+        if self._link_identity[link]:
+            return rot, pos
+        return (_matmul(rot, np.broadcast_to(self._link_rot[link][:, :, None], rot.shape)),
+                pos + _matvec(rot, self._link_pos[link]))
+
+
+def manipulability(jacobians: np.ndarray) -> np.ndarray:
+    """
+    Yoshikawa manipulability sqrt(det(J J^T)) of a batch of Jacobians.
+
+    Args:
+        jacobians: (..., rows, dof) Jacobians
+
+    Returns:
+        (...) manipulability, zero at singular configurations
+    """
+    gram = jacobians @ np.swapaxes(jacobians, -1, -2)
+    return np.sqrt(np.clip(np.linalg.det(gram), 0.0, None))
+
+
+def rotation_quats(rotations: np.ndarray) -> np.ndarray:
+    """
+    Unit (w, x, y, z) quaternions of a batch of rotation matrices, with w >= 0.
+
+    Args:
+        rotations: (..., 3, 3) rotation matrices
+
+    Returns:
+        (..., 4) quaternions
+    """
+    m = np.asarray(rotations, dtype=float)
+    # Each component from the diagonal, signs recovered from the largest one
+    diag = np.stack([
+        1.0 + m[..., 0, 0] + m[..., 1, 1] + m[..., 2, 2],
+        1.0 + m[..., 0, 0] - m[..., 1, 1] - m[..., 2, 2],
+        1.0 - m[..., 0, 0] + m[..., 1, 1] - m[..., 2, 2],
+        1.0 - m[..., 0, 0] - m[..., 1, 1] + m[..., 2, 2],
+    ], axis=-1)
+    pairs = np.stack([
+        np.stack([diag[..., 0], m[..., 2, 1] - m[..., 1, 2], m[..., 0, 2] - m[..., 2, 0], m[..., 1, 0] - m[..., 0, 1]], axis=-1),
+        np.stack([m[..., 2, 1] - m[..., 1, 2], diag[..., 1], m[..., 0, 1] + m[..., 1, 0], m[..., 0, 2] + m[..., 2, 0]], axis=-1),
+        np.stack([m[..., 0, 2] - m[..., 2, 0], m[..., 0, 1] + m[..., 1, 0], diag[..., 2], m[..., 1, 2] + m[..., 2, 1]], axis=-1),
+        np.stack([m[..., 1, 0] - m[..., 0, 1], m[..., 0, 2] + m[..., 2, 0], m[..., 1, 2] + m[..., 2, 1], diag[..., 3]], axis=-1),
+    ], axis=-2)
+    best = np.argmax(diag, axis=-1)
+    quats = np.take_along_axis(pairs, best[..., None, None], axis=-2)[..., 0, :]
+    quats /= np.linalg.norm(quats, axis=-1, keepdims=True)
+    return np.where(quats[..., :1] < 0, -quats, quats)
+
+
+def _matmul(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Batched 3x3 product of (3, 3, C) arrays."""
+    return a[:, 0, None] * b[None, 0] + a[:, 1, None] * b[None, 1] + a[:, 2, None] * b[None, 2]
+
+
+def _matvec(a: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """Batched product of (3, 3, C) rotations with (3, C) or (3,) vectors."""
+    if v.ndim == 1:
+        v = v[:, None]
+    return a[:, 0] * v[0] + a[:, 1] * v[1] + a[:, 2] * v[2]
+
+
+def _cross(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Cross product along axis 0; cheaper than np.cross for small batches."""
+    return np.stack([a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0]])
+
+
+def _skew(v: np.ndarray) -> np.ndarray:
+    x, y, z = v
+    return np.array([[0.0, -z, y], [z, 0.0, -x], [-y, x, 0.0]])
+
+
+def _mimic_resolvable(joint, model: UrdfModel) -> bool:
+    """Whether a mimic chain ends at an actuated joint (and has no cycle)."""
+    seen = set()
+    while joint.mimic is not None:
+        if joint.name in seen:
+            return False
+        seen.add(joint.name)
+        joint = model.joints.get(joint.mimic.joint)
+        if joint is None or not joint.movable:
+            return False
+    return True
+
+
+def _joint_source(joint, model: UrdfModel, actuated_index: Dict[str, int]) -> Tuple[int, float, float]:
+    """(actuated index, multiplier, offset) driving a movable joint."""
+    if joint.name in actuated_index:
+        return actuated_index[joint.name], 1.0, 0.0
+    scale, offset = 1.0, 0.0
+    while joint.name not in actuated_index:
+        mimic = joint.mimic
+        # value = multiplier * source + offset, composed down the chain
+        offset = offset + scale * mimic.offset
+        scale = scale * mimic.multiplier
+        joint = model.joints[mimic.joint]
+    return actuated_index[joint.name], scale, offset
+
+
+def _joint_range(joint) -> Tuple[float, float]:
+    """Sampling range of an actuated joint."""
+    limit = joint.limit
+    if joint.type != "continuous" and limit is not None and limit.lower is not None and limit.upper is not None:
+        if limit.lower < limit.upper:
+            return limit.lower, limit.upper
+    if joint.type == "prismatic":
+        return 0.0, 0.0
+    return -math.pi, math.pi
+
+
+def compile_chain(model: UrdfModel, dtype=np.float64) -> KinematicChain:
+    """Factory function to compile a kinematic chain."""
+    return KinematicChain(model, dtype)
+
+
+def chain_for_urdf(urdf_content: Union[str, bytes], digest: Optional[str] = None) -> KinematicChain:
+    """
+    Compiled chain of a URDF document, cached by content hash.
+
+    Args:
+        urdf_content: URDF document
+        digest: SHA-256 of the content, if already known
+
+    Returns:
+        Kinematic chain (shared; do not modify)
+    """
+    if isinstance(urdf_content, str):
+        urdf_content = urdf_content.encode("utf-8")
+    digest = digest or hashlib.sha256(urdf_content).hexdigest()
+
+    with _cache_lock:
+        chain = _chain_cache.get(digest)
+        if chain is not None:
+            _chain_cache.move_to_end(digest)
+            return chain
+
+    chain = KinematicChain(parse_urdf(urdf_content))
+    with _cache_lock:
+        _chain_cache[digest] = chain
+        while len(_chain_cache) > CHAIN_CACHE_SIZE:
+            _chain_cache.popitem(last=False)
+    return chain
+
+
+def _benchmark_urdf() -> str:
+    """A 7-DOF arm with Franka-like joint layout."""
+    joints = [
+        ("0 0 0.333", "0 0 0"), ("0 0 0", "-1.5708 0 0"), ("0 -0.316 0", "1.5708 0 0"),
+        ("0.0825 0 0", "1.5708 0 0"), ("-0.0825 0.384 0", "-1.5708 0 0"), ("0 0 0", "1.5708 0 0"),
+        ("0.088 0 0", "1.5708 0 0"),
+    ]
+    parts = ['<robot name="bench_arm">', '<link name="link0"/>']
+    for i, (xyz, rpy) in enumerate(joints, start=1):
+        parts.append(f'<link name="link{i}"/>')
+        parts.append(
+            f'<joint name="joint{i}" type="revolute"><parent link="link{i - 1}"/><child link="link{i}"/>'
+            f'<origin xyz="{xyz}" rpy="{rpy}"/><axis xyz="0 0 1"/>'
+            f'<limit lower="-2.9" upper="2.9" effort="87" velocity="2.1"/></joint>'
+        )
+    parts.append('<link name="flange"/>')
+    parts.append('<joint name="flange_joint" type="fixed"><parent link="link7"/><child link="flange"/>'
+                 '<origin xyz="0 0 0.107" rpy="0 0 0"/></joint>')
+    parts.append('</robot>')
+    return "".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched forward kinematics")
+    parser.add_argument("urdf", nargs="?", help="URDF file (defaults to a built-in 7-DOF arm)")
+    parser.add_argument("-n", "--configs", type=int, default=1_000_000, help="Configurations per run")
+    parser.add_argument("--link", help="Link to evaluate (defaults to the first tip link)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--float32", action="store_true", help="Evaluate in single precision")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    model = parse_urdf_file(args.urdf) if args.urdf else parse_urdf(_benchmark_urdf())
+    chain = compile_chain(model, np.float32 if args.float32 else np.float64)
+    link = args.link or chain.tip_links[0]
+
+    rng = np.random.default_rng(0)
+    q = rng.uniform(chain.lower, chain.upper, size=(args.configs, chain.dof))
+
+    # Cross-check one configuration against the scalar reference
+    reference = parse_urdf(_benchmark_urdf()).link_world_poses() if not args.urdf else model.link_world_poses()
+    zero = chain.link_poses(np.zeros(chain.dof))
+    error = max(max(abs(a - b) for a, b in zip(zero[name][0], reference[name][0]))
+                for name in reference if name in zero)
+
+    print(f"{model.name}: {chain.dof} DOF, {len(chain.link_names)} links, "
+          f"evaluating '{link}' for {args.configs:,} configurations "
+          f"({chain.dtype.name}, chunk {args.chunk_size}); zero-pose error {error:.2e} m")
+
+    for label, evaluate in (
+        ("pose", lambda: chain.forward(q, [link], args.chunk_size)),
+        ("position", lambda: chain.link_positions(q, [link], args.chunk_size)),
+    ):
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            evaluate()
+            best = min(best, time.perf_counter() - started)
+        print(f"  {label:8s} {best * 1000:8.1f} ms  {args.configs / best / 1e6:6.2f} M configs/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -51,10 +51,13 @@ except ImportError as e:
 
 import asyncio
 import importlib.util
+import json
 import logging
 import signal
+import time
 import traceback
-from typing import Optional, Dict, Any
+import uuid
+from typing import Optional, Dict, Any, Tuple
 from datetime import datetime
 
 import structlog
@@ -65,12 +68,19 @@ from aiohttp import web
 from isaac_sim_real_renderer import get_isaac_sim_real_renderer
 
 # Import config
-from anvil_config import ISAAC_SIM_CONFIG, GRPC_PORT, WEBSOCKET_PORT
+from anvil_config import ISAAC_SIM_CONFIG, GRPC_PORT, WEBSOCKET_PORT, SECURITY_CONFIG, ASSET_PATHS
 
 # Import other modules
 from services.simulation_service import SimulationServicer
 from isaac_sim_manager import isaac_sim_manager
 from webrtc_stream_manager import webrtc_stream_manager
+from bundle_upload import BundleUploadManager, BundleError, BundleTooLarge
+from urdf_preflight import preflight_urdf, preflight_urdf_file
+from reachability import ReachabilityCache, ReachabilityParams
+from inverse_kinematics import solve_request as solve_ik_request
+from design_sweep import run_sweep, DEFAULT_VALIDATIONS
+from process_pool import get_process_pool, shutdown_process_pool
+from validation_jobs import validation_jobs
 
 # Mock protocols for development
 try:
@@ -104,6 +114,11 @@ class AnvilSimService:
         self.running = False
         self.active_sessions: Dict[str, Dict[str, Any]] = {}
         self.isaac_sim_renderer = get_isaac_sim_real_renderer()
+        self.bundle_uploads = BundleUploadManager(
+            ASSET_PATHS['bundle_cache'],
+            SECURITY_CONFIG['max_request_size']
+        )
+        self.reachability = ReachabilityCache(ASSET_PATHS['reachability_cache'])
         
         # Video frame generator removed - using isaac_sim_real_renderer directly
         # from video_frame_generator import IsaacSimVideoGenerator
@@ -182,11 +197,51 @@ class AnvilSimService:
             data = await request.json()
             logger.debug("Received create_scene data", data_keys=list(data.keys()))
             
-            session_id = f"session_{int(datetime.utcnow().timestamp())}_{len(self.active_sessions)}"
+            # Random, not time + count: destroy_scene shrinks active_sessions, so counts repeat
+            session_id = f"session_{uuid.uuid4().hex}"
             
             # Extract Isaac Sim robot configuration
             isaac_sim_robot = data.get('isaac_sim_robot')
             physics_config = data.get('physics_config', {})
+            
+            # URDF may come from a previously uploaded bundle instead of inline text;
+            # either way the session only keeps the digest of the stored blob
+            blob_store = isaac_sim_manager.blob_store
+            urdf_digest = None
+            urdf_path = None
+            bundle_id = data.get('bundle_id')
+            if bundle_id:
+                urdf_file = self.bundle_uploads.resolve_file(bundle_id, data.get('urdf_file', ''))
+                if urdf_file is None:
+                    return web.json_response({
+                        'success': False,
+                        'error': 'Unknown bundle_id or urdf_file'
+                    }, status=404)
+                urdf_path = str(urdf_file)
+                # Meshes may live anywhere in the bundle, but nowhere else on this host
+                preflight = preflight_urdf_file(
+                    urdf_path, root=str(self.bundle_uploads.bundle_path(bundle_id).resolve())
+                )
+            elif data.get('urdf_content'):
+                # Inline URDF has no mesh files to check against
+                preflight = preflight_urdf(data['urdf_content'], check_meshes=False)
+            else:
+                preflight = None
+
+            # Reject broken robots before they take a blob, a session or renderer time
+            if preflight is not None and not preflight.ok:
+                logger.warning("URDF rejected by preflight", errors=len(preflight.errors),
+                               elapsed_ms=round(preflight.elapsed_ms, 3))
+                return web.json_response({
+                    'success': False,
+                    'error': 'URDF failed preflight checks',
+                    'preflight': preflight.to_dict()
+                }, status=422)
+
+            if urdf_path:
+                urdf_digest = blob_store.put_file(urdf_path)
+            elif data.get('urdf_content'):
+                urdf_digest = blob_store.put(data['urdf_content'])
 
             session = {
                 'id': session_id,
@@ -197,7 +252,9 @@ class AnvilSimService:
                 'status': 'ready',
                 'created_at': datetime.utcnow().isoformat(),
                 'isaac_sim_mode': ISAAC_SIM_AVAILABLE,
-                'urdf_content': data.get('urdf_content', ''),
+                'urdf_digest': urdf_digest,
+                'bundle_id': bundle_id,
+                'urdf_path': urdf_path,
                 'webrtc_ready': True,  # Real service supports WebRTC
                 # NEW: Isaac Sim robot configuration
                 'isaac_sim_robot': isaac_sim_robot,
@@ -258,6 +315,175 @@ class AnvilSimService:
                 'message': 'Failed to create Isaac Sim session'
             }, status=500)
 
+    async def destroy_scene(self, request):
+        """Remove a session and release its stored payloads."""
+        try:
+            data = await request.json()
+            session = self.active_sessions.pop(data.get('session_id'), None)
+            if session is None:
+                return web.json_response({'success': False, 'error': 'Session not found'}, status=404)
+            
+            isaac_sim_manager.blob_store.release(session.get('urdf_digest'))
+            logger.info("Isaac Sim session destroyed", session_id=session['id'])
+            return web.json_response({'success': True, 'session_id': session['id']})
+        
+        except Exception as e:
+            logger.error("Failed to destroy Isaac Sim session", error=str(e))
+            return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+    async def upload_bundle(self, request):
+        """Stream a URDF + mesh bundle (multipart files or a zip body) to disk."""
+        try:
+            bundle = await self.bundle_uploads.receive(request)
+            return web.json_response({'success': True, **bundle.to_dict()})
+        
+        except BundleTooLarge as e:
+            logger.warning("Rejected oversized bundle upload", error=str(e))
+            return web.json_response({'success': False, 'error': str(e)}, status=413)
+        except BundleError as e:
+            logger.warning("Rejected bundle upload", error=str(e))
+            return web.json_response({'success': False, 'error': str(e)}, status=400)
+        except Exception as e:
+            logger.error("Failed to receive bundle upload", error=str(e))
+            return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+    def _urdf_digest_for(self, data: Dict[str, Any]) -> Optional[str]:
+        """URDF digest of the request's session, or the digest given directly."""
+        if data.get('session_id'):
+            session = self.active_sessions.get(data['session_id'])
+            return session.get('urdf_digest') if session else None
+        return data.get('urdf_digest')
+
+    def _urdf_mesh_dirs(self, data: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+        """(URDF directory, bundle directory) of a session created from a bundle, for mesh lookups."""
+        session = self.active_sessions.get(data.get('session_id') or '')
+        if not session or not session.get('urdf_path'):
+            return None, None
+        bundle_dir = self.bundle_uploads.bundle_path(session.get('bundle_id') or '')
+        if bundle_dir is None:
+            return None, None
+        return os.path.dirname(session['urdf_path']), str(bundle_dir.resolve())
+
+    async def build_reachability(self, request):
+        """Build (or return the cached) reachability map of a robot."""
+        try:
+            data = await request.json()
+            urdf_digest = self._urdf_digest_for(data)
+            if not urdf_digest:
+                return web.json_response({'success': False, 'error': 'Unknown session or URDF'}, status=404)
+            params = ReachabilityParams.from_request(data)
+            
+            try:
+                urdf_content = isaac_sim_manager.blob_store.read_bytes(urdf_digest)
+            except (FileNotFoundError, ValueError):
+                return web.json_response({'success': False, 'error': 'Unknown session or URDF'}, status=404)
+            
+            reach_map = await self.reachability.ensure(urdf_digest, urdf_content, params, get_process_pool())
+            return web.json_response({'success': True, 'map': reach_map.to_dict()})
+        
+        except ValueError as e:
+            return web.json_response({'success': False, 'error': str(e)}, status=400)
+        except Exception as e:
+            logger.error("Failed to build reachability map", error=str(e))
+            return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+    async def query_reachability(self, request):
+        """Answer point and region reachability queries from a cached map."""
+        try:
+            data = await request.json()
+            urdf_digest = self._urdf_digest_for(data)
+            if not urdf_digest:
+                return web.json_response({'success': False, 'error': 'Unknown session or URDF'}, status=404)
+            
+            reach_map = self.reachability.get(urdf_digest, ReachabilityParams.from_request(data))
+            if reach_map is None:
+                return web.json_response({
+                    'success': False,
+                    'error': 'Reachability map not built; POST /reachability/build first'
+                }, status=404)
+            
+            started = time.perf_counter()
+            result: Dict[str, Any] = {'success': True, 'link': reach_map.meta['link']}
+            if data.get('points'):
+                reachable, manipulability = reach_map.query_points(data['points'])
+                result['points'] = [
+                    {'reachable': bool(r), 'manipulability': float(m)}
+                    for r, m in zip(reachable, manipulability)
+                ]
+            if data.get('region'):
+                result['region'] = reach_map.query_region(data['region']['min'], data['region']['max'])
+            result['query_us'] = round((time.perf_counter() - started) * 1e6, 1)
+            return web.json_response(result)
+        
+        except (KeyError, TypeError, ValueError) as e:
+            return web.json_response({'success': False, 'error': f"Invalid query: {e}"}, status=400)
+        except Exception as e:
+            logger.error("Failed to query reachability map", error=str(e))
+            return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+    async def solve_ik(self, request):
+        """Solve inverse kinematics for a batch of target poses."""
+        try:
+            data = await request.json()
+            urdf_digest = self._urdf_digest_for(data)
+            if not urdf_digest:
+                return web.json_response({'success': False, 'error': 'Unknown session or URDF'}, status=404)
+            
+            try:
+                urdf_content = isaac_sim_manager.blob_store.read_bytes(urdf_digest)
+            except (FileNotFoundError, ValueError):
+                return web.json_response({'success': False, 'error': 'Unknown session or URDF'}, status=404)
+            
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(None, solve_ik_request, urdf_content, urdf_digest, data)
+            return web.json_response(dict(result, success=True))
+        
+        except (KeyError, TypeError, ValueError) as e:
+            return web.json_response({'success': False, 'error': f"Invalid IK request: {e}"}, status=400)
+        except Exception as e:
+            logger.error("Failed to solve inverse kinematics", error=str(e))
+            return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+    async def design_sweep(self, request):
+        """Evaluate a grid of design variants, streamed as newline-delimited JSON."""
+        try:
+            data = await request.json()
+            urdf_digest = self._urdf_digest_for(data)
+            if not urdf_digest:
+                return web.json_response({'success': False, 'error': 'Unknown session or URDF'}, status=404)
+            
+            try:
+                urdf_content = isaac_sim_manager.blob_store.read_bytes(urdf_digest)
+            except (FileNotFoundError, ValueError):
+                return web.json_response({'success': False, 'error': 'Unknown session or URDF'}, status=404)
+            
+            base_dir, root = self._urdf_mesh_dirs(data)
+            records = run_sweep(urdf_content, data.get('parameters') or [],
+                                data.get('validations') or DEFAULT_VALIDATIONS,
+                                data.get('options'), get_process_pool(), base_dir, root)
+            # Validate the grid before committing to a streamed 200 response
+            first = await records.__anext__()
+        
+        except (KeyError, TypeError, ValueError) as e:
+            return web.json_response({'success': False, 'error': f"Invalid sweep: {e}"}, status=400)
+        except Exception as e:
+            logger.error("Failed to start design sweep", error=str(e))
+            return web.json_response({'success': False, 'error': str(e)}, status=500)
+        
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+        await response.prepare(request)
+        try:
+            await response.write(json.dumps(first).encode('utf-8') + b'\n')
+            async for record in records:
+                await response.write(json.dumps(record).encode('utf-8') + b'\n')
+        except Exception as e:
+            logger.error("Design sweep failed", error=str(e))
+            await response.write(json.dumps({'type': 'error', 'error': str(e)}).encode('utf-8') + b'\n')
+        finally:
+            await records.aclose()
+        await response.write_eof()
+        return response
+
     async def change_robot(self, request):
         """Change robot model in existing Isaac Sim session."""
         try:
@@ -591,7 +817,7 @@ class AnvilSimService:
     async def start_http_server(self):
         """Start HTTP server for health checks and session management."""
         try:
-            self.http_app = web.Application()
+            self.http_app = web.Application(client_max_size=SECURITY_CONFIG['max_request_size'])
             
             # Add CORS support  
             @web.middleware
@@ -614,6 +840,12 @@ class AnvilSimService:
             # Add routes
             self.http_app.router.add_get('/health', self.health_check)
             self.http_app.router.add_post('/create_scene', self.create_scene)
+            self.http_app.router.add_post('/destroy_scene', self.destroy_scene)
+            self.http_app.router.add_post('/upload_bundle', self.upload_bundle)
+            self.http_app.router.add_post('/reachability/build', self.build_reachability)
+            self.http_app.router.add_post('/reachability/query', self.query_reachability)
+            self.http_app.router.add_post('/ik/solve', self.solve_ik)
+            self.http_app.router.add_post('/design_sweep', self.design_sweep)
             self.http_app.router.add_post('/change_robot', self.change_robot)
             self.http_app.router.add_post('/update_camera', self.update_camera)
             self.http_app.router.add_get('/video_stream/{session_id}', self.video_stream)
@@ -681,6 +913,10 @@ class AnvilSimService:
             await self.http_runner.cleanup()
             logger.info("HTTP server stopped")
         
+        # Stop validation jobs, then CPU workers
+        await validation_jobs.stop()
+        shutdown_process_pool(wait=False)
+        
         # Shutdown Real Isaac Sim renderer
         if self.isaac_sim_renderer:
             self.isaac_sim_renderer.cleanup()
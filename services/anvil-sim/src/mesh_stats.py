@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Mesh Statistics
+Triangle counts, bounding boxes, vertex positions and faces of robot mesh
+files (STL, OBJ, DAE, glTF) without a full mesh library.
+"""
+
+import json
+import logging
+import os
+import struct
+import threading
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Any, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Vector3 = Tuple[float, float, float]
+
+_STL_TRIANGLE = np.dtype([
+    ("normal", "<f4", 3), ("vertices", "<f4", (3, 3)), ("attributes", "<u2")
+])
+
+
+@dataclass
+class MeshStats:
+    """Size information of one mesh file, in the mesh's own units."""
+    triangle_count: int
+    vertex_count: int
+    bbox_min: Optional[Vector3] = None
+    bbox_max: Optional[Vector3] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class MeshFaces:
+    """Polygons of one mesh file, in the mesh's own units."""
+    points: np.ndarray               # (N, 3) float64 vertex positions
+    face_vertex_counts: np.ndarray   # (F,) vertices per face
+    face_vertex_indices: np.ndarray  # (sum of counts,) indices into points
+
+
+_cache: Dict[str, Tuple[Tuple[int, int], Optional[MeshStats]]] = {}
+_cache_lock = threading.Lock()
+
+
+def read_mesh_stats(path: str) -> Optional[MeshStats]:
+    """
+    Read triangle count and bounding box of a mesh file.
+
+    Results are cached per file and reused until the file changes.
+
+    Args:
+        path: Path to an STL, OBJ, DAE, glTF or GLB file
+
+    Returns:
+        Mesh statistics, or None for unsupported or unreadable files
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        cached = _cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    extension = os.path.splitext(path)[1].lower()
+    stats = None
+    try:
+        if extension in _POINT_READERS:
+            stats = _stats_from_points(*_POINT_READERS[extension](path))
+        elif extension in _READERS:
+            stats = _READERS[extension](path)
+    except Exception as e:
+        logger.warning(f"Failed to read mesh statistics from {path}: {e}")
+
+    with _cache_lock:
+        _cache[path] = (key, stats)
+    return stats
+
+
+def read_mesh_points(path: str) -> Optional[np.ndarray]:
+    """
+    Read the vertex positions of a mesh file.
+
+    glTF buffers are not decoded; their bounding box corners are returned
+    instead.
+
+    Args:
+        path: Path to an STL, OBJ, DAE, glTF or GLB file
+
+    Returns:
+        (N, 3) float64 positions in the mesh's own units, or None for
+        unsupported or unreadable files
+    """
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        if extension in _POINT_READERS:
+            return _POINT_READERS[extension](path)[1].reshape(-1, 3).astype(np.float64)
+    except Exception as e:
+        logger.warning(f"Failed to read mesh vertices from {path}: {e}")
+        return None
+
+    stats = read_mesh_stats(path)
+    if stats is None or stats.bbox_min is None:
+        return None
+    lower, upper = stats.bbox_min, stats.bbox_max
+    return np.array([[x, y, z] for x in (lower[0], upper[0])
+                     for y in (lower[1], upper[1]) for z in (lower[2], upper[2])], dtype=np.float64)
+
+
+def read_mesh_faces(path: str) -> Optional[MeshFaces]:
+    """
+    Read the polygons of a mesh file.
+
+    STL triangles are welded at identical vertices; OBJ and DAE faces keep
+    their own vertex order.
+
+    Args:
+        path: Path to an STL, OBJ or DAE file
+
+    Returns:
+        Faces of the mesh, or None for unsupported, unreadable or empty files
+    """
+    reader = _FACE_READERS.get(os.path.splitext(path)[1].lower())
+    if reader is None:
+        return None
+    try:
+        faces = reader(path)
+    except Exception as e:
+        logger.warning(f"Failed to read mesh faces from {path}: {e}")
+        return None
+    if len(faces.face_vertex_counts) == 0:
+        return None
+    if len(faces.face_vertex_indices) and (faces.face_vertex_indices.min() < 0
+                                           or faces.face_vertex_indices.max() >= len(faces.points)):
+        logger.warning(f"Mesh {path} has face indices outside its vertices")
+        return None
+    return faces
+
+
+def _stats_from_points(triangle_count: int, points: np.ndarray) -> MeshStats:
+    points = points.reshape(-1, 3)
+    if len(points) == 0:
+        return MeshStats(triangle_count=triangle_count, vertex_count=0)
+    return MeshStats(
+        triangle_count=triangle_count,
+        vertex_count=len(points),
+        bbox_min=tuple(float(v) for v in points.min(axis=0)),
+        bbox_max=tuple(float(v) for v in points.max(axis=0)),
+    )
+
+
+def _read_stl(path: str) -> Tuple[int, np.ndarray]:
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.read(84)
+        if len(header) == 84:
+            count = struct.unpack("<I", header[80:84])[0]
+            if 84 + count * _STL_TRIANGLE.itemsize == size:
+                triangles = np.fromfile(f, dtype=_STL_TRIANGLE, count=count)
+                return count, triangles["vertices"].reshape(-1, 3)
+
+    # ASCII STL
+    vertices: List[List[float]] = []
+    count = 0
+    with open(path, "r", errors="replace") as f:
+        for line in f:
+            stripped = line.lstrip()
+            if stripped.startswith("vertex"):
+                vertices.append([float(v) for v in stripped.split()[1:4]])
+            elif stripped.startswith("endfacet"):
+                count += 1
+    return count, np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+
+
+def _read_obj(path: str) -> Tuple[int, np.ndarray]:
+    vertices: List[List[float]] = []
+    count = 0
+    with open(path, "r", errors="replace") as f:
+        for line in f:
+            if line.startswith("v "):
+                vertices.append([float(v) for v in line.split()[1:4]])
+            elif line.startswith("f "):
+                count += max(len(line.split()) - 3, 0)
+    return count, np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+
+
+def _read_dae(path: str) -> Tuple[int, np.ndarray]:
+    count = 0
+    unit = 1.0
+    arrays: Dict[str, str] = {}
+    vertices_sources: Dict[str, str] = {}
+
+    for _, element in ET.iterparse(path, events=("end",)):
+        tag = element.tag.rsplit("}", 1)[-1]
+        if tag == "unit":
+            unit = float(element.get("meter", 1.0))
+        elif tag == "float_array":
+            arrays[element.get("id", "")] = element.text or ""
+        elif tag == "source":
+            accessor = element.find(".//{*}accessor")
+            if accessor is not None:
+                arrays[element.get("id", "")] = arrays.get(accessor.get("source", "").lstrip("#"), "")
+        elif tag == "vertices":
+            for input_element in element.findall("{*}input"):
+                if input_element.get("semantic") == "POSITION":
+                    vertices_sources[element.get("id", "")] = input_element.get("source", "").lstrip("#")
+        elif tag == "triangles":
+            count += int(element.get("count", 0))
+        elif tag == "polylist":
+            vcount = element.find("{*}vcount")
+            if vcount is not None and vcount.text:
+                count += sum(max(int(n) - 2, 0) for n in vcount.text.split())
+        elif tag == "polygons":
+            count += sum(max(len((p.text or "").split()) // max(len(element.findall("{*}input")), 1) - 2, 0)
+                         for p in element.findall("{*}p"))
+
+        if tag == "mesh":
+            element.clear()
+
+    points = [np.array(arrays[source].split(), dtype=np.float64)
+              for source in vertices_sources.values() if arrays.get(source)]
+    all_points = np.concatenate(points) if points else np.zeros(0)
+    return count, (all_points[: len(all_points) - len(all_points) % 3] * unit).reshape(-1, 3)
+
+
+def _read_stl_faces(path: str) -> MeshFaces:
+    count, vertices = _read_stl(path)
+    points, inverse = np.unique(vertices.reshape(-1, 3), axis=0, return_inverse=True)
+    return MeshFaces(
+        points=points.astype(np.float64),
+        face_vertex_counts=np.full(count, 3, dtype=np.int64),
+        face_vertex_indices=inverse.reshape(-1).astype(np.int64),
+    )
+
+
+def _read_obj_faces(path: str) -> MeshFaces:
+    vertices: List[List[float]] = []
+    counts: List[int] = []
+    indices: List[int] = []
+    with open(path, "r", errors="replace") as f:
+        for line in f:
+            if line.startswith("v "):
+                vertices.append([float(v) for v in line.split()[1:4]])
+            elif line.startswith("f "):
+                corners = line.split()[1:]
+                if len(corners) < 3:
+                    continue
+                for corner in corners:
+                    # "v", "v/vt", "v//vn" or "v/vt/vn"; negative indices count from the end
+                    index = int(corner.split("/", 1)[0])
+                    indices.append(index - 1 if index > 0 else len(vertices) + index)
+                counts.append(len(corners))
+    return MeshFaces(
+        points=np.asarray(vertices, dtype=np.float64).reshape(-1, 3),
+        face_vertex_counts=np.asarray(counts, dtype=np.int64),
+        face_vertex_indices=np.asarray(indices, dtype=np.int64),
+    )
+
+
+def _read_dae_faces(path: str) -> MeshFaces:
+    unit = 1.0
+    points: List[np.ndarray] = []
+    counts: List[np.ndarray] = []
+    indices: List[np.ndarray] = []
+    point_count = 0
+
+    for _, element in ET.iterparse(path, events=("end",)):
+        tag = element.tag.rsplit("}", 1)[-1]
+        if tag == "unit":
+            unit = float(element.get("meter", 1.0))
+        if tag != "mesh":
+            continue
+
+        arrays = {array.get("id", ""): array.text or "" for array in element.findall(".//{*}float_array")}
+        sources: Dict[str, str] = {}
+        for source in element.findall("{*}source"):
+            accessor = source.find(".//{*}accessor")
+            if accessor is not None:
+                sources[source.get("id", "")] = arrays.get(accessor.get("source", "").lstrip("#"), "")
+        # <vertices> id -> offset of its positions in the combined point list
+        bases: Dict[str, int] = {}
+        for vertices in element.findall("{*}vertices"):
+            for input_element in vertices.findall("{*}input"):
+                if input_element.get("semantic") == "POSITION":
+                    positions = np.array(sources.get(input_element.get("source", "").lstrip("#"), "").split(),
+                                         dtype=np.float64)
+                    positions = positions[: len(positions) - len(positions) % 3].reshape(-1, 3)
+                    bases[vertices.get("id", "")] = point_count
+                    points.append(positions)
+                    point_count += len(positions)
+
+        for primitive in element:
+            kind = primitive.tag.rsplit("}", 1)[-1]
+            if kind not in ("triangles", "polylist", "polygons"):
+                continue
+            inputs = primitive.findall("{*}input")
+            vertex_input = next((i for i in inputs if i.get("semantic") == "VERTEX"), None)
+            if vertex_input is None or vertex_input.get("source", "").lstrip("#") not in bases:
+                continue
+            base = bases[vertex_input.get("source", "").lstrip("#")]
+            stride = max(int(i.get("offset", 0)) for i in inputs) + 1
+            offset = int(vertex_input.get("offset", 0))
+
+            for p in primitive.findall("{*}p"):
+                corners = np.array((p.text or "").split(), dtype=np.int64)[offset::stride] + base
+                if kind == "triangles":
+                    corners = corners[: len(corners) - len(corners) % 3]
+                    counts.append(np.full(len(corners) // 3, 3, dtype=np.int64))
+                elif kind == "polylist":
+                    vcount = primitive.find("{*}vcount")
+                    face_counts = np.array((vcount.text or "").split() if vcount is not None else [],
+                                           dtype=np.int64)
+                    if face_counts.sum() != len(corners):
+                        raise ValueError("polylist vcount does not match its indices")
+                    counts.append(face_counts)
+                else:
+                    counts.append(np.array([len(corners)], dtype=np.int64))
+                indices.append(corners)
+
+        element.clear()
+
+    return MeshFaces(
+        points=(np.concatenate(points) if points else np.zeros((0, 3))) * unit,
+        face_vertex_counts=np.concatenate(counts) if counts else np.zeros(0, dtype=np.int64),
+        face_vertex_indices=np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64),
+    )
+
+
+def _read_gltf(path: str) -> MeshStats:
+    if path.lower().endswith(".glb"):
+        with open(path, "rb") as f:
+            magic, _, _ = struct.unpack("<4sII", f.read(12))
+            if magic != b"glTF":
+                raise ValueError("not a GLB file")
+            chunk_length, chunk_type = struct.unpack("<I4s", f.read(8))
+            if chunk_type != b"JSON":
+                raise ValueError("GLB file has no JSON chunk")
+            document = json.loads(f.read(chunk_length))
+    else:
+        with open(path, "r") as f:
+            document = json.load(f)
+
+    accessors = document.get("accessors", [])
+    count = 0
+    vertex_count = 0
+    bbox_min = [float("inf")] * 3
+    bbox_max = [float("-inf")] * 3
+
+    for mesh in document.get("meshes", []):
+        for primitive in mesh.get("primitives", []):
+            if primitive.get("mode", 4) != 4:
+                continue
+            position = accessors[primitive["attributes"]["POSITION"]]
+            vertex_count += position.get("count", 0)
+            if "indices" in primitive:
+                count += accessors[primitive["indices"]].get("count", 0) // 3
+            else:
+                count += position.get("count", 0) // 3
+            if "min" in position and "max" in position:
+                bbox_min = [min(a, b) for a, b in zip(bbox_min, position["min"])]
+                bbox_max = [max(a, b) for a, b in zip(bbox_max, position["max"])]
+
+    has_bounds = bbox_min[0] != float("inf")
+    return MeshStats(
+        triangle_count=count,
+        vertex_count=vertex_count,
+        bbox_min=tuple(bbox_min) if has_bounds else None,
+        bbox_max=tuple(bbox_max) if has_bounds else None,
+    )
+
+
+# Readers returning (triangle count, vertex positions)
+_POINT_READERS = {
+    ".stl": _read_stl,
+    ".obj": _read_obj,
+    ".dae": _read_dae,
+}
+
+# Readers returning MeshStats directly
+_READERS = {
+    ".gltf": _read_gltf,
+    ".glb": _read_gltf,
+}
+
+# Readers returning MeshFaces
+_FACE_READERS = {
+    ".stl": _read_stl_faces,
+    ".obj": _read_obj_faces,
+    ".dae": _read_dae_faces,
+}
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+Physics Backends - Render-free physics stepping in tight batches
+A backend advances a session's robot by many physics steps per call and
+returns telemetry as arrays. Isaac Sim sessions step their world without
+rendering; without Isaac Sim, a numpy joint-space model stands in.
+"""
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Sequence, Union
+
+import numpy as np
+import structlog
+
+from kinematics import KinematicChain, chain_for_urdf, rotation_quats
+from stress_analysis import robot_loads
+from urdf_model import UrdfModel, parse_urdf
+
+logger = structlog.get_logger(__name__)
+
+MAX_STEPS_PER_BATCH = 100_000
+# Packed telemetry columns are little-endian float32
+TELEMETRY_DTYPE = np.dtype("<f4")
+
+# Stand-in drive tuning: critically damped at this bandwidth, per joint
+DRIVE_BANDWIDTH_HZ = 4.0
+ARMATURE = 0.01                    # kg m^2 (kg for prismatic joints) added to every joint
+# Configuration-dependent terms are refreshed every this many steps (60 Hz at 240 Hz physics)
+REFRESH_STEPS = 4
+
+
+@dataclass
+class TelemetryBatch:
+    """Telemetry of consecutive physics steps, one row per step."""
+    joint_names: List[str]
+    dt: float
+    time: np.ndarray               # (n,) simulation time after each step, s
+    positions: np.ndarray          # (n, dof) float32
+    velocities: np.ndarray         # (n, dof) float32
+    efforts: np.ndarray            # (n, dof) float32, drive effort
+    wall_seconds: float = 0.0
+    poses: Optional[np.ndarray] = None   # (n, 7) float32 x, y, z, qw, qx, qy, qz of pose_link
+    pose_link: Optional[str] = None
+
+    @classmethod
+    def without_joints(cls, time: np.ndarray, dt: float, wall_seconds: float = 0.0) -> "TelemetryBatch":
+        """Steps of a session with no robot: simulation time only."""
+        empty = np.zeros((len(time), 0), dtype=TELEMETRY_DTYPE)
+        return cls(joint_names=[], dt=dt, time=np.asarray(time, dtype=float), positions=empty,
+                   velocities=empty, efforts=empty, wall_seconds=wall_seconds)
+
+    @property
+    def steps(self) -> int:
+        return len(self.time)
+
+    @property
+    def realtime_factor(self) -> float:
+        return self.steps * self.dt / self.wall_seconds if self.wall_seconds > 0 else float("inf")
+
+    def final_state(self) -> Dict[str, float]:
+        if not self.steps:
+            return {}
+        return {name: float(v) for name, v in zip(self.joint_names, self.positions[-1])}
+
+    def to_dict(self, stride: int = 1) -> Dict[str, Any]:
+        """Compact JSON form: every ``stride``-th step plus the last one."""
+        rows = self.rows(stride)
+        return {
+            "joint_names": self.joint_names,
+            "dt": self.dt,
+            "steps": self.steps,
+            "time": np.round(self.time[rows], 6).tolist(),
+            "positions": np.round(self.positions[rows], 5).tolist(),
+            "velocities": np.round(self.velocities[rows], 5).tolist(),
+            "efforts": np.round(self.efforts[rows], 4).tolist(),
+            "wall_seconds": round(self.wall_seconds, 4),
+            "realtime_factor": round(self.realtime_factor, 1) if self.wall_seconds > 0 else None,
+        }
+
+    def slice(self, start: int, stop: int) -> "TelemetryBatch":
+        """Steps [start, stop) as a batch sharing this one's arrays."""
+        rows = slice(start, stop)
+        return TelemetryBatch(
+            joint_names=self.joint_names, dt=self.dt, time=self.time[rows], positions=self.positions[rows],
+            velocities=self.velocities[rows], efforts=self.efforts[rows], wall_seconds=self.wall_seconds,
+            poses=self.poses[rows] if self.poses is not None else None, pose_link=self.pose_link,
+        )
+
+    def rows(self, stride: int = 1) -> np.ndarray:
+        """Indices of every ``stride``-th step plus the last one."""
+        rows = np.arange(0, self.steps, max(1, stride))
+        if self.steps and rows[-1] != self.steps - 1:
+            rows = np.append(rows, self.steps - 1)
+        return rows
+
+    def columns(self, stride: int = 1) -> List[Dict[str, Any]]:
+        """
+        Packed columnar form: each array as little-endian float32 bytes with
+        its shape, one row per kept step. Decode with ``unpack_column``.
+        """
+        rows = self.rows(stride)
+        arrays = [("time", self.time), ("positions", self.positions),
+                  ("velocities", self.velocities), ("efforts", self.efforts)]
+        if self.poses is not None:
+            arrays.append(("poses", self.poses))
+        return [pack_column(name, array[rows]) for name, array in arrays]
+
+    def with_poses(self, chain: KinematicChain, link: Optional[str] = None) -> "TelemetryBatch":
+        """
+        Fill ``poses`` with the world pose of ``link`` (default: the first tip
+        link) at every step, by batched forward kinematics of the positions.
+        Joints are matched by name; joints the batch lacks are held at zero.
+        """
+        link = link or chain.tip_links[0]
+        self.poses = link_pose_track(chain, self.joint_names, self.positions, link)
+        self.pose_link = link
+        return self
+
+
+def link_pose_track(chain: KinematicChain, joint_names: Sequence[str], positions: np.ndarray,
+                    link: str) -> np.ndarray:
+    """
+    (n, 7) float32 world poses (x, y, z, qw, qx, qy, qz) of a link for (n, J)
+    joint positions ordered like ``joint_names``. Joints are matched by name;
+    chain joints missing from ``joint_names`` are held at zero.
+    """
+    q = np.zeros((len(positions), chain.dof))
+    index = {name: i for i, name in enumerate(joint_names)}
+    for j, name in enumerate(chain.joint_names):
+        if name in index:
+            q[:, j] = positions[:, index[name]]
+    link_positions, rotations = chain.forward(q, [link])
+    return np.concatenate([link_positions[:, 0], rotation_quats(rotations[:, 0])], axis=1).astype(np.float32)
+
+
+def pack_column(name: str, array: np.ndarray) -> Dict[str, Any]:
+    """One named array as little-endian float32 bytes plus its shape."""
+    data = np.ascontiguousarray(array, dtype=TELEMETRY_DTYPE)
+    return {"name": name, "dtype": "float32", "shape": list(data.shape), "data": data.tobytes()}
+
+
+def unpack_column(column) -> np.ndarray:
+    """Array of a packed column, given as a dict or a message with the same fields."""
+    get = column.get if isinstance(column, dict) else lambda key: getattr(column, key)
+    return np.frombuffer(get("data"), dtype=TELEMETRY_DTYPE).reshape(tuple(get("shape")))
+
+
+class PhysicsBackend:
+    """
+    Batched, render-free physics for one robot.
+
+    Joint targets are held by position drives; ``step`` advances
+    ``num_steps`` physics steps without rendering or pacing, optionally
+    with a separate drive target for every step.
+    """
+
+    name = "base"
+    # Whether step() may run on an executor thread
+    thread_safe = False
+
+    def __init__(self, joint_names: Sequence[str], dt: float):
+        self.joint_names = list(joint_names)
+        self.joint_index = {name: i for i, name in enumerate(self.joint_names)}
+        self.dt = float(dt)
+        self.time = 0.0
+
+    @property
+    def dof(self) -> int:
+        return len(self.joint_names)
+
+    def set_targets(self, targets: Union[Dict[str, float], Sequence[float]]):
+        raise NotImplementedError
+
+    def step(self, num_steps: int, targets: Optional[np.ndarray] = None) -> TelemetryBatch:
+        raise NotImplementedError
+
+    def reset(self):
+        raise NotImplementedError
+
+    def joint_positions(self) -> np.ndarray:
+        """Current joint positions, in ``joint_names`` order."""
+        raise NotImplementedError
+
+    def _step_targets(self, num_steps: int, targets: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        if targets is None:
+            return None
+        targets = np.asarray(targets, dtype=float)
+        if targets.shape != (num_steps, self.dof):
+            raise ValueError(f"Expected ({num_steps}, {self.dof}) step targets, got {targets.shape}")
+        return targets
+
+    def _target_vector(self, targets: Union[Dict[str, float], Sequence[float]],
+                       current: np.ndarray) -> np.ndarray:
+        """Target array from a name map (unknown names ignored) or a full vector."""
+        if isinstance(targets, dict):
+            vector = current.copy()
+            for name, value in targets.items():
+                index = self.joint_index.get(name)
+                if index is not None:
+                    vector[index] = float(value)
+            return vector
+        vector = np.asarray(targets, dtype=float).reshape(-1)
+        if len(vector) != self.dof:
+            raise ValueError(f"Expected {self.dof} joint targets, got {len(vector)}")
+        return vector
+
+
+class NumpyPhysicsBackend(PhysicsBackend):
+    """
+    Stand-in joint-space dynamics used when Isaac Sim is unavailable.
+
+    Each joint is a PD position drive with gravity feedforward acting on
+    its effective inertia, the diagonal of the joint-space mass matrix of
+    the link masses at their centers of mass, against the gravity torque of
+    the current pose.
+    Drive effort is clipped to the joint's effort limit and velocity to its
+    velocity limit. Coupling between joints, contacts and the base are not
+    modelled.
+    """
+
+    name = "numpy"
+    thread_safe = True
+
+    def __init__(self, model: UrdfModel, chain: KinematicChain, dt: float,
+                 default_effort: float = 100.0, default_force: float = 1000.0):
+        super().__init__(chain.joint_names, dt)
+        self.chain = chain
+        self.lower = chain.lower.copy()
+        self.upper = chain.upper.copy()
+
+        joints = [model.joints[name] for name in chain.joint_names]
+        prismatic = np.array([joint.type == "prismatic" for joint in joints])
+        self.effort_limit = np.array([
+            joint.limit.effort if joint.limit is not None and joint.limit.effort
+            else (default_force if is_prismatic else default_effort)
+            for joint, is_prismatic in zip(joints, prismatic)
+        ])
+        self.velocity_limit = np.array([
+            joint.limit.velocity if joint.limit is not None and joint.limit.velocity else np.inf
+            for joint in joints
+        ])
+        self.joint_damping = np.array([joint.damping for joint in joints])
+        self.joint_friction = np.array([joint.friction for joint in joints])
+
+        self._load_links, self._load_points, self._load_forces = robot_loads(model, chain)
+        self._masses = np.linalg.norm(self._load_forces, axis=1) / 9.81
+        self._omega = 2 * math.pi * DRIVE_BANDWIDTH_HZ
+        self.reset()
+
+    def reset(self):
+        self.time = 0.0
+        self.q = np.clip(np.zeros(self.dof), self.lower, self.upper)
+        self.qd = np.zeros(self.dof)
+        self.target = self.q.copy()
+
+    def set_targets(self, targets):
+        self.target = np.clip(self._target_vector(targets, self.target), self.lower, self.upper)
+
+    def joint_positions(self) -> np.ndarray:
+        return self.q.copy()
+
+    def set_state(self, positions: Sequence[float], velocities: Optional[Sequence[float]] = None):
+        self.q = np.clip(np.asarray(positions, dtype=float).reshape(self.dof), self.lower, self.upper)
+        self.qd = np.zeros(self.dof) if velocities is None else np.asarray(velocities, dtype=float).reshape(self.dof)
+
+    def step(self, num_steps: int, targets: Optional[np.ndarray] = None) -> TelemetryBatch:
+        if not 1 <= num_steps <= MAX_STEPS_PER_BATCH:
+            raise ValueError(f"num_steps must be between 1 and {MAX_STEPS_PER_BATCH}")
+        targets = self._step_targets(num_steps, targets)
+        if targets is not None:
+            targets = np.clip(targets, self.lower, self.upper)
+        started = time.perf_counter()
+        dt = self.dt
+        positions = np.empty((num_steps, self.dof), dtype=np.float32)
+        velocities = np.empty((num_steps, self.dof), dtype=np.float32)
+        efforts = np.empty((num_steps, self.dof), dtype=np.float32)
+        times = self.time + dt * np.arange(1, num_steps + 1)
+
+        q, qd, target = self.q, self.qd, self.target
+        for i in range(num_steps):
+            if targets is not None:
+                target = targets[i]
+            if i % REFRESH_STEPS == 0:
+                inertia, gravity = self._pose_terms(q)
+                kp = inertia * self._omega ** 2
+                kd = 2.0 * inertia * self._omega
+
+            # PD drive with gravity feedforward, clipped to the effort limit;
+            # joint damping is integrated implicitly
+            drive = np.clip(kp * (target - q) - kd * qd - gravity, -self.effort_limit, self.effort_limit)
+            torque = drive + gravity - self.joint_friction * np.sign(qd)
+            qd = (qd + dt * torque / inertia) / (1.0 + dt * self.joint_damping / inertia)
+            qd = np.clip(qd, -self.velocity_limit, self.velocity_limit)
+            q = q + dt * qd
+
+            # Hard stops at the joint limits
+            below, above = q < self.lower, q > self.upper
+            if below.any() or above.any():
+                q = np.clip(q, self.lower, self.upper)
+                qd = np.where(below | above, 0.0, qd)
+
+            positions[i] = q
+            velocities[i] = qd
+            efforts[i] = drive
+
+        self.q, self.qd, self.target = q, qd, target
+        self.time = float(times[-1])
+        return TelemetryBatch(
+            joint_names=self.joint_names, dt=dt, time=times, positions=positions,
+            velocities=velocities, efforts=efforts, wall_seconds=time.perf_counter() - started,
+        )
+
+    def _pose_terms(self, q: np.ndarray):
+        """Effective joint inertias and gravity torques at one configuration."""
+        _, jacobians = self.chain.point_jacobians(q, self._load_links, self._load_points)
+        jacobians = jacobians[0]
+        inertia = ARMATURE + np.einsum("k,kij->j", self._masses, jacobians ** 2)
+        gravity = np.einsum("kij,ki->j", jacobians, self._load_forces)
+        return inertia, gravity
+
+
+class IsaacPhysicsBackend(PhysicsBackend):
+    """
+    Steps an Isaac Sim world with ``render=False`` and no app update, reading
+    joint state from the robot articulation after every step.
+    """
+
+    name = "isaac"
+
+    def __init__(self, world, articulation, dt: float):
+        super().__init__(articulation.dof_names, dt)
+        self.world = world
+        self.articulation = articulation
+
+    def reset(self):
+        self.world.reset()
+        self.time = 0.0
+
+    def set_targets(self, targets):
+        from omni.isaac.core.utils.types import ArticulationAction
+        self.articulation.apply_action(ArticulationAction(joint_positions=self._target_vector(targets, self.joint_positions())))
+
+    def joint_positions(self) -> np.ndarray:
+        return np.asarray(self.articulation.get_joint_positions(), dtype=float)
+
+    def step(self, num_steps: int, targets: Optional[np.ndarray] = None) -> TelemetryBatch:
+        if not 1 <= num_steps <= MAX_STEPS_PER_BATCH:
+            raise ValueError(f"num_steps must be between 1 and {MAX_STEPS_PER_BATCH}")
+        targets = self._step_targets(num_steps, targets)
+        if targets is not None:
+            from omni.isaac.core.utils.types import ArticulationAction
+        started = time.perf_counter()
+        positions = np.empty((num_steps, self.dof), dtype=np.float32)
+        velocities = np.empty((num_steps, self.dof), dtype=np.float32)
+        efforts = np.empty((num_steps, self.dof), dtype=np.float32)
+        for i in range(num_steps):
+            if targets is not None:
+                self.articulation.apply_action(ArticulationAction(joint_positions=targets[i]))
+            self.world.step(render=False)
+            positions[i] = self.articulation.get_joint_positions()
+            velocities[i] = self.articulation.get_joint_velocities()
+            efforts[i] = self.articulation.get_applied_joint_efforts()
+
+        times = self.time + self.dt * np.arange(1, num_steps + 1)
+        self.time = float(times[-1])
+        return TelemetryBatch(
+            joint_names=self.joint_names, dt=self.dt, time=times, positions=positions,
+            velocities=velocities, efforts=efforts, wall_seconds=time.perf_counter() - started,
+        )
+
+
+def create_numpy_backend(urdf_content: Union[str, bytes], dt: float, digest: Optional[str] = None,
+                         default_effort: float = 100.0, default_force: float = 1000.0) -> NumpyPhysicsBackend:
+    """Factory function for the stand-in backend of a URDF document."""
+    if isinstance(urdf_content, str):
+        urdf_content = urdf_content.encode("utf-8")
+    chain = chain_for_urdf(urdf_content, digest)
+    if chain.dof == 0:
+        raise ValueError("Robot has no movable joints")
+    return NumpyPhysicsBackend(parse_urdf(urdf_content), chain, dt, default_effort, default_force)
+
+
+def run_physics_validation(backend: PhysicsBackend, duration_seconds: float,
+                           lower: np.ndarray, upper: np.ndarray, hold_seconds: float = 2.0,
+                           settle_tolerance: float = 0.01, stability_threshold: float = 0.95,
+                           seed: int = 0, progress=None) -> Dict[str, Any]:
+    """
+    Drive the robot through random joint-space waypoints for a simulated
+    duration and score how well it settles on each.
+
+    A waypoint counts as settled if every joint ends its hold within
+    ``settle_tolerance`` of the target; the stability score is the settled
+    fraction. Non-finite state fails the run.
+
+    Args:
+        backend: Physics backend, reset before the run
+        duration_seconds: Simulated time to run
+        lower, upper: Joint ranges the waypoints are drawn from
+        hold_seconds: Simulated time each waypoint is held
+        progress: Called with the completed fraction after each waypoint
+    """
+    started = time.perf_counter()
+    backend.reset()
+    rng = np.random.default_rng(seed)
+    waypoint_count = max(1, int(round(duration_seconds / hold_seconds)))
+    steps_per_waypoint = max(1, int(round(hold_seconds / backend.dt)))
+    # Stay clear of the hard stops, and keep each move within half of what
+    # the velocity limits allow in one hold, so every waypoint is reachable
+    margin = 0.05 * (upper - lower)
+    max_move = 0.5 * hold_seconds * getattr(backend, "velocity_limit", np.full(backend.dof, np.inf))
+    target = np.clip(np.zeros(backend.dof), lower + margin, upper - margin)
+
+    final_errors = np.zeros((waypoint_count, backend.dof))
+    saturated = 0
+    samples = 0
+    peak_velocity = np.zeros(backend.dof)
+    diverged = False
+    for w in range(waypoint_count):
+        target = np.clip(rng.uniform(lower + margin, upper - margin), target - max_move, target + max_move)
+        backend.set_targets(target)
+        batch = backend.step(steps_per_waypoint)
+        if not (np.all(np.isfinite(batch.positions)) and np.all(np.isfinite(batch.velocities))):
+            diverged = True
+            break
+        final_errors[w] = np.abs(batch.positions[-1] - target)
+        limit = getattr(backend, "effort_limit", None)
+        if limit is not None:
+            saturated += int(np.count_nonzero(np.abs(batch.efforts) >= 0.999 * limit))
+        samples += batch.efforts.size
+        peak_velocity = np.maximum(peak_velocity, np.abs(batch.velocities).max(axis=0))
+        if progress is not None:
+            progress((w + 1) / waypoint_count)
+
+    settled = np.all(final_errors <= settle_tolerance, axis=1)
+    stability = 0.0 if diverged else float(np.mean(settled))
+    worst = int(np.argmax(final_errors.max(axis=0))) if backend.dof else 0
+    wall = time.perf_counter() - started
+    simulated = waypoint_count * steps_per_waypoint * backend.dt
+    return {
+        "passed": bool(not diverged and stability >= stability_threshold),
+        "backend": backend.name,
+        "stability_score": round(stability, 4),
+        "waypoints": waypoint_count,
+        "settled_waypoints": int(np.count_nonzero(settled)) if not diverged else 0,
+        "max_steady_state_error": round(float(final_errors.max()), 6),
+        "worst_joint": backend.joint_names[worst] if backend.dof else None,
+        "effort_saturation": round(saturated / samples, 4) if samples else 0.0,
+        "peak_velocity": {name: round(float(v), 4) for name, v in zip(backend.joint_names, peak_velocity)},
+        "diverged": diverged,
+        "simulated_seconds": round(simulated, 3),
+        "wall_seconds": round(wall, 3),
+        "realtime_factor": round(simulated / wall, 1) if wall > 0 else None,
+    }
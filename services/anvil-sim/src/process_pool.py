@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Process Pool
+One CPU worker pool shared by every numpy-heavy job the service runs, so
+concurrent jobs queue for cores instead of oversubscribing them.
+"""
+
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import structlog
+
+from config.anvil_config import PERFORMANCE_SETTINGS
+
+logger = structlog.get_logger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def pool_size() -> int:
+    """Configured worker count, defaulting to the CPU count."""
+    return PERFORMANCE_SETTINGS.get("worker_processes") or os.cpu_count() or 1
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Shared process pool, created on first use.
+
+    Jobs submitted to the pool must be module-level functions of numpy-only
+    modules; workers never touch Isaac Sim, gRPC or the event loop.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=pool_size())
+            logger.info("Process pool started", workers=pool_size())
+        return _pool
+
+
+def shutdown_process_pool(wait: bool = True):
+    """Stop the shared pool; a later get_process_pool starts a new one."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+        logger.info("Process pool stopped")
+
+
+atexit.register(shutdown_process_pool, False)
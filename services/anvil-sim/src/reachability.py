@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Reachability Maps
+Voxel grids of where a robot's end effector can reach, built by sampling
+joint space with batched forward kinematics on the shared process pool.
+Maps are cached on disk per URDF hash and memory-mapped for queries.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, Optional, Any, Tuple, Union
+
+import numpy as np
+import structlog
+
+from kinematics import chain_for_urdf, manipulability
+
+logger = structlog.get_logger(__name__)
+
+REACHABILITY_VERSION = 1
+DEFAULT_VOXEL_SIZE = 0.05          # m
+DEFAULT_SAMPLES = 1_000_000
+SAMPLES_PER_TASK = 100_000
+MAX_GRID_EDGE = 256                # voxels; coarser voxels are used for very long arms
+
+META_NAME = "meta.json"
+OCCUPANCY_NAME = "occupancy.npy"
+MANIPULABILITY_NAME = "manipulability.npy"
+
+
+@dataclass(frozen=True)
+class ReachabilityParams:
+    """Sampling parameters; each distinct set is cached separately."""
+    link: Optional[str] = None
+    voxel_size: float = DEFAULT_VOXEL_SIZE
+    samples: int = DEFAULT_SAMPLES
+    seed: int = 0
+
+    @classmethod
+    def from_request(cls, data: Dict[str, Any]) -> "ReachabilityParams":
+        voxel_size = float(data.get("voxel_size", DEFAULT_VOXEL_SIZE))
+        samples = int(data.get("samples", DEFAULT_SAMPLES))
+        if not 0.001 <= voxel_size <= 1.0:
+            raise ValueError("voxel_size must be between 0.001 and 1.0 m")
+        if not 1000 <= samples <= 50_000_000:
+            raise ValueError("samples must be between 1000 and 50000000")
+        return cls(link=data.get("link"), voxel_size=voxel_size, samples=samples,
+                   seed=int(data.get("seed", 0)))
+
+    def key(self) -> str:
+        payload = json.dumps(dict(asdict(self), version=REACHABILITY_VERSION), sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class ReachabilityMap:
+    """
+    A memory-mapped reachability grid.
+
+    ``occupancy`` holds one bit per voxel, packed along z; ``manipulability``
+    holds the best position manipulability seen in each voxel as float16.
+    Coordinates are in the robot root link frame.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        with open(self.directory / META_NAME, "r") as f:
+            self.meta: Dict[str, Any] = json.load(f)
+        self.origin = tuple(self.meta["origin"])
+        self.voxel_size = float(self.meta["voxel_size"])
+        self.shape = tuple(self.meta["shape"])
+        self.occupancy = np.load(self.directory / OCCUPANCY_NAME, mmap_mode="r")
+        self.manipulability = np.load(self.directory / MANIPULABILITY_NAME, mmap_mode="r")
+
+    def voxel(self, point) -> Optional[Tuple[int, int, int]]:
+        """Voxel containing a point, or None outside the grid."""
+        x, y, z = point
+        ox, oy, oz = self.origin
+        i = math.floor((x - ox) / self.voxel_size)
+        j = math.floor((y - oy) / self.voxel_size)
+        k = math.floor((z - oz) / self.voxel_size)
+        nx, ny, nz = self.shape
+        if 0 <= i < nx and 0 <= j < ny and 0 <= k < nz:
+            return i, j, k
+        return None
+
+    def query_point(self, point) -> Dict[str, Any]:
+        """Whether the end effector can reach a point."""
+        voxel = self.voxel(point)
+        if voxel is None:
+            return {"reachable": False, "manipulability": 0.0, "voxel": None}
+        i, j, k = voxel
+        reachable = bool((self.occupancy[i, j, k >> 3] >> (7 - (k & 7))) & 1)
+        return {
+            "reachable": reachable,
+            "manipulability": float(self.manipulability[i, j, k]),
+            "voxel": [i, j, k],
+        }
+
+    def query_points(self, points) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized point queries.
+
+        Args:
+            points: (N, 3) positions
+
+        Returns:
+            (reachable (N,) bool, manipulability (N,) float32)
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        cells = np.floor((points - self.origin) / self.voxel_size).astype(np.int64)
+        inside = np.all((cells >= 0) & (cells < self.shape), axis=1)
+        reachable = np.zeros(len(points), dtype=bool)
+        values = np.zeros(len(points), dtype=np.float32)
+        i, j, k = cells[inside].T
+        reachable[inside] = (self.occupancy[i, j, k >> 3] >> (7 - (k & 7))) & 1
+        values[inside] = self.manipulability[i, j, k]
+        return reachable, values
+
+    def query_region(self, lower, upper) -> Dict[str, Any]:
+        """
+        Reachability of an axis-aligned box, e.g. a shelf or a bin.
+
+        Returns:
+            Voxel counts, reachable fraction and manipulability statistics
+        """
+        lower, upper = np.minimum(lower, upper), np.maximum(lower, upper)
+        start = np.floor((np.asarray(lower) - self.origin) / self.voxel_size).astype(np.int64)
+        stop = np.floor((np.asarray(upper) - self.origin) / self.voxel_size).astype(np.int64) + 1
+        total = int(np.prod(np.maximum(stop - start, 0)))
+        start = np.clip(start, 0, self.shape)
+        stop = np.clip(stop, 0, self.shape)
+
+        (x0, y0, z0), (x1, y1, z1) = start, stop
+        if total == 0 or x1 <= x0 or y1 <= y0 or z1 <= z0:
+            return {"voxels": total, "reachable_voxels": 0, "fraction": 0.0,
+                    "max_manipulability": 0.0, "mean_manipulability": 0.0}
+
+        packed = self.occupancy[x0:x1, y0:y1, z0 >> 3:(z1 + 7) >> 3]
+        occupied = np.unpackbits(packed, axis=2)[:, :, z0 - ((z0 >> 3) << 3):][:, :, :z1 - z0].astype(bool)
+        values = self.manipulability[x0:x1, y0:y1, z0:z1][occupied].astype(np.float32)
+        reachable = int(occupied.sum())
+        return {
+            "voxels": total,
+            "reachable_voxels": reachable,
+            "fraction": reachable / total,
+            "max_manipulability": float(values.max()) if reachable else 0.0,
+            "mean_manipulability": float(values.mean()) if reachable else 0.0,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.meta)
+
+
+def build_reachability_map(urdf_content: Union[str, bytes], output_dir: Union[str, Path],
+                           params: ReachabilityParams = ReachabilityParams(),
+                           executor=None) -> ReachabilityMap:
+    """
+    Sample joint space and write a reachability map.
+
+    Args:
+        urdf_content: URDF document
+        output_dir: Directory receiving the map (replaced atomically)
+        params: Sampling parameters
+        executor: Executor running the sampling tasks, inline if None
+
+    Returns:
+        The memory-mapped map
+    """
+    started = time.perf_counter()
+    if isinstance(urdf_content, str):
+        urdf_content = urdf_content.encode("utf-8")
+    digest = hashlib.sha256(urdf_content).hexdigest()
+    chain = chain_for_urdf(urdf_content, digest)
+    if chain.dof == 0:
+        raise ValueError("Robot has no movable joints")
+    link = params.link or chain.tip_links[0]
+    if link not in chain.link_index:
+        raise ValueError(f"Unknown link: {link}")
+
+    # Cube around the root sized by the kinematic reach bound
+    half = chain.reach_bound(link) + params.voxel_size
+    edge = min(MAX_GRID_EDGE, math.ceil(2 * half / params.voxel_size))
+    voxel_size = max(params.voxel_size, 2 * half / edge)
+    origin = np.full(3, -edge * voxel_size / 2)
+    shape = (edge, edge, edge)
+
+    tasks = []
+    for index, start in enumerate(range(0, params.samples, SAMPLES_PER_TASK)):
+        count = min(SAMPLES_PER_TASK, params.samples - start)
+        tasks.append((urdf_content, digest, link, origin, voxel_size, shape, count, params.seed * 100003 + index))
+
+    results = executor.map(_sample_task, tasks) if executor is not None else map(_sample_task, tasks)
+
+    best = np.zeros(edge ** 3, dtype=np.float32)
+    occupied = np.zeros(edge ** 3, dtype=bool)
+    max_reach = 0.0
+    for cells, values, reach in results:
+        best[cells] = np.maximum(best[cells], values)
+        occupied[cells] = True
+        max_reach = max(max_reach, reach)
+
+    meta = {
+        "version": REACHABILITY_VERSION,
+        "robot": chain.name,
+        "urdf_digest": digest,
+        "link": link,
+        "joints": chain.joint_names,
+        "samples": params.samples,
+        "seed": params.seed,
+        "origin": origin.tolist(),
+        "voxel_size": voxel_size,
+        "shape": list(shape),
+        "reachable_voxels": int(occupied.sum()),
+        "max_reach_m": round(max_reach, 4),
+        "build_seconds": round(time.perf_counter() - started, 3),
+    }
+
+    output_dir = Path(output_dir)
+    output_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = output_dir.with_name(f".{output_dir.name}.{uuid.uuid4().hex}.tmp")
+    tmp_dir.mkdir()
+    try:
+        np.save(tmp_dir / OCCUPANCY_NAME, np.packbits(occupied.reshape(shape), axis=2))
+        np.save(tmp_dir / MANIPULABILITY_NAME, best.reshape(shape).astype(np.float16))
+        with open(tmp_dir / META_NAME, "w") as f:
+            json.dump(meta, f, indent=2)
+        if output_dir.exists():
+            shutil.rmtree(output_dir)
+        os.replace(tmp_dir, output_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    logger.info("Reachability map built", robot=chain.name, link=link, samples=params.samples,
+                voxels=meta["reachable_voxels"], seconds=meta["build_seconds"])
+    return ReachabilityMap(output_dir)
+
+
+def _sample_task(args) -> Tuple[np.ndarray, np.ndarray, float]:
+    """Sample configurations and reduce them to (voxel, best manipulability) pairs."""
+    urdf_content, digest, link, origin, voxel_size, shape, count, seed = args
+    chain = chain_for_urdf(urdf_content, digest)
+    rng = np.random.default_rng(seed)
+    q = rng.uniform(chain.lower, chain.upper, size=(count, chain.dof))
+
+    positions, jacobians = chain.position_jacobian(q, link)
+    values = manipulability(jacobians)
+    reach = float(np.sqrt(np.max(np.einsum("ij,ij->i", positions, positions))))
+
+    cells = np.floor((positions - origin) / voxel_size).astype(np.int64)
+    inside = np.all((cells >= 0) & (cells < shape), axis=1)
+    flat = np.ravel_multi_index(cells[inside].T, shape)
+    values = values[inside]
+    if len(flat) == 0:
+        return flat, values.astype(np.float32), reach
+
+    order = np.argsort(flat, kind="stable")
+    flat, values = flat[order], values[order]
+    starts = np.flatnonzero(np.r_[True, flat[1:] != flat[:-1]])
+    return flat[starts], np.maximum.reduceat(values, starts).astype(np.float32), reach
+
+
+class ReachabilityCache:
+    """
+    Reachability maps on disk under ``<root>/<urdf digest>/<params key>/``.
+
+    Opened maps stay memory-mapped; concurrent requests for the same map
+    share a single build.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._maps: Dict[Tuple[str, str], ReachabilityMap] = {}
+        self._builds: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    def directory(self, digest: str, params: ReachabilityParams) -> Path:
+        if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+            raise ValueError(f"Invalid URDF digest: {digest!r}")
+        return self.root / digest / params.key()
+
+    def get(self, digest: str, params: ReachabilityParams = ReachabilityParams()) -> Optional[ReachabilityMap]:
+        """Cached map, or None if it has not been built."""
+        key = (digest, params.key())
+        with self._lock:
+            reach_map = self._maps.get(key)
+        if reach_map is not None:
+            return reach_map
+
+        directory = self.directory(digest, params)
+        if not (directory / META_NAME).exists():
+            return None
+        reach_map = ReachabilityMap(directory)
+        with self._lock:
+            return self._maps.setdefault(key, reach_map)
+
+    async def ensure(self, digest: str, urdf_content: Union[str, bytes],
+                     params: ReachabilityParams = ReachabilityParams(),
+                     executor=None) -> ReachabilityMap:
+        """Cached map, building it first if needed."""
+        reach_map = self.get(digest, params)
+        if reach_map is not None:
+            return reach_map
+
+        key = (digest, params.key())
+        build = self._builds.get(key)
+        if build is None:
+            loop = asyncio.get_running_loop()
+            build = loop.run_in_executor(
+                None, build_reachability_map, urdf_content, self.directory(digest, params), params, executor
+            )
+            self._builds[key] = build
+            build.add_done_callback(lambda _: self._builds.pop(key, None))
+
+        reach_map = await asyncio.shield(build)
+        with self._lock:
+            return self._maps.setdefault(key, reach_map)
+
+    def evict(self, digest: str):
+        """Close the open maps of a URDF (files stay on disk)."""
+        with self._lock:
+            for key in [key for key in self._maps if key[0] == digest]:
+                del self._maps[key]
@@ -10,33 +10,60 @@ import logging
 import hashlib
 import json
 import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple
 import tempfile
 import requests
 from datetime import datetime
 
+from robot_catalog_index import RobotCatalogIndex
+from texture_pipeline import (
+    TexturePipeline, DEFAULT_QUALITY_PROFILE, variant_paths, rewrite_texture_references
+)
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Read size used when hashing asset files
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Temporary copies in the shared mesh store younger than this belong to
+# uploads in progress; older ones are leftovers of failed uploads
+SHARED_MESH_TMP_GRACE_SECONDS = 3600
+
 class RobotAssetManager:
     """Manages robot assets for Isaac Sim deployment."""
     
-    def __init__(self, aws_public_ip: str, asset_base_path: str = "/assets"):
+    def __init__(self, aws_public_ip: str, asset_base_path: str = "/assets",
+                 max_upload_workers: int = 8, texture_workers: Optional[int] = None):
         """
         Initialize the robot asset manager.
         
         Args:
             aws_public_ip: Public IP of the AWS Isaac Sim instance
             asset_base_path: Base path for storing assets on AWS
+            max_upload_workers: Maximum number of files uploaded concurrently
+            texture_workers: Processes generating texture variants (default: CPU count)
         """
         self.aws_public_ip = aws_public_ip
         self.asset_base_path = Path(asset_base_path)
+        self.max_upload_workers = max(1, max_upload_workers)
+        self.texture_pipeline = TexturePipeline(max_workers=texture_workers)
         self.temp_dir = None
+        # Serializes linking into the shared mesh store with pruning it
+        self._shared_mesh_lock = threading.Lock()
         
         # Create asset directories
         self._create_asset_directories()
+        
+        # Persistent catalog index, built from the asset tree on first use
+        self.catalog_index = RobotCatalogIndex(str(self.asset_base_path / "cache" / "robot_catalog.sqlite3"))
+        if self.catalog_index.created:
+            self.catalog_index.rebuild(self.asset_base_path / "robots")
     
     def _create_asset_directories(self):
         """Create necessary asset directories."""
@@ -73,56 +100,277 @@ class RobotAssetManager:
             robot_name = robot_config.get('name', 'robot')
             robot_dir = self.asset_base_path / "robots" / robot_name
             robot_dir.mkdir(parents=True, exist_ok=True)
+            metadata_path = robot_dir / "metadata.json"
             
-            # Upload URDF file
+            # Collect every file of the robot into a single upload stage
+            jobs: List[Tuple[str, str, Path]] = []
             if 'urdf_path' in robot_config:
-                urdf_path = self._upload_file(
-                    robot_config['urdf_path'], 
-                    robot_dir / f"{robot_name}.urdf"
-                )
-                uploaded_assets['urdf'] = str(urdf_path)
+                jobs.append(("urdf", robot_config['urdf_path'], robot_dir / f"{robot_name}.urdf"))
+            for mesh_path in robot_config.get('meshes', []):
+                jobs.append(("mesh", mesh_path, robot_dir / "meshes" / os.path.basename(mesh_path)))
+            for texture_path in robot_config.get('textures', []):
+                jobs.append(("texture", texture_path, robot_dir / "textures" / os.path.basename(texture_path)))
+            
+            previous = self._load_previous_metadata(metadata_path)
+            results, upload_stats = self._upload_files(
+                jobs,
+                previous.get("content_hashes", {}),
+                previous.get("upload_stats", {}).get("copy_throughput_bps")
+            )
+            
+            content_hashes = {}
+            mesh_paths = []
+            texture_paths = []
+            for (kind, _, _), (dest_path, record) in zip(jobs, results):
+                content_hashes[str(dest_path)] = record
+                if kind == "urdf":
+                    uploaded_assets['urdf'] = str(dest_path)
+                elif kind == "mesh":
+                    mesh_paths.append(str(dest_path))
+                else:
+                    texture_paths.append(str(dest_path))
             
-            # Upload mesh files
             if 'meshes' in robot_config:
-                mesh_paths = []
-                for mesh_path in robot_config['meshes']:
-                    mesh_dest = robot_dir / "meshes" / os.path.basename(mesh_path)
-                    mesh_dest.parent.mkdir(parents=True, exist_ok=True)
-                    uploaded_mesh = self._upload_file(mesh_path, mesh_dest)
-                    mesh_paths.append(str(uploaded_mesh))
                 uploaded_assets['meshes'] = mesh_paths
-            
-            # Upload texture files
             if 'textures' in robot_config:
-                texture_paths = []
-                for texture_path in robot_config['textures']:
-                    texture_dest = robot_dir / "textures" / os.path.basename(texture_path)
-                    texture_dest.parent.mkdir(parents=True, exist_ok=True)
-                    uploaded_texture = self._upload_file(texture_path, texture_dest)
-                    texture_paths.append(str(uploaded_texture))
                 uploaded_assets['textures'] = texture_paths
             
+            # Capped-resolution variants and mip chains per quality profile
+            texture_variants = {}
+            if texture_paths:
+                texture_variants = self.texture_pipeline.process(
+                    [(path, content_hashes[path]["sha256"]) for path in texture_paths],
+                    robot_dir / "textures" / "variants"
+                )
+                uploaded_assets['texture_variants'] = texture_variants
+            
             # Create robot metadata
             metadata = {
                 "name": robot_name,
                 "uploaded_at": datetime.utcnow().isoformat(),
                 "assets": uploaded_assets,
-                "config": robot_config
+                "config": robot_config,
+                "content_hashes": content_hashes,
+                "texture_variants": texture_variants,
+                "upload_stats": upload_stats
             }
             
-            metadata_path = robot_dir / "metadata.json"
-            with open(metadata_path, 'w') as f:
-                json.dump(metadata, f, indent=2)
+            # Index and metadata file are updated together or not at all
+            with self.catalog_index.transaction() as tx:
+                self.catalog_index.upsert(metadata, conn=tx)
+                tmp_path = metadata_path.with_name(f".{metadata_path.name}.tmp")
+                with open(tmp_path, 'w') as f:
+                    json.dump(metadata, f, indent=2)
+                os.replace(tmp_path, metadata_path)
             
             uploaded_assets['metadata'] = str(metadata_path)
             
-            logger.info(f"Robot assets uploaded successfully: {robot_name}")
+            logger.info(
+                f"Robot assets uploaded successfully: {robot_name} "
+                f"({upload_stats['files_copied']} copied, {upload_stats['files_linked']} linked, "
+                f"{upload_stats['files_skipped']} unchanged, {upload_stats['bytes_saved']} bytes saved "
+                f"in {upload_stats['elapsed_seconds']:.2f}s)"
+            )
             return uploaded_assets
             
         except Exception as e:
             logger.error(f"Failed to upload robot assets: {e}")
             raise
     
+    def _upload_files(self, jobs: List[Tuple[str, str, Path]],
+                      known_hashes: Dict[str, Dict[str, Any]],
+                      previous_throughput: Optional[float] = None) -> Tuple[List[Tuple[Path, Dict[str, Any]]], Dict[str, Any]]:
+        """
+        Upload a batch of files on a bounded thread pool.
+        
+        Args:
+            jobs: (kind, source path, destination path) for every file
+            known_hashes: Content hash records from the previous upload, keyed by destination
+            previous_throughput: Copy throughput (bytes/s) measured by the previous upload
+            
+        Returns:
+            Per-job (destination, hash record) in job order, and upload statistics
+        """
+        started = time.perf_counter()
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_upload_workers, max(1, len(jobs)))) as pool:
+            futures = [
+                pool.submit(self._upload_asset, kind, source, dest, known_hashes.get(str(dest)))
+                for kind, source, dest in jobs
+            ]
+            outcomes = [future.result() for future in futures]
+        
+        stats = {
+            "files_total": len(jobs),
+            "files_copied": 0,
+            "files_linked": 0,
+            "files_skipped": 0,
+            "bytes_total": 0,
+            "bytes_copied": 0,
+            "bytes_saved": 0,
+            "elapsed_seconds": 0.0,
+            "copy_throughput_bps": previous_throughput,
+            "estimated_seconds_saved": None
+        }
+        copy_seconds = 0.0
+        results = []
+        for dest_path, record, action, seconds in outcomes:
+            size = record["size"]
+            stats["bytes_total"] += size
+            stats[f"files_{action}"] += 1
+            if action == "copied":
+                stats["bytes_copied"] += size
+                copy_seconds += seconds
+            else:
+                stats["bytes_saved"] += size
+            results.append((dest_path, record))
+        
+        stats["elapsed_seconds"] = round(time.perf_counter() - started, 4)
+        if stats["bytes_copied"] and copy_seconds > 0:
+            stats["copy_throughput_bps"] = stats["bytes_copied"] / copy_seconds
+        if stats["copy_throughput_bps"]:
+            # Extrapolate from the most recently observed copy throughput
+            stats["estimated_seconds_saved"] = round(stats["bytes_saved"] / stats["copy_throughput_bps"], 4)
+        
+        return results, stats
+    
+    def _upload_asset(self, kind: str, source_path: str, dest_path: Path,
+                      known: Optional[Dict[str, Any]]) -> Tuple[Path, Dict[str, Any], str, float]:
+        """
+        Upload one file unless the destination already holds the same content.
+        
+        Args:
+            kind: Asset kind ("urdf", "mesh" or "texture")
+            source_path: Source file path
+            dest_path: Destination path on AWS
+            known: Hash record of the destination from the previous upload
+            
+        Returns:
+            Destination path, new hash record, action taken and seconds spent writing
+        """
+        if not os.path.exists(source_path):
+            raise FileNotFoundError(f"Source file not found: {source_path}")
+        
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        source_stat = os.stat(source_path)
+        
+        # Fast path: neither side changed since the recorded upload
+        if known and dest_path.exists():
+            dest_stat = dest_path.stat()
+            if (known.get("size") == source_stat.st_size == dest_stat.st_size
+                    and known.get("source_mtime_ns") == source_stat.st_mtime_ns
+                    and known.get("dest_mtime_ns") == dest_stat.st_mtime_ns):
+                return dest_path, known, "skipped", 0.0
+        
+        content_hash = self._hash_file(source_path)
+        action = "skipped"
+        seconds = 0.0
+        
+        if not self._destination_matches(dest_path, source_stat.st_size, content_hash, known):
+            started = time.perf_counter()
+            if kind == "mesh":
+                action = self._link_shared_mesh(source_path, dest_path, content_hash)
+            else:
+                self._upload_file(source_path, dest_path)
+                action = "copied"
+            seconds = time.perf_counter() - started
+        
+        record = {
+            "sha256": content_hash,
+            "size": source_stat.st_size,
+            "source_mtime_ns": source_stat.st_mtime_ns,
+            "dest_mtime_ns": dest_path.stat().st_mtime_ns
+        }
+        return dest_path, record, action, seconds
+    
+    def _destination_matches(self, dest_path: Path, size: int, content_hash: str,
+                             known: Optional[Dict[str, Any]]) -> bool:
+        """Check whether the destination already holds content with the given hash."""
+        if not dest_path.exists():
+            return False
+        
+        dest_stat = dest_path.stat()
+        if dest_stat.st_size != size:
+            return False
+        
+        if known and known.get("dest_mtime_ns") == dest_stat.st_mtime_ns and known.get("size") == size:
+            return known.get("sha256") == content_hash
+        
+        return self._hash_file(str(dest_path)) == content_hash
+    
+    def _link_shared_mesh(self, source_path: str, dest_path: Path, content_hash: str) -> str:
+        """
+        Hard-link a mesh from the shared content-addressed mesh store.
+        
+        Identical meshes used by several robots are stored once under
+        ``meshes/<sha256><ext>`` and linked into each robot directory.
+        
+        Args:
+            source_path: Source mesh path
+            dest_path: Destination path inside the robot directory
+            content_hash: SHA-256 of the mesh content
+            
+        Returns:
+            "linked" if the mesh was already stored, "copied" otherwise
+        """
+        shared_path = self.asset_base_path / "meshes" / f"{content_hash}{Path(source_path).suffix.lower()}"
+        action = "linked"
+        
+        tmp_path = None
+        if not shared_path.exists():
+            # Copy under a temporary name so concurrent uploads never see a partial mesh
+            tmp_path = shared_path.with_name(f".{shared_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            shutil.copy2(source_path, tmp_path)
+        
+        # Publish and link under the lock so a prune cannot remove the mesh in between
+        with self._shared_mesh_lock:
+            if tmp_path is not None:
+                if shared_path.exists():
+                    tmp_path.unlink()
+                else:
+                    os.replace(tmp_path, shared_path)
+                    action = "copied"
+            elif not shared_path.exists():
+                # Pruned after the check above, before the lock was taken
+                tmp_path = shared_path.with_name(f".{shared_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                shutil.copy2(source_path, tmp_path)
+                os.replace(tmp_path, shared_path)
+                action = "copied"
+            
+            if dest_path.exists() or dest_path.is_symlink():
+                dest_path.unlink()
+            
+            try:
+                os.link(shared_path, dest_path)
+            except OSError as e:
+                # Hard links are unavailable across filesystems; fall back to a copy
+                logger.warning(f"Hard link failed for {dest_path} ({e}), copying instead")
+                shutil.copy2(source_path, dest_path)
+                action = "copied"
+        
+        logger.info(f"Uploaded mesh: {source_path} -> {dest_path} ({action})")
+        return action
+    
+    def _hash_file(self, path: str) -> str:
+        """Compute the SHA-256 of a file without loading it into memory."""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def _load_previous_metadata(self, metadata_path: Path) -> Dict[str, Any]:
+        """Load the metadata written by a previous upload, if any."""
+        if not metadata_path.exists():
+            return {}
+        
+        try:
+            with open(metadata_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable metadata {metadata_path}: {e}")
+            return {}
+    
     def _upload_file(self, source_path: str, dest_path: Path) -> Path:
         """
         Upload a single file to AWS.
@@ -177,6 +425,17 @@ class RobotAssetManager:
             robot_name = robot_config.get('name', 'robot')
             usd_path = self.asset_base_path / "scenes" / f"{robot_name}.usd"
             
+            # Reference the texture variants of the session's quality profile
+            texture_variants = uploaded_assets.get('texture_variants')
+            if texture_variants:
+                quality_profile = robot_config.get('quality_profile', DEFAULT_QUALITY_PROFILE)
+                urdf_path = rewrite_texture_references(
+                    urdf_path,
+                    variant_paths(texture_variants, quality_profile),
+                    str(Path(urdf_path).with_name(f"{robot_name}.{quality_profile}.urdf"))
+                )
+                usd_path = self.asset_base_path / "scenes" / f"{robot_name}.{quality_profile}.usd"
+            
             converted_path = converter.convert(
                 urdf_path=urdf_path,
                 output_usd_path=str(usd_path),
@@ -270,34 +529,37 @@ class RobotAssetManager:
             logger.error(f"Failed to send load command to Isaac Sim: {e}")
             raise
     
-    def get_robot_list(self) -> List[Dict[str, Any]]:
+    def get_robot_list(self, category: Optional[str] = None, manufacturer: Optional[str] = None,
+                       min_dof: Optional[int] = None, max_dof: Optional[int] = None,
+                       min_payload_kg: Optional[float] = None, max_payload_kg: Optional[float] = None,
+                       limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
         """
-        Get list of available robots.
+        Get list of available robots from the catalog index.
         
+        Args:
+            category: Only robots of this category
+            manufacturer: Only robots from this manufacturer
+            min_dof: Minimum degrees of freedom
+            max_dof: Maximum degrees of freedom
+            min_payload_kg: Minimum payload in kg
+            max_payload_kg: Maximum payload in kg
+            limit: Page size, or None for all matches
+            offset: Number of matches to skip
+            
         Returns:
             List of robot information
         """
-        robots = []
-        
         try:
-            robots_dir = self.asset_base_path / "robots"
-            
-            if robots_dir.exists():
-                for robot_dir in robots_dir.iterdir():
-                    if robot_dir.is_dir():
-                        metadata_path = robot_dir / "metadata.json"
-                        if metadata_path.exists():
-                            with open(metadata_path, 'r') as f:
-                                metadata = json.load(f)
-                                robots.append(metadata)
-                        else:
-                            # Basic info without metadata
-                            robots.append({
-                                "name": robot_dir.name,
-                                "uploaded_at": None,
-                                "assets": {},
-                                "config": {}
-                            })
+            robots = self.catalog_index.query(
+                category=category,
+                manufacturer=manufacturer,
+                min_dof=min_dof,
+                max_dof=max_dof,
+                min_payload_kg=min_payload_kg,
+                max_payload_kg=max_payload_kg,
+                limit=limit,
+                offset=offset
+            )
             
             logger.info(f"Found {len(robots)} robots")
             return robots
@@ -306,6 +568,15 @@ class RobotAssetManager:
             logger.error(f"Failed to get robot list: {e}")
             return []
     
+    def reindex_robots(self) -> int:
+        """
+        Rebuild the catalog index from the robot metadata on disk.
+        
+        Returns:
+            Number of indexed robots
+        """
+        return self.catalog_index.rebuild(self.asset_base_path / "robots")
+    
     def cleanup_robot_assets(self, robot_name: str) -> bool:
         """
         Clean up robot assets.
@@ -319,18 +590,53 @@ class RobotAssetManager:
         try:
             robot_dir = self.asset_base_path / "robots" / robot_name
             
-            if robot_dir.exists():
+            with self.catalog_index.transaction() as tx:
+                self.catalog_index.remove(robot_name, conn=tx)
+                
+                if not robot_dir.exists():
+                    logger.warning(f"Robot directory not found: {robot_dir}")
+                    return False
+                
                 shutil.rmtree(robot_dir)
-                logger.info(f"Cleaned up robot assets: {robot_name}")
-                return True
-            else:
-                logger.warning(f"Robot directory not found: {robot_dir}")
-                return False
+            
+            self.prune_shared_meshes()
+            logger.info(f"Cleaned up robot assets: {robot_name}")
+            return True
                 
         except Exception as e:
             logger.error(f"Failed to cleanup robot assets: {e}")
             return False
     
+    def prune_shared_meshes(self) -> int:
+        """
+        Remove shared meshes that are no longer linked by any robot.
+        
+        Runs under the lock uploads hold while storing and linking a mesh,
+        so a mesh is never removed between the two. Temporary copies are
+        only removed once older than SHARED_MESH_TMP_GRACE_SECONDS, by
+        inode change time since copies keep the source's modification time.
+        
+        Returns:
+            Number of meshes removed
+        """
+        removed = 0
+        tmp_cutoff = time.time() - SHARED_MESH_TMP_GRACE_SECONDS
+        with self._shared_mesh_lock:
+            for shared_path in (self.asset_base_path / "meshes").iterdir():
+                try:
+                    if not shared_path.is_file() or shared_path.stat().st_nlink > 1:
+                        continue
+                    if shared_path.name.startswith(".") and shared_path.stat().st_ctime >= tmp_cutoff:
+                        continue
+                    shared_path.unlink()
+                    removed += 1
+                except OSError as e:
+                    logger.warning(f"Failed to prune shared mesh {shared_path}: {e}")
+        
+        if removed:
+            logger.info(f"Pruned {removed} unreferenced shared meshes")
+        return removed
+    
     def get_asset_info(self, asset_path: str) -> Dict[str, Any]:
         """
         Get information about an asset.
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Robot Catalog Index
+Persistent SQLite index of uploaded robots so listing and filtering never scans the asset tree.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS robots (
+    name TEXT PRIMARY KEY,
+    category TEXT,
+    manufacturer TEXT,
+    dof INTEGER,
+    payload_kg REAL,
+    uploaded_at TEXT,
+    metadata TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_robots_category ON robots (category);
+CREATE INDEX IF NOT EXISTS idx_robots_manufacturer ON robots (manufacturer);
+CREATE INDEX IF NOT EXISTS idx_robots_dof ON robots (dof);
+CREATE INDEX IF NOT EXISTS idx_robots_payload ON robots (payload_kg);
+CREATE TABLE IF NOT EXISTS index_info (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Metadata keys that are only needed for re-uploads and are kept out of the index
+UNINDEXED_METADATA_KEYS = ("content_hashes", "texture_variants")
+
+
+class RobotCatalogIndex:
+    """SQLite-backed index of robot metadata with filtering and pagination."""
+
+    def __init__(self, db_path: str):
+        """
+        Open (and create if needed) the catalog index.
+
+        Args:
+            db_path: Path of the SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.created = not self.db_path.exists()
+        self._lock = threading.RLock()
+
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO index_info (key, value) VALUES ('schema_version', ?)",
+            (str(SCHEMA_VERSION),)
+        )
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run a block inside a single index transaction.
+
+        The transaction is rolled back if the block raises, so file operations
+        performed inside it and the index stay consistent.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            else:
+                self._conn.execute("COMMIT")
+
+    def upsert(self, metadata: Dict[str, Any], conn: Optional[sqlite3.Connection] = None):
+        """
+        Insert or replace a robot entry.
+
+        Args:
+            metadata: Robot metadata as written to metadata.json
+            conn: Connection of an open transaction, if any
+        """
+        config = metadata.get("config") or {}
+        specifications = config.get("specifications") or {}
+        indexed = {k: v for k, v in metadata.items() if k not in UNINDEXED_METADATA_KEYS}
+
+        row = (
+            metadata["name"],
+            config.get("category"),
+            config.get("manufacturer"),
+            _as_int(specifications.get("dof", config.get("dof"))),
+            _as_float(specifications.get("payload_kg", config.get("payload_kg"))),
+            metadata.get("uploaded_at"),
+            json.dumps(indexed, separators=(",", ":"))
+        )
+
+        sql = (
+            "INSERT OR REPLACE INTO robots "
+            "(name, category, manufacturer, dof, payload_kg, uploaded_at, metadata) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)"
+        )
+        if conn is not None:
+            conn.execute(sql, row)
+        else:
+            with self.transaction() as tx:
+                tx.execute(sql, row)
+
+    def remove(self, name: str, conn: Optional[sqlite3.Connection] = None) -> bool:
+        """
+        Remove a robot entry.
+
+        Args:
+            name: Robot name
+            conn: Connection of an open transaction, if any
+
+        Returns:
+            True if an entry was removed
+        """
+        if conn is not None:
+            return conn.execute("DELETE FROM robots WHERE name = ?", (name,)).rowcount > 0
+        with self.transaction() as tx:
+            return tx.execute("DELETE FROM robots WHERE name = ?", (name,)).rowcount > 0
+
+    def query(self, category: Optional[str] = None, manufacturer: Optional[str] = None,
+              min_dof: Optional[int] = None, max_dof: Optional[int] = None,
+              min_payload_kg: Optional[float] = None, max_payload_kg: Optional[float] = None,
+              limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        List robots matching the given filters, ordered by name.
+
+        Args:
+            category: Exact robot category (e.g. "manipulator")
+            manufacturer: Exact manufacturer name
+            min_dof: Minimum degrees of freedom
+            max_dof: Maximum degrees of freedom
+            min_payload_kg: Minimum payload in kg
+            max_payload_kg: Maximum payload in kg
+            limit: Page size, or None for all matches
+            offset: Number of matches to skip
+
+        Returns:
+            List of robot metadata
+        """
+        where, params = _build_filters(category, manufacturer, min_dof, max_dof,
+                                       min_payload_kg, max_payload_kg)
+        sql = f"SELECT metadata FROM robots{where} ORDER BY name LIMIT ? OFFSET ?"
+        params.extend([-1 if limit is None else limit, offset])
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def count(self, category: Optional[str] = None, manufacturer: Optional[str] = None,
+              min_dof: Optional[int] = None, max_dof: Optional[int] = None,
+              min_payload_kg: Optional[float] = None, max_payload_kg: Optional[float] = None) -> int:
+        """Count robots matching the given filters."""
+        where, params = _build_filters(category, manufacturer, min_dof, max_dof,
+                                       min_payload_kg, max_payload_kg)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM robots{where}", params).fetchone()[0]
+
+    def rebuild(self, robots_dir: Path) -> int:
+        """
+        Rebuild the index from the metadata files in the robots directory.
+
+        Args:
+            robots_dir: Directory containing one sub-directory per robot
+
+        Returns:
+            Number of indexed robots
+        """
+        entries = []
+        if robots_dir.exists():
+            for robot_dir in robots_dir.iterdir():
+                if not robot_dir.is_dir():
+                    continue
+                metadata_path = robot_dir / "metadata.json"
+                try:
+                    with open(metadata_path, 'r') as f:
+                        entries.append(json.load(f))
+                except FileNotFoundError:
+                    # Basic info without metadata
+                    entries.append({
+                        "name": robot_dir.name,
+                        "uploaded_at": None,
+                        "assets": {},
+                        "config": {}
+                    })
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Skipping unreadable robot metadata {metadata_path}: {e}")
+
+        with self.transaction() as tx:
+            tx.execute("DELETE FROM robots")
+            for metadata in entries:
+                self.upsert(metadata, conn=tx)
+
+        logger.info(f"Robot catalog index rebuilt with {len(entries)} robots")
+        return len(entries)
+
+    def close(self):
+        """Close the index database."""
+        with self._lock:
+            self._conn.close()
+
+
+def _build_filters(category, manufacturer, min_dof, max_dof,
+                   min_payload_kg, max_payload_kg) -> Tuple[str, List[Any]]:
+    """Build the WHERE clause for catalog filters."""
+    clauses = []
+    params: List[Any] = []
+    for clause, value in (
+        ("category = ?", category),
+        ("manufacturer = ?", manufacturer),
+        ("dof >= ?", min_dof),
+        ("dof <= ?", max_dof),
+        ("payload_kg >= ?", min_payload_kg),
+        ("payload_kg <= ?", max_payload_kg),
+    ):
+        if value is not None:
+            clauses.append(clause)
+            params.append(value)
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+def _as_int(value: Any) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_float(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
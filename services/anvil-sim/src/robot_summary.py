@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Robot Structure Summary
+Joint, link, mass and geometry facts extracted once at conversion time and
+stored next to the USD file, so structure queries never open a USD stage.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Tuple, Iterable
+
+from mesh_stats import read_mesh_stats
+from urdf_model import (
+    UrdfModel, UrdfShape, Vector3, quat_rotate,
+    parse_urdf, resolve_mesh_path
+)
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_VERSION = 2
+SUMMARY_SUFFIX = ".summary.json"
+
+# Summaries of URDF documents received over the API, keyed by content hash
+CONTENT_CACHE_SIZE = 256
+
+_sidecar_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+_content_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def build_robot_summary(model: UrdfModel, package_dirs: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    Summarize the structure of a robot.
+
+    Bounding boxes are axis-aligned in the robot base frame with all joints
+    at zero; link boxes use visual geometry, falling back to collisions.
+    Triangle counts cover meshes only: boxes, cylinders and spheres become
+    implicit USD shapes without triangles of their own.
+
+    Args:
+        model: Parsed URDF model
+        package_dirs: Directories used to resolve package:// mesh references
+
+    Returns:
+        JSON-serializable summary
+    """
+    package_dirs = list(package_dirs)
+    poses = model.link_world_poses()
+    links: List[Dict[str, Any]] = []
+    robot_box = _empty_box()
+    total_mass = 0.0
+    total_triangles = 0
+    missing_meshes: List[str] = []
+    materials = set(model.materials)
+
+    for link in model.links.values():
+        materials.update(visual.material.name for visual in link.visuals
+                         if visual.material is not None and visual.material.name)
+        link_box = _empty_box()
+        triangles = 0
+        pose = poses.get(link.name)
+
+        for shape in link.visuals or link.collisions:
+            corners, shape_triangles, missing = _shape_corners(shape, model.base_dir, package_dirs)
+            triangles += shape_triangles
+            if missing:
+                missing_meshes.append(missing)
+            if corners and pose is not None:
+                position, rotation = pose
+                for corner in corners:
+                    rotated = quat_rotate(rotation, corner)
+                    _grow(link_box, tuple(p + r for p, r in zip(position, rotated)))
+
+        mass = link.inertial.mass if link.inertial else 0.0
+        total_mass += mass
+        total_triangles += triangles
+        if _box_valid(link_box):
+            _grow(robot_box, link_box[0])
+            _grow(robot_box, link_box[1])
+
+        links.append({
+            "name": link.name,
+            "mass": mass,
+            "center_of_mass": list(link.inertial.origin.xyz) if link.inertial else None,
+            "visual_count": len(link.visuals),
+            "collision_count": len(link.collisions),
+            "triangle_count": triangles,
+            "bounding_box": _box_dict(link_box),
+        })
+
+    joints = []
+    for joint in model.joints.values():
+        limit = joint.limit
+        joints.append({
+            "name": joint.name,
+            "type": joint.type,
+            "parent": joint.parent,
+            "child": joint.child,
+            "axis": list(joint.axis),
+            "limits": {
+                "lower": limit.lower,
+                "upper": limit.upper,
+                "effort": limit.effort,
+                "velocity": limit.velocity,
+            } if limit else None,
+            "mimic": {
+                "joint": joint.mimic.joint,
+                "multiplier": joint.mimic.multiplier,
+                "offset": joint.mimic.offset,
+            } if joint.mimic else None,
+        })
+
+    movable = [joint.name for joint in model.movable_joints() if joint.mimic is None]
+
+    return {
+        "version": SUMMARY_VERSION,
+        "name": model.name,
+        "root_link": model.root_link(),
+        "link_count": len(model.links),
+        "joint_count": len(model.joints),
+        "dof": len(movable),
+        "movable_joints": movable,
+        "total_mass": total_mass,
+        "triangle_count": total_triangles,
+        "bounding_box": _box_dict(robot_box),
+        "links": links,
+        "joints": joints,
+        "materials": sorted(materials),
+        "missing_meshes": sorted(set(missing_meshes)),
+    }
+
+
+def summary_path_for(usd_path: str) -> str:
+    """Path of the summary sidecar of a USD file."""
+    return f"{usd_path}{SUMMARY_SUFFIX}"
+
+
+def write_robot_summary(usd_path: str, summary: Dict[str, Any],
+                        urdf_sha256: Optional[str] = None) -> str:
+    """
+    Write the summary sidecar of a USD file atomically.
+
+    Args:
+        usd_path: Path of the converted USD file
+        summary: Robot summary
+        urdf_sha256: Hash of the source URDF, recorded for cache validation
+
+    Returns:
+        Path of the sidecar file
+    """
+    path = summary_path_for(usd_path)
+    document = dict(summary)
+    if urdf_sha256:
+        document["urdf_sha256"] = urdf_sha256
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(document, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+    with _cache_lock:
+        _sidecar_cache.pop(path, None)
+    return path
+
+
+def load_robot_summary(usd_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Load the summary sidecar of a USD file.
+
+    The parsed summary is cached in memory until the sidecar changes, so
+    repeated queries cost one stat call. Callers must not modify it.
+
+    Args:
+        usd_path: Path of the converted USD file
+
+    Returns:
+        Robot summary, or None if the USD file has no (current) sidecar
+    """
+    path = summary_path_for(usd_path)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        cached = _sidecar_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    try:
+        with open(path, "r") as f:
+            summary = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Unreadable robot summary {path}: {e}")
+        return None
+
+    if summary.get("version") != SUMMARY_VERSION:
+        return None
+
+    with _cache_lock:
+        _sidecar_cache[path] = (key, summary)
+    return summary
+
+
+def summarize_urdf_content(urdf_content: str, digest: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Summary of a URDF document, cached by content hash.
+
+    Callers must not modify the returned summary.
+
+    Args:
+        urdf_content: URDF document
+        digest: SHA-256 of the UTF-8 content, if already known
+
+    Returns:
+        Robot summary
+    """
+    digest = digest or hashlib.sha256(urdf_content.encode("utf-8")).hexdigest()
+    with _cache_lock:
+        summary = _content_cache.get(digest)
+        if summary is not None:
+            _content_cache.move_to_end(digest)
+            return summary
+
+    summary = build_robot_summary(parse_urdf(urdf_content))
+    summary["urdf_sha256"] = digest
+
+    with _cache_lock:
+        _content_cache[digest] = summary
+        while len(_content_cache) > CONTENT_CACHE_SIZE:
+            _content_cache.popitem(last=False)
+    return summary
+
+
+def _shape_corners(shape: UrdfShape, base_dir: Optional[str],
+                   package_dirs: List[str]) -> Tuple[List[Vector3], int, Optional[str]]:
+    """Corners of a shape's bounding box in its link frame, its mesh triangle count and any missing mesh."""
+    geometry = shape.geometry
+    triangles = 0
+    missing = None
+
+    if geometry.type == "box":
+        half = tuple(s / 2 for s in geometry.size)
+        low, high = tuple(-h for h in half), half
+    elif geometry.type == "cylinder":
+        r, h = geometry.radius, geometry.length / 2
+        low, high = (-r, -r, -h), (r, r, h)
+    elif geometry.type == "sphere":
+        r = geometry.radius
+        low, high = (-r, -r, -r), (r, r, r)
+    else:
+        mesh_path = resolve_mesh_path(geometry.filename, base_dir, package_dirs)
+        stats = read_mesh_stats(mesh_path) if mesh_path else None
+        if mesh_path is None:
+            missing = geometry.filename
+        if stats is None or stats.bbox_min is None:
+            return [], stats.triangle_count if stats else 0, missing
+        triangles = stats.triangle_count
+        scale = geometry.scale
+        scaled = [tuple(v * s for v, s in zip(corner, scale)) for corner in (stats.bbox_min, stats.bbox_max)]
+        low = tuple(min(a, b) for a, b in zip(*scaled))
+        high = tuple(max(a, b) for a, b in zip(*scaled))
+
+    rotation = shape.origin.quaternion
+    offset = shape.origin.xyz
+    corners = []
+    for x in (low[0], high[0]):
+        for y in (low[1], high[1]):
+            for z in (low[2], high[2]):
+                rotated = quat_rotate(rotation, (x, y, z))
+                corners.append((rotated[0] + offset[0], rotated[1] + offset[1], rotated[2] + offset[2]))
+    return corners, triangles, missing
+
+
+def _empty_box() -> List[List[float]]:
+    return [[float("inf")] * 3, [float("-inf")] * 3]
+
+
+def _grow(box: List[List[float]], point: Vector3):
+    for axis in range(3):
+        box[0][axis] = min(box[0][axis], point[axis])
+        box[1][axis] = max(box[1][axis], point[axis])
+
+
+def _box_valid(box: List[List[float]]) -> bool:
+    return box[0][0] != float("inf")
+
+
+def _box_dict(box: List[List[float]]) -> Optional[Dict[str, List[float]]]:
+    if not _box_valid(box):
+        return None
+    return {
+        "min": box[0],
+        "max": box[1],
+        "size": [high - low for low, high in zip(box[0], box[1])],
+    }
@@ -5,8 +5,10 @@ Provides the main API interface for robot simulation and validation.
 """
 
 import asyncio
+import hashlib
 import json
 import logging
+from datetime import datetime
 from typing import Dict, Any, Optional
 
 import structlog
@@ -38,6 +40,12 @@ except ImportError:
         SimResponse = MockProtoClass
         StepRequest = MockProtoClass
         StepResponse = MockProtoClass
+        StepBatchRequest = MockProtoClass
+        StepBatchResponse = MockProtoClass
+        TelemetryColumn = MockProtoClass
+        TrajectoryRequest = MockProtoClass
+        TrajectoryProgress = MockProtoClass
+        CancelTrajectoryRequest = MockProtoClass
         StopRequest = MockProtoClass
         StopResponse = MockProtoClass
         ValidateRequest = MockProtoClass
@@ -46,8 +54,18 @@ except ImportError:
         StressReport = MockProtoClass
         CollisionRequest = MockProtoClass
         CollisionReport = MockProtoClass
+        ValidationJobRequest = MockProtoClass
+        ValidationJobStatus = MockProtoClass
+        DesignSweepRequest = MockProtoClass
+        DesignSweepResult = MockProtoClass
         TelemetryRequest = MockProtoClass
         TelemetryData = MockProtoClass
+        TelemetryHistoryRequest = MockProtoClass
+        TelemetryHistory = MockProtoClass
+        TelemetryRunsRequest = MockProtoClass
+        TelemetryRuns = MockProtoClass
+        TelemetryQueryRequest = MockProtoClass
+        TelemetryQueryResult = MockProtoClass
         VideoRequest = MockProtoClass
         VideoFrame = MockProtoClass
     
@@ -58,6 +76,17 @@ except ImportError:
 
 from isaac_sim_manager import isaac_sim_manager
 from webrtc_stream_manager import webrtc_stream_manager
+from collision import check_configurations
+from kinematics import chain_for_urdf
+from stress_analysis import stress_sweep
+from process_pool import get_process_pool
+from validation_jobs import validation_jobs, ValidationJob
+from design_sweep import run_sweep, DEFAULT_VALIDATIONS
+from physics_backend import run_physics_validation, pack_column, TelemetryBatch
+from telemetry_codec import TelemetrySchema, TelemetryEncoder
+from telemetry_store import DEFAULT_MAX_POINTS
+from joint_trajectory import DEFAULT_PROGRESS_HZ, DEFAULT_ACCEL_FRACTION
+from config.anvil_config import VALIDATION_SETTINGS, ISAAC_SIM_CONFIG
 
 logger = structlog.get_logger(__name__)
 
@@ -73,6 +102,15 @@ class SimulationServicer:
         self.isaac_sim_manager = isaac_sim_manager
         self.webrtc_manager = webrtc_stream_manager
     
+    def _session_urdf(self, session_id: str):
+        """Session and URDF bytes of a session with a loaded robot."""
+        session = self.isaac_sim_manager.active_sessions.get(session_id)
+        if not session:
+            raise ValueError(f"Session {session_id} not found")
+        if not session.urdf_digest:
+            raise ValueError(f"Session {session_id} has no robot loaded")
+        return session, self.isaac_sim_manager.blob_store.read_bytes(session.urdf_digest)
+    
     async def CreateScene(self, request, context):
         """Create a new simulation scene."""
         try:
@@ -154,13 +192,14 @@ class SimulationServicer:
             # Load robot from URDF
             robot = await self.isaac_sim_manager._load_robot_from_urdf(session, urdf_content)
             session.robot = robot
+            summary = session.robot_summary
             
             response_data = {
                 'success': True,
                 'session_id': session_id,
                 'robot_loaded': True,
-                'joint_count': 6,  # Would get from actual robot
-                'link_count': 8,
+                'joint_count': summary['dof'],
+                'link_count': summary['link_count'],
                 'message': 'Robot loaded successfully'
             }
             
@@ -242,7 +281,8 @@ class SimulationServicer:
             if not session:
                 raise ValueError(f"Session {session_id} not found")
             
-            # Start simulation
+            # Start simulation: physics advances in real time, recording telemetry
+            await self.isaac_sim_manager.start_realtime(session_id)
             session.status = "running"
             
             response_data = {
@@ -281,6 +321,29 @@ class SimulationServicer:
         """Step the simulation forward."""
         try:
             session_id = getattr(request, 'session_id', '')
+            num_steps = int(getattr(request, 'num_steps', 1) or 1)
+            
+            if num_steps > 1:
+                # Headless batch: physics only, no rendering or pacing
+                joint_targets = getattr(request, 'joint_targets', '') or None
+                if isinstance(joint_targets, str):
+                    joint_targets = json.loads(joint_targets)
+                batch = await self.isaac_sim_manager.step_simulation_batch(session_id, num_steps, joint_targets)
+                
+                response_data = {
+                    'success': True,
+                    'session_id': session_id,
+                    'simulation_time': datetime.utcnow().isoformat(),
+                    'physics_fps': round(batch.steps / batch.wall_seconds, 1) if batch.wall_seconds > 0 else 0.0,
+                    'robot_pose': json.dumps({}),
+                    'joint_states': json.dumps(batch.final_state()),
+                    'telemetry': json.dumps(batch.to_dict(int(getattr(request, 'telemetry_stride', 1) or 1))),
+                    'message': f'Stepped {batch.steps} physics steps'
+                }
+                
+                if GRPC_PROTO_AVAILABLE:
+                    return anvil_pb2.StepResponse(**response_data)
+                return MockProtoClass(**response_data)
             
             # Step simulation and get telemetry
             telemetry = await self.isaac_sim_manager.step_simulation(session_id)
@@ -318,6 +381,104 @@ class SimulationServicer:
                 
             return response
     
+    async def StepBatch(self, request, context):
+        """
+        Advance the simulation by num_steps physics steps in one call.
+        
+        Telemetry comes back as packed little-endian float32 columns (time,
+        positions, velocities, efforts and optionally poses), one row per
+        kept step, each with its shape, instead of per-step JSON.
+        """
+        try:
+            session_id = getattr(request, 'session_id', '')
+            num_steps = int(getattr(request, 'num_steps', 1) or 1)
+            stride = int(getattr(request, 'telemetry_stride', 1) or 1)
+            joint_targets = getattr(request, 'joint_targets', '') or None
+            if isinstance(joint_targets, str):
+                joint_targets = json.loads(joint_targets)
+            
+            batch = await self.isaac_sim_manager.step_simulation_batch(
+                session_id, num_steps, joint_targets,
+                with_poses=bool(getattr(request, 'include_poses', False)),
+                pose_link=getattr(request, 'pose_link', '') or None,
+            )
+            
+            column_class = anvil_pb2.TelemetryColumn if GRPC_PROTO_AVAILABLE else MockProtoClass
+            response_data = {
+                'success': True,
+                'session_id': session_id,
+                'steps': batch.steps,
+                'dt': batch.dt,
+                'simulation_time': float(batch.time[-1]),
+                'wall_seconds': batch.wall_seconds,
+                'physics_fps': round(batch.steps / batch.wall_seconds, 1) if batch.wall_seconds > 0 else 0.0,
+                'joint_names': batch.joint_names,
+                'pose_link': batch.pose_link or '',
+                'columns': [column_class(**column) for column in batch.columns(stride)],
+                'message': f'Stepped {batch.steps} physics steps'
+            }
+            
+            if GRPC_PROTO_AVAILABLE:
+                return anvil_pb2.StepBatchResponse(**response_data)
+            return MockProtoClass(**response_data)
+            
+        except Exception as e:
+            logger.error("Failed to step simulation batch", error=str(e))
+            
+            response_data = {
+                'success': False,
+                'error': str(e),
+                'message': 'Failed to step simulation batch'
+            }
+            
+            if GRPC_PROTO_AVAILABLE:
+                return anvil_pb2.StepBatchResponse(**response_data)
+            return MockProtoClass(**response_data)
+    
+    async def ExecuteTrajectory(self, request, context):
+        """
+        Follow timed joint waypoints, interpolated at the physics rate, and
+        stream progress until the trajectory completes or is cancelled.
+        
+        waypoints is a JSON list of {"time": seconds from now, "positions":
+        {joint: value}}; method is linear, cubic (default) or trapezoidal.
+        The trajectory advances with the session's physics, so the session
+        must be running (StartSimulation) or stepped with StepBatch.
+        """
+        session_id = getattr(request, 'session_id', '')
+        progress_class = anvil_pb2.TrajectoryProgress if GRPC_PROTO_AVAILABLE else MockProtoClass
+        try:
+            waypoints = getattr(request, 'waypoints', '') or '[]'
+            if isinstance(waypoints, str):
+                waypoints = json.loads(waypoints)
+            method = getattr(request, 'method', '') or 'cubic'
+            accel_fraction = float(getattr(request, 'accel_fraction', 0) or DEFAULT_ACCEL_FRACTION)
+            progress_hz = float(getattr(request, 'progress_hz', 0) or DEFAULT_PROGRESS_HZ)
+            
+            execution = await self.isaac_sim_manager.execute_trajectory(
+                session_id, waypoints, method, accel_fraction
+            )
+            async for event in execution.events(progress_hz):
+                yield progress_class(success=True, session_id=session_id, **event)
+            
+        except Exception as e:
+            logger.error("Trajectory execution failed", error=str(e))
+            yield progress_class(success=False, session_id=session_id, status='rejected', error=str(e))
+    
+    async def CancelTrajectory(self, request, context):
+        """Stop a session's running trajectory; the joints hold their last targets."""
+        session_id = getattr(request, 'session_id', '')
+        progress_class = anvil_pb2.TrajectoryProgress if GRPC_PROTO_AVAILABLE else MockProtoClass
+        try:
+            execution = self.isaac_sim_manager.cancel_trajectory(session_id)
+            if execution is None:
+                return progress_class(success=True, session_id=session_id, status='idle')
+            return progress_class(success=True, session_id=session_id, **execution.to_dict())
+            
+        except Exception as e:
+            logger.error("Failed to cancel trajectory", error=str(e))
+            return progress_class(success=False, session_id=session_id, error=str(e))
+    
     async def StopSimulation(self, request, context):
         """Stop physics simulation."""
         try:
@@ -325,6 +486,7 @@ class SimulationServicer:
             
             session = self.isaac_sim_manager.active_sessions.get(session_id)
             if session:
+                await self.isaac_sim_manager.stop_realtime(session_id)
                 session.status = "stopped"
             
             response_data = {
@@ -358,6 +520,163 @@ class SimulationServicer:
                 
             return response
     
+    def _stress_params(self, max_force: float) -> Dict[str, Any]:
+        settings = VALIDATION_SETTINGS['stress_validation']
+        return {
+            'max_force': float(max_force),
+            'samples': settings['sample_count'],
+            'safety_factor': settings['safety_factor'],
+            'max_torque_threshold': settings['max_torque_threshold'],
+            'max_force_threshold': settings['max_force_threshold']
+        }
+    
+    def _collision_params(self, check_self: bool, check_environment: bool, trajectory: str) -> Dict[str, Any]:
+        settings = VALIDATION_SETTINGS['collision_validation']
+        return {
+            'check_self': bool(check_self and settings['check_self_collision']),
+            'check_environment': bool(check_environment and settings['check_environment_collision']),
+            'trajectory': hashlib.sha256(trajectory.encode('utf-8')).hexdigest() if trajectory else None,
+            'samples': settings['sample_count'],
+            'tolerance_mm': settings['tolerance_mm'],
+            'max_distance_mm': settings['max_distance_mm'],
+            'recommended_clearance_mm': settings['recommended_clearance_mm']
+        }
+    
+    def _physics_params(self) -> Dict[str, Any]:
+        settings = VALIDATION_SETTINGS['physics_validation']
+        return {
+            'duration_seconds': settings['duration_seconds'],
+            'stability_threshold': settings['stability_threshold'],
+            'physics_dt': ISAAC_SIM_CONFIG['physics_dt']
+        }
+    
+    async def _run_physics(self, job: ValidationJob, session, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Headless waypoint-tracking run over the validation duration, on a
+        fresh numpy stand-in: resetting and driving the Isaac world would
+        disturb the live session and every other session sharing it.
+        """
+        backend = self.isaac_sim_manager.physics_backend(session, fresh=True)
+        chain = chain_for_urdf(self.isaac_sim_manager.blob_store.read_bytes(session.urdf_digest),
+                               session.urdf_digest)
+        # Limits by name: the backend's joint order need not match the chain's
+        chain_index = {name: i for i, name in enumerate(chain.joint_names)}
+        missing = [name for name in backend.joint_names if name not in chain_index]
+        if missing:
+            raise ValueError(f"No joint limits for {', '.join(missing)}")
+        order = [chain_index[name] for name in backend.joint_names]
+        run = lambda: run_physics_validation(
+            backend, params['duration_seconds'], chain.lower[order], chain.upper[order],
+            stability_threshold=params['stability_threshold'], progress=job.report
+        )
+        return await asyncio.get_running_loop().run_in_executor(None, run)
+    
+    async def _run_stress(self, job: ValidationJob, urdf_content: bytes, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Static gravity + payload torque sweep over the robot's joint space."""
+        loop = asyncio.get_running_loop()
+        sweep = await loop.run_in_executor(None, lambda: stress_sweep(
+            urdf_content,
+            samples=params['samples'],
+            payload_force_n=params['max_force'],
+            safety_factor=params['safety_factor'],
+            max_torque_threshold=params['max_torque_threshold'],
+            max_force_threshold=params['max_force_threshold'],
+            executor=get_process_pool(),
+            progress=job.report
+        ))
+        
+        critical = next((joint for joint in sweep['joints'] if joint['name'] == sweep['critical_joint']), None)
+        return {
+            'max_force_applied': params['max_force'],
+            'peak_joint_load': critical['peak_load'] if critical else 0.0,
+            'critical_joint': sweep['critical_joint'],
+            'failure_mode': None if sweep['passed'] else 'joint_effort_limit',
+            'safety_margin': sweep['min_safety_factor'],
+            'passed': sweep['passed'],
+            'sweep': sweep
+        }
+    
+    async def _run_collision(self, job: ValidationJob, urdf_content: bytes, urdf_digest: str,
+                             trajectory: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Self-collision over a trajectory, or a sweep of the joint space."""
+        collision_results = {
+            'self_collision_detected': False,
+            'environment_collision_detected': False,
+            'min_clearance_mm': None,
+            'collision_points': [],
+            'warnings': []
+        }
+        
+        if params['check_self']:
+            # Check the given trajectory, or a sweep of the joint space
+            if trajectory:
+                q = json.loads(trajectory)
+            else:
+                q = chain_for_urdf(urdf_content, urdf_digest).sample(params['samples'], seed=0)
+            
+            loop = asyncio.get_running_loop()
+            model, report = await loop.run_in_executor(
+                None, lambda: check_configurations(
+                    urdf_content, q, params['tolerance_mm'] / 1000.0, params['max_distance_mm'] / 1000.0,
+                    executor=get_process_pool(), progress=job.report
+                )
+            )
+            summary = report.to_dict(model)
+            collision_results.update({
+                'self_collision_detected': summary['colliding_configurations'] > 0,
+                'min_clearance_mm': round(summary['min_clearance_m'] * 1000.0, 3)
+                                    if summary['min_clearance_m'] is not None else None,
+                'collision_points': summary['collisions'],
+                'self_collision': summary,
+                'collision_model': model.to_dict()
+            })
+            if summary['min_clearance_m'] is not None and summary['min_clearance_m'] >= report.max_distance:
+                collision_results['warnings'].append(
+                    f"All clearances exceed {params['max_distance_mm']:.0f}mm; exact minimum not resolved"
+                )
+            if model.missing_meshes:
+                collision_results['warnings'].append(
+                    f"{len(set(model.missing_meshes))} meshes could not be resolved and were ignored"
+                )
+        
+        if params['check_environment']:
+            collision_results['warnings'].append(
+                "Environment collision checking is not available; only self-collision was evaluated"
+            )
+        
+        min_clearance = collision_results['min_clearance_mm']
+        if min_clearance is not None and min_clearance < params['recommended_clearance_mm']:
+            collision_results['warnings'].append(
+                f"Minimum clearance below recommended {params['recommended_clearance_mm']:.0f}mm"
+            )
+        return collision_results
+    
+    async def _submit_validation(self, kind: str, session_id: str, options: Dict[str, Any]) -> ValidationJob:
+        """Queue a physics, stress or collision validation of a session's robot."""
+        session, urdf_content = self._session_urdf(session_id)
+        digest = session.urdf_digest
+        
+        if kind == 'physics':
+            params = self._physics_params()
+            runner = lambda job: self._run_physics(job, session, params)
+        elif kind == 'stress':
+            params = self._stress_params(options.get('max_force', 0.0))
+            runner = lambda job: self._run_stress(job, urdf_content, params)
+        elif kind == 'collision':
+            trajectory = options.get('joint_trajectory') or ''
+            if not isinstance(trajectory, str):
+                trajectory = json.dumps(trajectory)
+            params = self._collision_params(
+                options.get('check_self_collision', True),
+                options.get('check_environment_collision', True),
+                trajectory
+            )
+            runner = lambda job: self._run_collision(job, urdf_content, digest, trajectory, params)
+        else:
+            raise ValueError(f"Unknown validation type: {kind}")
+        
+        return await validation_jobs.submit(kind, digest, params, runner, session_id=session_id)
+    
     async def ValidateDesign(self, request, context):
         """Run design validation tests."""
         try:
@@ -371,36 +690,54 @@ class SimulationServicer:
                        session_id=session_id, 
                        validation_types=validation_types)
             
-            # Simulate validation process
-            await asyncio.sleep(0.5)  # Simulate validation time
+            # Validations share the job queue and its result cache
+            jobs = {
+                kind: await self._submit_validation(kind, session_id, {})
+                for kind in ('physics', 'collision', 'stress') if kind in validation_types
+            }
+            job_results = dict(zip(jobs, await asyncio.gather(*(job.wait() for job in jobs.values()))))
             
             # Generate validation report
             validation_results = {}
             
             if 'physics' in validation_types:
-                validation_results['physics'] = {
-                    'passed': True,
-                    'stability_score': 0.98,
-                    'energy_conservation': 0.97,
-                    'issues': []
-                }
+                physics = job_results['physics']
+                issues = []
+                if physics['diverged']:
+                    issues.append('Simulation diverged')
+                elif not physics['passed']:
+                    issues.append(f"{physics['waypoints'] - physics['settled_waypoints']} of "
+                                  f"{physics['waypoints']} waypoints did not settle")
+                validation_results['physics'] = dict(physics, issues=issues, cached=jobs['physics'].cached)
             
             if 'collision' in validation_types:
+                collision = job_results['collision']
                 validation_results['collision'] = {
-                    'passed': True,
-                    'self_collision': False,
-                    'environment_collision': False,
-                    'clearance_mm': 5.2,
-                    'issues': []
+                    'passed': not (collision['self_collision_detected'] or
+                                   collision['environment_collision_detected']),
+                    'self_collision': collision['self_collision_detected'],
+                    'environment_collision': collision['environment_collision_detected'],
+                    'clearance_mm': collision['min_clearance_mm'],
+                    'issues': collision['warnings'],
+                    'cached': jobs['collision'].cached
                 }
             
             if 'stress' in validation_types:
+                sweep = job_results['stress']['sweep']
+                peaks = {unit: max((joint['peak_load'] for joint in sweep['joints'] if joint['unit'] == unit),
+                                   default=0.0)
+                         for unit in ('N', 'Nm')}
                 validation_results['stress'] = {
-                    'passed': True,
-                    'max_force_n': 250.0,
-                    'max_torque_nm': 15.0,
-                    'safety_factor': 3.2,
-                    'issues': []
+                    'passed': sweep['passed'],
+                    'max_force_n': peaks['N'],
+                    'max_torque_nm': peaks['Nm'],
+                    'safety_factor': sweep['min_safety_factor'],
+                    'issues': [
+                        f"{joint['name']} safety factor {joint['safety_factor']} below "
+                        f"{sweep['required_safety_factor']}"
+                        for joint in sweep['joints'] if not joint['passed']
+                    ],
+                    'cached': jobs['stress'].cached
                 }
             
             # Calculate overall score
@@ -445,37 +782,26 @@ class SimulationServicer:
             return response
     
     async def RunStressTest(self, request, context):
-        """Run stress testing on robot design."""
+        """Run a static gravity + payload torque sweep over the robot's joint space."""
         try:
             session_id = getattr(request, 'session_id', '')
             test_duration = getattr(request, 'duration_seconds', 10.0)
-            max_force = getattr(request, 'max_force', 1000.0)
+            # Payload weight held at the end effector, in N
+            max_force = getattr(request, 'max_force', 0.0)
             
             logger.info("Running stress test", 
                        session_id=session_id, 
                        duration=test_duration,
                        max_force=max_force)
             
-            # Simulate stress test
-            await asyncio.sleep(min(test_duration / 10, 2.0))  # Simulate test time
-            
-            # Generate stress test results
-            stress_results = {
-                'test_duration': test_duration,
-                'max_force_applied': max_force * 0.8,  # 80% of max
-                'peak_stress_mpa': 120.5,
-                'deformation_mm': 0.15,
-                'fatigue_cycles': 50000,
-                'failure_mode': None,
-                'safety_margin': 2.5,
-                'passed': True
-            }
+            job = await self._submit_validation('stress', session_id, {'max_force': max_force})
+            stress_results = await job.wait()
             
             response_data = {
                 'success': True,
                 'session_id': session_id,
                 'test_passed': stress_results['passed'],
-                'safety_margin': stress_results['safety_margin'],
+                'safety_margin': stress_results['safety_margin'] or 0.0,
                 'results': json.dumps(stress_results),
                 'message': 'Stress test completed successfully'
             }
@@ -487,7 +813,10 @@ class SimulationServicer:
             
             logger.info("Stress test completed", 
                        session_id=session_id,
-                       passed=stress_results['passed'])
+                       passed=stress_results['passed'],
+                       safety_margin=stress_results['safety_margin'],
+                       critical_joint=stress_results['critical_joint'],
+                       cached=job.cached)
             
             return response
             
@@ -519,22 +848,12 @@ class SimulationServicer:
                        check_self=check_self,
                        check_environment=check_environment)
             
-            # Simulate collision detection
-            await asyncio.sleep(0.3)
-            
-            collision_results = {
-                'self_collision_detected': False,
-                'environment_collision_detected': False,
-                'min_clearance_mm': 8.5,
-                'collision_points': [],
-                'warnings': []
-            }
-            
-            # Add some warnings for demo
-            if collision_results['min_clearance_mm'] < 10.0:
-                collision_results['warnings'].append(
-                    "Minimum clearance below recommended 10mm"
-                )
+            job = await self._submit_validation('collision', session_id, {
+                'check_self_collision': check_self,
+                'check_environment_collision': check_environment,
+                'joint_trajectory': getattr(request, 'joint_trajectory', '')
+            })
+            collision_results = await job.wait()
             
             response_data = {
                 'success': True,
@@ -543,7 +862,7 @@ class SimulationServicer:
                     collision_results['self_collision_detected'] or
                     collision_results['environment_collision_detected']
                 ),
-                'min_clearance': collision_results['min_clearance_mm'],
+                'min_clearance': collision_results['min_clearance_mm'] or 0.0,
                 'results': json.dumps(collision_results),
                 'message': 'Collision check completed'
             }
@@ -553,7 +872,10 @@ class SimulationServicer:
             else:
                 response = MockProtoClass(**response_data)
             
-            logger.info("Collision check completed", session_id=session_id)
+            logger.info("Collision check completed", session_id=session_id,
+                       collision_free=response_data['collision_free'],
+                       min_clearance_mm=collision_results['min_clearance_mm'],
+                       cached=job.cached)
             return response
             
         except Exception as e:
@@ -572,33 +894,305 @@ class SimulationServicer:
                 
             return response
     
-    async def StreamTelemetry(self, request, context):
-        """Stream real-time telemetry data."""
+    def _job_status(self, job: Optional[ValidationJob], job_id: str = ''):
+        """ValidationJobStatus message of a job."""
+        if job is None:
+            response_data = {
+                'success': False,
+                'job_id': job_id,
+                'error': f"Validation job {job_id} not found",
+                'message': 'Unknown validation job'
+            }
+        else:
+            status = job.to_dict(include_result=False)
+            response_data = {
+                'success': job.status != 'failed',
+                'job_id': job.job_id,
+                'validation_type': job.kind,
+                'status': job.status,
+                'progress': status['progress'],
+                'cached': job.cached,
+                'result': json.dumps(job.result) if job.result is not None else '',
+                'error': job.error or '',
+                'message': job.message
+            }
+        
+        if GRPC_PROTO_AVAILABLE:
+            return anvil_pb2.ValidationJobStatus(**response_data)
+        return MockProtoClass(**response_data)
+    
+    async def SubmitValidation(self, request, context):
+        """Queue a validation job and return its id without waiting for it."""
         try:
             session_id = getattr(request, 'session_id', '')
+            validation_type = getattr(request, 'validation_type', '')
+            options = getattr(request, 'parameters', '') or '{}'
+            if isinstance(options, str):
+                options = json.loads(options)
             
-            logger.info("Starting telemetry stream", session_id=session_id)
+            job = await self._submit_validation(validation_type, session_id, options)
+            logger.info("Validation submitted", session_id=session_id, job_id=job.job_id,
+                       validation_type=validation_type, cached=job.cached)
+            return self._job_status(job)
             
-            # Stream telemetry data
-            for i in range(100):  # Stream for demo
-                telemetry = await self.isaac_sim_manager.step_simulation(session_id)
-                
-                telemetry_data = {
-                    'timestamp': telemetry.get('timestamp'),
+        except Exception as e:
+            logger.error("Failed to submit validation", error=str(e))
+            
+            response_data = {
+                'success': False,
+                'error': str(e),
+                'message': 'Failed to submit validation'
+            }
+            
+            if GRPC_PROTO_AVAILABLE:
+                return anvil_pb2.ValidationJobStatus(**response_data)
+            return MockProtoClass(**response_data)
+    
+    async def GetValidationJob(self, request, context):
+        """Poll a validation job; the result is included once it has finished."""
+        job_id = getattr(request, 'job_id', '')
+        return self._job_status(validation_jobs.get(job_id), job_id)
+    
+    async def CancelValidationJob(self, request, context):
+        """Cancel a queued or running validation job."""
+        job_id = getattr(request, 'job_id', '')
+        validation_jobs.cancel(job_id)
+        return self._job_status(validation_jobs.get(job_id), job_id)
+    
+    async def StreamValidationJob(self, request, context):
+        """Stream validation job progress until the job finishes."""
+        job_id = getattr(request, 'job_id', '')
+        if validation_jobs.get(job_id) is None:
+            yield self._job_status(None, job_id)
+            return
+        
+        async for _ in validation_jobs.stream(job_id):
+            yield self._job_status(validation_jobs.get(job_id), job_id)
+    
+    async def RunDesignSweep(self, request, context):
+        """Evaluate a grid of design variants, streaming results as they finish."""
+        session_id = getattr(request, 'session_id', '')
+        try:
+            parameters = getattr(request, 'parameters', '') or '[]'
+            validations = getattr(request, 'validations', '') or list(DEFAULT_VALIDATIONS)
+            options = getattr(request, 'options', '') or '{}'
+            if isinstance(parameters, str):
+                parameters = json.loads(parameters)
+            if isinstance(validations, str):
+                validations = json.loads(validations)
+            if isinstance(options, str):
+                options = json.loads(options)
+            
+            logger.info("Running design sweep", session_id=session_id,
+                       parameters=[p.get('name') or p.get('type') for p in parameters],
+                       validations=validations)
+            
+            session, urdf_content = self._session_urdf(session_id)
+            async for record in run_sweep(urdf_content, parameters, validations, options, get_process_pool()):
+                response_data = {
+                    'success': True,
                     'session_id': session_id,
-                    'data': json.dumps(telemetry)
+                    'done': record['type'] == 'summary',
+                    'data': json.dumps(record)
                 }
-                
                 if GRPC_PROTO_AVAILABLE:
-                    yield anvil_pb2.TelemetryData(**telemetry_data)
+                    yield anvil_pb2.DesignSweepResult(**response_data)
                 else:
-                    yield MockProtoClass(**telemetry_data)
+                    yield MockProtoClass(**response_data)
                 
-                await asyncio.sleep(1.0 / 60.0)  # 60Hz telemetry
+        except Exception as e:
+            logger.error("Design sweep failed", error=str(e))
+            
+            response_data = {
+                'success': False,
+                'session_id': session_id,
+                'done': True,
+                'error': str(e),
+                'data': ''
+            }
+            
+            if GRPC_PROTO_AVAILABLE:
+                yield anvil_pb2.DesignSweepResult(**response_data)
+            else:
+                yield MockProtoClass(**response_data)
+    
+    async def StreamTelemetry(self, request, context):
+        """
+        Stream recorded telemetry at the requested rate (1, 10 or 60 Hz of
+        simulation time, default 60). Streaming never steps the simulation.
+        
+        With encoding "binary", samples come as telemetry_codec frames in the
+        payload bytes field; a message carrying the schema JSON in data comes
+        first and again whenever the channel layout changes.
+        """
+        try:
+            session_id = getattr(request, 'session_id', '')
+            rate_hz = float(getattr(request, 'rate_hz', 0) or 60.0)
+            binary = (getattr(request, 'encoding', '') or 'json') == 'binary'
+            if session_id not in self.isaac_sim_manager.active_sessions:
+                raise ValueError(f"Session {session_id} not found")
+            
+            logger.info("Starting telemetry stream", session_id=session_id, rate_hz=rate_hz,
+                        encoding='binary' if binary else 'json')
+            
+            telemetry_class = anvil_pb2.TelemetryData if GRPC_PROTO_AVAILABLE else MockProtoClass
+            current = None
+            async for buffer, steps, times, values in self.isaac_sim_manager.subscribe_telemetry(
+                    session_id, rate_hz, rows=True):
+                if buffer is not current:
+                    current = buffer
+                    schema = TelemetrySchema(buffer.joint_names, buffer.pose_link)
+                    encoder = TelemetryEncoder(schema)
+                    if binary:
+                        yield telemetry_class(session_id=session_id, data=json.dumps({'schema': schema.to_dict()}))
+                
+                if binary:
+                    for frame in encoder.encode_rows(steps, times, values):
+                        yield telemetry_class(session_id=session_id, payload=frame)
+                    continue
+                
+                for step, sim_time, row in zip(steps.tolist(), times.tolist(), values):
+                    yield telemetry_class(
+                        timestamp=datetime.utcnow().isoformat(),
+                        session_id=session_id,
+                        data=json.dumps({'step': step, 'simulation_time': sim_time, **schema.sample(row)})
+                    )
                 
         except Exception as e:
             logger.error("Telemetry streaming failed", error=str(e))
     
+    async def GetTelemetryHistory(self, request, context):
+        """
+        Recorded telemetry of a session within a simulation-time window, as
+        packed float32 columns like StepBatch. rate_hz decimates the rows;
+        0 returns every recorded step.
+        """
+        try:
+            session_id = getattr(request, 'session_id', '')
+            session = self.isaac_sim_manager.active_sessions.get(session_id)
+            if not session:
+                raise ValueError(f"Session {session_id} not found")
+            
+            rate_hz = float(getattr(request, 'rate_hz', 0) or 0)
+            start_time = getattr(request, 'start_time', None)
+            end_time = getattr(request, 'end_time', None)
+            if session.has_robot:
+                buffer = self.isaac_sim_manager.telemetry_buffer(session)
+                history = buffer.history(
+                    start_time=float(start_time) if start_time else None,
+                    end_time=float(end_time) if end_time else None,
+                    stride=buffer.stride_for(rate_hz) if rate_hz > 0 else 1,
+                )
+            else:
+                # No robot, no recorded joints
+                history = TelemetryBatch.without_joints([], ISAAC_SIM_CONFIG['physics_dt'])
+            
+            column_class = anvil_pb2.TelemetryColumn if GRPC_PROTO_AVAILABLE else MockProtoClass
+            response_data = {
+                'success': True,
+                'session_id': session_id,
+                'steps': history.steps,
+                'dt': history.dt,
+                'joint_names': history.joint_names,
+                'pose_link': history.pose_link or '',
+                'columns': [column_class(**column) for column in history.columns()],
+                'message': f'{history.steps} telemetry rows'
+            }
+            
+            if GRPC_PROTO_AVAILABLE:
+                return anvil_pb2.TelemetryHistory(**response_data)
+            return MockProtoClass(**response_data)
+            
+        except Exception as e:
+            logger.error("Failed to read telemetry history", error=str(e))
+            
+            response_data = {
+                'success': False,
+                'error': str(e),
+                'message': 'Failed to read telemetry history'
+            }
+            
+            if GRPC_PROTO_AVAILABLE:
+                return anvil_pb2.TelemetryHistory(**response_data)
+            return MockProtoClass(**response_data)
+    
+    async def ListTelemetryRuns(self, request, context):
+        """Stored telemetry runs, optionally of one session, oldest first."""
+        try:
+            session_id = getattr(request, 'session_id', '') or None
+            runs = self.isaac_sim_manager.telemetry_store.runs(session_id)
+            response_data = {
+                'success': True,
+                'runs': json.dumps(runs),
+                'message': f'{len(runs)} telemetry runs'
+            }
+        except Exception as e:
+            logger.error("Failed to list telemetry runs", error=str(e))
+            response_data = {
+                'success': False,
+                'error': str(e),
+                'message': 'Failed to list telemetry runs'
+            }
+        
+        if GRPC_PROTO_AVAILABLE:
+            return anvil_pb2.TelemetryRuns(**response_data)
+        return MockProtoClass(**response_data)
+    
+    async def QueryTelemetryRun(self, request, context):
+        """
+        Rows of a stored run within a time window, read through a memory map
+        and decimated to max_points (default 4000, 0 for every row). Returned
+        as packed float32 columns: time and one per requested channel.
+        """
+        try:
+            run_id = getattr(request, 'run_id', '')
+            channels = getattr(request, 'channels', None) or None
+            if isinstance(channels, str):
+                channels = json.loads(channels)
+            start_time = getattr(request, 'start_time', None)
+            end_time = getattr(request, 'end_time', None)
+            max_points = getattr(request, 'max_points', None)
+            
+            try:
+                run = self.isaac_sim_manager.telemetry_store.open(run_id)
+            except KeyError:
+                raise ValueError(f"Telemetry run {run_id} not found")
+            result = run.query(
+                start_time=float(start_time) if start_time else None,
+                end_time=float(end_time) if end_time else None,
+                channels=channels,
+                max_points=DEFAULT_MAX_POINTS if max_points is None else int(max_points),
+            )
+            
+            column_class = anvil_pb2.TelemetryColumn if GRPC_PROTO_AVAILABLE else MockProtoClass
+            columns = [pack_column('time', result['time'])]
+            columns += [pack_column(name, result['values'][:, i]) for i, name in enumerate(result['channels'])]
+            response_data = {
+                'success': True,
+                'run_id': run_id,
+                'rows': len(result['time']),
+                'stride': result['stride'],
+                'columns': [column_class(**column) for column in columns],
+                'message': f"{len(result['time'])} rows"
+            }
+            
+            if GRPC_PROTO_AVAILABLE:
+                return anvil_pb2.TelemetryQueryResult(**response_data)
+            return MockProtoClass(**response_data)
+            
+        except Exception as e:
+            logger.error("Failed to query telemetry run", error=str(e))
+            
+            response_data = {
+                'success': False,
+                'error': str(e),
+                'message': 'Failed to query telemetry run'
+            }
+            
+            if GRPC_PROTO_AVAILABLE:
+                return anvil_pb2.TelemetryQueryResult(**response_data)
+            return MockProtoClass(**response_data)
+    
     async def StreamVideo(self, request, context):
         """Stream video frames from Isaac Sim."""
         try:
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Telemetry Buffer - Per-session history of physics telemetry
+Every physics step a session takes is recorded into a preallocated numpy ring
+buffer. Subscribers read decimated samples from it at their own rate and
+history queries slice it, so reading telemetry never steps the simulation.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Any, Sequence, Tuple
+
+import numpy as np
+import structlog
+
+from kinematics import KinematicChain
+from physics_backend import TelemetryBatch, link_pose_track
+
+logger = structlog.get_logger(__name__)
+
+DEFAULT_HISTORY_SECONDS = 60.0
+# Wall-clock window over which the achieved physics rate is measured
+RATE_WINDOW_SECONDS = 2.0
+# Samples handed to a subscriber per read; a slower subscriber skips ahead
+MAX_SAMPLES_PER_READ = 1024
+# The real-time sampler drops a backlog longer than this instead of bursting
+MAX_LAG_SECONDS = 0.5
+
+
+class TelemetryRingBuffer:
+    """
+    Fixed-capacity history of physics steps, one row per step.
+
+    Rows are addressed by step number, counting every step recorded since the
+    buffer was created; the newest ``capacity`` steps are kept. ``write`` may
+    be called from executor threads; subscribers run on the event loop the
+    buffer was created on.
+    """
+
+    def __init__(self, joint_names: Sequence[str], dt: float, capacity: int,
+                 chain: Optional[KinematicChain] = None, pose_link: Optional[str] = None):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.joint_names = list(joint_names)
+        self.dt = float(dt)
+        self.capacity = int(capacity)
+        self.chain = chain
+        self.pose_link = (pose_link or chain.tip_links[0]) if chain is not None else None
+
+        dof = len(self.joint_names)
+        self._time = np.zeros(self.capacity)
+        self._positions = np.zeros((self.capacity, dof), dtype=np.float32)
+        self._velocities = np.zeros((self.capacity, dof), dtype=np.float32)
+        self._efforts = np.zeros((self.capacity, dof), dtype=np.float32)
+        self._poses = np.zeros((self.capacity, 7), dtype=np.float32) if chain is not None else None
+
+        self.count = 0
+        self.closed = False
+        self._lock = threading.Lock()
+        self._writes: deque = deque()
+        self._loop = asyncio.get_running_loop()
+        self._changed = asyncio.Event()
+
+    @property
+    def first(self) -> int:
+        """Step number of the oldest row still held."""
+        return max(0, self.count - self.capacity)
+
+    @property
+    def physics_fps(self) -> float:
+        """Steps recorded per wall-clock second over the last few seconds."""
+        with self._lock:
+            if len(self._writes) < 2:
+                return 0.0
+            (t0, c0), (t1, c1) = self._writes[0], self._writes[-1]
+        return (c1 - c0) / (t1 - t0) if t1 > t0 else 0.0
+
+    def stride_for(self, rate_hz: float) -> int:
+        """Step stride giving ``rate_hz`` samples per second of simulation time."""
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be positive")
+        return max(1, int(round(1.0 / (rate_hz * self.dt))))
+
+    def write(self, batch: TelemetryBatch):
+        """Record a batch of consecutive steps; only its last ``capacity`` rows are kept."""
+        if batch.joint_names != self.joint_names:
+            raise ValueError("Telemetry batch joints do not match the buffer")
+        if self.closed or not batch.steps:
+            return
+
+        kept = min(batch.steps, self.capacity)
+        tail = slice(batch.steps - kept, batch.steps)
+        poses = None
+        if self._poses is not None:
+            if batch.poses is not None and batch.pose_link == self.pose_link:
+                poses = batch.poses[tail]
+            else:
+                poses = link_pose_track(self.chain, self.joint_names, batch.positions[tail], self.pose_link)
+
+        with self._lock:
+            slots = (self.count + batch.steps - kept + np.arange(kept)) % self.capacity
+            self._time[slots] = batch.time[tail]
+            self._positions[slots] = batch.positions[tail]
+            self._velocities[slots] = batch.velocities[tail]
+            self._efforts[slots] = batch.efforts[tail]
+            if poses is not None:
+                self._poses[slots] = poses
+            self.count += batch.steps
+
+            now = time.monotonic()
+            self._writes.append((now, self.count))
+            while len(self._writes) > 2 and now - self._writes[0][0] > RATE_WINDOW_SECONDS:
+                self._writes.popleft()
+
+        self._loop.call_soon_threadsafe(self._notify)
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        """Newest sample, or None before the first step."""
+        with self._lock:
+            if not self.count:
+                return None
+            return self._sample(self.count - 1)
+
+    def read(self, cursor: int, stride: int = 1,
+             limit: int = MAX_SAMPLES_PER_READ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Samples at step numbers >= ``cursor`` that are multiples of ``stride``.
+
+        Returns:
+            (samples, cursor to pass to the next read); steps already
+            overwritten are skipped
+        """
+        with self._lock:
+            start = max(cursor, self.first)
+            start += -start % stride
+            steps = range(start, self.count, stride)[:limit]
+            samples = [self._sample(step) for step in steps]
+            return samples, (steps[-1] + stride if samples else max(cursor, start))
+
+    def read_rows(self, cursor: int, stride: int = 1,
+                  limit: int = MAX_SAMPLES_PER_READ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+        """
+        Like ``read``, as arrays: (step numbers, simulation times, (k, channels)
+        float32 rows of positions, velocities, efforts and pose, next cursor).
+        """
+        with self._lock:
+            start = max(cursor, self.first)
+            start += -start % stride
+            steps = np.arange(start, self.count, stride)[:limit]
+            slots = steps % self.capacity
+            parts = [self._positions[slots], self._velocities[slots], self._efforts[slots]]
+            if self._poses is not None:
+                parts.append(self._poses[slots])
+            next_cursor = int(steps[-1]) + stride if len(steps) else max(cursor, start)
+            return steps, self._time[slots], np.hstack(parts), next_cursor
+
+    def history(self, start_time: Optional[float] = None, end_time: Optional[float] = None,
+                stride: int = 1) -> TelemetryBatch:
+        """Held steps within a simulation-time window, every ``stride``-th step."""
+        with self._lock:
+            start = self.first + (-self.first % stride)
+            steps = np.arange(start, self.count, stride)
+            slots = steps % self.capacity
+            times = self._time[slots]
+            keep = np.ones(len(steps), dtype=bool)
+            if start_time is not None:
+                keep &= times >= start_time
+            if end_time is not None:
+                keep &= times <= end_time
+            slots = slots[keep]
+            return TelemetryBatch(
+                joint_names=self.joint_names, dt=self.dt, time=self._time[slots],
+                positions=self._positions[slots], velocities=self._velocities[slots],
+                efforts=self._efforts[slots],
+                poses=self._poses[slots] if self._poses is not None else None,
+                pose_link=self.pose_link,
+            )
+
+    async def subscribe(self, rate_hz: float, rows: bool = False) -> AsyncIterator[Any]:
+        """
+        Yield samples ``rate_hz`` times per second of simulation time as they
+        are recorded, starting with the newest one, until the buffer closes.
+
+        Args:
+            rate_hz: Samples per second of simulation time
+            rows: Yield ``read_rows`` chunks instead of one dict per sample
+        """
+        stride = self.stride_for(rate_hz)
+        cursor = max(self.count - 1, 0)
+        cursor -= cursor % stride
+        while True:
+            changed = self._changed
+            if rows:
+                steps, times, values, cursor = self.read_rows(cursor, stride)
+                read = len(steps)
+                if read:
+                    yield steps, times, values
+            else:
+                samples, cursor = self.read(cursor, stride)
+                read = len(samples)
+                for sample in samples:
+                    yield sample
+            if self.closed:
+                return
+            if read < MAX_SAMPLES_PER_READ:
+                await changed.wait()
+
+    def close(self):
+        """End subscriptions; the held history stays readable."""
+        self.closed = True
+        self._loop.call_soon_threadsafe(self._notify)
+
+    def _sample(self, step: int) -> Dict[str, Any]:
+        slot = step % self.capacity
+        sample = {
+            "step": step,
+            "simulation_time": round(float(self._time[slot]), 6),
+            "joint_states": dict(zip(self.joint_names, self._positions[slot].tolist())),
+            "joint_velocities": dict(zip(self.joint_names, self._velocities[slot].tolist())),
+            "joint_efforts": dict(zip(self.joint_names, self._efforts[slot].tolist())),
+        }
+        if self._poses is not None:
+            pose = self._poses[slot].tolist()
+            sample["robot_pose"] = {"link": self.pose_link, "position": pose[:3], "orientation": pose[3:]}
+        return sample
+
+    def _notify(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+
+class TelemetrySampler:
+    """
+    Advances a session's physics in real time. Every tick it takes the
+    physics steps due since the previous tick, so the session's telemetry
+    buffer fills at the physics rate regardless of who is reading it.
+    """
+
+    def __init__(self, step: Callable[[int], Awaitable[Any]], dt: float, tick: float):
+        self._step = step
+        self.dt = float(dt)
+        self.tick = float(tick)
+        self.dropped_steps = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self):
+        started = time.perf_counter()
+        stepped = 0
+        max_due = max(1, int(MAX_LAG_SECONDS / self.dt))
+        try:
+            while True:
+                due = int((time.perf_counter() - started) / self.dt) - stepped
+                if due > max_due:
+                    # Fell behind (slow physics or a blocked loop): skip ahead
+                    self.dropped_steps += due - max_due
+                    stepped += due - max_due
+                    due = max_due
+                if due > 0:
+                    await self._step(due)
+                    stepped += due
+                await asyncio.sleep(self.tick)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Real-time physics sampler stopped", error=str(e))
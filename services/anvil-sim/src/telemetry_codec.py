@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Telemetry Codec - Compact binary encoding of telemetry samples
+A sample is one row of fixed channels (joint positions, velocities, efforts
+and optionally a link pose), quantized to fixed resolutions. Keyframes carry
+absolute int32 values; the frames between them carry zigzag varint deltas
+from the previous frame, typically one or two bytes per channel. The channel
+layout is described once by a schema, identified in every frame by its id.
+"""
+
+import argparse
+import json
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Sequence, Tuple
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+FRAME_KEY = 1
+FRAME_DELTA = 2
+FRAME_ACK = 3
+
+# version, frame type, schema id, step, simulation time
+TELEMETRY_HEADER = struct.Struct("<BBIId")
+# version, frame type, acknowledged command, command sequence number
+ACK_HEADER = struct.Struct("<BBBI")
+
+ACK_CODES = {"joint": 1, "camera": 2}
+
+# Quantization step of each channel group, in SI units
+CHANNEL_RESOLUTION = {
+    "position": 1e-5,       # rad or m
+    "velocity": 1e-4,       # rad/s or m/s
+    "effort": 1e-3,         # Nm or N
+    "pose_position": 1e-5,  # m
+    "pose_orientation": 1e-6,
+}
+
+# A keyframe every this many frames lets a decoder resynchronize
+KEYFRAME_INTERVAL = 60
+
+# Encoded zigzag varints of every value below 2**14, the one and two byte
+# deltas that make up nearly all delta frames
+_SHORT_VARINTS = [bytes((z,)) for z in range(0x80)] + \
+                 [bytes(((z & 0x7F) | 0x80, z >> 7)) for z in range(0x80, 1 << 14)]
+
+POSE_AXES = ("x", "y", "z", "qw", "qx", "qy", "qz")
+
+
+@dataclass
+class TelemetrySchema:
+    """Channel layout of a telemetry stream."""
+    joint_names: List[str]
+    pose_link: Optional[str] = None
+
+    def __post_init__(self):
+        self.joint_names = list(self.joint_names)
+        groups = [("position", self.joint_names), ("velocity", self.joint_names),
+                  ("effort", self.joint_names)]
+        if self.pose_link:
+            groups += [("pose_position", POSE_AXES[:3]), ("pose_orientation", POSE_AXES[3:])]
+        self.channels = [f"{group}/{name}" for group, names in groups for name in names]
+        self.resolution = np.concatenate([
+            np.full(len(names), CHANNEL_RESOLUTION[group]) for group, names in groups
+        ])
+        layout = json.dumps([FORMAT_VERSION, self.channels, self.resolution.tolist()])
+        self.schema_id = zlib.crc32(layout.encode("utf-8"))
+
+    @property
+    def width(self) -> int:
+        return len(self.channels)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "schema_id": self.schema_id,
+            "version": FORMAT_VERSION,
+            "byte_order": "little",
+            "header": "u8 version, u8 frame type, u32 schema id, u32 step, f64 time",
+            "frame_types": {"key": FRAME_KEY, "delta": FRAME_DELTA, "ack": FRAME_ACK},
+            "key_body": "i32 per channel, value / resolution",
+            "delta_body": "zigzag LEB128 varint per channel, change of value / resolution",
+            "joint_names": self.joint_names,
+            "pose_link": self.pose_link,
+            "channels": self.channels,
+            "resolution": self.resolution.tolist(),
+        }
+
+    def sample(self, values: np.ndarray) -> Dict[str, Any]:
+        """Decoded channel row as the JSON telemetry sample layout."""
+        dof = len(self.joint_names)
+        values = np.asarray(values, dtype=float)
+        sample = {
+            "joint_states": dict(zip(self.joint_names, values[:dof].tolist())),
+            "joint_velocities": dict(zip(self.joint_names, values[dof:2 * dof].tolist())),
+            "joint_efforts": dict(zip(self.joint_names, values[2 * dof:3 * dof].tolist())),
+        }
+        if self.pose_link:
+            pose = values[3 * dof:].tolist()
+            sample["robot_pose"] = {"link": self.pose_link, "position": pose[:3], "orientation": pose[3:]}
+        return sample
+
+
+class TelemetryEncoder:
+    """
+    Encodes consecutive rows of one stream. Frames must reach the decoder
+    in order; a keyframe is emitted first and every ``keyframe_interval``
+    frames after.
+    """
+
+    def __init__(self, schema: TelemetrySchema, keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.schema = schema
+        self.keyframe_interval = max(1, keyframe_interval)
+        self._inverse_resolution = 1.0 / schema.resolution
+        self._previous: Optional[np.ndarray] = None
+        self._since_key = 0
+
+    def keyframe(self):
+        """Make the next frame a keyframe, e.g. for a newly joined reader."""
+        self._previous = None
+
+    def encode(self, step: int, sim_time: float, values: np.ndarray) -> bytes:
+        return self.encode_rows([step], [sim_time], np.asarray(values).reshape(1, -1))[0]
+
+    def encode_rows(self, steps: Sequence[int], times: Sequence[float], values: np.ndarray) -> List[bytes]:
+        """One frame per row of (k, channels) values."""
+        values = np.asarray(values, dtype=float)
+        if values.ndim != 2 or values.shape[1] != self.schema.width:
+            raise ValueError(f"Expected rows of {self.schema.width} channels, got {values.shape}")
+        quantized = np.rint(values * self._inverse_resolution).astype(np.int64)
+        deltas = quantized.copy()
+        deltas[1:] -= quantized[:-1]
+        if self._previous is not None:
+            deltas[0] -= self._previous
+        # Zigzag for the whole batch at once; rows then only look up their bytes
+        zigzag = (deltas << 1) ^ (deltas >> 63)
+        short = (np.abs(deltas).max(axis=1) < 1 << 13).tolist()
+        zigzag = zigzag.tolist()
+
+        pack = TELEMETRY_HEADER.pack
+        schema_id = self.schema.schema_id
+        frames = []
+        for i, (step, sim_time) in enumerate(zip(steps, times)):
+            if (i == 0 and self._previous is None) or self._since_key >= self.keyframe_interval:
+                self._since_key = 0
+                header = pack(FORMAT_VERSION, FRAME_KEY, schema_id, int(step), float(sim_time))
+                frames.append(header + quantized[i].astype("<i4").tobytes())
+            elif short[i]:
+                header = pack(FORMAT_VERSION, FRAME_DELTA, schema_id, int(step), float(sim_time))
+                frames.append(header + b"".join([_SHORT_VARINTS[z] for z in zigzag[i]]))
+            else:
+                frame = bytearray(pack(FORMAT_VERSION, FRAME_DELTA, schema_id, int(step), float(sim_time)))
+                _write_varints(frame, deltas[i].tolist())
+                frames.append(bytes(frame))
+            self._since_key += 1
+        self._previous = quantized[-1]
+        return frames
+
+
+class TelemetryDecoder:
+    """Decodes the frames of one stream, in order."""
+
+    def __init__(self, schema: TelemetrySchema):
+        self.schema = schema
+        self._previous: Optional[np.ndarray] = None
+
+    def decode(self, frame: bytes) -> Dict[str, Any]:
+        """
+        Returns:
+            {"step", "simulation_time", "values"} for telemetry frames,
+            {"ack", "seq"} for acknowledgements
+        """
+        version, kind = frame[0], frame[1]
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported telemetry format version {version}")
+        if kind == FRAME_ACK:
+            return decode_ack(frame)
+
+        _, _, schema_id, step, sim_time = TELEMETRY_HEADER.unpack_from(frame)
+        if schema_id != self.schema.schema_id:
+            raise ValueError(f"Frame schema {schema_id} does not match {self.schema.schema_id}")
+        body = np.frombuffer(frame, dtype=np.uint8, offset=TELEMETRY_HEADER.size)
+        if kind == FRAME_KEY:
+            quantized = body.view("<i4").astype(np.int64)
+        elif kind == FRAME_DELTA:
+            if self._previous is None:
+                raise ValueError("Delta frame before the first keyframe")
+            quantized = self._previous + read_varints(body, self.schema.width)
+        else:
+            raise ValueError(f"Unknown frame type {kind}")
+        self._previous = quantized
+        return {"step": step, "simulation_time": sim_time, "values": quantized * self.schema.resolution}
+
+
+def encode_ack(command: str, seq: int) -> bytes:
+    """Binary acknowledgement of a client command."""
+    return ACK_HEADER.pack(FORMAT_VERSION, FRAME_ACK, ACK_CODES[command], seq & 0xFFFFFFFF)
+
+
+def decode_ack(frame: bytes) -> Dict[str, Any]:
+    _, _, code, seq = ACK_HEADER.unpack_from(frame)
+    command = next((name for name, value in ACK_CODES.items() if value == code), str(code))
+    return {"ack": command, "seq": seq}
+
+
+def _write_varints(out: bytearray, values: Sequence[int]):
+    """Append zigzag LEB128 varints; small deltas take one byte each."""
+    append = out.append
+    for value in values:
+        value = (value << 1) ^ (value >> 63)
+        while value >= 0x80:
+            append((value & 0x7F) | 0x80)
+            value >>= 7
+        append(value)
+
+
+def read_varints(data: np.ndarray, count: int) -> np.ndarray:
+    """The first ``count`` zigzag varints of a uint8 array, as int64."""
+    ends = np.flatnonzero(data < 0x80)[:count]
+    if len(ends) < count:
+        raise ValueError("Truncated delta frame")
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    lengths = ends - starts + 1
+    positions = np.arange(ends[-1] + 1) - np.repeat(starts, lengths)
+    payload = (data[:ends[-1] + 1] & 0x7F).astype(np.uint64) << (7 * positions).astype(np.uint64)
+    zigzag = np.add.reduceat(payload, starts)
+    return (zigzag >> np.uint64(1)).astype(np.int64) ^ -(zigzag & np.uint64(1)).astype(np.int64)
+
+
+def main():
+    """Compare frame size and encode time against JSON samples."""
+    parser = argparse.ArgumentParser(description="Benchmark the binary telemetry codec")
+    parser.add_argument("--joints", type=int, default=7)
+    parser.add_argument("--frames", type=int, default=6000)
+    parser.add_argument("--batch", type=int, default=60, help="rows per encode_rows call")
+    args = parser.parse_args()
+
+    names = [f"joint{i + 1}" for i in range(args.joints)]
+    schema = TelemetrySchema(names, "tool0")
+    t = np.arange(args.frames)[:, None] / 60.0
+    phase = np.arange(args.joints)[None, :]
+    positions = np.sin(t + phase)
+    velocities = np.cos(t + phase)
+    efforts = 20 * np.sin(2 * t + phase)
+    pose = np.hstack([np.sin(t), np.cos(t), 0.5 + 0 * t, np.ones_like(t), 0 * t, 0 * t, 0 * t])
+    rows = np.hstack([positions, velocities, efforts, pose]).astype(np.float32)
+
+    started = time.perf_counter()
+    samples = [json.dumps({"step": i, "simulation_time": i / 60.0, **schema.sample(row)}) for i, row in enumerate(rows)]
+    json_seconds = time.perf_counter() - started
+
+    encoder = TelemetryEncoder(schema)
+    started = time.perf_counter()
+    frames = [encoder.encode(i, i / 60.0, row) for i, row in enumerate(rows)]
+    binary_seconds = time.perf_counter() - started
+
+    # Subscribers read every row recorded since their last read in one go
+    encoder = TelemetryEncoder(schema)
+    steps = np.arange(args.frames)
+    started = time.perf_counter()
+    for start in range(0, args.frames, args.batch):
+        encoder.encode_rows(steps[start:start + args.batch].tolist(),
+                            (steps[start:start + args.batch] / 60.0).tolist(), rows[start:start + args.batch])
+    batch_seconds = time.perf_counter() - started
+
+    decoder = TelemetryDecoder(schema)
+    error = max(np.abs(decoder.decode(frame)["values"] - row).max() for frame, row in zip(frames, rows))
+
+    json_bytes = sum(len(sample) for sample in samples) / len(samples)
+    binary_bytes = sum(len(frame) for frame in frames) / len(frames)
+    print(f"{args.joints} joints + pose, {args.frames} frames at 60 Hz")
+    print(f"  json:   {json_bytes:7.1f} B/frame  {json_seconds / args.frames * 1e6:6.1f} us/frame (sample dict + dumps)")
+    print(f"  binary: {binary_bytes:7.1f} B/frame  {binary_seconds / args.frames * 1e6:6.1f} us/frame (one row per call)")
+    print(f"  binary: {binary_bytes:7.1f} B/frame  {batch_seconds / args.frames * 1e6:6.1f} us/frame "
+          f"({args.batch} rows per call)")
+    print(f"  max decode error {error:.2e}")
+
+
+if __name__ == "__main__":
+    main()
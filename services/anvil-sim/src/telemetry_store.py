@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Telemetry Store - Persistent, memory-mapped telemetry runs
+A session's telemetry is drained from its ring buffer into an append-only
+run on disk, a chunk of rows at a time, so it outlives the session. Reads
+memory-map the run and touch only the chunks overlapping the requested time
+range, so a dashboard can scrub an hour-long run without loading it.
+
+Run layout, ``<root>/<run_id>/``:
+    meta.json   Run metadata and channel names
+    chunks.bin  Chunks, then an index footer once the run is closed. Each
+                chunk is a header (magic, rows, first step, first and last
+                time) followed by int64 steps, float64 times and one float32
+                column per channel, padded to 8 bytes.
+"""
+
+import json
+import os
+import re
+import shutil
+import struct
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Sequence, Union
+
+import numpy as np
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+META_NAME = "meta.json"
+DATA_NAME = "chunks.bin"
+
+CHUNK_MAGIC = b"TCHK"
+INDEX_MAGIC = b"TIDX"
+# magic, rows, first step, first time, last time
+CHUNK_HEADER = struct.Struct("<4sIqdd")
+# index offset, chunk count, magic
+INDEX_TRAILER = struct.Struct("<QI4s")
+INDEX_DTYPE = np.dtype([
+    ("offset", "<u8"), ("rows", "<u4"), ("channels", "<u4"),
+    ("first_step", "<i8"), ("start", "<f8"), ("end", "<f8"),
+])
+
+DEFAULT_CHUNK_ROWS = 4096
+DEFAULT_MAX_POINTS = 4000
+
+# No leading dot or dash, so "." and ".." never name a run
+_RUN_ID = re.compile(r"[A-Za-z0-9_][A-Za-z0-9_.-]*")
+
+
+def _chunk_size(rows: int, channels: int) -> int:
+    body = rows * 16 + rows * channels * 4
+    return CHUNK_HEADER.size + body + (-body % 8)
+
+
+class TelemetryRunWriter:
+    """Appends chunks to a new run; ``close`` writes the index footer."""
+
+    def __init__(self, directory: Path, meta: Dict[str, Any]):
+        self.directory = directory
+        self.meta = dict(meta)
+        self.channel_count = len(self.meta["channels"])
+        self.rows = 0
+        self.closed = False
+        self._index: List[tuple] = []
+        self._offset = 0
+
+        directory.mkdir(parents=True)
+        self.meta["status"] = "recording"
+        self._write_meta()
+        self._file = open(directory / DATA_NAME, "wb")
+
+    def append(self, steps: np.ndarray, times: np.ndarray, values: np.ndarray):
+        """Write one chunk of (k,) steps, (k,) times and (k, channels) values."""
+        rows = len(steps)
+        if not rows or self.closed:
+            return
+        values = np.asarray(values, dtype="<f4")
+        if values.shape != (rows, self.channel_count):
+            raise ValueError(f"Expected ({rows}, {self.channel_count}) values, got {values.shape}")
+
+        times = np.asarray(times, dtype="<f8")
+        header = CHUNK_HEADER.pack(CHUNK_MAGIC, rows, int(steps[0]), float(times[0]), float(times[-1]))
+        body = b"".join([np.asarray(steps, dtype="<i8").tobytes(), times.tobytes(),
+                         np.ascontiguousarray(values.T).tobytes()])
+        self._file.write(header + body + b"\0" * (-len(body) % 8))
+        self._file.flush()
+
+        self._index.append((self._offset, rows, self.channel_count, int(steps[0]), float(times[0]), float(times[-1])))
+        self._offset += _chunk_size(rows, self.channel_count)
+        self.rows += rows
+
+    def close(self):
+        """Write the index footer and final metadata."""
+        if self.closed:
+            return
+        self.closed = True
+        if not self.rows:
+            # Nothing was recorded; leave no empty run behind
+            self._file.close()
+            shutil.rmtree(self.directory, ignore_errors=True)
+            return
+        index = np.array(self._index, dtype=INDEX_DTYPE)
+        self._file.write(index.tobytes() + INDEX_TRAILER.pack(self._offset, len(index), INDEX_MAGIC))
+        self._file.close()
+
+        self.meta.update({
+            "status": "complete",
+            "rows": self.rows,
+            "chunks": len(index),
+            "start_time": float(index["start"][0]),
+            "end_time": float(index["end"][-1]),
+            "finished_at": time.time(),
+        })
+        self._write_meta()
+        logger.info("Telemetry run closed", run_id=self.meta["run_id"], rows=self.rows, chunks=len(index))
+
+    def _write_meta(self):
+        tmp_path = self.directory / f".{META_NAME}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self.directory / META_NAME)
+
+
+class TelemetryRun:
+    """
+    Read-only, memory-mapped view of a run.
+
+    Closed runs are indexed by their footer; runs still recording (or cut
+    short) are indexed by walking the chunk headers written so far.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        with open(self.directory / META_NAME, "r") as f:
+            self.meta = json.load(f)
+        self.channels: List[str] = self.meta["channels"]
+        self.channel_index = {name: i for i, name in enumerate(self.channels)}
+
+        path = self.directory / DATA_NAME
+        size = path.stat().st_size if path.exists() else 0
+        self._data = np.memmap(path, dtype=np.uint8, mode="r") if size else np.zeros(0, dtype=np.uint8)
+        self.index = self._read_index()
+
+    @property
+    def rows(self) -> int:
+        return int(self.index["rows"].sum())
+
+    @property
+    def start_time(self) -> Optional[float]:
+        return float(self.index["start"][0]) if len(self.index) else None
+
+    @property
+    def end_time(self) -> Optional[float]:
+        return float(self.index["end"][-1]) if len(self.index) else None
+
+    def query(self, start_time: Optional[float] = None, end_time: Optional[float] = None,
+              channels: Optional[Sequence[str]] = None,
+              max_points: Optional[int] = DEFAULT_MAX_POINTS) -> Dict[str, Any]:
+        """
+        Rows within a time window, decimated to at most about ``max_points``.
+
+        Args:
+            start_time: Window start in simulation seconds, defaults to the run start
+            end_time: Window end, inclusive, defaults to the run end
+            channels: Channel names to return, defaults to all
+            max_points: Row budget; every n-th row is kept to stay within it.
+                None or 0 returns every row
+
+        Returns:
+            {"channels", "stride", "steps" (k,), "time" (k,), "values" (k, channels)}
+        """
+        names = list(channels) if channels else self.channels
+        unknown = [name for name in names if name not in self.channel_index]
+        if unknown:
+            raise ValueError(f"Unknown channels: {', '.join(unknown)}")
+        columns = np.array([self.channel_index[name] for name in names], dtype=int)
+
+        first, last = 0, len(self.index)
+        if start_time is not None:
+            first = int(np.searchsorted(self.index["end"], start_time, side="left"))
+        if end_time is not None:
+            last = int(np.searchsorted(self.index["start"], end_time, side="right"))
+
+        # Row range of each chunk in the window; only the edge chunks need a search
+        ranges = []
+        for i in range(first, max(first, last)):
+            rows = int(self.index["rows"][i])
+            lo, hi = 0, rows
+            if (start_time is not None and self.index["start"][i] < start_time) or \
+                    (end_time is not None and self.index["end"][i] > end_time):
+                chunk_times = self._chunk(i)[1]
+                if start_time is not None:
+                    lo = int(np.searchsorted(chunk_times, start_time, side="left"))
+                if end_time is not None:
+                    hi = int(np.searchsorted(chunk_times, end_time, side="right"))
+            if hi > lo:
+                ranges.append((i, lo, hi))
+
+        total = sum(hi - lo for _, lo, hi in ranges)
+        stride = max(1, -(-total // max_points)) if max_points else 1
+
+        steps, times, values = [], [], []
+        skip = 0
+        for i, lo, hi in ranges:
+            chunk_steps, chunk_times, chunk_values = self._chunk(i)
+            rows = slice(lo + skip, hi, stride)
+            steps.append(chunk_steps[rows])
+            times.append(chunk_times[rows])
+            values.append(chunk_values[columns, rows].T)
+            # Keep the stride continuous across chunk boundaries
+            skip = (lo + skip - hi) % stride
+
+        return {
+            "channels": names,
+            "stride": stride,
+            "steps": np.concatenate(steps) if steps else np.zeros(0, dtype=np.int64),
+            "time": np.concatenate(times) if times else np.zeros(0),
+            "values": np.concatenate(values) if values else np.zeros((0, len(names)), dtype=np.float32),
+        }
+
+    def info(self) -> Dict[str, Any]:
+        return {**self.meta, "rows": self.rows, "chunks": len(self.index),
+                "start_time": self.start_time, "end_time": self.end_time}
+
+    def _chunk(self, i: int):
+        """Zero-copy (steps, times, (channels, rows) values) views of chunk i."""
+        entry = self.index[i]
+        offset, rows, channels = int(entry["offset"]) + CHUNK_HEADER.size, int(entry["rows"]), int(entry["channels"])
+        steps = np.frombuffer(self._data, dtype="<i8", count=rows, offset=offset)
+        times = np.frombuffer(self._data, dtype="<f8", count=rows, offset=offset + rows * 8)
+        values = np.frombuffer(self._data, dtype="<f4", count=rows * channels, offset=offset + rows * 16)
+        return steps, times, values.reshape(channels, rows)
+
+    def _read_index(self) -> np.ndarray:
+        size = len(self._data)
+        if size >= INDEX_TRAILER.size:
+            index_offset, count, magic = INDEX_TRAILER.unpack_from(self._data, size - INDEX_TRAILER.size)
+            if magic == INDEX_MAGIC and index_offset + count * INDEX_DTYPE.itemsize + INDEX_TRAILER.size == size:
+                return np.frombuffer(self._data, dtype=INDEX_DTYPE, count=count, offset=index_offset)
+
+        entries = []
+        offset = 0
+        channels = len(self.channels)
+        while offset + CHUNK_HEADER.size <= size:
+            magic, rows, first_step, start, end = CHUNK_HEADER.unpack_from(self._data, offset)
+            length = _chunk_size(rows, channels)
+            if magic != CHUNK_MAGIC or offset + length > size:
+                break
+            entries.append((offset, rows, channels, first_step, start, end))
+            offset += length
+        return np.array(entries, dtype=INDEX_DTYPE)
+
+
+class TelemetryRecorder:
+    """
+    Drains a session's telemetry ring buffer into a run, ``chunk_rows`` rows
+    at a time. ``drain`` must run before the buffer wraps past rows not yet
+    drained; callers write at most ``capacity - chunk_rows`` steps between
+    drains.
+    """
+
+    def __init__(self, writer: TelemetryRunWriter, buffer, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+        self.writer = writer
+        self.buffer = buffer
+        self.chunk_rows = max(1, min(chunk_rows, buffer.capacity // 2))
+        self.cursor = buffer.count
+
+    @property
+    def max_write(self) -> int:
+        """Most steps the buffer may take between drains without losing rows."""
+        return self.buffer.capacity - self.chunk_rows
+
+    def drain(self, final: bool = False):
+        """Write every full chunk pending, and a partial one if ``final``."""
+        while True:
+            pending = self.buffer.count - self.cursor
+            if pending <= 0 or (pending < self.chunk_rows and not final):
+                return
+            steps, times, values, self.cursor = self.buffer.read_rows(self.cursor, 1, self.chunk_rows)
+            self.writer.append(steps, times, values)
+
+    def close(self):
+        self.drain(final=True)
+        self.writer.close()
+
+
+class TelemetryStore:
+    """Directory of telemetry runs, one subdirectory per run."""
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def create(self, session_id: str, channels: Sequence[str], dt: float,
+               **meta) -> TelemetryRunWriter:
+        """Start a new run for a session."""
+        safe_session = re.sub(r"[^A-Za-z0-9_.-]", "_", session_id).lstrip(".-") or "session"
+        run_id = f"{safe_session}-{int(time.time())}-{uuid.uuid4().hex[:8]}"
+        return TelemetryRunWriter(self.root / run_id, {
+            "run_id": run_id,
+            "session_id": session_id,
+            "channels": list(channels),
+            "dt": dt,
+            "started_at": time.time(),
+            **meta,
+        })
+
+    def open(self, run_id: str) -> TelemetryRun:
+        if not _RUN_ID.fullmatch(run_id) or not (self.root / run_id / META_NAME).exists():
+            raise KeyError(run_id)
+        return TelemetryRun(self.root / run_id)
+
+    def runs(self, session_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Metadata of stored runs, oldest first."""
+        runs = []
+        for meta_path in self.root.glob(f"*/{META_NAME}"):
+            try:
+                with open(meta_path, "r") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if session_id is None or meta.get("session_id") == session_id:
+                runs.append(meta)
+        return sorted(runs, key=lambda meta: meta.get("started_at", 0))
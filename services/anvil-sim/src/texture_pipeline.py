@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Texture Pipeline
+Generates capped-resolution texture variants and mip chains per quality
+profile, so low-quality sessions load a fraction of the texture bytes.
+"""
+
+import json
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Largest texture edge per quality profile, matched to the stream resolutions
+# of the WebRTC quality profiles (720p demo, 1080p engineering, 4K certification)
+TEXTURE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "demo": {"max_size": 1024},
+    "engineering": {"max_size": 2048},
+    "certification": {"max_size": 4096},
+}
+
+DEFAULT_QUALITY_PROFILE = "engineering"
+
+# Smallest mip level written
+MIN_MIP_SIZE = 16
+
+MANIFEST_NAME = "variants.json"
+
+_TEXTURE_REFERENCE = re.compile(r'(<texture\b[^>]*?\bfilename\s*=\s*")([^"]*)(")')
+
+
+class TexturePipeline:
+    """Builds per-profile texture variants on a process pool."""
+
+    def __init__(self, profiles: Optional[Dict[str, Dict[str, Any]]] = None,
+                 max_workers: Optional[int] = None, generate_mips: bool = True,
+                 min_mip_size: int = MIN_MIP_SIZE):
+        """
+        Initialize the texture pipeline.
+
+        Args:
+            profiles: Quality profile name -> {"max_size": largest edge in pixels}
+            max_workers: Worker processes, defaults to the CPU count
+            generate_mips: Whether to write a mip chain for every variant
+            min_mip_size: Smallest mip edge in pixels
+        """
+        self.profiles = profiles or TEXTURE_PROFILES
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.generate_mips = generate_mips
+        self.min_mip_size = min_mip_size
+
+    def process(self, textures: List[Tuple[str, str]], output_dir: Path) -> Dict[str, Dict[str, Any]]:
+        """
+        Build variants for a robot's textures.
+
+        Textures whose content hash matches the previous run reuse their
+        existing variants.
+
+        Args:
+            textures: (texture path, sha256) pairs
+            output_dir: Directory receiving one sub-directory per profile
+
+        Returns:
+            Texture path -> {"sha256", "width", "height", "bytes", "variants": {profile: variant}}
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = output_dir / MANIFEST_NAME
+        previous = _load_manifest(manifest_path)
+
+        results: Dict[str, Dict[str, Any]] = {}
+        pending = []
+        for path, sha256 in textures:
+            entry = previous.get(path)
+            if entry and entry.get("sha256") == sha256 and _variants_exist(entry):
+                results[path] = entry
+            else:
+                pending.append((path, sha256))
+
+        args = [
+            (path, sha256, str(output_dir), self.profiles, self.generate_mips, self.min_mip_size)
+            for path, sha256 in pending
+        ]
+        if len(args) > 1 and self.max_workers > 1:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(args))) as pool:
+                built = list(pool.map(_build_variants_job, args))
+        else:
+            built = [_build_variants_job(a) for a in args]
+
+        for (path, _), entry in zip(pending, built):
+            if "error" in entry:
+                logger.warning(f"Texture variants not generated for {path}: {entry['error']}")
+            results[path] = entry
+
+        tmp_path = manifest_path.with_name(f".{MANIFEST_NAME}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(results, f, indent=2)
+        os.replace(tmp_path, manifest_path)
+
+        if pending:
+            logger.info(f"Generated texture variants for {len(pending)} textures "
+                        f"({len(textures) - len(pending)} unchanged)")
+        return results
+
+
+def variant_paths(variants: Dict[str, Dict[str, Any]], quality_profile: str) -> Dict[str, str]:
+    """
+    Map each texture to its variant for a quality profile.
+
+    Args:
+        variants: Result of TexturePipeline.process
+        quality_profile: Session quality profile
+
+    Returns:
+        Original texture path -> variant path (the original if it needs no variant)
+    """
+    mapping = {}
+    for path, entry in variants.items():
+        variant = entry.get("variants", {}).get(quality_profile)
+        mapping[path] = variant["path"] if variant else path
+    return mapping
+
+
+def rewrite_texture_references(urdf_path: str, texture_map: Dict[str, str], output_path: str) -> str:
+    """
+    Write a copy of a URDF whose texture references point at profile variants.
+
+    References are matched by file name, so ``package://``, relative and
+    absolute references to an uploaded texture are all rewritten.
+
+    Args:
+        urdf_path: Source URDF
+        texture_map: Original texture path -> variant path
+        output_path: Path of the rewritten URDF
+
+    Returns:
+        Path of the rewritten URDF
+    """
+    by_name = {os.path.basename(original): variant for original, variant in texture_map.items()}
+
+    def replace(match):
+        variant = by_name.get(os.path.basename(match.group(2)))
+        return f"{match.group(1)}{variant or match.group(2)}{match.group(3)}"
+
+    with open(urdf_path, "r") as f:
+        content = f.read()
+
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(_TEXTURE_REFERENCE.sub(replace, content))
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def _build_variants_job(args) -> Dict[str, Any]:
+    path, sha256, output_dir, profiles, generate_mips, min_mip_size = args
+    try:
+        return build_variants(path, sha256, Path(output_dir), profiles, generate_mips, min_mip_size)
+    except Exception as e:
+        return {"sha256": sha256, "error": f"{type(e).__name__}: {e}", "variants": {}}
+
+
+def build_variants(path: str, sha256: str, output_dir: Path, profiles: Dict[str, Dict[str, Any]],
+                   generate_mips: bool = True, min_mip_size: int = MIN_MIP_SIZE) -> Dict[str, Any]:
+    """
+    Build the variants of one texture.
+
+    Profiles are produced from largest to smallest, each downscaled from the
+    previous one, so the full-resolution image is only resampled once.
+
+    Returns:
+        {"sha256", "width", "height", "bytes", "variants": {profile: {"path", "width", "height", "bytes", "mips"}}}
+    """
+    stem, extension = os.path.splitext(os.path.basename(path))
+    save_format, save_options = _save_settings(extension)
+    largest = max(profile["max_size"] for profile in profiles.values())
+
+    with Image.open(path) as image:
+        width, height = image.size
+        # JPEG decoders can skip straight to a reduced scale
+        image.draft(image.mode, _fit((width, height), largest))
+        current = image.convert("RGBA" if image.mode in ("P", "LA") else image.mode)
+
+    entry = {
+        "sha256": sha256,
+        "width": width,
+        "height": height,
+        "bytes": os.path.getsize(path),
+        "variants": {},
+    }
+
+    for name, profile in sorted(profiles.items(), key=lambda item: item[1]["max_size"], reverse=True):
+        size = _fit((width, height), profile["max_size"])
+        profile_dir = output_dir / name
+        profile_dir.mkdir(parents=True, exist_ok=True)
+
+        if size == (width, height) and not generate_mips:
+            # Already within the cap: the original serves as the variant
+            entry["variants"][name] = {"path": path, "width": width, "height": height,
+                                       "bytes": entry["bytes"], "mips": []}
+            continue
+
+        if current.size != size:
+            current = current.resize(size, Image.LANCZOS, reducing_gap=2.0)
+
+        if size == (width, height):
+            variant_path = path
+        else:
+            variant_path = str(profile_dir / f"{stem}{extension}")
+            _save(current, variant_path, save_format, save_options)
+
+        mips = []
+        if generate_mips:
+            mip = current
+            level = 1
+            while max(mip.size) // 2 >= min_mip_size:
+                mip = mip.reduce(2)
+                mip_path = str(profile_dir / f"{stem}.mip{level}{extension}")
+                _save(mip, mip_path, save_format, save_options)
+                mips.append(mip_path)
+                level += 1
+
+        entry["variants"][name] = {
+            "path": variant_path,
+            "width": size[0],
+            "height": size[1],
+            "bytes": os.path.getsize(variant_path),
+            "mips": mips,
+        }
+
+    return entry
+
+
+def _fit(size: Tuple[int, int], max_size: int) -> Tuple[int, int]:
+    """Size scaled down (never up) so its longest edge is at most max_size."""
+    width, height = size
+    scale = min(1.0, max_size / max(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _save_settings(extension: str) -> Tuple[str, Dict[str, Any]]:
+    extension = extension.lower()
+    if extension in (".jpg", ".jpeg"):
+        return "JPEG", {"quality": 90}
+    if extension == ".png":
+        return "PNG", {"compress_level": 3}
+    return Image.registered_extensions().get(extension, "PNG"), {}
+
+
+def _save(image: Image.Image, path: str, save_format: str, options: Dict[str, Any]):
+    if save_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    image.save(tmp_path, format=save_format, **options)
+    os.replace(tmp_path, path)
+
+
+def _variants_exist(entry: Dict[str, Any]) -> bool:
+    for variant in entry.get("variants", {}).values():
+        if not os.path.exists(variant["path"]):
+            return False
+        if not all(os.path.exists(mip) for mip in variant.get("mips", [])):
+            return False
+    return "error" not in entry
+
+
+def _load_manifest(manifest_path: Path) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(manifest_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
@@ -0,0 +1,617 @@
+#!/usr/bin/env python3
+"""
+URDF Model
+Streaming URDF parser producing a lightweight, Isaac-free robot description.
+"""
+
+import io
+import logging
+import math
+import os
+import xml.etree.ElementTree as ET
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union, Iterable
+
+logger = logging.getLogger(__name__)
+
+Vector3 = Tuple[float, float, float]
+Quaternion = Tuple[float, float, float, float]  # (w, x, y, z)
+
+IDENTITY_QUAT: Quaternion = (1.0, 0.0, 0.0, 0.0)
+ZERO_VECTOR: Vector3 = (0.0, 0.0, 0.0)
+
+# Joint types that add a degree of freedom
+MOVABLE_JOINT_TYPES = ("revolute", "continuous", "prismatic")
+
+
+class UrdfParseError(ValueError):
+    """Raised when a URDF document cannot be parsed."""
+
+
+@dataclass
+class UrdfOrigin:
+    """Pose of a child frame relative to its parent frame."""
+    xyz: Vector3 = ZERO_VECTOR
+    rpy: Vector3 = ZERO_VECTOR
+
+    @property
+    def quaternion(self) -> Quaternion:
+        return rpy_to_quat(self.rpy)
+
+
+@dataclass
+class UrdfGeometry:
+    """Visual or collision geometry."""
+    type: str  # box, cylinder, sphere or mesh
+    size: Vector3 = ZERO_VECTOR
+    radius: float = 0.0
+    length: float = 0.0
+    filename: Optional[str] = None
+    scale: Vector3 = (1.0, 1.0, 1.0)
+
+
+@dataclass
+class UrdfMaterial:
+    """Material referenced by visuals."""
+    name: str
+    color: Optional[Tuple[float, float, float, float]] = None
+    texture: Optional[str] = None
+
+
+@dataclass
+class UrdfShape:
+    """A visual or collision element of a link."""
+    origin: UrdfOrigin
+    geometry: UrdfGeometry
+    name: Optional[str] = None
+    material: Optional[UrdfMaterial] = None
+
+
+@dataclass
+class UrdfInertial:
+    """Mass properties of a link."""
+    mass: float
+    origin: UrdfOrigin = field(default_factory=UrdfOrigin)
+    # ixx, ixy, ixz, iyy, iyz, izz
+    inertia: Tuple[float, float, float, float, float, float] = (0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+
+@dataclass
+class UrdfLink:
+    """A rigid body of the robot."""
+    name: str
+    inertial: Optional[UrdfInertial] = None
+    visuals: List[UrdfShape] = field(default_factory=list)
+    collisions: List[UrdfShape] = field(default_factory=list)
+
+
+@dataclass
+class UrdfLimit:
+    """Joint limits; lower/upper are None when not given."""
+    lower: Optional[float] = None
+    upper: Optional[float] = None
+    effort: Optional[float] = None
+    velocity: Optional[float] = None
+
+
+@dataclass
+class UrdfMimic:
+    """Mimic relation: position = multiplier * joint + offset."""
+    joint: str
+    multiplier: float = 1.0
+    offset: float = 0.0
+
+
+@dataclass
+class UrdfJoint:
+    """A joint connecting a parent link to a child link."""
+    name: str
+    type: str
+    parent: Optional[str]
+    child: Optional[str]
+    origin: UrdfOrigin = field(default_factory=UrdfOrigin)
+    axis: Vector3 = (1.0, 0.0, 0.0)
+    limit: Optional[UrdfLimit] = None
+    mimic: Optional[UrdfMimic] = None
+    damping: float = 0.0
+    friction: float = 0.0
+
+    @property
+    def movable(self) -> bool:
+        return self.type in MOVABLE_JOINT_TYPES
+
+
+@dataclass
+class UrdfModel:
+    """Parsed URDF robot description."""
+    name: str
+    links: Dict[str, UrdfLink] = field(default_factory=dict)
+    joints: Dict[str, UrdfJoint] = field(default_factory=dict)
+    materials: Dict[str, UrdfMaterial] = field(default_factory=dict)
+    duplicate_links: List[str] = field(default_factory=list)
+    duplicate_joints: List[str] = field(default_factory=list)
+    source_path: Optional[str] = None
+
+    @property
+    def base_dir(self) -> Optional[str]:
+        return os.path.dirname(os.path.abspath(self.source_path)) if self.source_path else None
+
+    def child_joints(self) -> Dict[str, List[UrdfJoint]]:
+        """Joints grouped by parent link."""
+        children: Dict[str, List[UrdfJoint]] = {}
+        for joint in self.joints.values():
+            children.setdefault(joint.parent, []).append(joint)
+        return children
+
+    def root_links(self) -> List[str]:
+        """Links that are not the child of any joint."""
+        child_links = {joint.child for joint in self.joints.values()}
+        return [name for name in self.links if name not in child_links]
+
+    def root_link(self) -> Optional[str]:
+        roots = self.root_links()
+        return roots[0] if roots else None
+
+    def ordered_joints(self) -> List[UrdfJoint]:
+        """Joints reachable from the root link, parents before children."""
+        root = self.root_link()
+        if root is None:
+            return []
+
+        children = self.child_joints()
+        ordered: List[UrdfJoint] = []
+        visited = {root}
+        queue = deque([root])
+        while queue:
+            link = queue.popleft()
+            for joint in children.get(link, []):
+                if joint.child in visited:
+                    continue
+                visited.add(joint.child)
+                ordered.append(joint)
+                queue.append(joint.child)
+        return ordered
+
+    def movable_joints(self) -> List[UrdfJoint]:
+        """Movable joints in tree order."""
+        return [joint for joint in self.ordered_joints() if joint.movable]
+
+    def link_world_poses(self) -> Dict[str, Tuple[Vector3, Quaternion]]:
+        """Pose of every reachable link with all joints at zero."""
+        root = self.root_link()
+        if root is None:
+            return {}
+
+        poses = {root: (ZERO_VECTOR, IDENTITY_QUAT)}
+        for joint in self.ordered_joints():
+            parent_pos, parent_rot = poses[joint.parent]
+            poses[joint.child] = compose_pose(parent_pos, parent_rot, joint.origin.xyz, joint.origin.quaternion)
+        return poses
+
+
+def parse_urdf(source: Union[str, bytes], source_path: Optional[str] = None) -> UrdfModel:
+    """
+    Parse URDF text.
+
+    Args:
+        source: URDF document
+        source_path: Path the document was read from, used to resolve meshes
+
+    Returns:
+        Parsed model
+    """
+    if isinstance(source, str):
+        source = source.encode("utf-8")
+    return _parse_stream(io.BytesIO(source), source_path)
+
+
+def parse_urdf_file(urdf_path: str) -> UrdfModel:
+    """
+    Parse a URDF file without loading the whole tree into memory.
+
+    Args:
+        urdf_path: Path to URDF file
+
+    Returns:
+        Parsed model
+    """
+    with open(urdf_path, "rb") as f:
+        return _parse_stream(f, urdf_path)
+
+
+def _parse_stream(stream, source_path: Optional[str]) -> UrdfModel:
+    """Parse a URDF stream, releasing each link/joint element once consumed."""
+    model: Optional[UrdfModel] = None
+    depth = 0
+    root = None
+
+    try:
+        for event, element in ET.iterparse(stream, events=("start", "end")):
+            if event == "start":
+                if depth == 0:
+                    if element.tag != "robot":
+                        raise UrdfParseError(f"Root element must be <robot>, found <{element.tag}>")
+                    root = element
+                    model = UrdfModel(name=element.get("name", "robot"), source_path=source_path)
+                depth += 1
+                continue
+
+            depth -= 1
+            if depth != 1:
+                continue
+
+            # Direct child of <robot> is complete
+            if element.tag == "link":
+                link = _parse_link(element, model)
+                if link.name in model.links:
+                    model.duplicate_links.append(link.name)
+                model.links[link.name] = link
+            elif element.tag == "joint":
+                joint = _parse_joint(element)
+                if joint.name in model.joints:
+                    model.duplicate_joints.append(joint.name)
+                model.joints[joint.name] = joint
+            elif element.tag == "material":
+                material = _parse_material(element, model)
+                model.materials[material.name] = material
+            root.remove(element)
+
+    except ET.ParseError as e:
+        raise UrdfParseError(f"Malformed URDF XML: {e}") from e
+
+    if model is None:
+        raise UrdfParseError("Empty URDF document")
+
+    # Resolve material references declared after the visuals using them
+    for link in model.links.values():
+        for visual in link.visuals:
+            if visual.material and visual.material.color is None and visual.material.texture is None:
+                visual.material = model.materials.get(visual.material.name, visual.material)
+
+    return model
+
+
+def _parse_link(element: ET.Element, model: UrdfModel) -> UrdfLink:
+    link = UrdfLink(name=_required(element, "name"))
+
+    inertial = element.find("inertial")
+    if inertial is not None:
+        mass_element = inertial.find("mass")
+        inertia_element = inertial.find("inertia")
+        link.inertial = UrdfInertial(
+            mass=_float(mass_element, "value", 0.0) if mass_element is not None else 0.0,
+            origin=_parse_origin(inertial.find("origin")),
+            inertia=tuple(
+                _float(inertia_element, key, 0.0) if inertia_element is not None else 0.0
+                for key in ("ixx", "ixy", "ixz", "iyy", "iyz", "izz")
+            )
+        )
+
+    for visual in element.findall("visual"):
+        shape = _parse_shape(visual)
+        material = visual.find("material")
+        if material is not None:
+            shape.material = _parse_material(material, model)
+        if shape.geometry is not None:
+            link.visuals.append(shape)
+
+    for collision in element.findall("collision"):
+        shape = _parse_shape(collision)
+        if shape.geometry is not None:
+            link.collisions.append(shape)
+
+    return link
+
+
+def _parse_shape(element: ET.Element) -> UrdfShape:
+    return UrdfShape(
+        name=element.get("name"),
+        origin=_parse_origin(element.find("origin")),
+        geometry=_parse_geometry(element.find("geometry"))
+    )
+
+
+def _parse_geometry(element: Optional[ET.Element]) -> Optional[UrdfGeometry]:
+    if element is None:
+        return None
+
+    box = element.find("box")
+    if box is not None:
+        return UrdfGeometry(type="box", size=_vector(box.get("size"), ZERO_VECTOR))
+
+    cylinder = element.find("cylinder")
+    if cylinder is not None:
+        return UrdfGeometry(type="cylinder", radius=_float(cylinder, "radius", 0.0),
+                            length=_float(cylinder, "length", 0.0))
+
+    sphere = element.find("sphere")
+    if sphere is not None:
+        return UrdfGeometry(type="sphere", radius=_float(sphere, "radius", 0.0))
+
+    mesh = element.find("mesh")
+    if mesh is not None:
+        return UrdfGeometry(type="mesh", filename=mesh.get("filename"),
+                            scale=_vector(mesh.get("scale"), (1.0, 1.0, 1.0)))
+
+    return None
+
+
+def _parse_material(element: ET.Element, model: UrdfModel) -> UrdfMaterial:
+    name = element.get("name", "")
+    color_element = element.find("color")
+    texture_element = element.find("texture")
+
+    if color_element is None and texture_element is None and name in model.materials:
+        # Reference to a global material
+        return model.materials[name]
+
+    color = None
+    if color_element is not None:
+        values = _floats(color_element.get("rgba"), 4)
+        color = tuple(values) if values else None
+
+    return UrdfMaterial(
+        name=name,
+        color=color,
+        texture=texture_element.get("filename") if texture_element is not None else None
+    )
+
+
+def _parse_joint(element: ET.Element) -> UrdfJoint:
+    parent = element.find("parent")
+    child = element.find("child")
+
+    joint = UrdfJoint(
+        name=_required(element, "name"),
+        type=element.get("type", ""),
+        parent=parent.get("link") if parent is not None else None,
+        child=child.get("link") if child is not None else None,
+        origin=_parse_origin(element.find("origin")),
+    )
+
+    axis = element.find("axis")
+    if axis is not None:
+        joint.axis = _vector(axis.get("xyz"), (1.0, 0.0, 0.0))
+
+    limit = element.find("limit")
+    if limit is not None:
+        joint.limit = UrdfLimit(
+            lower=_float(limit, "lower", None),
+            upper=_float(limit, "upper", None),
+            effort=_float(limit, "effort", None),
+            velocity=_float(limit, "velocity", None)
+        )
+
+    mimic = element.find("mimic")
+    if mimic is not None:
+        joint.mimic = UrdfMimic(
+            joint=_required(mimic, "joint"),
+            multiplier=_float(mimic, "multiplier", 1.0),
+            offset=_float(mimic, "offset", 0.0)
+        )
+
+    dynamics = element.find("dynamics")
+    if dynamics is not None:
+        joint.damping = _float(dynamics, "damping", 0.0)
+        joint.friction = _float(dynamics, "friction", 0.0)
+
+    return joint
+
+
+def _parse_origin(element: Optional[ET.Element]) -> UrdfOrigin:
+    if element is None:
+        return UrdfOrigin()
+    return UrdfOrigin(
+        xyz=_vector(element.get("xyz"), ZERO_VECTOR),
+        rpy=_vector(element.get("rpy"), ZERO_VECTOR)
+    )
+
+
+def _required(element: ET.Element, attribute: str) -> str:
+    value = element.get(attribute)
+    if not value:
+        raise UrdfParseError(f"<{element.tag}> is missing the '{attribute}' attribute")
+    return value
+
+
+def _float(element: ET.Element, attribute: str, default: Optional[float]) -> Optional[float]:
+    value = element.get(attribute)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise UrdfParseError(f"<{element.tag} {attribute}=\"{value}\"> is not a number")
+
+
+def _floats(text: Optional[str], count: int) -> Optional[List[float]]:
+    if text is None:
+        return None
+    try:
+        values = [float(v) for v in text.split()]
+    except ValueError:
+        raise UrdfParseError(f"'{text}' is not a list of numbers")
+    if len(values) != count:
+        raise UrdfParseError(f"'{text}' must contain {count} numbers")
+    return values
+
+
+def _vector(text: Optional[str], default: Vector3) -> Vector3:
+    values = _floats(text, 3)
+    return tuple(values) if values else default
+
+
+def resolve_mesh_path(filename: str, base_dir: Optional[str],
+                      package_dirs: Iterable[str] = (), root: Optional[str] = None) -> Optional[str]:
+    """
+    Resolve a URDF mesh reference to a local file.
+
+    Handles ``package://<pkg>/<path>``, ``file://`` and relative paths. Package
+    URIs are looked up in the given package directories and then relative to
+    the URDF directory and its ancestors.
+
+    Meshes only resolve inside ``root`` (the URDF directory by default, or
+    the enclosing ``<pkg>`` directory for package URIs) or a package
+    directory, after following symbolic links, so a URDF cannot probe for
+    other files on the host.
+
+    Args:
+        filename: Mesh reference from the URDF
+        base_dir: Directory of the URDF file
+        package_dirs: Directories containing ROS packages
+        root: Directory tree the URDF's own files live in, e.g. an
+            uploaded bundle; defaults to base_dir
+
+    Returns:
+        Existing local path, or None if the mesh cannot be found
+    """
+    if not filename:
+        return None
+
+    top = os.path.realpath(root) if root else None
+    allowed = [os.path.realpath(d) for d in package_dirs]
+    if top or base_dir:
+        allowed.append(top or os.path.realpath(base_dir))
+
+    candidates: List[str] = []
+    if filename.startswith("file://"):
+        candidates.append(filename[len("file://"):])
+    elif filename.startswith("package://"):
+        package, _, relative = filename[len("package://"):].partition("/")
+        for package_dir in package_dirs:
+            candidates.append(os.path.join(package_dir, package, relative))
+        if base_dir:
+            directory = base_dir
+            while True:
+                candidates.append(os.path.join(directory, relative))
+                if os.path.basename(directory) == package:
+                    if root is None:
+                        # The URDF sits inside its package: the whole package is its own
+                        allowed.append(os.path.realpath(directory))
+                    break
+                parent = os.path.dirname(directory)
+                if parent == directory or os.path.realpath(directory) == top:
+                    break
+                directory = parent
+            candidates.append(os.path.join(base_dir, package, relative))
+    elif os.path.isabs(filename):
+        candidates.append(filename)
+    elif base_dir:
+        candidates.append(os.path.join(base_dir, filename))
+
+    for candidate in candidates:
+        resolved = os.path.realpath(candidate)
+        if any(resolved.startswith(directory.rstrip(os.sep) + os.sep) for directory in allowed) \
+                and os.path.isfile(resolved):
+            return os.path.normpath(candidate)
+    return None
+
+
+def rpy_to_quat(rpy: Vector3) -> Quaternion:
+    """Convert URDF roll/pitch/yaw (fixed XYZ) to a (w, x, y, z) quaternion."""
+    roll, pitch, yaw = rpy
+    cr, sr = math.cos(roll / 2), math.sin(roll / 2)
+    cp, sp = math.cos(pitch / 2), math.sin(pitch / 2)
+    cy, sy = math.cos(yaw / 2), math.sin(yaw / 2)
+    return (
+        cr * cp * cy + sr * sp * sy,
+        sr * cp * cy - cr * sp * sy,
+        cr * sp * cy + sr * cp * sy,
+        cr * cp * sy - sr * sp * cy,
+    )
+
+
+def quat_multiply(a: Quaternion, b: Quaternion) -> Quaternion:
+    aw, ax, ay, az = a
+    bw, bx, by, bz = b
+    return (
+        aw * bw - ax * bx - ay * by - az * bz,
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+    )
+
+
+def quat_rotate(q: Quaternion, v: Vector3) -> Vector3:
+    """Rotate a vector by a unit quaternion."""
+    w, x, y, z = q
+    vx, vy, vz = v
+    # t = 2 * cross(q.xyz, v)
+    tx = 2 * (y * vz - z * vy)
+    ty = 2 * (z * vx - x * vz)
+    tz = 2 * (x * vy - y * vx)
+    return (
+        vx + w * tx + (y * tz - z * ty),
+        vy + w * ty + (z * tx - x * tz),
+        vz + w * tz + (x * ty - y * tx),
+    )
+
+
+def quat_to_matrix(q: Quaternion) -> Tuple[Vector3, Vector3, Vector3]:
+    """Rotation matrix (row-major) of a unit quaternion."""
+    w, x, y, z = q
+    return (
+        (1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)),
+        (2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)),
+        (2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)),
+    )
+
+
+def matrix_to_quat(m) -> Quaternion:
+    """Unit quaternion of a row-major rotation matrix."""
+    trace = m[0][0] + m[1][1] + m[2][2]
+    if trace > 0:
+        s = math.sqrt(trace + 1.0) * 2
+        q = (0.25 * s, (m[2][1] - m[1][2]) / s, (m[0][2] - m[2][0]) / s, (m[1][0] - m[0][1]) / s)
+    elif m[0][0] > m[1][1] and m[0][0] > m[2][2]:
+        s = math.sqrt(1.0 + m[0][0] - m[1][1] - m[2][2]) * 2
+        q = ((m[2][1] - m[1][2]) / s, 0.25 * s, (m[0][1] + m[1][0]) / s, (m[0][2] + m[2][0]) / s)
+    elif m[1][1] > m[2][2]:
+        s = math.sqrt(1.0 + m[1][1] - m[0][0] - m[2][2]) * 2
+        q = ((m[0][2] - m[2][0]) / s, (m[0][1] + m[1][0]) / s, 0.25 * s, (m[1][2] + m[2][1]) / s)
+    else:
+        s = math.sqrt(1.0 + m[2][2] - m[0][0] - m[1][1]) * 2
+        q = ((m[1][0] - m[0][1]) / s, (m[0][2] + m[2][0]) / s, (m[1][2] + m[2][1]) / s, 0.25 * s)
+    norm = math.sqrt(sum(c * c for c in q))
+    return tuple(c / norm for c in q)
+
+
+def quat_from_two_vectors(a: Vector3, b: Vector3) -> Quaternion:
+    """Shortest-arc rotation taking unit vector a onto unit vector b."""
+    dot = a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+    if dot < -0.999999:
+        # Opposite vectors: rotate 180 degrees about any perpendicular axis
+        perpendicular = (0.0, 1.0, 0.0) if abs(a[0]) > 0.9 else (1.0, 0.0, 0.0)
+        axis = _normalize(_cross(a, perpendicular))
+        return (0.0, axis[0], axis[1], axis[2])
+    cross = _cross(a, b)
+    q = (1.0 + dot, cross[0], cross[1], cross[2])
+    norm = math.sqrt(sum(c * c for c in q))
+    return tuple(c / norm for c in q)
+
+
+def compose_pose(parent_pos: Vector3, parent_rot: Quaternion,
+                 local_pos: Vector3, local_rot: Quaternion) -> Tuple[Vector3, Quaternion]:
+    """Pose of a child frame given its parent pose and its pose in the parent."""
+    offset = quat_rotate(parent_rot, local_pos)
+    return (
+        (parent_pos[0] + offset[0], parent_pos[1] + offset[1], parent_pos[2] + offset[2]),
+        quat_multiply(parent_rot, local_rot),
+    )
+
+
+def _cross(a: Vector3, b: Vector3) -> Vector3:
+    return (a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0])
+
+
+def _normalize(v: Vector3) -> Vector3:
+    norm = math.sqrt(v[0] * v[0] + v[1] * v[1] + v[2] * v[2])
+    if norm == 0:
+        return v
+    return (v[0] / norm, v[1] / norm, v[2] / norm)
+
+
+def normalize(v: Vector3) -> Vector3:
+    """Unit vector in the direction of v (v itself if zero)."""
+    return _normalize(v)
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+URDF Preflight
+Millisecond structural checks that reject broken URDFs before any Isaac Sim
+or conversion work is spent on them.
+"""
+
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Any, Iterable, Tuple, Union
+
+from urdf_model import UrdfModel, UrdfParseError, parse_urdf, resolve_mesh_path
+from usda_writer import principal_inertia
+
+logger = logging.getLogger(__name__)
+
+KNOWN_JOINT_TYPES = ("revolute", "continuous", "prismatic", "fixed", "floating", "planar")
+
+# Bounds beyond which a value is almost certainly a unit or typing mistake
+MAX_REVOLUTE_RANGE_RAD = 4 * math.pi
+MAX_PRISMATIC_RANGE_M = 100.0
+MAX_EFFORT = 1e6
+MAX_VELOCITY = 1e3
+MAX_LINK_MASS_KG = 1e5
+
+CACHE_SIZE = 512
+
+
+class UrdfPreflightError(ValueError):
+    """Raised when a URDF fails preflight; carries the full report."""
+
+    def __init__(self, report: "PreflightReport"):
+        self.report = report
+        errors = report.errors
+        summary = "; ".join(issue.message for issue in errors[:3])
+        more = f" (+{len(errors) - 3} more)" if len(errors) > 3 else ""
+        super().__init__(f"URDF preflight failed: {summary}{more}")
+
+
+@dataclass
+class PreflightIssue:
+    """A single preflight finding."""
+    severity: str  # "error" or "warning"
+    code: str
+    message: str
+    element: Optional[str] = None
+
+
+@dataclass
+class PreflightReport:
+    """Result of a preflight run."""
+    digest: str
+    issues: List[PreflightIssue] = field(default_factory=list)
+    link_count: int = 0
+    joint_count: int = 0
+    elapsed_ms: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    @property
+    def errors(self) -> List[PreflightIssue]:
+        return [issue for issue in self.issues if issue.severity == "error"]
+
+    @property
+    def warnings(self) -> List[PreflightIssue]:
+        return [issue for issue in self.issues if issue.severity == "warning"]
+
+    def raise_for_errors(self):
+        """Raise UrdfPreflightError if the report contains errors."""
+        if not self.ok:
+            raise UrdfPreflightError(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "digest": self.digest,
+            "link_count": self.link_count,
+            "joint_count": self.joint_count,
+            "elapsed_ms": round(self.elapsed_ms, 3),
+            "errors": [asdict(issue) for issue in self.errors],
+            "warnings": [asdict(issue) for issue in self.warnings],
+        }
+
+
+_cache: "OrderedDict[Tuple, PreflightReport]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def preflight_urdf(content: Union[str, bytes], base_dir: Optional[str] = None,
+                   package_dirs: Iterable[str] = (), check_meshes: bool = True,
+                   digest: Optional[str] = None, root: Optional[str] = None) -> PreflightReport:
+    """
+    Check a URDF document.
+
+    Reports are cached by content hash (and mesh lookup location), so
+    resubmitting the same URDF costs one hash.
+
+    Args:
+        content: URDF document
+        base_dir: Directory relative mesh references are resolved against
+        package_dirs: Directories used to resolve package:// references
+        check_meshes: Whether referenced mesh files must exist; ignored
+            without a base directory
+        digest: SHA-256 of the content, if already known
+        root: Directory tree meshes may resolve into; defaults to base_dir
+
+    Returns:
+        Preflight report
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    digest = digest or hashlib.sha256(content).hexdigest()
+    package_dirs = tuple(package_dirs)
+    check_meshes = check_meshes and base_dir is not None
+    key = (digest, base_dir if check_meshes else None, package_dirs if check_meshes else (),
+           root if check_meshes else None, check_meshes)
+
+    with _cache_lock:
+        report = _cache.get(key)
+        if report is not None:
+            _cache.move_to_end(key)
+            return report
+
+    source_path = os.path.join(base_dir, "robot.urdf") if base_dir else None
+    report = _run_checks(content, digest, source_path, package_dirs, check_meshes, root)
+
+    with _cache_lock:
+        _cache[key] = report
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+    if not report.ok:
+        logger.info(f"URDF preflight rejected {digest[:12]}: {len(report.errors)} errors "
+                    f"in {report.elapsed_ms:.2f} ms")
+    return report
+
+
+def preflight_urdf_file(urdf_path: str, package_dirs: Iterable[str] = (),
+                        check_meshes: bool = True, root: Optional[str] = None) -> PreflightReport:
+    """
+    Check a URDF file, resolving meshes relative to its directory.
+
+    Args:
+        urdf_path: Path to URDF file
+        package_dirs: Directories used to resolve package:// references
+        check_meshes: Whether referenced mesh files must exist
+        root: Directory tree meshes may resolve into, e.g. the bundle the
+            file came from; defaults to the file's directory
+
+    Returns:
+        Preflight report
+    """
+    with open(urdf_path, "rb") as f:
+        content = f.read()
+    return preflight_urdf(content, os.path.dirname(os.path.abspath(urdf_path)), package_dirs, check_meshes,
+                          root=root)
+
+
+def _run_checks(content: bytes, digest: str, source_path: Optional[str],
+                package_dirs: Tuple[str, ...], check_meshes: bool,
+                root: Optional[str] = None) -> PreflightReport:
+    started = time.perf_counter()
+    report = PreflightReport(digest=digest)
+
+    def issue(severity: str, code: str, message: str, element: Optional[str] = None):
+        report.issues.append(PreflightIssue(severity, code, message, element))
+
+    try:
+        model = parse_urdf(content, source_path)
+    except UrdfParseError as e:
+        issue("error", "malformed", str(e))
+        report.elapsed_ms = (time.perf_counter() - started) * 1000
+        return report
+
+    report.link_count = len(model.links)
+    report.joint_count = len(model.joints)
+
+    _check_names(model, issue)
+    _check_graph(model, issue)
+    _check_joints(model, issue)
+    _check_links(model, issue, package_dirs, check_meshes, root)
+
+    report.elapsed_ms = (time.perf_counter() - started) * 1000
+    return report
+
+
+def _check_names(model: UrdfModel, issue):
+    if not model.links:
+        issue("error", "no_links", "URDF defines no links")
+    for name in sorted(set(model.duplicate_links)):
+        issue("error", "duplicate_link", f"Link '{name}' is defined more than once", name)
+    for name in sorted(set(model.duplicate_joints)):
+        issue("error", "duplicate_joint", f"Joint '{name}' is defined more than once", name)
+
+
+def _check_graph(model: UrdfModel, issue):
+    parents: Dict[str, List[str]] = {}
+    children: Dict[str, List[str]] = {}
+
+    for joint in model.joints.values():
+        if not joint.parent or joint.parent not in model.links:
+            issue("error", "dangling_parent",
+                  f"Joint '{joint.name}' parent link '{joint.parent}' does not exist", joint.name)
+            continue
+        if not joint.child or joint.child not in model.links:
+            issue("error", "dangling_child",
+                  f"Joint '{joint.name}' child link '{joint.child}' does not exist", joint.name)
+            continue
+        if joint.parent == joint.child:
+            issue("error", "self_joint", f"Joint '{joint.name}' connects link '{joint.parent}' to itself", joint.name)
+            continue
+        parents.setdefault(joint.child, []).append(joint.parent)
+        children.setdefault(joint.parent, []).append(joint.child)
+
+    for link, link_parents in parents.items():
+        if len(link_parents) > 1:
+            issue("error", "multiple_parents",
+                  f"Link '{link}' is the child of {len(link_parents)} joints", link)
+
+    if not model.links:
+        return
+
+    roots = [name for name in model.links if name not in parents]
+    if not roots:
+        issue("error", "cycle", "Joint graph has no root link (every link has a parent)")
+    elif len(roots) > 1:
+        issue("error", "multiple_roots",
+              f"Joint graph is disconnected: {len(roots)} root links ({', '.join(roots[:5])})")
+
+    # Iterative DFS; a back edge to a link on the current path is a cycle
+    state: Dict[str, int] = {}
+    for start in list(model.links):
+        if start in state:
+            continue
+        stack = [(start, iter(children.get(start, [])))]
+        state[start] = 1
+        while stack:
+            link, remaining = stack[-1]
+            child = next(remaining, None)
+            if child is None:
+                state[link] = 2
+                stack.pop()
+            elif state.get(child) == 1:
+                issue("error", "cycle", f"Joint graph contains a cycle through link '{child}'", child)
+                return
+            elif child not in state:
+                state[child] = 1
+                stack.append((child, iter(children.get(child, []))))
+
+
+def _check_joints(model: UrdfModel, issue):
+    for joint in model.joints.values():
+        name = joint.name
+        if joint.type not in KNOWN_JOINT_TYPES:
+            issue("error", "joint_type", f"Joint '{name}' has unknown type '{joint.type}'", name)
+            continue
+
+        if joint.type in ("revolute", "continuous", "prismatic", "planar"):
+            if not any(joint.axis) or not all(math.isfinite(v) for v in joint.axis):
+                issue("error", "joint_axis", f"Joint '{name}' has an invalid axis {joint.axis}", name)
+
+        if not all(math.isfinite(v) for v in joint.origin.xyz + joint.origin.rpy):
+            issue("error", "joint_origin", f"Joint '{name}' has a non-finite origin", name)
+
+        if joint.mimic is not None and joint.mimic.joint not in model.joints:
+            issue("error", "mimic_target", f"Joint '{name}' mimics unknown joint '{joint.mimic.joint}'", name)
+
+        limit = joint.limit
+        if joint.type in ("revolute", "prismatic"):
+            if limit is None:
+                issue("error", "missing_limit", f"{joint.type.capitalize()} joint '{name}' has no <limit>", name)
+                continue
+            if limit.lower is None or limit.upper is None:
+                issue("warning", "open_limit", f"Joint '{name}' limit is missing lower or upper", name)
+            elif not (math.isfinite(limit.lower) and math.isfinite(limit.upper)):
+                issue("error", "limit_range", f"Joint '{name}' has non-finite limits", name)
+            elif limit.lower > limit.upper:
+                issue("error", "limit_range",
+                      f"Joint '{name}' lower limit {limit.lower} exceeds upper limit {limit.upper}", name)
+            else:
+                span = limit.upper - limit.lower
+                bound = MAX_REVOLUTE_RANGE_RAD if joint.type == "revolute" else MAX_PRISMATIC_RANGE_M
+                if span > bound:
+                    unit = "rad" if joint.type == "revolute" else "m"
+                    issue("warning", "limit_range",
+                          f"Joint '{name}' range {span:g} {unit} is implausibly large (degrees instead of radians?)", name)
+
+        if limit is not None and joint.type != "fixed":
+            if limit.effort is not None:
+                if limit.effort <= 0:
+                    issue("warning", "effort", f"Joint '{name}' has non-positive effort limit {limit.effort}", name)
+                elif limit.effort > MAX_EFFORT:
+                    issue("warning", "effort", f"Joint '{name}' effort limit {limit.effort:g} is implausibly large", name)
+            if limit.velocity is not None:
+                if limit.velocity <= 0:
+                    issue("warning", "velocity", f"Joint '{name}' has non-positive velocity limit {limit.velocity}", name)
+                elif limit.velocity > MAX_VELOCITY:
+                    issue("warning", "velocity", f"Joint '{name}' velocity limit {limit.velocity:g} is implausibly large", name)
+
+
+def _check_links(model: UrdfModel, issue, package_dirs: Tuple[str, ...], check_meshes: bool,
+                 root: Optional[str] = None):
+    missing_checked: Dict[str, bool] = {}
+
+    for link in model.links.values():
+        name = link.name
+        inertial = link.inertial
+        if inertial is not None:
+            mass = inertial.mass
+            if not math.isfinite(mass) or mass < 0:
+                issue("error", "mass", f"Link '{name}' has invalid mass {mass}", name)
+            elif mass == 0:
+                issue("warning", "mass", f"Link '{name}' has zero mass", name)
+            elif mass > MAX_LINK_MASS_KG:
+                issue("warning", "mass", f"Link '{name}' mass {mass:g} kg is implausibly large", name)
+
+            if not all(math.isfinite(v) for v in inertial.inertia):
+                issue("error", "inertia", f"Link '{name}' has a non-finite inertia tensor", name)
+            elif mass > 0:
+                moments, _ = principal_inertia(inertial.inertia, (1.0, 0.0, 0.0, 0.0))
+                if min(moments) < -1e-12:
+                    issue("error", "inertia", f"Link '{name}' inertia is not positive semi-definite", name)
+                elif min(moments) <= 0:
+                    issue("warning", "inertia", f"Link '{name}' has a zero principal inertia", name)
+                else:
+                    a, b, c = sorted(moments)
+                    if a + b < c * (1 - 1e-6):
+                        issue("warning", "inertia",
+                              f"Link '{name}' inertia violates the triangle inequality", name)
+
+        for kind, shapes in (("visual", link.visuals), ("collision", link.collisions)):
+            for shape in shapes:
+                geometry = shape.geometry
+                if not all(math.isfinite(v) for v in shape.origin.xyz + shape.origin.rpy):
+                    issue("error", "geometry_origin", f"Link '{name}' {kind} has a non-finite origin", name)
+
+                # NaN compares false against everything, so check finiteness before sign
+                if geometry.type == "box" and not all(math.isfinite(v) and v > 0 for v in geometry.size):
+                    issue("error", "geometry", f"Link '{name}' {kind} box has invalid size {geometry.size}", name)
+                elif geometry.type == "cylinder" and not all(
+                        math.isfinite(v) and v > 0 for v in (geometry.radius, geometry.length)):
+                    issue("error", "geometry", f"Link '{name}' {kind} cylinder has invalid dimensions", name)
+                elif geometry.type == "sphere" and not (math.isfinite(geometry.radius) and geometry.radius > 0):
+                    issue("error", "geometry", f"Link '{name}' {kind} sphere has invalid radius {geometry.radius}", name)
+                elif geometry.type == "mesh":
+                    if not geometry.filename:
+                        issue("error", "mesh_filename", f"Link '{name}' {kind} mesh has no filename", name)
+                        continue
+                    if not all(math.isfinite(s) and s != 0 for s in geometry.scale):
+                        issue("error", "mesh_scale", f"Link '{name}' {kind} mesh has invalid scale {geometry.scale}", name)
+                    if check_meshes:
+                        found = missing_checked.get(geometry.filename)
+                        if found is None:
+                            found = resolve_mesh_path(geometry.filename, model.base_dir, package_dirs, root) is not None
+                            missing_checked[geometry.filename] = found
+                        if not found:
+                            issue("error", "missing_mesh",
+                                  f"Link '{name}' {kind} mesh not found: {geometry.filename}", name)
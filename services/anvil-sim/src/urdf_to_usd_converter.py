@@ -12,6 +12,11 @@ from typing import Optional, Dict, Any, List
 import tempfile
 import shutil
 
+from robot_summary import build_robot_summary, write_robot_summary, load_robot_summary
+from urdf_model import UrdfModel, parse_urdf_file, UrdfParseError
+from urdf_preflight import preflight_urdf_file
+from usda_writer import write_usda
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -32,7 +37,7 @@ class UrdfToUsdConverter:
         if isaac_sim_available:
             self._setup_isaac_sim_imports()
         else:
-            logger.warning("Isaac Sim not available - using mock conversion")
+            logger.warning("Isaac Sim not available - using pure-Python USDA conversion")
     
     def _setup_isaac_sim_imports(self):
         """Setup Isaac Sim imports when available."""
@@ -74,13 +79,19 @@ class UrdfToUsdConverter:
         if not os.path.exists(urdf_path):
             raise FileNotFoundError(f"URDF file not found: {urdf_path}")
         
+        # Reject broken URDFs before spending importer time on them
+        preflight = preflight_urdf_file(urdf_path, (config or {}).get("package_dirs", ()))
+        for issue in preflight.warnings:
+            logger.warning(f"URDF preflight: {issue.message}")
+        preflight.raise_for_errors()
+        
         # Create output directory if it doesn't exist
         os.makedirs(os.path.dirname(output_usd_path), exist_ok=True)
         
         if self.isaac_sim_available:
             return self._convert_with_isaac_sim(urdf_path, output_usd_path, robot_name, config)
         else:
-            return self._convert_mock(urdf_path, output_usd_path, robot_name, config)
+            return self._convert_pure_python(urdf_path, output_usd_path, robot_name, config)
     
     def _convert_with_isaac_sim(self, urdf_path: str, output_usd_path: str, 
                                robot_name: str, config: Optional[Dict[str, Any]]) -> str:
@@ -131,6 +142,11 @@ class UrdfToUsdConverter:
                 # Save the stage
                 stage.Save()
                 
+                try:
+                    self._write_summary(parse_urdf_file(urdf_path), output_usd_path, config)
+                except UrdfParseError as e:
+                    logger.warning(f"Robot summary not written: {e}")
+                
                 return output_usd_path
             else:
                 raise RuntimeError(f"URDF import failed: {import_path}")
@@ -139,63 +155,31 @@ class UrdfToUsdConverter:
             logger.error(f"Isaac Sim URDF conversion failed: {e}")
             raise
     
-    def _convert_mock(self, urdf_path: str, output_usd_path: str, 
-                     robot_name: str, config: Optional[Dict[str, Any]]) -> str:
-        """Create a mock USD file when Isaac Sim is not available."""
-        logger.info("Creating mock USD file (Isaac Sim not available)")
-        
-        # Create a simple USD file with basic robot structure
-        usd_content = f'''#usda 1.0
-(
-    defaultPrim = "{robot_name}"
-    doc = "Mock USD file for {robot_name} (Isaac Sim not available)"
-    upAxis = "Z"
-)
+    def _convert_pure_python(self, urdf_path: str, output_usd_path: str,
+                             robot_name: str, config: Optional[Dict[str, Any]]) -> str:
+        """Convert by writing USDA directly from the parsed URDF (no Isaac Sim needed)."""
+        logger.info("Converting with the pure-Python USDA writer (Isaac Sim not available)")
 
-def Xform "{robot_name}" (
-    prepend apiSchemas = ["PhysicsRigidBodyAPI", "PhysxRigidBodyAPI"]
-)
-{{
-    def Xform "base_link" (
-        prepend apiSchemas = ["PhysicsRigidBodyAPI", "PhysxRigidBodyAPI"]
-    )
-    {{
-        def Cylinder "base_geometry" (
-            prepend apiSchemas = ["PhysicsCollisionAPI", "PhysxCollisionAPI"]
-        )
-        {{
-            double3 xformOp:translate = (0, 0, 0.1)
-            uniform token[] xformOpOrder = ["xformOp:translate"]
-            double radius = 0.1
-            double height = 0.2
-        }}
-    }}
-    
-    def Xform "joint_1" (
-        prepend apiSchemas = ["PhysicsRevoluteJointAPI", "PhysxRevoluteJointAPI"]
-    )
-    {{
-        double3 xformOp:translate = (0, 0, 0.2)
-        uniform token[] xformOpOrder = ["xformOp:translate"]
-    }}
-    
-    def Xform "joint_2" (
-        prepend apiSchemas = ["PhysicsRevoluteJointAPI", "PhysxRevoluteJointAPI"]
-    )
-    {{
-        double3 xformOp:translate = (0, 0, 0.4)
-        uniform token[] xformOpOrder = ["xformOp:translate"]
-    }}
-}}
-'''
-        
-        # Write the mock USD file
-        with open(output_usd_path, 'w') as f:
-            f.write(usd_content)
-        
-        logger.info(f"Mock USD file created: {output_usd_path}")
+        try:
+            model = parse_urdf_file(urdf_path)
+        except UrdfParseError as e:
+            logger.error(f"URDF parsing failed: {e}")
+            raise
+
+        write_usda(model, output_usd_path, robot_name, config)
+        self._write_summary(model, output_usd_path, config)
+
+        logger.info(f"USD file created: {output_usd_path} "
+                    f"({len(model.links)} links, {len(model.joints)} joints)")
         return output_usd_path
     
+    def _write_summary(self, model: UrdfModel, output_usd_path: str, config: Optional[Dict[str, Any]]):
+        """Write the robot structure summary next to the USD file."""
+        package_dirs = (config or {}).get("package_dirs", [])
+        summary = build_robot_summary(model, package_dirs)
+        summary_path = write_robot_summary(output_usd_path, summary)
+        logger.info(f"Robot summary written: {summary_path}")
+    
     def _add_robot_metadata(self, stage, robot_name: str, urdf_path: str):
         """Add metadata to the USD stage."""
         try:
@@ -279,6 +263,22 @@ def Xform "{robot_name}" (
                 info["file_size"] = os.path.getsize(usd_path)
                 info["created"] = os.path.getctime(usd_path)
             
+            summary = load_robot_summary(usd_path)
+            if summary is not None:
+                # Answer from the conversion-time summary without opening the stage
+                info.update({
+                    "name": summary["name"],
+                    "joints": summary["movable_joints"],
+                    "links": [link["name"] for link in summary["links"]],
+                    "materials": summary["materials"],
+                    "dof": summary["dof"],
+                    "total_mass": summary["total_mass"],
+                    "triangle_count": summary["triangle_count"],
+                    "bounding_box": summary["bounding_box"],
+                    "summary": summary
+                })
+                return info
+            
             if self.isaac_sim_available:
                 stage = self.Usd.Stage.Open(usd_path)
                 if stage:
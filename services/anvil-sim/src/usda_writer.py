@@ -0,0 +1,583 @@
+#!/usr/bin/env python3
+"""
+USDA Writer
+Writes a parsed URDF model as a USD ASCII layer using UsdPhysics schemas,
+without requiring Isaac Sim or the pxr modules.
+"""
+
+import logging
+import math
+import os
+import re
+from typing import Dict, List, Optional, Any, Tuple, TextIO
+
+from mesh_stats import MeshFaces, read_mesh_faces
+from urdf_model import (
+    UrdfModel, UrdfJoint, UrdfLink, UrdfShape, UrdfMaterial, Vector3, Quaternion,
+    IDENTITY_QUAT, quat_multiply, matrix_to_quat, quat_from_two_vectors,
+    normalize, resolve_mesh_path
+)
+
+logger = logging.getLogger(__name__)
+
+# Mesh formats USD can reference directly; other formats are written as Mesh prims
+USD_MESH_EXTENSIONS = (".usd", ".usda", ".usdc")
+
+DEFAULT_CONVERSION_CONFIG = {
+    "fix_base": True,
+    "import_inertia_tensor": True,
+    "self_collision": False,
+    "default_drive_type": "position",
+    "default_drive_strength": 1e7,
+    "default_position_damping": 1e5,
+    "package_dirs": [],
+}
+
+_AXIS_TOKENS = {
+    (1.0, 0.0, 0.0): "X",
+    (0.0, 1.0, 0.0): "Y",
+    (0.0, 0.0, 1.0): "Z",
+}
+
+
+def write_usda(model: UrdfModel, output_path: str, robot_name: str = "robot",
+               config: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Write a URDF model to a USDA file.
+
+    The file is streamed prim by prim and moved into place once complete.
+
+    Args:
+        model: Parsed URDF model
+        output_path: Path of the USD file to write
+        robot_name: Name of the robot's root prim
+        config: Conversion options (see DEFAULT_CONVERSION_CONFIG)
+
+    Returns:
+        Path to the written USD file
+    """
+    options = dict(DEFAULT_CONVERSION_CONFIG)
+    if config:
+        options.update(config)
+
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            UsdaWriter(f, model, robot_name, options).write()
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return output_path
+
+
+class UsdaWriter:
+    """Streams the USDA text for one robot."""
+
+    def __init__(self, stream: TextIO, model: UrdfModel, robot_name: str, options: Dict[str, Any]):
+        self.stream = stream
+        self.model = model
+        self.options = options
+        self.root_name = sanitize_prim_name(robot_name)
+        self.root_path = f"/{self.root_name}"
+
+        self._link_names = _unique_prim_names(model.links.keys())
+        self._joint_names = _unique_prim_names(model.joints.keys())
+        self._material_names: Dict[int, str] = {}
+        self._materials: List[UrdfMaterial] = []
+        self._faces: Dict[str, Optional[MeshFaces]] = {}
+        self._poses = model.link_world_poses()
+        self._indent = 0
+        self._at_block_start = False
+
+    def write(self):
+        model = self.model
+        self._collect_materials()
+
+        self._line("#usda 1.0")
+        self._line("(")
+        self._line(f'    defaultPrim = "{self.root_name}"')
+        self._line(f'    doc = "Generated from {_escape(os.path.basename(model.source_path or model.name))} by sepulki_urdf_to_usd"')
+        self._line("    metersPerUnit = 1")
+        self._line('    upAxis = "Z"')
+        self._line(")")
+        self._line("")
+
+        self._open(f'def Xform "{self.root_name}"', [
+            'prepend apiSchemas = ["PhysicsArticulationRootAPI"]',
+            "customData = {",
+            f'    string urdf_name = "{_escape(model.name)}"',
+            f'    string converter = "sepulki_urdf_to_usd"',
+            "}",
+            'kind = "component"',
+        ])
+        self._line(f"bool physxArticulation:enabledSelfCollisions = {_bool(self.options['self_collision'])}")
+
+        for link in model.links.values():
+            self._write_link(link)
+
+        self._open('def Scope "joints"')
+        if self.options["fix_base"] and model.root_link():
+            self._write_root_joint(model.root_link())
+        for joint in model.joints.values():
+            self._write_joint(joint)
+        self._close()
+
+        if self._materials:
+            self._open('def Scope "Looks"')
+            for material in self._materials:
+                self._write_material(material)
+            self._close()
+
+        self._close()
+
+    # Links
+
+    def _write_link(self, link: UrdfLink):
+        prim_name = self._link_names[link.name]
+        position, rotation = self._poses.get(link.name, ((0.0, 0.0, 0.0), IDENTITY_QUAT))
+        inertial = link.inertial
+
+        schemas = ["PhysicsRigidBodyAPI"]
+        if inertial is not None:
+            schemas.append("PhysicsMassAPI")
+
+        self._open(f'def Xform "{prim_name}"', [
+            f"prepend apiSchemas = [{', '.join(_quote(s) for s in schemas)}]",
+            "customData = {",
+            f'    string urdf_link = "{_escape(link.name)}"',
+            "}",
+        ])
+
+        if inertial is not None:
+            self._line(f"float physics:mass = {_num(inertial.mass)}")
+            self._line(f"point3f physics:centerOfMass = {_vec(inertial.origin.xyz)}")
+            if self.options["import_inertia_tensor"]:
+                diagonal, axes = principal_inertia(inertial.inertia, inertial.origin.quaternion)
+                self._line(f"float3 physics:diagonalInertia = {_vec(diagonal)}")
+                self._line(f"quatf physics:principalAxes = {_quat(axes)}")
+
+        self._write_xform_ops(position, rotation)
+
+        if link.visuals:
+            self._open('def Xform "visuals"')
+            for index, visual in enumerate(link.visuals):
+                self._write_shape(visual, f"visual_{index}", collision=False)
+            self._close()
+
+        if link.collisions:
+            self._open('def Xform "collisions"')
+            self._line('uniform token purpose = "guide"')
+            for index, collision in enumerate(link.collisions):
+                self._write_shape(collision, f"collision_{index}", collision=True)
+            self._close()
+
+        self._close()
+
+    def _write_shape(self, shape: UrdfShape, prim_name: str, collision: bool):
+        geometry = shape.geometry
+        prim_type = {"box": "Cube", "cylinder": "Cylinder", "sphere": "Sphere"}.get(geometry.type, "Xform")
+
+        metadata = []
+        mesh_path = None
+        faces = None
+        if geometry.type == "mesh":
+            mesh_path = resolve_mesh_path(geometry.filename, self.model.base_dir, self.options["package_dirs"])
+            if mesh_path is None:
+                logger.warning(f"Mesh not found for {prim_name}: {geometry.filename}")
+            elif mesh_path.lower().endswith(USD_MESH_EXTENSIONS):
+                # The referenced asset's default prim supplies the geometry and its type
+                prim_type = None
+                metadata.append(f"prepend references = @{_asset(mesh_path)}@")
+            else:
+                faces = self._mesh_faces(mesh_path)
+                if faces is not None:
+                    prim_type = "Mesh"
+                else:
+                    logger.warning(f"Mesh has no readable faces for {prim_name}: {geometry.filename}")
+
+        # Only geometry gets collision schemas; an unresolved mesh stays an empty Xform
+        schemas = []
+        if collision and prim_type != "Xform":
+            schemas.append("PhysicsCollisionAPI")
+            if geometry.type == "mesh":
+                schemas.append("PhysicsMeshCollisionAPI")
+        material_path = None
+        if not collision and shape.material is not None and id(shape.material) in self._material_names:
+            schemas.append("MaterialBindingAPI")
+            material_path = f"{self.root_path}/Looks/{self._material_names[id(shape.material)]}"
+        if schemas:
+            metadata.insert(0, f"prepend apiSchemas = [{', '.join(_quote(s) for s in schemas)}]")
+
+        header = f'def {prim_type} "{prim_name}"' if prim_type else f'def "{prim_name}"'
+        self._open(header, metadata or None)
+
+        scale = None
+        if geometry.type == "box":
+            self._line("double size = 1")
+            scale = geometry.size
+        elif geometry.type == "cylinder":
+            self._line(f"double radius = {_num(geometry.radius)}")
+            self._line(f"double height = {_num(geometry.length)}")
+            self._line('uniform token axis = "Z"')
+        elif geometry.type == "sphere":
+            self._line(f"double radius = {_num(geometry.radius)}")
+        elif geometry.type == "mesh":
+            self._line(f'custom string sepulki:meshUri = "{_escape(geometry.filename or "")}"')
+            if mesh_path is not None:
+                self._line(f"custom asset sepulki:meshSource = @{_asset(mesh_path)}@")
+            if faces is not None:
+                self._write_mesh_faces(faces)
+            if collision and prim_type != "Xform":
+                self._line('uniform token physics:approximation = "convexHull"')
+            scale = geometry.scale
+
+        if not collision and shape.material is not None and shape.material.color is not None:
+            self._line(f"color3f[] primvars:displayColor = [{_vec(shape.material.color[:3])}]")
+            if shape.material.color[3] < 1.0:
+                self._line(f"float[] primvars:displayOpacity = [{_num(shape.material.color[3])}]")
+
+        if material_path is not None:
+            self._line(f"rel material:binding = <{material_path}>")
+
+        self._write_xform_ops(shape.origin.xyz, shape.origin.quaternion, scale)
+        self._close()
+
+    def _mesh_faces(self, path: str) -> Optional[MeshFaces]:
+        """Faces of a mesh file, read once per file for visuals and collisions alike."""
+        if path not in self._faces:
+            self._faces[path] = read_mesh_faces(path)
+        return self._faces[path]
+
+    def _write_mesh_faces(self, faces: MeshFaces):
+        points = ", ".join(f"({x:.9g}, {y:.9g}, {z:.9g})" for x, y, z in faces.points.tolist())
+        self._line(f"point3f[] points = [{points}]")
+        self._line(f"int[] faceVertexCounts = [{', '.join(map(str, faces.face_vertex_counts.tolist()))}]")
+        self._line(f"int[] faceVertexIndices = [{', '.join(map(str, faces.face_vertex_indices.tolist()))}]")
+        lower, upper = faces.points.min(axis=0), faces.points.max(axis=0)
+        self._line(f"float3[] extent = [{_vec(lower.tolist())}, {_vec(upper.tolist())}]")
+        self._line('uniform token subdivisionScheme = "none"')
+
+    # Joints
+
+    def _write_root_joint(self, root_link: str):
+        self._open('def PhysicsFixedJoint "root_joint"')
+        self._line(f"rel physics:body1 = <{self.root_path}/{self._link_names[root_link]}>")
+        self._line("point3f physics:localPos0 = (0, 0, 0)")
+        self._line("quatf physics:localRot0 = (1, 0, 0, 0)")
+        self._line("point3f physics:localPos1 = (0, 0, 0)")
+        self._line("quatf physics:localRot1 = (1, 0, 0, 0)")
+        self._close()
+
+    def _write_joint(self, joint: UrdfJoint):
+        prim_name = self._joint_names[joint.name]
+        if joint.parent not in self._link_names or joint.child not in self._link_names:
+            logger.warning(f"Skipping joint {joint.name}: unknown parent or child link")
+            return
+
+        prim_type, drive = {
+            "revolute": ("PhysicsRevoluteJoint", "angular"),
+            "continuous": ("PhysicsRevoluteJoint", "angular"),
+            "prismatic": ("PhysicsPrismaticJoint", "linear"),
+            "fixed": ("PhysicsFixedJoint", None),
+        }.get(joint.type, ("PhysicsJoint", None))
+
+        schemas = []
+        if drive:
+            schemas.extend([f"PhysicsDriveAPI:{drive}", "PhysxJointAPI"])
+
+        metadata = [
+            "customData = {",
+            f'    string urdf_joint = "{_escape(joint.name)}"',
+            f'    string urdf_type = "{_escape(joint.type)}"',
+            "}",
+        ]
+        if schemas:
+            metadata.insert(0, f"prepend apiSchemas = [{', '.join(_quote(s) for s in schemas)}]")
+
+        self._open(f'def {prim_type} "{prim_name}"', metadata)
+        self._line(f"rel physics:body0 = <{self.root_path}/{self._link_names[joint.parent]}>")
+        self._line(f"rel physics:body1 = <{self.root_path}/{self._link_names[joint.child]}>")
+
+        # The joint frame sits at the joint origin in the parent and at the child's origin
+        axis_token, align = joint_axis_alignment(joint.axis)
+        self._line(f"point3f physics:localPos0 = {_vec(joint.origin.xyz)}")
+        self._line(f"quatf physics:localRot0 = {_quat(quat_multiply(joint.origin.quaternion, align))}")
+        self._line("point3f physics:localPos1 = (0, 0, 0)")
+        self._line(f"quatf physics:localRot1 = {_quat(align)}")
+
+        if drive:
+            self._line(f'uniform token physics:axis = "{axis_token}"')
+            self._write_joint_limits(joint, drive)
+            self._write_drive(joint, drive)
+
+        if joint.mimic is not None:
+            mimic = joint.mimic
+            self._line(f'custom string sepulki:mimicJoint = "{_escape(mimic.joint)}"')
+            self._line(f"custom double sepulki:mimicMultiplier = {_num(mimic.multiplier)}")
+            self._line(f"custom double sepulki:mimicOffset = {_num(mimic.offset)}")
+
+        self._close()
+
+    def _write_joint_limits(self, joint: UrdfJoint, drive: str):
+        limit = joint.limit
+        angular = drive == "angular"
+        if limit is None:
+            return
+
+        if joint.type != "continuous" and limit.lower is not None and limit.upper is not None:
+            lower, upper = limit.lower, limit.upper
+            if angular:
+                lower, upper = math.degrees(lower), math.degrees(upper)
+            self._line(f"float physics:lowerLimit = {_num(lower)}")
+            self._line(f"float physics:upperLimit = {_num(upper)}")
+
+        if limit.velocity:
+            velocity = math.degrees(limit.velocity) if angular else limit.velocity
+            self._line(f"float physxJoint:maxJointVelocity = {_num(velocity)}")
+
+    def _write_drive(self, joint: UrdfJoint, drive: str):
+        if joint.mimic is not None:
+            return
+
+        stiffness = self.options["default_drive_strength"]
+        damping = max(self.options["default_position_damping"], joint.damping)
+        if self.options["default_drive_type"] == "velocity":
+            stiffness = 0.0
+
+        prefix = f"drive:{drive}:physics"
+        self._line(f'uniform token {prefix}:type = "force"')
+        self._line(f"float {prefix}:stiffness = {_num(stiffness)}")
+        self._line(f"float {prefix}:damping = {_num(damping)}")
+        if joint.limit is not None and joint.limit.effort:
+            self._line(f"float {prefix}:maxForce = {_num(joint.limit.effort)}")
+        self._line(f"float {prefix}:targetPosition = 0")
+
+    # Materials
+
+    def _collect_materials(self):
+        """Give every distinct visual material a prim name under Looks."""
+        used = set()
+        for link in self.model.links.values():
+            for visual in link.visuals:
+                material = visual.material
+                if material is None or id(material) in self._material_names:
+                    continue
+                if material.color is None and material.texture is None:
+                    continue
+                base = sanitize_prim_name(material.name or "material")
+                name, suffix = base, 1
+                while name in used:
+                    name, suffix = f"{base}_{suffix}", suffix + 1
+                used.add(name)
+                self._material_names[id(material)] = name
+                self._materials.append(material)
+
+    def _write_material(self, material: UrdfMaterial):
+        name = self._material_names[id(material)]
+        path = f"{self.root_path}/Looks/{name}"
+        color = material.color or (0.8, 0.8, 0.8, 1.0)
+
+        texture_path = None
+        if material.texture:
+            texture_path = resolve_mesh_path(material.texture, self.model.base_dir, self.options["package_dirs"])
+            if texture_path is None:
+                logger.warning(f"Texture not found for material {material.name}: {material.texture}")
+
+        self._open(f'def Material "{name}"')
+        self._line(f"token outputs:surface.connect = <{path}/PreviewSurface.outputs:surface>")
+
+        self._open('def Shader "PreviewSurface"')
+        self._line('uniform token info:id = "UsdPreviewSurface"')
+        if texture_path is not None:
+            self._line(f"color3f inputs:diffuseColor.connect = <{path}/DiffuseTexture.outputs:rgb>")
+        else:
+            self._line(f"color3f inputs:diffuseColor = {_vec(color[:3])}")
+        self._line(f"float inputs:opacity = {_num(color[3])}")
+        self._line("token outputs:surface")
+        self._close()
+
+        if texture_path is not None:
+            self._open('def Shader "DiffuseTexture"')
+            self._line('uniform token info:id = "UsdUVTexture"')
+            self._line(f"asset inputs:file = @{_asset(texture_path)}@")
+            self._line("float3 outputs:rgb")
+            self._close()
+
+        self._close()
+
+    # Output helpers
+
+    def _write_xform_ops(self, position: Vector3, rotation: Quaternion, scale: Optional[Vector3] = None):
+        ops = []
+        if any(position):
+            self._line(f"double3 xformOp:translate = {_vec(position)}")
+            ops.append("xformOp:translate")
+        if rotation != IDENTITY_QUAT and any(abs(c) > 1e-12 for c in rotation[1:]):
+            self._line(f"quatd xformOp:orient = {_quat(rotation)}")
+            ops.append("xformOp:orient")
+        if scale is not None and tuple(scale) != (1.0, 1.0, 1.0):
+            self._line(f"double3 xformOp:scale = {_vec(scale)}")
+            ops.append("xformOp:scale")
+        if ops:
+            self._line(f"uniform token[] xformOpOrder = [{', '.join(_quote(op) for op in ops)}]")
+
+    def _open(self, header: str, metadata: Optional[List[str]] = None):
+        if not self._at_block_start:
+            self._line("")
+        if metadata:
+            self._line(f"{header} (")
+            for entry in metadata:
+                self._line(f"    {entry}")
+            self._line(")")
+        else:
+            self._line(header)
+        self._line("{")
+        self._indent += 1
+
+    def _close(self):
+        self._indent -= 1
+        self._line("}")
+
+    def _line(self, text: str):
+        self._at_block_start = text == "{"
+        if text:
+            self.stream.write("    " * self._indent)
+            self.stream.write(text)
+        self.stream.write("\n")
+
+
+def joint_axis_alignment(axis: Vector3) -> Tuple[str, Quaternion]:
+    """
+    Choose the USD joint axis token and the rotation aligning it with a URDF axis.
+
+    Axis-aligned URDF axes map directly onto the X/Y/Z tokens; any other axis
+    uses the X token with the joint frame rotated onto the URDF axis.
+
+    Returns:
+        (axis token, rotation of the USD joint frame within the URDF joint frame)
+    """
+    unit = normalize(axis)
+    for candidate, token in _AXIS_TOKENS.items():
+        if all(abs(a - b) < 1e-9 for a, b in zip(unit, candidate)):
+            return token, IDENTITY_QUAT
+    return "X", quat_from_two_vectors((1.0, 0.0, 0.0), unit)
+
+
+def principal_inertia(inertia: Tuple[float, ...], frame: Quaternion) -> Tuple[Vector3, Quaternion]:
+    """
+    Diagonalize a URDF inertia tensor.
+
+    Args:
+        inertia: (ixx, ixy, ixz, iyy, iyz, izz) in the inertial frame
+        frame: Rotation of the inertial frame within the link frame
+
+    Returns:
+        (principal moments, rotation of the principal axes within the link frame)
+    """
+    ixx, ixy, ixz, iyy, iyz, izz = inertia
+    if abs(ixy) < 1e-12 and abs(ixz) < 1e-12 and abs(iyz) < 1e-12:
+        return (ixx, iyy, izz), frame
+
+    moments, vectors = _symmetric_eigen([[ixx, ixy, ixz], [ixy, iyy, iyz], [ixz, iyz, izz]])
+
+    # Right-handed rotation with the eigenvectors as columns
+    det = (vectors[0][0] * (vectors[1][1] * vectors[2][2] - vectors[1][2] * vectors[2][1])
+           - vectors[0][1] * (vectors[1][0] * vectors[2][2] - vectors[1][2] * vectors[2][0])
+           + vectors[0][2] * (vectors[1][0] * vectors[2][1] - vectors[1][1] * vectors[2][0]))
+    if det < 0:
+        for row in vectors:
+            row[2] = -row[2]
+
+    return tuple(moments), quat_multiply(frame, matrix_to_quat(vectors))
+
+
+def _symmetric_eigen(matrix: List[List[float]], sweeps: int = 32) -> Tuple[List[float], List[List[float]]]:
+    """Cyclic Jacobi eigen-decomposition of a symmetric 3x3 matrix."""
+    a = [row[:] for row in matrix]
+    v = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+
+    for _ in range(sweeps):
+        off = a[0][1] ** 2 + a[0][2] ** 2 + a[1][2] ** 2
+        if off < 1e-30:
+            break
+        for p, q in ((0, 1), (0, 2), (1, 2)):
+            if abs(a[p][q]) < 1e-300:
+                continue
+            theta = (a[q][q] - a[p][p]) / (2 * a[p][q])
+            t = math.copysign(1.0, theta) / (abs(theta) + math.sqrt(theta * theta + 1))
+            c = 1 / math.sqrt(t * t + 1)
+            s = t * c
+            for k in range(3):
+                akp, akq = a[k][p], a[k][q]
+                a[k][p] = c * akp - s * akq
+                a[k][q] = s * akp + c * akq
+            for k in range(3):
+                apk, aqk = a[p][k], a[q][k]
+                a[p][k] = c * apk - s * aqk
+                a[q][k] = s * apk + c * aqk
+            for k in range(3):
+                vkp, vkq = v[k][p], v[k][q]
+                v[k][p] = c * vkp - s * vkq
+                v[k][q] = s * vkp + c * vkq
+
+    return [a[0][0], a[1][1], a[2][2]], v
+
+
+_INVALID_PRIM_CHARS = re.compile(r"[^A-Za-z0-9_]")
+
+
+def sanitize_prim_name(name: str) -> str:
+    """Make a URDF name a valid USD prim name."""
+    cleaned = _INVALID_PRIM_CHARS.sub("_", name) or "_"
+    if cleaned[0].isdigit():
+        cleaned = f"_{cleaned}"
+    return cleaned
+
+
+def _unique_prim_names(names) -> Dict[str, str]:
+    """Map URDF names to unique, valid prim names."""
+    mapping: Dict[str, str] = {}
+    used = set()
+    for name in names:
+        base = sanitize_prim_name(name)
+        candidate, suffix = base, 1
+        while candidate in used:
+            candidate, suffix = f"{base}_{suffix}", suffix + 1
+        used.add(candidate)
+        mapping[name] = candidate
+    return mapping
+
+
+def _num(value: float) -> str:
+    if not math.isfinite(value):
+        return "inf" if value > 0 else ("-inf" if value < 0 else "nan")
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return f"{value:.9g}"
+
+
+def _vec(values) -> str:
+    return f"({', '.join(_num(v) for v in values)})"
+
+
+def _quat(q: Quaternion) -> str:
+    return _vec(q)
+
+
+def _bool(value: bool) -> str:
+    return "true" if value else "false"
+
+
+def _quote(text: str) -> str:
+    return f'"{text}"'
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _asset(path: str) -> str:
+    return path.replace("@", "_")
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Validation Jobs - Bounded async job queue for design validations
+Validations are submitted as jobs and run by a fixed number of workers, so a
+burst of requests queues instead of oversubscribing the host. Results are
+memoized by (robot content hash, validation type, parameters).
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Any
+
+import structlog
+
+from config.anvil_config import PERFORMANCE_SETTINGS
+
+logger = structlog.get_logger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+RESULT_CACHE_SIZE = 256
+JOB_HISTORY_SIZE = 1000
+
+
+class ValidationJobError(RuntimeError):
+    """A validation job failed or was cancelled."""
+
+
+def result_key(kind: str, urdf_digest: str, params: Dict[str, Any]) -> str:
+    """Memo key of a validation; params must be JSON-serializable."""
+    payload = json.dumps([kind, urdf_digest, params], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ValidationJob:
+    """One submitted validation and its progress."""
+    job_id: str
+    kind: str
+    key: str
+    session_id: str = ""
+    status: str = QUEUED
+    progress: float = 0.0
+    message: str = ""
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cached: bool = False
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def __post_init__(self):
+        self._loop = asyncio.get_running_loop()
+        self._changed = asyncio.Event()
+        self._done = self._loop.create_future()
+        self._runner: Optional[Callable[["ValidationJob"], Awaitable[Dict[str, Any]]]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def report(self, progress: float, message: Optional[str] = None):
+        """
+        Record progress; safe to call from executor threads.
+
+        Cancelling a job only cancels its asyncio task, so the work it
+        handed to threads and the process pool carries on; it learns of the
+        cancellation here. Raising stops that work at its next progress
+        report, and unwinding through ``Executor.map`` cancels the chunks
+        still queued in the pool. Chunks already running in a worker
+        process finish.
+
+        Raises:
+            ValidationJobError: The job was cancelled
+        """
+        if self.status == CANCELLED:
+            raise ValidationJobError("Validation job cancelled")
+        self._loop.call_soon_threadsafe(self._update, progress, message)
+
+    async def wait(self) -> Dict[str, Any]:
+        """Result of the job, once finished."""
+        await asyncio.shield(self._done)
+        if self.status != SUCCEEDED:
+            raise ValidationJobError(self.error or f"Validation job {self.status}")
+        return self.result
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        data = {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "session_id": self.session_id,
+            "status": self.status,
+            "progress": round(self.progress, 4),
+            "message": self.message,
+            "cached": self.cached,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.error:
+            data["error"] = self.error
+        if include_result and self.result is not None:
+            data["result"] = self.result
+        return data
+
+    def _update(self, progress: Optional[float] = None, message: Optional[str] = None, status: Optional[str] = None):
+        if self.finished:
+            return
+        if status is not None:
+            self.status = status
+        if progress is not None:
+            self.progress = min(max(float(progress), self.progress), 1.0)
+        if message is not None:
+            self.message = message
+        self._notify()
+
+    def _finish(self, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        if self.finished:
+            return
+        self.status = status
+        self.result = result
+        self.error = error
+        self.finished_at = time.time()
+        if status == SUCCEEDED:
+            self.progress = 1.0
+        if not self._done.done():
+            self._done.set_result(None)
+        self._notify()
+
+    def _notify(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+
+class ValidationJobQueue:
+    """
+    Runs validation jobs on ``max_concurrent`` asyncio workers.
+
+    Identical submissions (same memo key) while a job is pending share that
+    job; finished results are kept in an LRU memo and returned instantly.
+    Workers start on first submit, on the running event loop.
+    """
+
+    def __init__(self, max_concurrent: Optional[int] = None, cache_size: int = RESULT_CACHE_SIZE,
+                 history_size: int = JOB_HISTORY_SIZE):
+        self.max_concurrent = max(1, max_concurrent or PERFORMANCE_SETTINGS["max_concurrent_simulations"])
+        self.cache_size = cache_size
+        self.history_size = history_size
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        self._jobs: "OrderedDict[str, ValidationJob]" = OrderedDict()
+        self._pending: Dict[str, ValidationJob] = {}
+        self._results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def start(self):
+        """Start the workers on the running loop (idempotent)."""
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.max_concurrent)]
+        logger.info("Validation job queue started", workers=self.max_concurrent)
+
+    async def stop(self):
+        """Cancel pending jobs and stop the workers."""
+        for job in list(self._pending.values()):
+            self.cancel(job.job_id)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._queue = None
+        self._workers = []
+
+    async def submit(self, kind: str, urdf_digest: str, params: Dict[str, Any],
+                     runner: Callable[[ValidationJob], Awaitable[Dict[str, Any]]],
+                     session_id: str = "") -> ValidationJob:
+        """
+        Submit a validation.
+
+        Args:
+            kind: Validation type, e.g. "stress"
+            urdf_digest: Content hash of the robot being validated
+            params: Parameters that affect the result
+            runner: Coroutine function computing the result dict for a job
+            session_id: Session the job was submitted for, informational
+
+        Returns:
+            The job; already finished if the result was memoized
+        """
+        self.start()
+        key = result_key(kind, urdf_digest, params)
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            return pending
+
+        job = ValidationJob(job_id=str(uuid.uuid4()), kind=kind, key=key, session_id=session_id)
+        self._remember(job)
+
+        cached = self.cached_result(key)
+        if cached is not None:
+            job.cached = True
+            job._finish(SUCCEEDED, cached)
+            return job
+
+        job._runner = runner
+        self._pending[key] = job
+        self._queue.put_nowait(job)
+        logger.info("Validation job queued", job_id=job.job_id, kind=kind, queued=self._queue.qsize())
+        return job
+
+    async def run(self, kind: str, urdf_digest: str, params: Dict[str, Any],
+                  runner: Callable[[ValidationJob], Awaitable[Dict[str, Any]]],
+                  session_id: str = "") -> ValidationJob:
+        """Submit a validation and wait for it to finish."""
+        job = await self.submit(kind, urdf_digest, params, runner, session_id)
+        await job.wait()
+        return job
+
+    def get(self, job_id: str) -> Optional[ValidationJob]:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job."""
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return False
+        if job._task is not None:
+            job._task.cancel()
+        if self._pending.get(job.key) is job:
+            del self._pending[job.key]
+        job._finish(CANCELLED, error="Cancelled")
+        return True
+
+    async def stream(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield job snapshots on every change, ending with the finished job."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        while True:
+            changed = job._changed
+            yield job.to_dict(include_result=job.finished)
+            if job.finished:
+                return
+            await changed.wait()
+
+    def cached_result(self, key: str) -> Optional[Dict[str, Any]]:
+        """Memoized result of a validation key, if any."""
+        result = self._results.get(key)
+        if result is None:
+            self._misses += 1
+            return None
+        self._results.move_to_end(key)
+        self._hits += 1
+        return result
+
+    def store_result(self, key: str, result: Dict[str, Any]):
+        self._results[key] = result
+        self._results.move_to_end(key)
+        while len(self._results) > self.cache_size:
+            self._results.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_concurrent,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": sum(1 for job in self._pending.values() if job.status == RUNNING),
+            "cached_results": len(self._results),
+            "cache_hits": self._hits,
+            "cache_misses": self._misses,
+        }
+
+    def _remember(self, job: ValidationJob):
+        self._jobs[job.job_id] = job
+        while len(self._jobs) > self.history_size:
+            oldest = next(iter(self._jobs.values()))
+            if not oldest.finished:
+                break
+            self._jobs.popitem(last=False)
+
+    async def _worker(self, index: int):
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.finished:
+                    continue
+                job.started_at = time.time()
+                job._update(status=RUNNING, message="Running")
+                job._task = asyncio.create_task(job._runner(job))
+                try:
+                    result = await job._task
+                except asyncio.CancelledError:
+                    if not job.finished:
+                        raise
+                    continue
+                self.store_result(job.key, result)
+                job._finish(SUCCEEDED, result)
+                logger.info("Validation job finished", job_id=job.job_id, kind=job.kind,
+                            seconds=round(job.finished_at - job.started_at, 3))
+            except asyncio.CancelledError:
+                job._finish(CANCELLED, error="Cancelled")
+                raise
+            except Exception as e:
+                logger.error("Validation job failed", job_id=job.job_id, kind=job.kind, error=str(e))
+                job._finish(FAILED, error=str(e))
+            finally:
+                if self._pending.get(job.key) is job:
+                    del self._pending[job.key]
+                job._runner = None
+                job._task = None
+                self._queue.task_done()
+
+
+# Global validation job queue
+validation_jobs = ValidationJobQueue()
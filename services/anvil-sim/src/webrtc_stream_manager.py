@@ -9,7 +9,7 @@ import json
 import logging
 import time
 import uuid
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, Union
 from dataclasses import dataclass, asdict
 from datetime import datetime
 
@@ -22,6 +22,10 @@ import sys
 import os
 sys.path.append(os.path.dirname(__file__))
 from isaac_sim_real_renderer import get_isaac_sim_real_renderer, ISAAC_SIM_AVAILABLE
+from telemetry_codec import TelemetrySchema, TelemetryEncoder, encode_ack
+from joint_trajectory import DEFAULT_PROGRESS_HZ
+from command_coalescer import CommandCoalescer, CommandBatch, JOINT
+from config.anvil_config import ISAAC_SIM_CONFIG
 
 # Real aiortc for video streaming
 try:
@@ -52,6 +56,9 @@ except ImportError:
 
 logger = structlog.get_logger(__name__)
 
+# Telemetry encodings a client may ask for in join_session, in our preference order
+TELEMETRY_ENCODINGS = ("binary", "json")
+
 class IsaacSimVideoTrack(VideoStreamTrack):
     """Custom video track that generates Isaac Sim frames."""
     
@@ -196,6 +203,9 @@ class StreamClient:
     media_player: Optional[object] = None  # Isaac Sim media player
     media_source: Optional[object] = None  # Isaac Sim media source
     video_file: Optional[str] = None  # Test video file path
+    telemetry_encoding: str = "json"  # Negotiated at join_session
+    telemetry_task: Optional[asyncio.Task] = None
+    trajectory_task: Optional[asyncio.Task] = None
     
     def __post_init__(self):
         if self.connected_at is None:
@@ -227,8 +237,10 @@ class WebRTCStreamManager:
     
     def __init__(self, isaac_sim_manager=None):
         self.isaac_sim_manager = isaac_sim_manager
+        self.isaac_sim_renderer = get_isaac_sim_real_renderer() if ISAAC_SIM_AVAILABLE else None
         self.clients: Dict[str, StreamClient] = {}
         self.session_streams: Dict[str, List[str]] = {}  # session_id -> client_ids
+        self.command_coalescers: Dict[str, CommandCoalescer] = {}  # session_id -> pending commands
         self.websocket_server = None
         self.running = False
         
@@ -330,7 +342,8 @@ class WebRTCStreamManager:
                 session_id=data.get("session_id", ""),
                 websocket=websocket,
                 peer_connection=RTCPeerConnection(self.rtc_config),
-                quality_profile=data.get("quality_profile", "engineering")
+                quality_profile=data.get("quality_profile", "engineering"),
+                telemetry_encoding=self._negotiate_encoding(data.get("telemetry_encoding"))
             )
             
             self.clients[client_id] = client
@@ -346,7 +359,8 @@ class WebRTCStreamManager:
                 "type": "connection_established",
                 "client_id": client_id,
                 "session_id": session_id,
-                "quality_profile": client.quality_profile
+                "quality_profile": client.quality_profile,
+                "telemetry_encoding": client.telemetry_encoding
             })
             
             logger.info("Stream client connected", 
@@ -406,6 +420,18 @@ class WebRTCStreamManager:
         elif message_type == "joint_control":
             await self._handle_joint_control(client_id, data)
             
+        elif message_type == "execute_trajectory":
+            await self._handle_execute_trajectory(client_id, data)
+            
+        elif message_type == "cancel_trajectory":
+            await self._handle_cancel_trajectory(client_id)
+            
+        elif message_type == "subscribe_telemetry":
+            await self._subscribe_telemetry(client_id, data)
+            
+        elif message_type == "unsubscribe_telemetry":
+            self._unsubscribe_telemetry(client_id)
+            
         elif message_type == "start_video_stream":
             await self._start_video_stream(client_id, data)
         elif message_type == "start_webrtc_stream":
@@ -544,7 +570,7 @@ class WebRTCStreamManager:
         logger.debug("Keyframe requested", client_id=client_id)
     
     async def _handle_camera_control(self, client_id: str, data: Dict[str, Any]):
-        """Handle camera control commands."""
+        """Queue a camera command; only the newest one per tick is applied."""
         client = self.clients.get(client_id)
         if not client:
             return
@@ -554,72 +580,237 @@ class WebRTCStreamManager:
             "target": data.get("target", [0, 0, 0]),
             "fov": data.get("fov", 50)
         }
+        self._command_coalescer(client.session_id).camera(client_id, camera_data, data.get("seq"))
+    
+    async def _handle_joint_control(self, client_id: str, data: Dict[str, Any]):
+        """Queue robot joint targets; they are merged and applied once per tick."""
+        client = self.clients.get(client_id)
+        if not client:
+            return
         
-        # Update real Isaac Sim renderer with new camera position
-        if ISAAC_SIM_AVAILABLE:
-            self.isaac_sim_renderer.update_camera(
-                camera_data["position"],
-                camera_data["target"], 
-                camera_data["fov"]
+        joint_states = data.get("joint_states", {})
+        self._command_coalescer(client.session_id).joint(client_id, joint_states, data.get("seq"))
+    
+    def _command_coalescer(self, session_id: str) -> CommandCoalescer:
+        coalescer = self.command_coalescers.get(session_id)
+        if coalescer is None:
+            coalescer = CommandCoalescer(
+                lambda batch: self._apply_commands(session_id, batch),
+                self._acknowledge_commands,
+                ISAAC_SIM_CONFIG["rendering_dt"]
             )
+            self.command_coalescers[session_id] = coalescer
+        return coalescer
+    
+    async def _apply_commands(self, session_id: str, batch: CommandBatch):
+        """Apply one tick's folded camera and joint commands, before the next step."""
+        camera_data = batch.camera
+        if camera_data is not None:
+            # Update real Isaac Sim renderer with new camera position
+            if self.isaac_sim_renderer:
+                self.isaac_sim_renderer.update_camera(
+                    camera_data["position"],
+                    camera_data["target"], 
+                    camera_data["fov"]
+                )
         
-        # Forward to Isaac Sim Manager
-        if self.isaac_sim_manager:
-            # Would call isaac_sim_manager.update_camera(client.session_id, camera_data)
-            pass
+        joint_states = batch.joint_states
+        if joint_states:
+            # Update real Isaac Sim renderer with new joint states
+            if self.isaac_sim_renderer:
+                await self.isaac_sim_renderer.update_joints(joint_states)
             
-        # Send acknowledgment
-        await self._send_to_client(client_id, {
-            "type": "camera_update_response",
-            "camera": camera_data,
-            "timestamp": datetime.utcnow().isoformat(),
-            "status": "updated"
-        })
+            # Forward to Isaac Sim Manager
+            if self.isaac_sim_manager:
+                try:
+                    await self.isaac_sim_manager.update_joint_states(session_id, joint_states)
+                except Exception as e:
+                    logger.error("Failed to update joint states", 
+                               session_id=session_id, error=str(e))
         
-        logger.debug("Camera control handled", 
-                    client_id=client_id, camera_data=camera_data)
+        logger.debug("Coalesced commands applied", session_id=session_id,
+                    commands=batch.received, camera=camera_data is not None,
+                    joint_count=len(joint_states))
     
-    async def _handle_joint_control(self, client_id: str, data: Dict[str, Any]):
-        """Handle robot joint control commands."""
+    async def _acknowledge_commands(self, batch: CommandBatch):
+        """One acknowledgement per client and command type, for the newest command applied."""
+        for (client_id, command), (seq, count) in batch.acks.items():
+            fields = {"coalesced": count}
+            if command == JOINT:
+                fields["joint_count"] = len(batch.joint_states)
+            await self._acknowledge(client_id, command, {"seq": seq}, **fields)
+    
+    async def _handle_execute_trajectory(self, client_id: str, data: Dict[str, Any]):
+        """
+        Run a joint motion sent once as timed waypoints. The server
+        interpolates it at the physics rate and reports trajectory_progress
+        events at progress_hz (default 10), ending with the final status.
+        """
         client = self.clients.get(client_id)
         if not client:
             return
         
-        joint_states = data.get("joint_states", {})
+        waypoints = data.get("waypoints", [])
+        method = data.get("method", "cubic")
+        seq = data.get("seq")
+        execution = None
+        try:
+            progress_hz = float(data.get("progress_hz", DEFAULT_PROGRESS_HZ))
+            if progress_hz <= 0:
+                raise ValueError("progress_hz must be positive")
+            
+            # One executor per session: the Isaac Sim Manager when it owns the
+            # session, otherwise the real renderer's physics callback
+            if self.isaac_sim_manager and client.session_id in self.isaac_sim_manager.active_sessions:
+                if self.isaac_sim_renderer:
+                    self.isaac_sim_renderer.cancel_trajectory("Replaced by a session trajectory")
+                execution = await self.isaac_sim_manager.execute_trajectory(
+                    client.session_id, waypoints, method
+                )
+                await self.isaac_sim_manager.start_realtime(client.session_id)
+            elif self.isaac_sim_renderer:
+                execution = await self.isaac_sim_renderer.start_trajectory(waypoints, method)
+            
+            if execution is None:
+                raise ValueError("No simulation available to run the trajectory")
+        except Exception as e:
+            if execution is not None:
+                # Don't leave a motion running that the client was told failed
+                await self._handle_cancel_trajectory(client_id)
+            logger.error("Failed to start trajectory", client_id=client_id, error=str(e))
+            message = {'type': 'error', 'message': f'Trajectory rejected: {e}'}
+            if seq is not None:
+                message['seq'] = seq
+            await self._send_to_client(client_id, message)
+            return
         
-        # Update real Isaac Sim renderer with new joint states
-        if ISAAC_SIM_AVAILABLE:
-            await self.isaac_sim_renderer.update_joints(joint_states)
+        # A replaced trajectory's stream ends on its own with a cancelled event
+        client.trajectory_task = asyncio.create_task(
+            self._trajectory_progress(client_id, execution, progress_hz, seq)
+        )
+        logger.debug("Trajectory control handled", client_id=client_id,
+                    trajectory_id=execution.trajectory_id, waypoints=len(waypoints))
+    
+    async def _handle_cancel_trajectory(self, client_id: str):
+        """Stop the session's running trajectory; its progress stream ends with the cancellation."""
+        client = self.clients.get(client_id)
+        if not client:
+            return
         
-        # Forward to Isaac Sim Manager
-        if self.isaac_sim_manager:
+        if self.isaac_sim_manager and client.session_id in self.isaac_sim_manager.active_sessions:
+            self.isaac_sim_manager.cancel_trajectory(client.session_id)
+        elif self.isaac_sim_renderer:
+            self.isaac_sim_renderer.cancel_trajectory()
+    
+    async def _trajectory_progress(self, client_id: str, execution, progress_hz: float, seq: Any):
+        """Send a trajectory's progress events to the client that started it."""
+        try:
+            async for event in execution.events(progress_hz):
+                message = {"type": "trajectory_progress", **event}
+                if seq is not None:
+                    message["seq"] = seq
+                await self._send_to_client(client_id, message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Trajectory progress stream failed", client_id=client_id, error=str(e))
+    
+    def _negotiate_encoding(self, accepted: Union[str, List[str], None]) -> str:
+        """First telemetry encoding of the client's preference list that we support."""
+        if isinstance(accepted, str):
+            accepted = [accepted]
+        for encoding in accepted or []:
+            if encoding in TELEMETRY_ENCODINGS:
+                return encoding
+        return "json"
+    
+    async def _acknowledge(self, client_id: str, command: str, data: Dict[str, Any], **fields):
+        """
+        Acknowledge a client command: a 7-byte frame for binary clients, a
+        small JSON message otherwise. ``seq`` is echoed if the client sent one.
+        """
+        client = self.clients.get(client_id)
+        if not client:
+            return
+        
+        seq = data.get("seq")
+        if client.telemetry_encoding == "binary":
             try:
-                await self.isaac_sim_manager.update_joint_states(
-                    client.session_id, joint_states
-                )
-            except Exception as e:
-                logger.error("Failed to update joint states", 
-                           client_id=client_id, error=str(e))
-                           
-        # Send acknowledgment
-        await self._send_to_client(client_id, {
-            "type": "joint_update_response",
-            "joint_states": joint_states,
-            "timestamp": datetime.utcnow().isoformat(),
-            "status": "updated"
-        })
+                binary_seq = int(seq or 0)
+            except (TypeError, ValueError, OverflowError):
+                # The frame only carries integers; a string or nested seq acks as 0
+                binary_seq = 0
+            await self._send_to_client(client_id, encode_ack(command, binary_seq))
+        else:
+            message = {"type": f"{command}_update_response", "status": "updated", **fields}
+            if seq is not None:
+                message["seq"] = seq
+            await self._send_to_client(client_id, message)
+    
+    async def _subscribe_telemetry(self, client_id: str, data: Dict[str, Any]):
+        """Start streaming the session's recorded telemetry at rate_hz (default 60)."""
+        client = self.clients.get(client_id)
+        if not client:
+            return
+        if not self.isaac_sim_manager:
+            await self._send_to_client(client_id, {'type': 'error', 'message': 'Telemetry not available'})
+            return
         
-        logger.debug("Joint control handled", 
-                    client_id=client_id, joint_count=len(joint_states))
+        self._unsubscribe_telemetry(client_id)
+        rate_hz = float(data.get("rate_hz", 60.0))
+        client.telemetry_task = asyncio.create_task(self._telemetry_stream(client_id, client.session_id, rate_hz))
+        logger.info("Telemetry subscription started", client_id=client_id,
+                    rate_hz=rate_hz, encoding=client.telemetry_encoding)
+    
+    def _unsubscribe_telemetry(self, client_id: str):
+        client = self.clients.get(client_id)
+        if client and client.telemetry_task is not None:
+            client.telemetry_task.cancel()
+            client.telemetry_task = None
+    
+    async def _telemetry_stream(self, client_id: str, session_id: str, rate_hz: float):
+        """
+        Send telemetry rows to one client. Binary clients get a JSON
+        telemetry_schema message whenever the channel layout changes, then one
+        binary frame per sample.
+        """
+        current = None
+        try:
+            async for buffer, steps, times, values in self.isaac_sim_manager.subscribe_telemetry(
+                    session_id, rate_hz, rows=True):
+                client = self.clients.get(client_id)
+                if not client:
+                    return
+                
+                if buffer is not current:
+                    current = buffer
+                    schema = TelemetrySchema(buffer.joint_names, buffer.pose_link)
+                    encoder = TelemetryEncoder(schema)
+                    if client.telemetry_encoding == "binary":
+                        await self._send_to_client(client_id, {"type": "telemetry_schema", **schema.to_dict()})
+                
+                if client.telemetry_encoding == "binary":
+                    for frame in encoder.encode_rows(steps, times, values):
+                        await self._send_to_client(client_id, frame)
+                else:
+                    for step, sim_time, row in zip(steps.tolist(), times.tolist(), values):
+                        await self._send_to_client(client_id, {
+                            "type": "telemetry", "step": step, "simulation_time": sim_time, **schema.sample(row)
+                        })
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Telemetry stream failed", client_id=client_id, error=str(e))
+            await self._send_to_client(client_id, {'type': 'error', 'message': f'Telemetry stream failed: {e}'})
     
-    async def _send_to_client(self, client_id: str, message: Dict[str, Any]):
-        """Send message to specific client."""
+    async def _send_to_client(self, client_id: str, message: Union[Dict[str, Any], bytes]):
+        """Send a JSON message, or a binary frame, to a specific client."""
         client = self.clients.get(client_id)
         if not client or client.websocket.closed:
             return
         
         try:
-            await client.websocket.send(json.dumps(message))
+            await client.websocket.send(message if isinstance(message, bytes) else json.dumps(message))
         except websockets.exceptions.ConnectionClosed:
             logger.debug("Client connection closed", client_id=client_id)
             await self._disconnect_client(client_id)
@@ -640,6 +831,11 @@ class WebRTCStreamManager:
         if not client:
             return
         
+        if client.telemetry_task is not None:
+            client.telemetry_task.cancel()
+        if client.trajectory_task is not None:
+            client.trajectory_task.cancel()
+        
         # Remove from session streams
         session_id = client.session_id
         if session_id in self.session_streams:
@@ -647,6 +843,9 @@ class WebRTCStreamManager:
                 self.session_streams[session_id].remove(client_id)
                 if not self.session_streams[session_id]:
                     del self.session_streams[session_id]
+                    coalescer = self.command_coalescers.pop(session_id, None)
+                    if coalescer is not None:
+                        await coalescer.close()
             except ValueError:
                 pass
         